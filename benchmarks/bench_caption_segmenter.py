@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Speed and cue quality of caption segmentation on large synthetic transcripts.
+
+Speech-like word timings (sentences of 3-20 words, commas, short and long
+pauses) are segmented by ``CaptionSegmenter`` and by the previous greedy
+grouping (a caption every ``WORDS_PER_CAPTION`` words or
+``MAX_CAPTION_DURATION`` seconds). The timing rows show the segmenter stays
+linear (constant microseconds per word as the transcript grows); the quality
+table compares the cues each one produces.
+
+Usage:
+    python benchmarks/bench_caption_segmenter.py [--words 1000000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.caption_generator.core.config import settings
+from src.caption_generator.utils.caption_segmenter import (
+    CLAUSE_END, SENTENCE_END, CaptionSegmenter, words_from_segments
+)
+
+SYLLABLES = "ka lo mi ter san do re vi pa nu tion ing ex com pro be".split()
+
+
+def synthetic_segments(words: int, seed: int = 7):
+    """Whisper-style segments (one per sentence) with aligned words"""
+    rng = random.Random(seed)
+    t = 0.0
+    segments = []
+    while words > 0:
+        count = min(words, rng.randint(3, 20))
+        words -= count
+        timed = []
+        for index in range(count):
+            text = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+            if index == count - 1:
+                text += rng.choice(".?!")
+            elif rng.random() < 0.08:
+                text += ","
+            duration = 0.05 + 0.055 * len(text)
+            timed.append({"word": text, "start": round(t, 3), "end": round(t + duration, 3)})
+            t += duration + (rng.uniform(0.15, 0.4) if text.endswith(",") else rng.uniform(0.01, 0.08))
+        segments.append({
+            "start": timed[0]["start"], "end": timed[-1]["end"],
+            "text": " ".join(word["word"] for word in timed), "words": timed
+        })
+        # Pause between sentences: mostly short, sometimes a long silence
+        t += rng.choice((0.1, 0.25, 0.5, 0.8, 2.5))
+    return segments
+
+
+def legacy_grouping(words):
+    """The previous grouping, for comparison: ``(start, end, [words])`` per caption"""
+    captions = []
+    current = []
+    for word in words:
+        current.append(word)
+        if (
+            (len(current) >= settings.whisperx.words_per_caption
+             or current[-1].end - current[0].start >= settings.whisperx.max_caption_duration)
+            and len(current) >= settings.whisperx.min_words_per_caption
+        ):
+            captions.append((current[0].start, current[-1].end, current))
+            current = []
+    if current:
+        captions.append((current[0].start, current[-1].end, current))
+    return captions
+
+
+def quality(captions, words):
+    """Cue statistics from ``(start, end, text, last word index)`` tuples"""
+    gap_after = {
+        index: words[index + 1].start - words[index].end for index in range(len(words) - 1)
+    }
+    stats = {"cues": len(captions), "sentence": 0, "clause/pause": 0, "mid-phrase": 0,
+             "short": 0, "fast": 0, "too wide": 0}
+    for start, end, text, last in captions:
+        word = words[last].text
+        if last == len(words) - 1 or word.endswith(SENTENCE_END):
+            stats["sentence"] += 1
+        elif word.endswith(CLAUSE_END) or gap_after[last] >= 0.3:
+            stats["clause/pause"] += 1
+        else:
+            stats["mid-phrase"] += 1
+        duration = end - start
+        stats["short"] += duration < settings.whisperx.MIN_CAPTION_DURATION
+        stats["fast"] += len(text.replace("\n", " ")) / duration > settings.whisperx.CAPTION_MAX_CPS
+        lines = text.split("\n")
+        stats["too wide"] += (
+            len(lines) > settings.whisperx.CAPTION_MAX_LINES
+            or max(len(line) for line in lines) > settings.whisperx.CAPTION_MAX_CHARS_PER_LINE
+        )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=1_000_000, help="Largest transcript")
+    args = parser.parse_args()
+
+    segmenter = CaptionSegmenter()
+    print("📊 Caption segmentation benchmark")
+    print("=" * 64)
+    print(f"{'words':>10}{'flatten s':>12}{'segment s':>12}{'us/word':>10}{'captions':>10}")
+    sizes = [size for size in (10_000, 100_000, 1_000_000, 10_000_000) if size <= args.words]
+    for size in sizes or [args.words]:
+        segments = synthetic_segments(size)
+        started = time.perf_counter()
+        words = words_from_segments(segments)
+        flattened = time.perf_counter()
+        captions = segmenter.segment(words)
+        finished = time.perf_counter()
+        print(
+            f"{size:>10,}{flattened - started:>12.2f}{finished - flattened:>12.2f}"
+            f"{(finished - flattened) / size * 1e6:>10.1f}{len(captions):>10,}"
+        )
+
+    # Cue quality on a 50k-word transcript
+    words = words_from_segments(synthetic_segments(min(args.words, 50_000)))
+    position = 0
+    new = []
+    for caption in segmenter.segment(words):
+        position += len(caption.text.split())
+        new.append((caption.start, caption.end, caption.text, position - 1))
+    old = []
+    position = 0
+    for start, end, group in legacy_grouping(words):
+        position += len(group)
+        old.append((start, end, " ".join(word.text for word in group), position - 1))
+
+    print()
+    print(f"Cue quality ({len(words):,} words; share of cues)")
+    rows = {"previous grouping": quality(old, words), "CaptionSegmenter": quality(new, words)}
+    columns = ["cues", "sentence", "clause/pause", "mid-phrase", "short", "fast", "too wide"]
+    print(f"{'':<20}" + "".join(f"{column:>13}" for column in columns))
+    for name, stats in rows.items():
+        cells = [f"{stats['cues']:>13,}"] + [
+            f"{stats[column] / stats['cues']:>13.1%}" for column in columns[1:]
+        ]
+        print(f"{name:<20}" + "".join(cells))
+    print("sentence/clause/pause/mid-phrase: what the cue ends on; short: under "
+          "MIN_CAPTION_DURATION; fast: over CAPTION_MAX_CPS; too wide: over the line limits")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+libass render time of karaoke captions: ASS ``\\k`` tags vs. one cue per word.
+
+Synthetic word-aligned captions are written two ways and burned onto a
+generated video with FFmpeg's ``subtitles`` filter (output discarded):
+
+- ``\\k`` karaoke: one event per caption, words timed with ``\\k`` tags
+  (what the service writes for ``highlight_color``)
+- per-word cues: the naive approach, one event per word that redraws the
+  whole caption with the current word recolored
+
+Both look the same on screen; the report shows events, file size and the
+render wall time (best of ``--repeat`` runs).
+
+Usage:
+    python benchmarks/bench_karaoke.py [--seconds 120] [--size 1280x720]
+"""
+
+import argparse
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+from src.caption_generator.services.whisperx_service import ASS_HEADER, WhisperXService
+
+VOCABULARY = (
+    "the a of to and in that it is was for on with as we you this they at be have from "
+    "video caption speaker music today history learning machine model data talk show"
+).split()
+
+
+def synthetic_segments(seconds: float, seed: int = 7):
+    """Speech-like word timings: ~3 words/s with short pauses between phrases"""
+    rng = random.Random(seed)
+    t = 0.2
+    segments = []
+    while t < seconds - 3:
+        words = []
+        for _ in range(rng.randint(5, 12)):
+            duration = rng.uniform(0.15, 0.45)
+            words.append({"word": rng.choice(VOCABULARY), "start": round(t, 3), "end": round(t + duration, 3)})
+            t += duration + rng.uniform(0.02, 0.12)
+        segments.append({
+            "start": words[0]["start"], "end": words[-1]["end"],
+            "text": " ".join(word["word"] for word in words), "words": words
+        })
+        t += rng.uniform(0.3, 1.0)
+    return segments
+
+
+def per_word_cues(whisperx: WhisperXService, captions, spoken: str, upcoming: str) -> str:
+    """One event per word: the caption redrawn with the words spoken so far highlighted"""
+    lines = [ASS_HEADER]
+    for caption in captions:
+        words = caption.words
+        for index, word in enumerate(words):
+            start = round(word.start * 100)
+            end = round(words[index + 1].start * 100) if index + 1 < len(words) else round(caption.end * 100)
+            if end <= start:
+                continue
+            spoken_text = " ".join(w.word for w in words[:index + 1])
+            rest = " ".join(w.word for w in words[index + 1:])
+            text = f"{{\\1c{spoken}}}{spoken_text}" + (f" {{\\1c{upcoming}}}{rest}" if rest else "")
+            lines.append(
+                f"Dialogue: 0,{whisperx._centiseconds_to_ass_time(start)},"
+                f"{whisperx._centiseconds_to_ass_time(end)},Default,,0,0,0,,{text}\n"
+            )
+    return "".join(lines)
+
+
+def render(ffmpeg: FFmpegService, subtitle_path: Path, seconds: float, size: str, fps: int) -> float:
+    cmd = [
+        ffmpeg.ffmpeg_path, "-v", "error",
+        "-f", "lavfi", "-i", f"color=c=0x336699:s={size}:r={fps}:d={seconds}",
+        "-vf", ffmpeg.subtitle_filter(subtitle_path, 24, "white", "bottom"),
+        "-f", "null", "-"
+    ]
+    started = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=120.0, help="Video duration")
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    whisperx = WhisperXService()
+    ffmpeg = FFmpegService()
+    spoken, upcoming = ffmpeg.ass_color("yellow"), ffmpeg.ass_color("white")
+    captions = whisperx.group_words_into_captions(synthetic_segments(args.seconds))
+    words = sum(len(caption.words) for caption in captions)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = {
+            "\\k karaoke": whisperx.create_karaoke_ass_content(captions, spoken, upcoming),
+            "per-word cues": per_word_cues(whisperx, captions, spoken, upcoming),
+        }
+        print("📊 Karaoke render benchmark")
+        print(f"   {args.seconds:.0f}s at {args.size} {args.fps}fps, {len(captions)} captions, {words} words")
+        print("=" * 64)
+        print(f"{'variant':<18}{'events':>8}{'KiB':>8}{'render s':>10}{'x realtime':>12}")
+        # A render without subtitles shows the cost of generating the frames
+        baseline_path = Path(tmp) / "empty.ass"
+        baseline_path.write_text(ASS_HEADER)
+        results = {"no captions": (ASS_HEADER, baseline_path)}
+        for name, content in variants.items():
+            path = Path(tmp) / f"{len(results)}.ass"
+            path.write_text(content)
+            results[name] = (content, path)
+
+        for name, (content, path) in results.items():
+            elapsed = min(render(ffmpeg, path, args.seconds, args.size, args.fps) for _ in range(args.repeat))
+            events = content.count("\nDialogue:")
+            print(
+                f"{name:<18}{events:>8}{len(content.encode()) / 1024:>8.1f}"
+                f"{elapsed:>10.2f}{args.seconds / elapsed:>12.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
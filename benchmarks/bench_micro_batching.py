@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Throughput vs. latency of transcription micro-batching under synthetic load.
+
+The model is simulated: a batch costs a fixed overhead plus a small per-window
+cost (the shape of a GPU forward pass, where a half-empty batch costs almost
+as much as a full one). Concurrent "requests" with 1-3 windows each arrive
+with random inter-arrival times; each configuration reports throughput,
+latency percentiles and mean batch fill.
+
+Usage:
+    python benchmarks/bench_micro_batching.py [--requests 400] [--rate 200]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.caption_generator.services.transcription_scheduler import MicroBatcher
+
+
+def synthetic_model(overhead_ms: float, per_item_ms: float):
+    def run_batch(key, items):
+        time.sleep((overhead_ms + per_item_ms * len(items)) / 1000)
+        return [None] * len(items)
+    return run_batch
+
+
+async def run_load(batcher: MicroBatcher, requests: int, rate: float, seed: int = 7):
+    """Fire requests with Poisson arrivals; return (elapsed, latencies, windows)"""
+    rng = random.Random(seed)
+    latencies = []
+    windows = 0
+
+    async def one_request(size):
+        start = time.perf_counter()
+        await batcher.submit("en", list(range(size)))
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        size = rng.randint(1, 3)
+        windows += size
+        tasks.append(asyncio.create_task(one_request(size)))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started, latencies, windows
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=200, help="Mean request arrivals per second")
+    parser.add_argument("--overhead-ms", type=float, default=20, help="Fixed cost of one model batch")
+    parser.add_argument("--per-item-ms", type=float, default=1, help="Extra cost per window in a batch")
+    args = parser.parse_args()
+
+    configs = [
+        ("no batching", 1, 0),
+        ("batch 16, wait 0ms", 16, 0),
+        ("batch 16, wait 2ms", 16, 2),
+        ("batch 16, wait 5ms", 16, 5),
+        ("batch 16, wait 20ms", 16, 20),
+        ("batch 32, wait 5ms", 32, 5),
+    ]
+
+    print("📊 Transcription micro-batching benchmark")
+    print(f"   {args.requests} requests, {args.rate:.0f} req/s offered, "
+          f"batch cost {args.overhead_ms:.0f}ms + {args.per_item_ms:.0f}ms/window")
+    print("=" * 78)
+    print(f"{'config':<22}{'windows/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'avg batch':>11}")
+    for name, max_batch_size, max_wait_ms in configs:
+        batcher = MicroBatcher(
+            synthetic_model(args.overhead_ms, args.per_item_ms),
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms
+        )
+        elapsed, latencies, windows = asyncio.run(run_load(batcher, args.requests, args.rate))
+        print(
+            f"{name:<22}{windows / elapsed:>10.0f}"
+            f"{statistics.median(latencies) * 1000:>10.0f}"
+            f"{percentile(latencies, 0.95) * 1000:>10.0f}"
+            f"{percentile(latencies, 0.99) * 1000:>10.0f}"
+            f"{batcher.stats.average_batch_size:>11.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
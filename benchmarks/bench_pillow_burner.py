@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Caption burn throughput: libass (``subtitles`` filter) vs. the Pillow/NumPy fallback burner.
+
+Synthetic captions are burned onto a generated H.264 video with the same
+preset and CRF three ways:
+
+- libass: ``burn_subtitles`` with FFmpeg's ``subtitles`` filter
+- pillow (cold): ``PillowSubtitleBurner``, drawing every caption with Pillow
+- pillow (warm): the same burn again, with every caption already cached
+
+The Pillow burner pipes raw frames out of one FFmpeg process and into
+another, blending only the frames a caption is on. "copy frames" is that
+pipeline without any captions, i.e. the cost of the pipes alone. A fast
+preset (the default) keeps the encoder from hiding the differences.
+
+Usage:
+    python benchmarks/bench_pillow_burner.py [--seconds 30] [--size 1920x1080] [--preset ultrafast]
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.caption_generator.models.subtitle import TranscriptSegment
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+from src.caption_generator.services.pillow_burner import PillowSubtitleBurner
+from src.caption_generator.services.whisperx_service import WhisperXService
+
+VOCABULARY = (
+    "the a of to and in that it is was for on with as we you this they at be have from "
+    "video caption speaker music today history learning machine model data talk show"
+).split()
+STYLE = dict(font_size=24, font_color="white", position="bottom")
+
+
+def synthetic_captions(seconds: float, seed: int = 7):
+    """Two-line captions of 2-3 seconds separated by short gaps"""
+    rng = random.Random(seed)
+    captions = []
+    t = 0.3
+    while t < seconds - 3:
+        duration = rng.uniform(2.0, 3.0)
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(6, 12))]
+        half = len(words) // 2
+        text = " ".join(words[:half]) + "\n" + " ".join(words[half:])
+        captions.append(TranscriptSegment(start=round(t, 3), end=round(t + duration, 3), text=text))
+        t += duration + rng.uniform(0.1, 0.6)
+    return captions
+
+
+def timed(coroutine) -> float:
+    started = time.perf_counter()
+    asyncio.run(coroutine)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30.0, help="Video duration")
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--preset", default="ultrafast", help="libx264 preset of every burn")
+    parser.add_argument("--crf", type=int, default=23)
+    args = parser.parse_args()
+
+    ffmpeg = FFmpegService()
+    burner = PillowSubtitleBurner(ffmpeg)
+    captions = synthetic_captions(args.seconds)
+    covered = sum(caption.end - caption.start for caption in captions) / args.seconds
+    encode = dict(preset=args.preset, crf=args.crf, **STYLE)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video_path, srt_path, empty_path = tmp / "input.mp4", tmp / "captions.srt", tmp / "empty.srt"
+        srt_path.write_text(WhisperXService().create_srt_content(captions))
+        empty_path.write_text("")
+        print("Generating input...")
+        subprocess.run(
+            [
+                ffmpeg.ffmpeg_path, "-v", "error",
+                "-f", "lavfi", "-i", f"testsrc2=s={args.size}:r={args.fps}:d={args.seconds}",
+                "-f", "lavfi", "-i", f"sine=d={args.seconds}",
+                "-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac", "-shortest", str(video_path)
+            ],
+            check=True
+        )
+
+        results = {}
+        if ffmpeg.uses_libass:
+            results["libass"] = timed(ffmpeg.burn_subtitles(video_path, srt_path, tmp / "libass.mp4", **encode))
+        results["copy frames"] = timed(burner.burn(video_path, empty_path, tmp / "copy.mp4", **encode))
+        results["pillow (cold)"] = timed(burner.burn(video_path, srt_path, tmp / "cold.mp4", **encode))
+        rasterized = burner.rasterized
+        results["pillow (warm)"] = timed(burner.burn(video_path, srt_path, tmp / "warm.mp4", **encode))
+
+    frames = args.seconds * args.fps
+    print()
+    print("📊 Pillow caption burner benchmark")
+    print(f"   {args.seconds:.0f}s at {args.size} {args.fps}fps, {len(captions)} captions on {covered:.0%} "
+          f"of frames, libx264 {args.preset} CRF {args.crf}")
+    print(f"   Captions drawn by Pillow: {rasterized} (cold), {burner.rasterized - rasterized} (warm)")
+    print("=" * 64)
+    print(f"{'burn':<16}{'seconds':>10}{'fps':>10}{'vs libass':>12}")
+    for name, seconds in results.items():
+        relative = f"{seconds / results['libass']:.2f}x" if "libass" in results else "-"
+        print(f"{name:<16}{seconds:>10.2f}{frames / seconds:>10.1f}{relative:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
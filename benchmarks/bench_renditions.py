@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Multi-rendition encode: one FFmpeg process with ``split`` vs. one run per output.
+
+A generated H.264 video (with AAC audio) is captioned in several styles and
+sizes, first with one ``burn_subtitles`` run per rendition (each decoding the
+input again), then with a single ``burn_renditions`` run that decodes it once
+and splits the frames between the outputs. The report shows wall time and
+the CPU time of the FFmpeg processes for each approach.
+
+Usage:
+    python benchmarks/bench_renditions.py [--seconds 30] [--size 1920x1080]
+"""
+
+import argparse
+import asyncio
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.caption_generator.models.rendition import RenditionSpec
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+
+RENDITIONS = [
+    RenditionSpec(),
+    RenditionSpec(font_color="yellow", position="top"),
+    RenditionSpec(height=720),
+    RenditionSpec(height=480, font_size=18),
+]
+
+
+def describe(spec: RenditionSpec) -> str:
+    size = f"{spec.height}p" if spec.height else "source"
+    return f"{size} {spec.font_color} {spec.position.value}"
+
+
+def make_input(ffmpeg: FFmpegService, path: Path, seconds: float, size: str, fps: int):
+    """A detailed moving test pattern (decoding it is real work) with a tone"""
+    subprocess.run(
+        [
+            ffmpeg.ffmpeg_path, "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=s={size}:r={fps}:d={seconds}",
+            "-f", "lavfi", "-i", f"sine=f=440:d={seconds}",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-c:a", "aac", "-shortest", str(path)
+        ],
+        check=True
+    )
+
+
+def make_srt(path: Path, seconds: float):
+    """A caption every two seconds"""
+    cues = []
+    for index, start in enumerate(range(0, int(seconds) - 1, 2)):
+        cues.append(
+            f"{index + 1}\n00:{start // 60:02d}:{start % 60:02d},000 --> "
+            f"00:{(start + 2) // 60:02d}:{(start + 2) % 60:02d},000\nCaption number {index + 1}\n"
+        )
+    path.write_text("\n".join(cues))
+
+
+def child_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def separate_runs(ffmpeg: FFmpegService, video_path: Path, srt_path: Path, out_dir: Path, count: int):
+    for index, spec in enumerate(RENDITIONS[:count]):
+        await ffmpeg.burn_subtitles(
+            video_path, srt_path, out_dir / f"separate_{index}.mp4",
+            font_size=spec.font_size, font_color=spec.font_color, position=spec.position.value,
+            scale_height=spec.height
+        )
+
+
+async def single_run(ffmpeg: FFmpegService, video_path: Path, srt_path: Path, out_dir: Path, count: int):
+    await ffmpeg.burn_renditions(
+        video_path,
+        [(spec, srt_path, out_dir / f"split_{index}.mp4") for index, spec in enumerate(RENDITIONS[:count])]
+    )
+
+
+def measure(run) -> tuple:
+    cpu = child_cpu_seconds()
+    started = time.perf_counter()
+    asyncio.run(run)
+    return time.perf_counter() - started, child_cpu_seconds() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30.0, help="Input duration")
+    parser.add_argument("--size", default="1920x1080", help="Input frame size")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+
+    ffmpeg = FFmpegService()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video_path, srt_path = tmp / "input.mp4", tmp / "captions.srt"
+        print("Generating input...")
+        make_input(ffmpeg, video_path, args.seconds, args.size, args.fps)
+        make_srt(srt_path, args.seconds)
+
+        rows = []
+        for count in range(2, len(RENDITIONS) + 1):
+            separate = measure(separate_runs(ffmpeg, video_path, srt_path, tmp, count))
+            single = measure(single_run(ffmpeg, video_path, srt_path, tmp, count))
+            rows.append((count, separate, single))
+
+    print()
+    print("📊 Multi-rendition benchmark")
+    print(f"   {args.seconds:.0f}s input at {args.size} {args.fps}fps; renditions: " + ", ".join(
+        describe(spec) for spec in RENDITIONS
+    ))
+    print("=" * 72)
+    print(f"{'outputs':>8}{'separate s':>12}{'split s':>10}{'speedup':>9}{'separate cpu':>14}{'split cpu':>11}{'saved':>8}")
+    for count, (separate_wall, separate_cpu), (single_wall, single_cpu) in rows:
+        print(
+            f"{count:>8}{separate_wall:>12.2f}{single_wall:>10.2f}{separate_wall / single_wall:>8.2f}x"
+            f"{separate_cpu:>14.1f}{single_cpu:>11.1f}{1 - single_cpu / separate_cpu:>8.1%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the API.
+
+Measures the import cost of the FastAPI app with ``python -X importtime``
+and the time from process start until ``/health`` answers. Fails if the
+import time exceeds the budget or if the heavy ML stack (torch, whisperx)
+is imported at startup instead of lazily.
+
+Usage:
+    python benchmarks/bench_startup.py [--budget-ms 1500] [--no-server]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+project_root = Path(__file__).parent.parent
+APP_MODULE = "src.caption_generator.api.app"
+HEAVY_MODULES = ("torch", "whisperx")
+
+
+def measure_import_time():
+    """Run ``-X importtime`` on the app module and parse the report"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {APP_MODULE}"],
+        cwd=project_root,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit("❌ Importing the app failed")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.split("|", 1)[0].split(":", 1) + line.split("|")[1:]]
+        modules.append((int(cumulative_us), int(self_us), name))
+    return modules
+
+
+def measure_time_to_health(port: int = 8765, timeout: float = 60.0) -> float:
+    """Start uvicorn and return seconds until /health answers 200"""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{APP_MODULE}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=project_root,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.exceptions.ConnectionError:
+                pass
+            time.sleep(0.02)
+        raise SystemExit("❌ /health did not answer in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500")))
+    parser.add_argument("--no-server", action="store_true", help="Skip the /health latency measurement")
+    args = parser.parse_args()
+
+    print("⏱️  Startup benchmark")
+    print("=" * 40)
+
+    modules = measure_import_time()
+    by_name = {name: cumulative for cumulative, _, name in modules}
+    total_ms = by_name.get(APP_MODULE, max(c for c, _, _ in modules)) / 1000
+    print(f"App import time: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print("Slowest top-level imports (cumulative):")
+    top_level = [(c, name) for c, _, name in modules if "." not in name]
+    for cumulative, name in sorted(top_level, reverse=True)[:10]:
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
+
+    ok = True
+    heavy = [name for name in HEAVY_MODULES if name in by_name]
+    if heavy:
+        print(f"❌ Heavy modules imported at startup: {', '.join(heavy)}")
+        ok = False
+    if total_ms > args.budget_ms:
+        print(f"❌ Import time over budget")
+        ok = False
+
+    if not args.no_server:
+        seconds = measure_time_to_health()
+        print(f"Process start -> /health 200: {seconds * 1000:.0f} ms")
+
+    print("✅ Startup within budget" if ok else "❌ Startup benchmark failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
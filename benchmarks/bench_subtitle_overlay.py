@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Caption burn cost: libass on every frame vs. a cached pre-rendered overlay track.
+
+Synthetic captions are burned onto a generated H.264 video two ways:
+
+- libass: the ``subtitles`` filter (what every burn does without overlays)
+- overlay: ``SubtitleOverlayCache`` renders each caption once into a
+  transparent band image, then the ``overlay`` filter composites the track
+
+The filter table decodes and filters without encoding (``-f null``), so it
+isolates subtitle rendering; "none" is the decode alone. The encode table
+burns the same captions at several CRF values, as repeated burns at
+different bitrates would, with the overlay rendered once for all of them.
+
+Usage:
+    python benchmarks/bench_subtitle_overlay.py [--seconds 60] [--size 1920x1080] [--crf 20 23 28]
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.caption_generator.models.subtitle import TranscriptSegment
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+from src.caption_generator.services.subtitle_overlay import SubtitleOverlayCache
+from src.caption_generator.services.whisperx_service import WhisperXService
+from src.caption_generator.utils.caption_timeline import CaptionTimeline
+
+VOCABULARY = (
+    "the a of to and in that it is was for on with as we you this they at be have from "
+    "video caption speaker music today history learning machine model data talk show"
+).split()
+STYLE = dict(font_size=24, font_color="white", position="bottom")
+
+
+def synthetic_captions(seconds: float, seed: int = 7):
+    """Two-line captions of 2-3 seconds separated by short gaps"""
+    rng = random.Random(seed)
+    captions = []
+    t = 0.3
+    while t < seconds - 3:
+        duration = rng.uniform(2.0, 3.0)
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(6, 12))]
+        half = len(words) // 2
+        text = " ".join(words[:half]) + "\n" + " ".join(words[half:])
+        captions.append(TranscriptSegment(start=round(t, 3), end=round(t + duration, 3), text=text))
+        t += duration + rng.uniform(0.1, 0.6)
+    return captions
+
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def filter_only(ffmpeg: FFmpegService, video_path: Path, srt_path: Path, overlay=None, captions: bool = True):
+    cmd = [ffmpeg.ffmpeg_path, "-v", "error", "-i", str(video_path)]
+    if overlay:
+        cmd += ffmpeg.overlay_input(overlay) + ["-filter_complex", f"[0:v][1:v]{ffmpeg.overlay_filter(overlay)}"]
+    elif captions:
+        cmd += ["-vf", ffmpeg.subtitle_filter(srt_path, **STYLE)]
+    subprocess.run(cmd + ["-an", "-f", "null", "-"], check=True, capture_output=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0, help="Video duration")
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--crf", type=int, nargs="+", default=[20, 23, 28], help="One encode per value")
+    args = parser.parse_args()
+
+    ffmpeg = FFmpegService()
+    width, height = (int(value) for value in args.size.split("x"))
+    captions = synthetic_captions(args.seconds)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video_path, srt_path = tmp / "input.mp4", tmp / "captions.srt"
+        srt_path.write_text(WhisperXService().create_srt_content(captions))
+        print("Generating input...")
+        subprocess.run(
+            [
+                ffmpeg.ffmpeg_path, "-v", "error",
+                "-f", "lavfi", "-i", f"testsrc2=s={args.size}:r={args.fps}:d={args.seconds}",
+                "-f", "lavfi", "-i", f"sine=d={args.seconds}",
+                "-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac", "-shortest", str(video_path)
+            ],
+            check=True
+        )
+        cache = SubtitleOverlayCache(ffmpeg, tmp / "overlays")
+
+        started = time.perf_counter()
+        overlay = asyncio.run(cache.acquire(srt_path, CaptionTimeline(captions), width=width, height=height, **STYLE))
+        render_seconds = time.perf_counter() - started
+        track_bytes = sum(path.stat().st_size for path in overlay.concat_path.parent.iterdir())
+
+        filters = {
+            "none": timed(filter_only, ffmpeg, video_path, srt_path, None, False),
+            "libass": timed(filter_only, ffmpeg, video_path, srt_path),
+            "overlay": timed(filter_only, ffmpeg, video_path, srt_path, overlay),
+        }
+
+        encodes = {"libass": 0.0, "overlay": render_seconds}
+        for crf in args.crf:
+            for name, track in (("libass", None), ("overlay", overlay)):
+                encodes[name] += timed(lambda: asyncio.run(ffmpeg.burn_subtitles(
+                    video_path, srt_path, tmp / f"{name}_{crf}.mp4", crf=crf, overlay=track, **STYLE
+                )))
+
+    print()
+    print("📊 Caption overlay benchmark")
+    print(f"   {args.seconds:.0f}s at {args.size} {args.fps}fps, {len(captions)} captions")
+    print(f"   Overlay track: rendered in {render_seconds:.2f}s, {overlay.band_height}px band, "
+          f"{track_bytes / 1024:.0f} KiB")
+    print("=" * 64)
+    print(f"{'filter only':<14}{'seconds':>10}{'subtitle cost':>16}")
+    for name, seconds in filters.items():
+        print(f"{name:<14}{seconds:>10.2f}{seconds - filters['none']:>16.2f}")
+    print()
+    print(f"{len(args.crf)} encodes (CRF {', '.join(map(str, args.crf))}); overlay includes its one render")
+    for name, seconds in encodes.items():
+        print(f"{name:<14}{seconds:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Indexing throughput and query latency of the transcript search index.
+
+Synthetic transcripts (word-aligned segments drawn from a fixed vocabulary)
+are indexed into a fresh SQLite FTS5 store, then random two- and three-word
+phrases taken from the indexed text are queried, reporting p50/p95/p99
+latency. Every 1000th transcript contains a marker phrase, so a rare-phrase
+query is measured separately from the common ones.
+
+Usage:
+    python benchmarks/bench_transcript_search.py [--videos 100000] [--queries 500]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.caption_generator.services.transcript_store import TranscriptStore, fts5_available
+
+VOCABULARY = (
+    "the a of to and in that it is was for on with as we you this they at be have from "
+    "video caption speaker music today history learning machine model data talk show "
+    "people world time year question answer story image sound light water city river "
+    "market energy health science game team coach player season night morning power"
+).split()
+
+
+def synthetic_transcript(rng: random.Random, index: int, segments: int, words_per_segment: int):
+    t = 0.0
+    result = []
+    for s in range(segments):
+        words = [rng.choice(VOCABULARY) for _ in range(words_per_segment)]
+        if s == 0 and index % 1000 == 0:
+            words[:2] = ["zeppelin", "marmalade"]
+        timed = []
+        for word in words:
+            timed.append({"word": word, "start": t, "end": t + 0.3})
+            t += 0.35
+        result.append({"start": timed[0]["start"], "end": timed[-1]["end"], "text": " ".join(words), "words": timed})
+        t += 1.0
+    return {"language": "en", "segments": result}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(store: TranscriptStore, queries):
+    latencies = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        hits += len(store.search(query, limit=20))
+        latencies.append(time.perf_counter() - start)
+    return latencies, hits / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=100_000)
+    parser.add_argument("--segments", type=int, default=6, help="Segments per transcript")
+    parser.add_argument("--words", type=int, default=12, help="Words per segment")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    if not fts5_available():
+        print("❌ SQLite was built without FTS5")
+        return 1
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "transcripts.sqlite3"
+        store = TranscriptStore(db_path)
+
+        print("📊 Transcript search benchmark")
+        print(f"   {args.videos} videos x {args.segments} segments x {args.words} words")
+        print("=" * 64)
+
+        started = time.perf_counter()
+        for index in range(args.videos):
+            transcript = synthetic_transcript(rng, index, args.segments, args.words)
+            store.add(f"video_{index}.mp4", transcript, video_url=f"/download/video_{index}.mp4")
+        elapsed = time.perf_counter() - started
+        print(f"indexing:   {args.videos / elapsed:,.0f} videos/s ({elapsed:.1f}s), "
+              f"index {db_path.stat().st_size / 1e6:.0f} MB")
+
+        common = [
+            " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 3)))
+            for _ in range(args.queries)
+        ]
+        print(f"{'queries':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'avg hits':>10}")
+        for name, queries in (("common phrases", common), ("rare phrase", ["zeppelin marmalade"] * args.queries)):
+            latencies, hits = measure(store, queries)
+            print(
+                f"{name:<22}{statistics.median(latencies) * 1000:>10.2f}"
+                f"{percentile(latencies, 0.95) * 1000:>10.2f}"
+                f"{percentile(latencies, 0.99) * 1000:>10.2f}"
+                f"{hits:>10.1f}"
+            )
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,8 +10,22 @@ __author__ = "Video Caption Generator Team"
 __description__ = "Automatic video captioning with burned-in subtitles"
 
 from .core.config import settings
-from .models.video import VideoResponse
-from .services.video_service import VideoProcessingService
+
+# Heavier members are imported on first access (PEP 562) so that importing
+# ``caption_generator.core.config`` does not pull in FastAPI or the services.
+_LAZY_ATTRIBUTES = {
+    "VideoResponse": ".models.video",
+    "VideoProcessingService": ".services.video_service",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "settings",
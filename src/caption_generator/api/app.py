@@ -1,17 +1,34 @@
 """
 FastAPI application for Video Caption Generator API.
 """
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from typing import List, Optional
+import asyncio
+import hashlib
+import json
+import math
 import os
+import time
 from pathlib import Path
 
 from ..models.video import VideoResponse, ErrorResponse
-from ..models.subtitle import CaptionPosition
+from ..models.rendition import RenditionSpec, RenditionsResponse
+from ..models.job import JobResponse
+from ..models.batch import BatchResponse
+from ..models.encode import OutputType
+from ..models.search import SearchResponse
+from ..models.admission import AdmissionStats, JobPriority
+from ..models.storage import JanitorStats
+from ..models.transcription import SchedulerStats
+from ..models.subtitle import CaptionPosition, CaptionWindowResponse
 from ..services.video_service import VideoProcessingService
 from ..core.config import settings
+from ..core.exceptions import RateLimitExceededError, ServerBusyError, StorageCapacityError
+from ..utils.range_response import build_file_response
+from ..utils.validation import normalize_language_code
+from ..utils.caption_timeline import CaptionTimeline
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -41,23 +58,133 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "generate_captions": "POST /generate-captioned-video",
-            "download": "GET /download/{filename}"
+            "renditions": "POST /renditions",
+            "health": "GET /health",
+            "ready": "GET /ready",
+            "create_job": "POST /jobs",
+            "job_status": "GET /jobs/{job_id}",
+            "cancel_job": "DELETE /jobs/{job_id}",
+            "job_captions": "GET /jobs/{job_id}/captions",
+            "create_batch": "POST /batch",
+            "batch_status": "GET /batch/{group_id}",
+            "cancel_batch": "DELETE /batch/{group_id}",
+            "download": "GET /download/{filename}",
+            "stream": "GET /stream/{filename}",
+            "search": "GET /search?q=",
+            "admission_stats": "GET /admission/stats",
+            "janitor_stats": "GET /janitor/stats",
+            "transcription_stats": "GET /transcription/stats"
         }
     }
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check; answers immediately, even while models are loading"""
     return {"status": "healthy", "service": "video-caption-generator"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check; 503 until the WhisperX model has been loaded"""
+    whisperx_service = video_service.whisperx_service
+    if whisperx_service.is_model_loaded:
+        return {"status": "ready", "model_loaded": True, "model": settings.whisperx.model}
+    
+    warmup_task = getattr(app.state, "warmup_task", None)
+    status = "loading" if warmup_task and not warmup_task.done() else "not_ready"
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": status,
+            "model_loaded": False,
+            "model": settings.whisperx.model,
+            "error": whisperx_service.load_error
+        }
+    )
+
+def validate_caption_request(
+    file: Optional[UploadFile],
+    url: Optional[str],
+    font_size: int,
+    position: str
+):
+    """Validate the input source and styling parameters of a caption request"""
+    # Validate input
+    if not file and not url:
+        raise HTTPException(
+            status_code=400,
+            detail="Either 'file' or 'url' parameter is required"
+        )
+    
+    if file and url:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide either 'file' or 'url', not both"
+        )
+    
+    # Validate parameters
+    if font_size < 12 or font_size > 72:
+        raise HTTPException(
+            status_code=400,
+            detail="Font size must be between 12 and 72"
+        )
+    
+    if position not in ["top", "bottom"]:
+        raise HTTPException(
+            status_code=400,
+            detail="Position must be 'top' or 'bottom'"
+        )
+
+def client_identity(request: Request, api_key: Optional[str]) -> str:
+    """Rate-limit identity of a caller: its API key (hashed), else its IP address"""
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+def admission_error(error: Exception) -> HTTPException:
+    """HTTP error for a rejected job: 429 over the client's rate, 503 at capacity"""
+    status_code = 429 if isinstance(error, RateLimitExceededError) else 503
+    return HTTPException(
+        status_code=status_code,
+        detail=error.message,
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
+
+async def run_until_disconnected(request: Request, coro):
+    """
+    Await a request's work, cancelling it if the client goes away.
+    
+    Cancelling the task kills its FFmpeg processes, drops its queued
+    transcription windows and deletes its temp files.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.app.DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print("🛑 Client disconnected, cancelling its request")
+                task.cancel()
+                await asyncio.wait({task})
+                # Nobody is left to read it; 499 is the conventional status for this in access logs
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
 @app.post("/generate-captioned-video", response_model=VideoResponse)
 async def generate_captioned_video(
-    background_tasks: BackgroundTasks,
+    request: Request,
     file: Optional[UploadFile] = File(None),
     url: Optional[str] = Form(None),
     font_size: Optional[int] = Form(settings.ffmpeg.default_font_size),
     font_color: Optional[str] = Form(settings.ffmpeg.default_font_color),
-    position: Optional[str] = Form(settings.ffmpeg.default_position)
+    position: Optional[str] = Form(settings.ffmpeg.default_position),
+    language: Optional[str] = Form(None),
+    highlight_color: Optional[str] = Form(None),
+    output: OutputType = Form(OutputType.BURN),
+    priority: JobPriority = Form(JobPriority.INTERACTIVE),
+    x_api_key: Optional[str] = Header(None)
 ):
     """
     Generate a captioned video with burned-in subtitles.
@@ -67,33 +194,25 @@ async def generate_captioned_video(
     - **font_size**: Caption font size (12-72, default: 24)
     - **font_color**: Caption color (default: white)
     - **position**: Caption position - 'top' or 'bottom' (default: bottom)
+    - **language**: Spoken language code (e.g. 'en'); skips language detection
+    - **highlight_color**: Karaoke captions: each word turns this color as it is
+      spoken, the rest of the caption stays `font_color`
+    - **output**: 'burn' (default, re-encodes the video), 'soft' (MP4 remux with a
+      subtitle track, no video re-encode) or 'audio' (M4A audio with a subtitle track)
+    - **priority**: Scheduling class when the server is busy: 'interactive' (default;
+      inputs longer than `SCHEDULER_INTERACTIVE_MAX_MINUTES` run as 'standard'),
+      'standard' or 'batch'
+    
+    Repeating a request with the same input, style and output returns the stored
+    result without encoding again (`cached: true`).
+    
+    The input's audio minutes count against the caller's rate limit (per
+    `X-API-Key` header, or per IP address): 429 when it is used up, 503 when
+    the server is at capacity. Both carry a `Retry-After` header.
     """
     try:
-        # Validate input
-        if not file and not url:
-            raise HTTPException(
-                status_code=400,
-                detail="Either 'file' or 'url' parameter is required"
-            )
-        
-        if file and url:
-            raise HTTPException(
-                status_code=400,
-                detail="Provide either 'file' or 'url', not both"
-            )
-        
-        # Validate parameters
-        if font_size < 12 or font_size > 72:
-            raise HTTPException(
-                status_code=400,
-                detail="Font size must be between 12 and 72"
-            )
-        
-        if position not in ["top", "bottom"]:
-            raise HTTPException(
-                status_code=400,
-                detail="Position must be 'top' or 'bottom'"
-            )
+        validate_caption_request(file, url, font_size, position)
+        language = normalize_language_code(language)
         
         # Debug logging to verify parameters
         print(f"🎨 API received styling parameters:")
@@ -101,25 +220,29 @@ async def generate_captioned_video(
         print(f"   Font Color: '{font_color}' (type: {type(font_color)})")
         print(f"   Position: '{position}' (type: {type(position)})")
         
-        # Process video
-        result = await video_service.process_video(
+        # Process video (cancelled if the client disconnects first)
+        result = await run_until_disconnected(request, video_service.process_video(
             file=file,
             url=url,
             font_size=font_size,
             font_color=font_color,
-            position=position
-        )
-        
-        # Schedule cleanup of output file after some time (optional)
-        filename = result.video_url.split("/")[-1]
-        background_tasks.add_task(
-            cleanup_file_after_delay, 
-            filename, 
-            delay_minutes=30
-        )
+            position=position,
+            language=language,
+            output_type=output,
+            client=client_identity(request, x_api_key),
+            priority=priority,
+            highlight_color=highlight_color or None
+        ))
         
+        # Outputs are removed by the artifact janitor once their TTL expires
         return result
-        
+    
+    except HTTPException:
+        raise
+    except (RateLimitExceededError, ServerBusyError) as e:
+        raise admission_error(e)
+    except StorageCapacityError as e:
+        raise HTTPException(status_code=507, detail=e.message)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except FileNotFoundError as e:
@@ -127,33 +250,364 @@ async def generate_captioned_video(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
-@app.get("/download/{filename}")
-async def download_video(filename: str):
-    """Download the processed video file"""
+def parse_renditions(renditions: str) -> List[RenditionSpec]:
+    """Parse the JSON list of rendition styles of a /renditions request"""
     try:
-        file_path = video_service.get_download_path(filename)
+        items = json.loads(renditions)
+        if not isinstance(items, list):
+            raise ValueError("expected a JSON list")
+        specs = [RenditionSpec(**item) for item in items]
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid renditions: {e}")
+    if not 1 <= len(specs) <= settings.app.MAX_RENDITIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Between 1 and {settings.app.MAX_RENDITIONS} renditions are allowed"
+        )
+    return specs
+
+@app.post("/renditions", response_model=RenditionsResponse)
+async def generate_renditions(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    url: Optional[str] = Form(None),
+    renditions: str = Form(...),
+    language: Optional[str] = Form(None),
+    priority: JobPriority = Form(JobPriority.INTERACTIVE),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Caption one video in several styles or sizes at once.
+    
+    - **file**: Video file upload (multipart/form-data)
+    - **url**: Video URL (alternative to file upload)
+    - **renditions**: JSON list of outputs, each with optional `font_size`,
+      `font_color`, `position`, `height` (scales the output, keeping the
+      aspect ratio) and `highlight_color`, e.g.
+      `[{"height": 1080}, {"height": 480, "font_size": 18, "position": "top"}]`
+    - **language**: Spoken language code (e.g. 'en'); skips language detection
+    - **priority**: Scheduling class when the server is busy (see `/generate-captioned-video`)
+    
+    The video is transcribed once and every rendition that is not already
+    cached is encoded by one FFmpeg process that decodes the input once.
+    At most `MAX_RENDITIONS` outputs per request.
+    """
+    try:
+        specs = parse_renditions(renditions)
+        validate_caption_request(file, url, specs[0].font_size, specs[0].position.value)
+        language = normalize_language_code(language)
         
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="File not found")
+        return await run_until_disconnected(request, video_service.process_renditions(
+            file=file,
+            url=url,
+            renditions=specs,
+            language=language,
+            client=client_identity(request, x_api_key),
+            priority=priority
+        ))
+    
+    except HTTPException:
+        raise
+    except (RateLimitExceededError, ServerBusyError) as e:
+        raise admission_error(e)
+    except StorageCapacityError as e:
+        raise HTTPException(status_code=507, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=f"System error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_caption_job(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    url: Optional[str] = Form(None),
+    font_size: Optional[int] = Form(settings.ffmpeg.default_font_size),
+    font_color: Optional[str] = Form(settings.ffmpeg.default_font_color),
+    position: Optional[str] = Form(settings.ffmpeg.default_position),
+    stream: bool = Form(False),
+    language: Optional[str] = Form(None),
+    highlight_color: Optional[str] = Form(None),
+    priority: JobPriority = Form(JobPriority.STANDARD),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Start a progressive caption job and return its ID immediately.
+    
+    A low-resolution captioned preview becomes downloadable as soon as the
+    transcript is ready; the full-quality video follows. Poll
+    `GET /jobs/{job_id}` to get both download URLs.
+    
+    - **stream**: Encode the full video as fragmented MP4 that can be fetched
+      from `video.stream_url` while it is still being produced
+    - **language**: Spoken language code (e.g. 'en'); skips language detection
+    - **highlight_color**: Karaoke captions (see `/generate-captioned-video`)
+    - **priority**: Scheduling class: 'interactive', 'standard' (default) or 'batch'
+    
+    Over-limit requests are rejected immediately (429/503, see
+    `/generate-captioned-video`); admitted jobs stay `queued` until there is
+    capacity for them.
+    """
+    try:
+        validate_caption_request(file, url, font_size, position)
+        language = normalize_language_code(language)
         
-        return FileResponse(
-            path=str(file_path),
-            filename=filename,
-            media_type="video/mp4"
+        job = await video_service.start_progressive_job(
+            file=file,
+            url=url,
+            font_size=font_size,
+            font_color=font_color,
+            position=position,
+            stream=stream,
+            language=language,
+            client=client_identity(request, x_api_key),
+            priority=priority,
+            highlight_color=highlight_color or None
         )
         
+        return job.to_response()
+    
+    except HTTPException:
+        raise
+    except (RateLimitExceededError, ServerBusyError) as e:
+        raise admission_error(e)
+    except StorageCapacityError as e:
+        raise HTTPException(status_code=507, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Download error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_caption_job(job_id: str):
+    """Get the status and artifacts (preview and full video) of a job"""
+    job = video_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_response()
+
+@app.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_caption_job(job_id: str):
+    """
+    Cancel a running job.
+    
+    Its FFmpeg processes are killed, its queued transcription work is dropped
+    and its temp files are deleted. Returns 409 if the job already finished.
+    """
+    job = video_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.is_finished:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.value}")
+    job = await video_service.cancel_job(job)
+    return job.to_response()
+
+@app.get("/jobs/{job_id}/captions", response_model=CaptionWindowResponse)
+async def get_job_captions(
+    job_id: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    at: Optional[float] = None,
+    q: Optional[str] = None,
+    format: str = "json"
+):
+    """
+    Query the captions of a job by time or by words.
+    
+    - **at**: Captions on screen at this timestamp (seconds)
+    - **start** / **end**: Captions visible in this window (seconds; either may be omitted)
+    - **q**: Captions containing these words (as a phrase), within the window if one is given
+    - **format**: 'json' (default) or 'binary' for the whole timeline in its compact binary form
+    """
+    job = video_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    timeline = job.timeline
+    if timeline is None:
+        raise HTTPException(status_code=409, detail="Captions are not ready yet")
+    
+    if format == "binary":
+        return Response(content=timeline.to_bytes(), media_type="application/octet-stream")
+    if format != "json":
+        raise HTTPException(status_code=400, detail="Format must be 'json' or 'binary'")
+    
+    if at is not None:
+        timeline = CaptionTimeline(timeline.at(at))
+    elif start is not None or end is not None:
+        window_start = start if start is not None else 0.0
+        window_end = end if end is not None else timeline.duration
+        if window_end <= window_start:
+            raise HTTPException(status_code=400, detail="end must be after start")
+        timeline = CaptionTimeline(timeline.window(window_start, window_end))
+    captions = timeline.search(q) if q else list(timeline)
+    
+    return CaptionWindowResponse(job_id=job_id, total=len(job.timeline), captions=captions)
 
-async def cleanup_file_after_delay(filename: str, delay_minutes: int = 30):
-    """Background task to cleanup files after a delay"""
-    import asyncio
-    await asyncio.sleep(delay_minutes * 60)  # Convert to seconds
+@app.post("/batch", response_model=BatchResponse, status_code=202)
+async def create_caption_batch(
+    request: Request,
+    files: Optional[List[UploadFile]] = File(None),
+    urls: Optional[List[str]] = Form(None),
+    font_size: Optional[int] = Form(settings.ffmpeg.default_font_size),
+    font_color: Optional[str] = Form(settings.ffmpeg.default_font_color),
+    position: Optional[str] = Form(settings.ffmpeg.default_position),
+    language: Optional[str] = Form(None),
+    highlight_color: Optional[str] = Form(None),
+    priority: JobPriority = Form(JobPriority.BATCH),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Caption many videos in one request and return a job group immediately.
+    
+    Audio from all clips is transcribed in shared WhisperX batches and the
+    encodes are spread over a CPU-sized pool. Poll `GET /batch/{group_id}`
+    for per-item status and download URLs.
+    
+    - **files**: Video file uploads (repeat the field for each file)
+    - **urls**: Video URLs (repeat the field for each URL)
+    - **font_size**, **font_color**, **position**, **highlight_color**: Styling applied to every item
+    - **language**: Spoken language code shared by all items; skips language detection
+    - **priority**: Scheduling class: 'interactive', 'standard' or 'batch' (default)
+    
+    Every item counts against the caller's rate limit; items over it fail.
+    """
+    files = files or []
+    urls = [url for url in (urls or []) if url]
     try:
-        video_service.cleanup_download_file(filename)
-        print(f"Cleaned up file: {filename}")
+        if not files and not urls:
+            raise HTTPException(
+                status_code=400,
+                detail="At least one 'files' or 'urls' entry is required"
+            )
+        for file in files:
+            validate_caption_request(file, None, font_size, position)
+        for url in urls:
+            validate_caption_request(None, url, font_size, position)
+        language = normalize_language_code(language)
+        
+        group = await video_service.start_batch(
+            files=files,
+            urls=urls,
+            font_size=font_size,
+            font_color=font_color,
+            position=position,
+            language=language,
+            client=client_identity(request, x_api_key),
+            priority=priority,
+            highlight_color=highlight_color or None
+        )
+        
+        return group.to_response()
+    
+    except HTTPException:
+        raise
+    except (RateLimitExceededError, ServerBusyError) as e:
+        raise admission_error(e)
+    except StorageCapacityError as e:
+        raise HTTPException(status_code=507, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error cleaning up file {filename}: {e}")
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+@app.get("/batch/{group_id}", response_model=BatchResponse)
+async def get_caption_batch(group_id: str):
+    """Get the overall and per-item status of a batch"""
+    group = video_service.get_group(group_id)
+    if group is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return group.to_response()
+
+@app.delete("/batch/{group_id}", response_model=BatchResponse)
+async def cancel_caption_batch(group_id: str):
+    """Cancel a running batch; items that already finished keep their outputs"""
+    group = video_service.get_group(group_id)
+    if group is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if group.is_finished:
+        raise HTTPException(status_code=409, detail="Batch already finished")
+    group = await video_service.cancel_group(group)
+    return group.to_response()
+
+@app.get("/search", response_model=SearchResponse)
+async def search_transcripts(q: str, limit: int = 20, offset: int = 0):
+    """
+    Find where a phrase is spoken across all captioned videos.
+    
+    - **q**: Words to search for, matched as a phrase (case and punctuation insensitive)
+    - **limit** / **offset**: Page through the hits, best matches first
+    """
+    store = video_service.transcript_store
+    if store is None:
+        raise HTTPException(status_code=503, detail="Transcript search is disabled")
+    if not 1 <= limit <= 100 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be 1-100 and offset non-negative")
+    
+    loop = asyncio.get_running_loop()
+    try:
+        hits = await loop.run_in_executor(None, lambda: store.search(q, limit=limit, offset=offset))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SearchResponse(query=q, hits=hits, indexed_videos=store.video_count())
+
+@app.get("/stream/{filename}")
+async def stream_video(filename: str):
+    """Stream a video, serving bytes while the encode is still running"""
+    chunks = await video_service.stream_output(filename)
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    # Chunked transfer: the final size is unknown while encoding
+    return StreamingResponse(chunks, media_type="video/mp4")
+
+@app.get("/janitor/stats", response_model=JanitorStats)
+async def janitor_stats():
+    """Temp-dir usage and janitor eviction statistics"""
+    return video_service.janitor.stats
+
+@app.get("/transcription/stats", response_model=SchedulerStats)
+async def transcription_stats():
+    """Micro-batching statistics of the transcription scheduler"""
+    return video_service.whisperx_service.scheduler_stats
+
+@app.get("/admission/stats", response_model=AdmissionStats)
+async def admission_stats():
+    """Rate-limit, capacity and per-class queue wait statistics of the admission controller"""
+    return video_service.admission.stats
+
+@app.get("/download/{filename}")
+async def download_video(filename: str, request: Request):
+    """
+    Download the processed video file.
+    
+    Supports byte ranges (206, including multipart ranges), strong ETags and
+    conditional requests (If-None-Match, If-Modified-Since, If-Range).
+    """
+    if filename in video_service.active_outputs:
+        raise HTTPException(
+            status_code=409,
+            detail=f"File is still being encoded, use /stream/{filename}"
+        )
+    
+    artifact = await video_service.get_artifact(filename)
+    file_path = await video_service.get_download_path(filename) if artifact else None
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    try:
+        return await build_file_response(
+            request,
+            file_path,
+            filename=filename,
+            media_type=artifact.content_type,
+            etag=artifact.sha256
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Download error: {str(e)}")
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -163,7 +617,8 @@ async def http_exception_handler(request, exc):
         content=ErrorResponse(
             error=exc.detail,
             detail=getattr(exc, 'detail', None)
-        ).dict()
+        ).dict(),
+        headers=getattr(exc, 'headers', None)
     )
 
 @app.exception_handler(Exception)
@@ -185,10 +640,35 @@ async def startup_event():
     temp_dir.mkdir(exist_ok=True)
     print(f"Temp directory created: {temp_dir}")
     
-    # Pre-load WhisperX model (optional, will load on first request if this fails)
+    # Single periodic janitor: expires artifacts and keeps TEMP_DIR within budget,
+    # independently of the requests that created the files
+    app.state.janitor_task = asyncio.create_task(video_service.janitor.run())
+    
+    # Jobs interrupted by the previous shutdown or a crash continue from their checkpoints
+    resumed = video_service.resume_incomplete_jobs()
+    if resumed:
+        print(f"🔁 Resumed {len(resumed)} interrupted job(s)")
+    
+    # Pre-load WhisperX model in the background so the server starts answering
+    # /health immediately; /ready reports when the model is available
+    app.state.warmup_task = asyncio.create_task(warm_up_models())
+
+async def warm_up_models():
+    """Background warm-up: import the ML stack and load the WhisperX model"""
+    start_time = time.time()
     try:
         await video_service.whisperx_service.load_model()
-        print("WhisperX model loaded successfully")
+        print(f"WhisperX model loaded successfully in {time.time() - start_time:.1f}s")
     except Exception as e:
         print(f"Warning: Could not pre-load WhisperX model: {e}")
         print("Model will be loaded on first transcription request")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background services"""
+    # Jobs still running keep their checkpoints and resume on the next start
+    video_service.prepare_shutdown()
+    for task_name in ("janitor_task", "warmup_task"):
+        task = getattr(app.state, task_name, None)
+        if task:
+            task.cancel()
@@ -31,6 +31,20 @@ class AppSettings:
     
     # Cleanup settings
     CLEANUP_DELAY_MINUTES: int = int(os.getenv("CLEANUP_DELAY_MINUTES", "30"))
+    
+    # Job settings
+    MAX_TRACKED_JOBS: int = int(os.getenv("MAX_TRACKED_JOBS", "1000"))
+    MAX_BATCH_ITEMS: int = int(os.getenv("MAX_BATCH_ITEMS", "50"))
+    # Outputs per /renditions request (all encoded by one FFmpeg process)
+    MAX_RENDITIONS: int = int(os.getenv("MAX_RENDITIONS", "6"))
+    
+    # How often a synchronous request checks whether its client is still connected
+    DISCONNECT_POLL_INTERVAL: float = float(os.getenv("DISCONNECT_POLL_INTERVAL", "1.0"))
+    
+    # Identical requests in flight at the same time share one execution (single-flight);
+    # URL inputs are matched by normalized URL plus ETag/Last-Modified from a HEAD request
+    COALESCE_REQUESTS: bool = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+    URL_HEAD_TIMEOUT: float = float(os.getenv("URL_HEAD_TIMEOUT", "5"))
 
 
 class WhisperXSettings:
@@ -39,6 +53,10 @@ class WhisperXSettings:
     MODEL_NAME: str = os.getenv("WHISPERX_MODEL", "large-v2")
     BATCH_SIZE: int = int(os.getenv("WHISPERX_BATCH_SIZE", "16"))
     
+    # Micro-batching: 30s windows from concurrent requests share model batches
+    MICRO_BATCH_MAX_SIZE: int = int(os.getenv("WHISPERX_MICRO_BATCH_MAX_SIZE", str(BATCH_SIZE)))
+    MICRO_BATCH_MAX_WAIT_MS: float = float(os.getenv("WHISPERX_MICRO_BATCH_MAX_WAIT_MS", "5"))
+    
     # Device settings
     FORCE_CPU: bool = os.getenv("CUDA_VISIBLE_DEVICES") == ""
     
@@ -47,6 +65,10 @@ class WhisperXSettings:
     MIN_WORDS_PER_CAPTION: int = int(os.getenv("MIN_WORDS_PER_CAPTION", "5"))
     MAX_CAPTION_DURATION: float = float(os.getenv("MAX_CAPTION_DURATION", "4.0"))
     MIN_CAPTION_DURATION: float = float(os.getenv("MIN_CAPTION_DURATION", "1.0"))
+    # Line layout and reading speed of a caption (see utils/caption_segmenter.py)
+    CAPTION_MAX_LINES: int = int(os.getenv("CAPTION_MAX_LINES", "2"))
+    CAPTION_MAX_CHARS_PER_LINE: int = int(os.getenv("CAPTION_MAX_CHARS_PER_LINE", "42"))
+    CAPTION_MAX_CPS: float = float(os.getenv("CAPTION_MAX_CPS", "17"))
     
     @property
     def model(self) -> str:
@@ -87,11 +109,61 @@ class FFmpegSettings:
     SHADOW_SIZE: int = int(os.getenv("SHADOW_SIZE", "1"))
     MARGIN_V: int = int(os.getenv("MARGIN_V", "20"))
     
+    # Caption renderer: "libass" (FFmpeg's subtitles filter), "pillow" (captions drawn with
+    # Pillow and blended with NumPy on piped frames) or "auto" (libass if FFmpeg has it).
+    # FALLBACK_FONT_PATH is the TrueType font of the Pillow renderer (empty = search the
+    # system fonts, then Pillow's built-in font)
+    SUBTITLE_RENDERER: str = os.getenv("SUBTITLE_RENDERER", "auto")
+    FALLBACK_FONT_PATH: str = os.getenv("FALLBACK_FONT_PATH", "")
+    
+    # Progressive preview settings (fast low-res proxy)
+    PREVIEW_HEIGHT: int = int(os.getenv("PREVIEW_HEIGHT", "360"))
+    PREVIEW_PRESET: str = os.getenv("PREVIEW_PRESET", "ultrafast")
+    PREVIEW_CRF: int = int(os.getenv("PREVIEW_CRF", "30"))
+    
+    # Streaming output settings (fragmented MP4)
+    STREAM_FRAGMENT_SECONDS: int = int(os.getenv("STREAM_FRAGMENT_SECONDS", "2"))
+    STREAM_CHUNK_SIZE: int = int(os.getenv("STREAM_CHUNK_SIZE", "65536"))
+    STREAM_POLL_INTERVAL: float = float(os.getenv("STREAM_POLL_INTERVAL", "0.25"))
+    
+    # Input probing: optional codec allow-list (comma-separated, empty = anything
+    # FFprobe recognizes), cached probes and keyframe sampling window
+    SUPPORTED_VIDEO_CODECS: str = os.getenv("SUPPORTED_VIDEO_CODECS", "")
+    PROBE_CACHE_SIZE: int = int(os.getenv("PROBE_CACHE_SIZE", "1024"))
+    KEYFRAME_PROBE_SECONDS: float = float(os.getenv("KEYFRAME_PROBE_SECONDS", "60"))
+    
+    # Initial ETA model (seconds of work per second of media), refined from finished jobs
+    ETA_TRANSCRIBE_SPEED: float = float(os.getenv("ETA_TRANSCRIBE_SPEED", "0.3"))
+    ETA_ENCODE_SPEED_1080P: float = float(os.getenv("ETA_ENCODE_SPEED_1080P", "1.0"))
+    
+    # Smart render: re-encode only the GOPs a caption overlaps and stream-copy the rest,
+    # unless more than SMART_RENDER_MAX_COVERAGE of the video would be re-encoded anyway
+    SMART_RENDER: bool = os.getenv("SMART_RENDER", "true").lower() == "true"
+    SMART_RENDER_MAX_COVERAGE: float = float(os.getenv("SMART_RENDER_MAX_COVERAGE", "0.6"))
+    
+    # Seconds a cancelled FFmpeg gets to exit after SIGTERM before it is killed
+    KILL_TIMEOUT: float = float(os.getenv("FFMPEG_KILL_TIMEOUT", "2"))
+    
+    # Concurrent encodes for batch jobs; 0 = one per FFMPEG_THREADS cores
+    MAX_CONCURRENT_ENCODES: int = int(os.getenv("MAX_CONCURRENT_ENCODES", "0"))
+    
     @property
     def threads(self) -> int:
         """Get the number of threads."""
         return self.THREADS
     
+    @property
+    def supported_video_codecs(self) -> set:
+        """Get the video codec allow-list (empty set = no restriction)."""
+        return {codec.strip().lower() for codec in self.SUPPORTED_VIDEO_CODECS.split(",") if codec.strip()}
+    
+    @property
+    def max_concurrent_encodes(self) -> int:
+        """Get the number of encodes that may run at once."""
+        if self.MAX_CONCURRENT_ENCODES > 0:
+            return self.MAX_CONCURRENT_ENCODES
+        return max(1, (os.cpu_count() or 1) // max(1, self.THREADS))
+    
     @property
     def default_font_size(self) -> int:
         """Get the default font size."""
@@ -108,6 +180,104 @@ class FFmpegSettings:
         return self.DEFAULT_POSITION
 
 
+class StorageSettings:
+    """Artifact store configuration."""
+    
+    # Backend: "local" (flat directory), "sharded" (nested hash directories) or "s3"
+    BACKEND: str = os.getenv("ARTIFACT_BACKEND", "local")
+    ARTIFACT_DIR: Path = Path(os.getenv("ARTIFACT_DIR", str(AppSettings.TEMP_DIR / "artifacts")))
+    INDEX_PATH: Path = Path(os.getenv("ARTIFACT_INDEX_PATH", str(ARTIFACT_DIR / "index.sqlite3")))
+    SHARD_DEPTH: int = int(os.getenv("ARTIFACT_SHARD_DEPTH", "2"))
+    
+    # Artifacts expire this long after creation; the janitor removes them
+    TTL_SECONDS: int = int(os.getenv("ARTIFACT_TTL_SECONDS", str(AppSettings.CLEANUP_DELAY_MINUTES * 60)))
+    
+    # Temp-dir janitor: scratch files older than CLEANUP_DELAY_MINUTES are removed,
+    # and the oldest files/artifacts are evicted above the high-water mark
+    JANITOR_INTERVAL_SECONDS: int = int(os.getenv("JANITOR_INTERVAL_SECONDS", "60"))
+    JANITOR_GRACE_SECONDS: int = int(os.getenv("JANITOR_GRACE_SECONDS", "300"))
+    HIGH_WATER_BYTES: int = int(os.getenv("TEMP_DIR_HIGH_WATER_BYTES", str(20 * 1024 ** 3)))  # 20GB
+    LOW_WATER_RATIO: float = float(os.getenv("TEMP_DIR_LOW_WATER_RATIO", "0.8"))
+    MIN_FREE_DISK_BYTES: int = int(os.getenv("MIN_FREE_DISK_BYTES", str(2 * 1024 ** 3)))  # 2GB
+    
+    # Full-text search over transcripts (SQLite FTS5); false discards transcripts
+    TRANSCRIPT_SEARCH: bool = os.getenv("TRANSCRIPT_SEARCH", "true").lower() == "true"
+    TRANSCRIPT_INDEX_PATH: Path = Path(
+        os.getenv("TRANSCRIPT_INDEX_PATH", str(AppSettings.TEMP_DIR / "search" / "transcripts.sqlite3"))
+    )
+    # Words per indexed passage; consecutive passages overlap by a quarter of that
+    TRANSCRIPT_CHUNK_WORDS: int = int(os.getenv("TRANSCRIPT_CHUNK_WORDS", "16"))
+    
+    # Crash-safe jobs: stage results are checkpointed under CHECKPOINT_DIR and jobs
+    # interrupted by a restart resume from their last finished stage (at most
+    # CHECKPOINT_MAX_RESUMES times, so an input that crashes the server is dropped)
+    JOB_CHECKPOINTS: bool = os.getenv("JOB_CHECKPOINTS", "true").lower() == "true"
+    CHECKPOINT_DIR: Path = Path(os.getenv("JOB_CHECKPOINT_DIR", str(AppSettings.TEMP_DIR / "jobs")))
+    CHECKPOINT_MAX_RESUMES: int = int(os.getenv("JOB_CHECKPOINT_MAX_RESUMES", "3"))
+    
+    # Caption overlays: a caption track is rendered once per style and frame size into
+    # transparent images under OVERLAY_CACHE_DIR and burned with FFmpeg's overlay filter
+    # instead of libass; the least recently used beyond OVERLAY_CACHE_ENTRIES are removed
+    SUBTITLE_OVERLAY: bool = os.getenv("SUBTITLE_OVERLAY", "false").lower() == "true"
+    OVERLAY_CACHE_DIR: Path = Path(os.getenv("OVERLAY_CACHE_DIR", str(AppSettings.TEMP_DIR / "overlays")))
+    OVERLAY_CACHE_ENTRIES: int = int(os.getenv("OVERLAY_CACHE_ENTRIES", "32"))
+    
+    # S3-compatible backend (AWS S3, MinIO, ...)
+    S3_BUCKET: str = os.getenv("S3_BUCKET", "")
+    S3_PREFIX: str = os.getenv("S3_PREFIX", "artifacts/")
+    S3_ENDPOINT_URL: Optional[str] = os.getenv("S3_ENDPOINT_URL") or None
+    
+    @property
+    def backend(self) -> str:
+        """Get the artifact backend name."""
+        return self.BACKEND.lower()
+
+
+class AdmissionSettings:
+    """Admission control configuration."""
+    
+    ENABLED: bool = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+    
+    # Per-client token bucket in audio minutes (clients are identified by X-API-Key,
+    # or by IP address without one)
+    MINUTES_PER_HOUR: float = float(os.getenv("ADMISSION_MINUTES_PER_HOUR", "600"))
+    BURST_MINUTES: float = float(os.getenv("ADMISSION_BURST_MINUTES", "180"))
+    MAX_CLIENTS: int = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+    
+    # Global capacity in seconds of estimated work running at once; 0 = ten minutes
+    # per encode slot. Jobs beyond it wait in a bounded queue, then are rejected
+    CAPACITY_SECONDS: float = float(os.getenv("ADMISSION_CAPACITY_SECONDS", "0"))
+    MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "600"))
+    
+    # Scheduling of queued jobs: priority classes (interactive requests for inputs longer
+    # than INTERACTIVE_MAX_MINUTES run as standard), one class of aging per
+    # PRIORITY_AGING_SECONDS waited, and weighted fair shares per client
+    # ("key:<hash>=2,ip:10.0.0.5=0.5"; unlisted clients weigh 1)
+    INTERACTIVE_MAX_MINUTES: float = float(os.getenv("SCHEDULER_INTERACTIVE_MAX_MINUTES", "10"))
+    PRIORITY_AGING_SECONDS: float = float(os.getenv("SCHEDULER_PRIORITY_AGING_SECONDS", "300"))
+    TENANT_WEIGHTS: str = os.getenv("SCHEDULER_TENANT_WEIGHTS", "")
+    # Lower-class jobs yield their capacity at stage boundaries to queued higher-class jobs
+    PREEMPTION: bool = os.getenv("SCHEDULER_PREEMPTION", "true").lower() == "true"
+    
+    @property
+    def capacity_seconds(self) -> float:
+        """Get the global capacity in seconds of estimated work."""
+        if self.CAPACITY_SECONDS > 0:
+            return self.CAPACITY_SECONDS
+        return 600.0 * FFmpegSettings().max_concurrent_encodes
+    
+    @property
+    def tenant_weights(self) -> dict:
+        """Get the fair-share weight of each listed client."""
+        weights = {}
+        for entry in self.TENANT_WEIGHTS.split(","):
+            client, _, weight = entry.strip().rpartition("=")
+            if client and weight:
+                weights[client] = float(weight)
+        return weights
+
+
 class Settings:
     """Main settings container."""
     
@@ -115,6 +285,8 @@ class Settings:
         self.app = AppSettings()
         self.whisperx = WhisperXSettings()
         self.ffmpeg = FFmpegSettings()
+        self.storage = StorageSettings()
+        self.admission = AdmissionSettings()
     
     # App properties
     @property
@@ -131,7 +303,7 @@ class Settings:
     def max_file_size(self) -> int:
         """Get the maximum file size."""
         return self.app.MAX_FILE_SIZE
-        
+    
     @property
     def temp_dir(self) -> Path:
         """Get the temporary directory path."""
@@ -42,3 +42,24 @@ class ModelLoadError(CaptionGeneratorError):
 class SubtitleGenerationError(CaptionGeneratorError):
     """Raised when subtitle generation fails."""
     pass
+
+
+class StorageCapacityError(CaptionGeneratorError):
+    """Raised when there is not enough free disk space to accept new work."""
+    pass
+
+
+class RateLimitExceededError(CaptionGeneratorError):
+    """Raised when a client has used up its audio-minute budget."""
+    
+    def __init__(self, message: str, retry_after: float, details: Optional[str] = None):
+        self.retry_after = retry_after
+        super().__init__(message, details)
+
+
+class ServerBusyError(CaptionGeneratorError):
+    """Raised when the server has no capacity left to accept or queue a job."""
+    
+    def __init__(self, message: str, retry_after: float, details: Optional[str] = None):
+        self.retry_after = retry_after
+        super().__init__(message, details)
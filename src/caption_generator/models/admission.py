@@ -0,0 +1,57 @@
+"""
+Models for admission control (per-client rate limits, global capacity and scheduling).
+"""
+
+from pydantic import BaseModel, Field
+from typing import Dict
+from enum import Enum
+
+
+class JobPriority(str, Enum):
+    """Scheduling classes, most latency-sensitive first."""
+    INTERACTIVE = "interactive"
+    STANDARD = "standard"
+    BATCH = "batch"
+    
+    @property
+    def rank(self) -> int:
+        """0 for the most urgent class"""
+        return list(JobPriority).index(self)
+
+
+class JobCost(BaseModel):
+    """Estimated cost of a caption job, from the probed input."""
+    
+    audio_minutes: float = Field(description="Minutes of audio to transcribe (charged to the client)")
+    work_seconds: float = Field(description="Estimated seconds of transcription and encoding work")
+
+
+class ClassQueueStats(BaseModel):
+    """Queue wait statistics of one scheduling class."""
+    
+    queued: int = Field(0, description="Jobs of this class waiting for capacity")
+    started: int = Field(0, description="Jobs of this class that got capacity")
+    preempted: int = Field(0, description="Times a running job of this class yielded at a stage boundary")
+    average_wait: float = Field(0.0, description="Mean seconds waited before starting")
+    p95_wait: float = Field(0.0, description="95th percentile of recent waits in seconds")
+    max_wait: float = Field(0.0, description="Longest wait in seconds")
+
+
+class AdmissionStats(BaseModel):
+    """Statistics reported by the admission controller."""
+    
+    enabled: bool = Field(description="Whether admission control is active")
+    minutes_per_hour: float = Field(description="Audio minutes each client may submit per hour")
+    burst_minutes: float = Field(description="Audio minutes a client may submit at once")
+    capacity_seconds: float = Field(description="Estimated work that may run at the same time")
+    in_flight_seconds: float = Field(0.0, description="Estimated work of the jobs running now")
+    running: int = Field(0, description="Jobs holding capacity")
+    queued: int = Field(0, description="Jobs waiting for capacity")
+    admitted: int = Field(0, description="Jobs admitted since start")
+    rate_limited: int = Field(0, description="Jobs rejected because the client was over its rate")
+    rejected: int = Field(0, description="Jobs rejected because the queue was full or timed out")
+    clients: int = Field(0, description="Clients with a tracked token bucket")
+    classes: Dict[JobPriority, ClassQueueStats] = Field(
+        default_factory=lambda: {priority: ClassQueueStats() for priority in JobPriority},
+        description="Queue wait statistics per scheduling class"
+    )
@@ -0,0 +1,19 @@
+"""
+Models for stored output artifacts.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class ArtifactRecord(BaseModel):
+    """Metadata of an artifact kept in the artifact index."""
+    
+    key: str = Field(description="Storage key (full UUID hex)")
+    filename: str = Field(description="Public filename used in download URLs")
+    backend: str = Field(description="Name of the backend holding the bytes")
+    size: int = Field(description="Size in bytes")
+    sha256: str = Field(description="SHA-256 of the artifact contents")
+    content_type: str = Field("video/mp4", description="MIME type")
+    created_at: float = Field(description="Creation time (Unix seconds)")
+    expires_at: Optional[float] = Field(None, description="Expiry time (Unix seconds), None to keep forever")
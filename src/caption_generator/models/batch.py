@@ -0,0 +1,35 @@
+"""
+Models for batch caption requests (job groups with per-item status).
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from .job import JobStatus
+
+
+class BatchItem(BaseModel):
+    """State of one video in a batch."""
+    
+    index: int = Field(description="Position of the item in the request")
+    source: str = Field(description="Uploaded filename or URL")
+    status: JobStatus = Field(JobStatus.QUEUED, description="Current item status")
+    message: Optional[str] = Field(None, description="Status message")
+    language_detected: Optional[str] = Field(None, description="Detected language code")
+    video_url: Optional[str] = Field(None, description="Download URL once completed")
+    processing_time: Optional[float] = Field(
+        None,
+        description="Seconds from batch start until the item finished"
+    )
+    error: Optional[str] = Field(None, description="Error details if the item failed")
+
+
+class BatchResponse(BaseModel):
+    """Response model describing a batch job group."""
+    
+    group_id: str = Field(description="Unique batch identifier")
+    status: JobStatus = Field(description="Overall status (completed once every item finished)")
+    total: int = Field(description="Number of items in the batch")
+    completed: int = Field(description="Items captioned successfully")
+    failed: int = Field(description="Items that failed")
+    items: List[BatchItem] = Field(description="Per-item status")
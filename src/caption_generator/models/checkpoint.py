@@ -0,0 +1,21 @@
+"""
+Models for the on-disk checkpoints of resumable caption jobs.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict
+
+
+class JobManifest(BaseModel):
+    """What a job was asked to do and which of its stages have finished."""
+    
+    job_id: str = Field(description="Job identifier (reused when the job resumes)")
+    kind: str = Field(description="'video' (POST /generate-captioned-video) or 'job' (POST /jobs)")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Request parameters needed to rerun the job")
+    stages: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Finished stages and the file holding each one's result, relative to the job directory"
+    )
+    attempts: int = Field(0, description="Times the job was resumed after a restart")
+    created_at: float = Field(description="Creation time (Unix seconds)")
+    updated_at: float = Field(description="Time of the last checkpoint (Unix seconds)")
@@ -0,0 +1,63 @@
+"""
+Models describing how an output is produced from its input.
+"""
+
+from pydantic import BaseModel, Field
+from pathlib import Path
+from typing import Optional
+from enum import Enum
+
+
+class OutputType(str, Enum):
+    """Kinds of captioned output a caller can request."""
+    BURN = "burn"      # Subtitles rendered into the picture (video re-encode)
+    SOFT = "soft"      # Remux to MP4 with a selectable subtitle track
+    AUDIO = "audio"    # Audio-only M4A with a subtitle track
+
+
+class EncodePlan(BaseModel):
+    """The minimal FFmpeg operation that produces a requested output."""
+    
+    output_type: OutputType = Field(description="Requested output type")
+    video_codec: Optional[str] = Field(None, description="'copy', an encoder name, or None to drop video")
+    audio_codec: str = Field(description="'copy' or the encoder used for audio")
+    subtitle_codec: Optional[str] = Field(None, description="Codec of the subtitle track, None when burned in")
+    extension: str = Field(".mp4", description="Output file extension")
+    content_type: str = Field("video/mp4", description="MIME type of the output")
+    profile: str = Field(description="Encoder settings that affect the output bytes")
+    
+    @property
+    def uses_style(self) -> bool:
+        """Whether font styling changes the output (only when subtitles are burned in)"""
+        return self.output_type == OutputType.BURN
+    
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        return (
+            f"{self.output_type.value}: video={self.video_codec or 'none'}, "
+            f"audio={self.audio_codec}, subtitles={self.subtitle_codec or 'burned'}"
+        )
+
+
+class RenderSegment(BaseModel):
+    """A keyframe-aligned span of the video in a smart render."""
+    
+    start: float = Field(description="Start time in seconds (a keyframe)")
+    end: float = Field(description="End time in seconds (the next kept keyframe or the end of the video)")
+    reencode: bool = Field(description="Whether a caption is visible in the span (burned), else stream-copied")
+    
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class SubtitleOverlay(BaseModel):
+    """A caption track pre-rendered as transparent images, composited with FFmpeg's ``overlay`` filter."""
+    
+    key: str = Field(description="Cache key (subtitle hash, style and frame size)")
+    concat_path: Path = Field(description="ffconcat list of the caption images with their start and end times")
+    width: int = Field(description="Frame width the captions were rendered for")
+    height: int = Field(description="Frame height the captions were rendered for")
+    y: int = Field(description="Top of the caption band in the frame")
+    band_height: int = Field(description="Height of the images: the rows any caption touches")
+    captions: int = Field(description="Number of captions in the track")
@@ -0,0 +1,55 @@
+"""
+Models for asynchronous caption jobs and their downloadable artifacts.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+from enum import Enum
+
+from .pipeline import PipelineReport
+
+
+class JobStatus(str, Enum):
+    """Lifecycle states of a caption job."""
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    PREVIEW_READY = "preview_ready"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobArtifact(BaseModel):
+    """A video produced by a job (low-res preview or full-quality output)."""
+
+    kind: str = Field(description="Artifact kind (preview or full)")
+    ready: bool = Field(False, description="Whether the artifact can be downloaded")
+    url: Optional[str] = Field(None, description="Download URL once ready")
+    stream_url: Optional[str] = Field(
+        None,
+        description="URL serving the artifact while it is still being encoded"
+    )
+    processing_time: Optional[float] = Field(
+        None,
+        description="Seconds from job start until the artifact was ready"
+    )
+
+
+class JobResponse(BaseModel):
+    """Response model describing the state of a caption job."""
+
+    job_id: str = Field(description="Unique job identifier")
+    status: JobStatus = Field(description="Current job status")
+    message: Optional[str] = Field(None, description="Status message")
+    language_detected: Optional[str] = Field(None, description="Detected language code")
+    preview: JobArtifact = Field(description="Fast low-resolution captioned proxy")
+    video: JobArtifact = Field(description="Full-quality captioned video")
+    error: Optional[str] = Field(None, description="Error details if the job failed")
+    estimated_time_remaining: Optional[float] = Field(
+        None,
+        description="Estimated seconds until the job finishes, based on the probed input"
+    )
+    pipeline: Optional[PipelineReport] = Field(
+        None,
+        description="Stage timings and critical path, once the job has finished"
+    )
@@ -0,0 +1,28 @@
+"""
+Models for per-job pipeline timing reports.
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class StageTiming(BaseModel):
+    """When a pipeline stage ran, relative to the start of the pipeline."""
+    
+    name: str = Field(description="Stage name")
+    depends_on: List[str] = Field(default_factory=list, description="Stages this stage waited for")
+    start: Optional[float] = Field(None, description="Seconds from pipeline start until the stage started")
+    end: Optional[float] = Field(None, description="Seconds from pipeline start until the stage finished")
+    duration: Optional[float] = Field(None, description="Stage run time in seconds")
+    status: str = Field("pending", description="pending, running, completed, failed or cancelled")
+
+
+class PipelineReport(BaseModel):
+    """Timing of every stage of a job and the chain that determined its duration."""
+    
+    total_time: Optional[float] = Field(None, description="Wall-clock seconds for the whole pipeline")
+    critical_path: List[str] = Field(
+        default_factory=list,
+        description="Chain of dependent stages that ended last; shortening any of them shortens the job"
+    )
+    stages: List[StageTiming] = Field(default_factory=list, description="Per-stage timings")
@@ -0,0 +1,28 @@
+"""
+Models for probed input video metadata.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class VideoProbe(BaseModel):
+    """Stream and container metadata of an input video (from ffprobe)."""
+    
+    fingerprint: str = Field(description="SHA-256 of the file, the key the probe is cached under")
+    duration: float = Field(description="Duration in seconds")
+    size: int = Field(description="File size in bytes")
+    format_name: Optional[str] = Field(None, description="Container format")
+    has_video: bool = Field(description="Whether the file has a video stream")
+    has_audio: bool = Field(description="Whether the file has an audio stream")
+    video_codec: Optional[str] = Field(None, description="Codec of the first video stream")
+    audio_codec: Optional[str] = Field(None, description="Codec of the first audio stream")
+    width: Optional[int] = Field(None, description="Frame width in pixels")
+    height: Optional[int] = Field(None, description="Frame height in pixels")
+    rotation: int = Field(0, description="Display rotation in degrees (decoded frames are rotated by it)")
+    fps: Optional[float] = Field(None, description="Average frame rate")
+    pix_fmt: Optional[str] = Field(None, description="Pixel format of the first video stream")
+    keyframe_interval: Optional[float] = Field(
+        None,
+        description="Mean seconds between keyframes (sampled from the start of the video)"
+    )
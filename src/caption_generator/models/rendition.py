@@ -0,0 +1,71 @@
+"""
+Models for multi-rendition requests (several styled outputs from one input).
+"""
+
+from pydantic import BaseModel, Field, validator
+from typing import List, Optional
+
+from .pipeline import PipelineReport
+from .video import CaptionPosition
+
+
+class RenditionSpec(BaseModel):
+    """Style and size of one output of a multi-rendition request."""
+    
+    font_size: int = Field(24, ge=12, le=72, description="Font size for captions (12-72)")
+    font_color: str = Field("white", description="Font color for captions")
+    position: CaptionPosition = Field(CaptionPosition.BOTTOM, description="Caption position (top or bottom)")
+    height: Optional[int] = Field(
+        None,
+        ge=144,
+        le=4320,
+        description="Output height in pixels (width keeps the aspect ratio); input height if omitted"
+    )
+    highlight_color: Optional[str] = Field(
+        None,
+        description="Karaoke highlight color of the spoken word"
+    )
+    
+    @validator('font_color')
+    def validate_font_color(cls, v):
+        """Validate font color."""
+        if not v or not isinstance(v, str):
+            raise ValueError("Font color must be a non-empty string")
+        return v.strip().lower()
+    
+    @validator('height')
+    def validate_height(cls, v):
+        """H.264 needs even frame dimensions."""
+        if v is not None and v % 2:
+            raise ValueError("Height must be even")
+        return v
+    
+    @validator('highlight_color')
+    def validate_highlight_color(cls, v):
+        """Empty means no karaoke highlight."""
+        return v.strip().lower() if v and v.strip() else None
+
+
+class RenditionResult(BaseModel):
+    """One finished output of a multi-rendition request."""
+    
+    video_url: str = Field(description="URL to download this rendition")
+    spec: RenditionSpec = Field(description="Style and size it was rendered with")
+    cached: bool = Field(
+        False,
+        description="Whether an identical earlier output was returned instead of encoding again"
+    )
+
+
+class RenditionsResponse(BaseModel):
+    """Response model for a multi-rendition request."""
+    
+    message: str = Field(description="Success message")
+    processing_time: float = Field(description="Processing time in seconds")
+    language_detected: Optional[str] = Field(None, description="Detected language code")
+    renditions: List[RenditionResult] = Field(description="Outputs, in request order")
+    encoded: int = Field(description="Renditions encoded by this request (in a single FFmpeg run)")
+    pipeline: Optional[PipelineReport] = Field(
+        None,
+        description="Stage timings and critical path of the processing pipeline"
+    )
@@ -0,0 +1,27 @@
+"""
+Models for full-text transcript search.
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class SearchHit(BaseModel):
+    """A place in a captioned video where the query is spoken."""
+    
+    video_id: str = Field(description="Identifier of the indexed video (its output filename)")
+    video_url: Optional[str] = Field(None, description="Download URL of the captioned video")
+    job_id: Optional[str] = Field(None, description="Job that produced the video, if any")
+    language: Optional[str] = Field(None, description="Transcript language")
+    time: float = Field(description="Seconds into the video where the match starts")
+    start: float = Field(description="Start of the matching transcript passage in seconds")
+    end: float = Field(description="End of the matching transcript passage in seconds")
+    snippet: str = Field(description="Passage text with the match in [brackets]")
+
+
+class SearchResponse(BaseModel):
+    """Ranked transcript search results."""
+    
+    query: str = Field(description="The phrase searched for")
+    hits: List[SearchHit] = Field(default_factory=list, description="Best matches first")
+    indexed_videos: int = Field(description="Number of videos in the index")
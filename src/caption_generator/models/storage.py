@@ -0,0 +1,26 @@
+"""
+Models for temp-dir and artifact storage statistics.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class JanitorStats(BaseModel):
+    """Statistics reported by the temp-dir janitor."""
+    
+    runs: int = Field(0, description="Number of completed janitor passes")
+    last_run_at: Optional[float] = Field(None, description="Time of the last pass (Unix seconds)")
+    last_run_duration: Optional[float] = Field(None, description="Duration of the last pass in seconds")
+    scratch_files: int = Field(0, description="Scratch files in the temp directory")
+    scratch_bytes: int = Field(0, description="Bytes used by scratch files")
+    artifact_bytes: int = Field(0, description="Bytes used by stored artifacts")
+    free_disk_bytes: int = Field(0, description="Free bytes on the temp-dir filesystem")
+    high_water_bytes: int = Field(description="Eviction threshold for scratch + artifact bytes")
+    min_free_disk_bytes: int = Field(description="New jobs are refused below this much free disk")
+    accepting_jobs: bool = Field(True, description="Whether free disk allows new jobs")
+    files_evicted_by_age: int = Field(0, description="Scratch files removed for exceeding their max age")
+    files_evicted_by_size: int = Field(0, description="Scratch files removed to get under the high-water mark")
+    artifacts_expired: int = Field(0, description="Artifacts removed after their TTL")
+    artifact_bytes_evicted: int = Field(0, description="Artifact bytes removed to get under the high-water mark")
+    jobs_refused: int = Field(0, description="Jobs refused for lack of disk space")
@@ -29,6 +29,9 @@ class TranscriptSegment(BaseModel):
     start: float = Field(description="Start time in seconds")
     end: float = Field(description="End time in seconds")
     text: str = Field(description="Segment text")
+    words: Optional[List[WordAlignment]] = Field(
+        None, description="Aligned words of the caption, when the transcript has word timings"
+    )
     
     @validator('end')
     def end_after_start(cls, v, values):
@@ -38,6 +41,14 @@ class TranscriptSegment(BaseModel):
         return v
 
 
+class CaptionWindowResponse(BaseModel):
+    """Captions of a job matching a time window or search query."""
+    
+    job_id: str = Field(description="Job the captions belong to")
+    total: int = Field(description="Number of captions in the whole job")
+    captions: List[TranscriptSegment] = Field(description="Matching captions in time order")
+
+
 class TranscriptionSegment(BaseModel):
     """Model for transcription segments."""
     
@@ -0,0 +1,21 @@
+"""
+Models for transcription scheduling statistics.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class SchedulerStats(BaseModel):
+    """Statistics reported by the transcription micro-batcher."""
+    
+    max_batch_size: int = Field(description="Maximum windows per model batch")
+    max_wait_ms: float = Field(description="Longest a window waits for a batch to fill")
+    requests: int = Field(0, description="Transcription requests submitted")
+    batches: int = Field(0, description="Model batches dispatched")
+    items: int = Field(0, description="Audio windows processed")
+    cancelled_items: int = Field(0, description="Queued windows dropped because their request was cancelled")
+    average_batch_size: float = Field(0.0, description="Mean windows per batch")
+    last_batch_size: Optional[int] = Field(None, description="Windows in the most recent batch")
+    last_batch_duration: Optional[float] = Field(None, description="Seconds the most recent batch took")
+    max_queue_wait_ms: float = Field(0.0, description="Longest time a window waited before dispatch")
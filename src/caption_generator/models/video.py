@@ -6,6 +6,9 @@ from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from enum import Enum
 
+from .encode import OutputType
+from .pipeline import PipelineReport
+
 
 class CaptionPosition(str, Enum):
     """Available caption positions."""
@@ -51,6 +54,19 @@ class VideoResponse(BaseModel):
         description="Detected language code"
     )
     job_id: Optional[str] = Field(None, description="Unique job identifier")
+    output_type: OutputType = Field(OutputType.BURN, description="Kind of output produced")
+    cached: bool = Field(
+        False,
+        description="Whether an identical earlier output was returned instead of encoding again"
+    )
+    coalesced: bool = Field(
+        False,
+        description="Whether the result was shared with an identical request that was already in progress"
+    )
+    pipeline: Optional[PipelineReport] = Field(
+        None,
+        description="Stage timings and critical path of the processing pipeline"
+    )
 
 
 class ErrorResponse(BaseModel):
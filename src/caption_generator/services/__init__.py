@@ -4,5 +4,6 @@ Services package for video processing, transcription, and subtitle generation.
 from .video_service import VideoProcessingService
 from .whisperx_service import WhisperXService
 from .ffmpeg_service import FFmpegService
+from .job_service import JobManager
 
-__all__ = ['VideoProcessingService', 'WhisperXService', 'FFmpegService']
\ No newline at end of file
+__all__ = ['VideoProcessingService', 'WhisperXService', 'FFmpegService', 'JobManager']
@@ -0,0 +1,419 @@
+"""
+Admission control: per-client rate limits, global capacity and the order queued jobs start in.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.exceptions import RateLimitExceededError, ServerBusyError
+from ..models.admission import AdmissionStats, JobCost, JobPriority
+from ..models.probe import VideoProbe
+
+
+class TokenBucket:
+    """
+    Token bucket holding up to ``capacity`` tokens, refilled continuously.
+    
+    A cost larger than the whole bucket is accepted once the bucket is
+    full and leaves it in debt, so long inputs are throttled rather than
+    refused outright.
+    """
+    
+    def __init__(self, capacity: float, refill_per_second: float, now: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = now
+    
+    def take(self, cost: float, now: float) -> float:
+        """Take ``cost`` tokens; returns 0 on success, else seconds until it would succeed"""
+        self._refill(now)
+        required = min(cost, self.capacity)
+        if self.tokens >= required:
+            self.tokens -= cost
+            return 0.0
+        if self.refill_per_second <= 0:
+            return float("inf")
+        return (required - self.tokens) / self.refill_per_second
+    
+    def give_back(self, cost: float, now: float):
+        """Return tokens taken for work that was never started"""
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + cost)
+    
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+    
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated = now
+
+
+class AdmissionTicket:
+    """Capacity held by an admitted job; ``release`` it when the job ends."""
+    
+    def __init__(
+        self,
+        controller: "AdmissionController",
+        cost: JobCost,
+        work: float,
+        client: str,
+        priority: JobPriority
+    ):
+        self.cost = cost
+        self.work = work
+        self.client = client
+        self.priority = priority
+        self._controller = controller
+        self._held = False
+        self._released = False
+        # Set while the job is queued (initially, or after yielding at a checkpoint)
+        self._waiter: Optional["_Waiter"] = None
+    
+    async def checkpoint(self):
+        """
+        Stage boundary: yield the capacity if a higher-class job is waiting for it.
+        
+        Returns at once in the common case; otherwise the job goes back to
+        the queue (ahead of fresh jobs of its class) and this waits until it
+        gets capacity again.
+        """
+        if self._released:
+            return
+        if self._waiter is None:
+            if not self._controller._should_preempt(self):
+                return
+            self._controller._suspend(self)
+        if self._waiter is not None:
+            await asyncio.shield(self._waiter.future)
+    
+    def release(self):
+        """Give the capacity back, or leave the queue (idempotent)"""
+        if not self._released:
+            self._released = True
+            self._controller._release(self)
+
+
+class _Waiter:
+    """A job waiting for capacity."""
+    
+    def __init__(self, ticket: AdmissionTicket, enqueued_at: float, resumed: bool):
+        self.ticket = ticket
+        self.enqueued_at = enqueued_at
+        self.resumed = resumed
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class AdmissionController:
+    """
+    Decides whether a caption job may start, must wait, or is rejected.
+    
+    Every job is costed from its probe: audio minutes (what the client is
+    charged) and estimated seconds of work (what it occupies on this
+    machine, which grows with resolution). Each client has a token bucket
+    in audio minutes; a job over the client's budget is rejected with the
+    time until it would fit. Admitted jobs then need global capacity: the
+    estimated work running at once is kept under ``capacity_seconds``
+    (a job that is larger on its own may run when nothing else does).
+    Jobs beyond that wait in a bounded queue; when the queue is full or the
+    wait times out the job is rejected and its minutes refunded.
+    
+    Queued jobs start in order of priority class (interactive, standard,
+    batch; a job moves up one class per ``aging_seconds`` waited so batch
+    work is never starved). Within a class, clients get weighted fair
+    shares of the work: each client's virtual finish time advances by
+    ``work / weight`` per started job, and the job with the earliest finish
+    time starts next, which also makes every client's shortest job go
+    first. Running jobs of a lower class yield their capacity at stage
+    boundaries (``AdmissionTicket.checkpoint``) to a queued higher-class
+    job that would then fit.
+    """
+    
+    def __init__(
+        self,
+        estimate_work: Callable[[VideoProbe], float],
+        minutes_per_hour: float = settings.admission.MINUTES_PER_HOUR,
+        burst_minutes: float = settings.admission.BURST_MINUTES,
+        capacity_seconds: float = settings.admission.capacity_seconds,
+        max_queue: int = settings.admission.MAX_QUEUE,
+        queue_timeout: float = settings.admission.QUEUE_TIMEOUT,
+        max_clients: int = settings.admission.MAX_CLIENTS,
+        interactive_max_minutes: float = settings.admission.INTERACTIVE_MAX_MINUTES,
+        aging_seconds: float = settings.admission.PRIORITY_AGING_SECONDS,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        preemption: bool = settings.admission.PREEMPTION,
+        enabled: bool = settings.admission.ENABLED,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.estimate_work = estimate_work
+        self.minutes_per_hour = minutes_per_hour
+        self.burst_minutes = burst_minutes
+        self.capacity_seconds = capacity_seconds
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.max_clients = max(1, max_clients)
+        self.interactive_max_minutes = interactive_max_minutes
+        self.aging_seconds = aging_seconds
+        self.tenant_weights = settings.admission.tenant_weights if tenant_weights is None else tenant_weights
+        self.preemption = preemption
+        self.enabled = enabled
+        self.clock = clock
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._in_flight = 0.0
+        self._running = 0
+        self._waiters: List[_Waiter] = []
+        # Weighted fair queuing: system virtual time and each client's last virtual finish time
+        self._virtual_time = 0.0
+        self._finish_tags: Dict[str, float] = {}
+        self._recent_waits: Dict[JobPriority, Deque[float]] = {
+            priority: deque(maxlen=1000) for priority in JobPriority
+        }
+        self._total_waits: Dict[JobPriority, float] = {priority: 0.0 for priority in JobPriority}
+        self.stats = AdmissionStats(
+            enabled=enabled,
+            minutes_per_hour=minutes_per_hour,
+            burst_minutes=burst_minutes,
+            capacity_seconds=capacity_seconds
+        )
+    
+    def estimate(self, probe: Optional[VideoProbe]) -> JobCost:
+        """Cost of a job from its probe (free if the input could not be probed)"""
+        if probe is None:
+            return JobCost(audio_minutes=0.0, work_seconds=0.0)
+        return JobCost(
+            audio_minutes=round(probe.duration / 60, 3),
+            work_seconds=self.estimate_work(probe)
+        )
+    
+    def classify(self, requested: JobPriority, cost: JobCost) -> JobPriority:
+        """Scheduling class of a job: long inputs are not treated as interactive"""
+        if requested == JobPriority.INTERACTIVE and cost.audio_minutes > self.interactive_max_minutes:
+            return JobPriority.STANDARD
+        return requested
+    
+    def charge(self, client: str, cost: JobCost):
+        """
+        Charge a job's audio minutes to a client's bucket.
+        
+        Raises:
+            RateLimitExceededError: If the client is over its budget
+        """
+        if not self.enabled or cost.audio_minutes <= 0:
+            return
+        now = self.clock()
+        wait = self._bucket(client, now).take(cost.audio_minutes, now)
+        if wait > 0:
+            self.stats.rate_limited += 1
+            raise RateLimitExceededError(
+                f"Rate limit exceeded: {cost.audio_minutes:.1f} audio minutes requested, "
+                f"limit is {self.minutes_per_hour:g} per hour",
+                retry_after=wait
+            )
+    
+    def refund(self, client: str, cost: JobCost):
+        """Give back minutes charged for a job that was rejected before it ran"""
+        if not self.enabled or cost.audio_minutes <= 0 or client not in self._buckets:
+            return
+        self._buckets[client].give_back(cost.audio_minutes, self.clock())
+    
+    def check_capacity(self):
+        """
+        Fail fast if a new job could neither run nor queue right now.
+        
+        Raises:
+            ServerBusyError: If the wait queue is full
+        """
+        if self.enabled and self._queue_length() >= self.max_queue and self._in_flight > 0:
+            self.stats.rejected += 1
+            raise ServerBusyError("Server is at capacity, try again later", retry_after=self._retry_after())
+    
+    async def acquire(
+        self,
+        cost: JobCost,
+        client: str = "anonymous",
+        priority: JobPriority = JobPriority.STANDARD
+    ) -> AdmissionTicket:
+        """
+        Wait until the job is scheduled and fits in the global capacity.
+        
+        Raises:
+            ServerBusyError: If the queue is full or the wait times out
+        """
+        work = cost.work_seconds if self.enabled else 0.0
+        ticket = AdmissionTicket(self, cost, work, client, priority)
+        waiter = self._enqueue(ticket, resumed=False)
+        self._wake()
+        if waiter.future.done():
+            return ticket
+        if self._queue_length() > self.max_queue:
+            ticket.release()
+            self.stats.rejected += 1
+            raise ServerBusyError("Server is at capacity, try again later", retry_after=self._retry_after())
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            ticket.release()
+            self.stats.rejected += 1
+            raise ServerBusyError(
+                f"Timed out after {self.queue_timeout:g}s waiting for capacity",
+                retry_after=self._retry_after()
+            )
+        except BaseException:
+            ticket.release()
+            raise
+        return ticket
+    
+    async def admit(
+        self,
+        client: str,
+        cost: JobCost,
+        priority: JobPriority = JobPriority.STANDARD
+    ) -> AdmissionTicket:
+        """Charge the client, then wait for capacity (refunding if rejected)"""
+        self.charge(client, cost)
+        try:
+            return await self.acquire(cost, client, self.classify(priority, cost))
+        except ServerBusyError:
+            self.refund(client, cost)
+            raise
+    
+    def _fits(self, work: float) -> bool:
+        return self._in_flight <= 0 or self._in_flight + work <= self.capacity_seconds
+    
+    def _queue_length(self) -> int:
+        """Queued new jobs (jobs that yielded at a checkpoint do not count)"""
+        return sum(1 for waiter in self._waiters if not waiter.resumed)
+    
+    def _enqueue(self, ticket: AdmissionTicket, resumed: bool) -> _Waiter:
+        waiter = _Waiter(ticket, self.clock(), resumed)
+        ticket._waiter = waiter
+        self._waiters.append(waiter)
+        return waiter
+    
+    def _start_tag(self, client: str) -> float:
+        return max(self._virtual_time, self._finish_tags.get(client, 0.0))
+    
+    def _order(self, waiter: _Waiter, now: float) -> Tuple[int, bool, float, float]:
+        """Sort key of a queued job: aged class, yielded jobs first, virtual finish time, arrival"""
+        ticket = waiter.ticket
+        rank = ticket.priority.rank
+        if self.aging_seconds > 0:
+            rank = max(0, rank - int((now - waiter.enqueued_at) / self.aging_seconds))
+        finish = self._start_tag(ticket.client) + ticket.work / self.tenant_weights.get(ticket.client, 1.0)
+        return rank, not waiter.resumed, finish, waiter.enqueued_at
+    
+    def _next_waiter(self) -> Optional[_Waiter]:
+        if not self._waiters:
+            return None
+        now = self.clock()
+        return min(self._waiters, key=lambda waiter: self._order(waiter, now))
+    
+    def _wake(self):
+        """Start queued jobs in scheduling order while the next one fits"""
+        while True:
+            waiter = self._next_waiter()
+            if waiter is None or not self._fits(waiter.ticket.work):
+                break
+            self._waiters.remove(waiter)
+            self._grant(waiter)
+        self._update_stats()
+    
+    def _grant(self, waiter: _Waiter):
+        ticket = waiter.ticket
+        ticket._waiter = None
+        ticket._held = True
+        self._in_flight += ticket.work
+        self._running += 1
+        if not waiter.resumed:
+            # Charge the client's fair share and record how long the job queued
+            start = self._start_tag(ticket.client)
+            self._finish_tags[ticket.client] = start + ticket.work / self.tenant_weights.get(ticket.client, 1.0)
+            self._virtual_time = start
+            if len(self._finish_tags) > self.max_clients:
+                self._finish_tags = {
+                    client: finish for client, finish in self._finish_tags.items() if finish > self._virtual_time
+                }
+            self._record_wait(ticket.priority, self.clock() - waiter.enqueued_at)
+            self.stats.admitted += 1
+        waiter.future.set_result(True)
+    
+    def _should_preempt(self, ticket: AdmissionTicket) -> bool:
+        """Whether yielding ``ticket``'s capacity lets a queued higher-class job start"""
+        if not (self.enabled and self.preemption and ticket._held):
+            return False
+        waiter = self._next_waiter()
+        if waiter is None or waiter.ticket.priority.rank >= ticket.priority.rank:
+            return False
+        remaining = self._in_flight - ticket.work
+        return remaining <= 0 or remaining + waiter.ticket.work <= self.capacity_seconds
+    
+    def _suspend(self, ticket: AdmissionTicket):
+        """Take a running job's capacity back and queue it again"""
+        print(f"⏸️  Preempting a {ticket.priority.value} job of {ticket.work:.0f}s for higher-priority work")
+        ticket._held = False
+        self._in_flight = max(0.0, self._in_flight - ticket.work)
+        self._running -= 1
+        self.stats.classes[ticket.priority].preempted += 1
+        self._enqueue(ticket, resumed=True)
+        self._wake()
+    
+    def _release(self, ticket: AdmissionTicket):
+        """Return a ticket's capacity, or drop it from the queue"""
+        if ticket._held:
+            ticket._held = False
+            self._in_flight = max(0.0, self._in_flight - ticket.work)
+            self._running -= 1
+        elif ticket._waiter is not None:
+            waiter = ticket._waiter
+            ticket._waiter = None
+            self._waiters.remove(waiter)
+            waiter.future.cancel()
+        # The next queued job may fit now
+        self._wake()
+    
+    def _record_wait(self, priority: JobPriority, waited: float):
+        waits = self._recent_waits[priority]
+        waits.append(waited)
+        self._total_waits[priority] += waited
+        stats = self.stats.classes[priority]
+        stats.started += 1
+        stats.average_wait = round(self._total_waits[priority] / stats.started, 3)
+        stats.max_wait = round(max(stats.max_wait, waited), 3)
+        ordered = sorted(waits)
+        stats.p95_wait = round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3)
+    
+    def _retry_after(self) -> float:
+        """Rough seconds until capacity frees up: the shorter of the running work and the queue timeout"""
+        return max(1.0, min(self._in_flight, self.queue_timeout))
+    
+    def _bucket(self, client: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                self._prune(now)
+            bucket = TokenBucket(self.burst_minutes, self.minutes_per_hour / 3600, now)
+            self._buckets[client] = bucket
+        self._buckets.move_to_end(client)
+        return bucket
+    
+    def _prune(self, now: float):
+        """Forget refilled buckets (they behave like new ones), least recently used first"""
+        for client in [c for c, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[client]
+        while len(self._buckets) >= self.max_clients:
+            self._buckets.popitem(last=False)
+    
+    def _update_stats(self):
+        self.stats.in_flight_seconds = round(self._in_flight, 1)
+        self.stats.running = self._running
+        self.stats.queued = len(self._waiters)
+        self.stats.clients = len(self._buckets)
+        for priority in JobPriority:
+            self.stats.classes[priority].queued = sum(
+                1 for waiter in self._waiters if waiter.ticket.priority == priority
+            )
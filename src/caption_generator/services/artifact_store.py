@@ -0,0 +1,522 @@
+"""
+Artifact store for captioned outputs with pluggable storage backends.
+
+Artifacts are addressed by full UUID keys, their metadata lives in a SQLite
+index next to the data, and expiry is driven by ``expires_at`` timestamps in
+that index. Because the index survives restarts, the periodic janitor
+(``services/janitor.py``) removes expired artifacts regardless of which
+process (or request) created them. The index also caches the transcripts of
+inputs by content hash. Directories and the index database are created on
+first use, so building a store writes nothing to disk.
+"""
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from ..models.artifact import ArtifactRecord
+from ..core.config import settings
+from ..utils.hashing import hash_file
+from ..utils.serialization import to_json
+
+
+class ArtifactBackend(ABC):
+    """Where artifact bytes are kept."""
+    
+    name: str = "base"
+    
+    @abstractmethod
+    def put_file(self, key: str, source_path: Path) -> None:
+        """Store a file under ``key``; the source file is consumed (moved)."""
+    
+    @abstractmethod
+    def local_path(self, key: str) -> Optional[Path]:
+        """Return a local path with the artifact's bytes, or None if missing."""
+    
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove an artifact; missing artifacts are ignored."""
+
+
+class LocalArtifactBackend(ArtifactBackend):
+    """All artifacts in a single flat directory."""
+    
+    name = "local"
+    
+    def __init__(self, root: Path):
+        self.root = Path(root)
+    
+    def _path(self, key: str) -> Path:
+        return self.root / key
+    
+    def put_file(self, key: str, source_path: Path) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(source_path), str(path))
+    
+    def local_path(self, key: str) -> Optional[Path]:
+        path = self._path(key)
+        return path if path.exists() else None
+    
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ShardedArtifactBackend(LocalArtifactBackend):
+    """
+    Artifacts spread over nested directories derived from the key
+    (``ab/cd/abcd...``) so no single directory grows huge.
+    """
+    
+    name = "sharded"
+    
+    def __init__(self, root: Path, depth: int = 2, width: int = 2):
+        super().__init__(root)
+        self.depth = depth
+        self.width = width
+    
+    def _path(self, key: str) -> Path:
+        shards = [key[i * self.width:(i + 1) * self.width] for i in range(self.depth)]
+        return self.root.joinpath(*shards, key)
+    
+    def delete(self, key: str) -> None:
+        super().delete(key)
+        # Prune shard directories that became empty
+        parent = self._path(key).parent
+        for _ in range(self.depth):
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+
+
+class S3ArtifactBackend(ArtifactBackend):
+    """
+    Artifacts in an S3-compatible bucket.
+    
+    ``client`` only needs the boto3-style ``upload_file``, ``download_file``
+    and ``delete_object`` methods, so any S3-compatible service (or a local
+    stand-in) can be used. Downloads are cached in ``cache_dir`` so range
+    requests are served from local disk.
+    """
+    
+    name = "s3"
+    
+    def __init__(self, client, bucket: str, prefix: str, cache_dir: Path):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache_dir = Path(cache_dir)
+    
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+    
+    def put_file(self, key: str, source_path: Path) -> None:
+        self.client.upload_file(str(source_path), self.bucket, self._object_key(key))
+        Path(source_path).unlink()
+    
+    def local_path(self, key: str) -> Optional[Path]:
+        cached = self.cache_dir / key
+        if cached.exists():
+            return cached
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # A name of its own, so concurrent fetches of one key do not write into each other
+        fd, partial = tempfile.mkstemp(prefix=f".{key}.", suffix=".part", dir=self.cache_dir)
+        os.close(fd)
+        partial = Path(partial)
+        try:
+            self.client.download_file(self.bucket, self._object_key(key), str(partial))
+        except Exception as e:
+            print(f"Warning: Could not fetch artifact {key} from S3: {e}")
+            partial.unlink(missing_ok=True)
+            return None
+        partial.replace(cached)
+        return cached
+    
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        (self.cache_dir / key).unlink(missing_ok=True)
+
+
+def create_s3_client():
+    """Create a boto3 S3 client (boto3 is only required for the s3 backend)"""
+    try:
+        import boto3
+    except ImportError:
+        raise RuntimeError("boto3 is required for ARTIFACT_BACKEND=s3 (pip install boto3)")
+    return boto3.client("s3", endpoint_url=settings.storage.S3_ENDPOINT_URL)
+
+
+class ArtifactIndex:
+    """SQLite index of artifact metadata (the database is opened on first use)."""
+    
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+    
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Only accessed while holding self._lock
+        if self._connection is None:
+            self._connection = self._open()
+        return self._connection
+    
+    def _open(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    key TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL UNIQUE,
+                    backend TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    content_type TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_artifacts_expires ON artifacts (expires_at)"
+            )
+            # Maps the inputs of an encode (content hashes, style, encoder profile) to its output
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS output_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    artifact_key TEXT NOT NULL
+                )
+                """
+            )
+            # Aligned transcripts by input content hash and requested language ('' = detected)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcript_cache (
+                    input_hash TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    transcript TEXT NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (input_hash, language)
+                )
+                """
+            )
+        return conn
+    
+    def add(self, record: ArtifactRecord):
+        """Insert or replace an artifact record."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts VALUES "
+                "(:key, :filename, :backend, :size, :sha256, :content_type, :created_at, :expires_at)",
+                record.dict()
+            )
+    
+    def get_by_filename(self, filename: str) -> Optional[ArtifactRecord]:
+        """Look up an artifact by its public filename."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM artifacts WHERE filename = ?", (filename,)
+            ).fetchone()
+        return ArtifactRecord(**dict(row)) if row else None
+    
+    def delete(self, key: str):
+        """Remove an artifact record."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM output_cache WHERE artifact_key = ?", (key,))
+    
+    def set_cached(self, cache_key: str, artifact_key: str):
+        """Record the artifact produced for an output cache key."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO output_cache VALUES (?, ?)", (cache_key, artifact_key)
+            )
+    
+    def get_cached(self, cache_key: str) -> Optional[ArtifactRecord]:
+        """Artifact recorded for an output cache key."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT artifacts.* FROM output_cache "
+                "JOIN artifacts ON artifacts.key = output_cache.artifact_key "
+                "WHERE output_cache.cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+        return ArtifactRecord(**dict(row)) if row else None
+    
+    def set_transcript(self, input_hash: str, language: str, transcript: str, expires_at: Optional[float]):
+        """Record the transcript (JSON) of an input in a language."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcript_cache VALUES (?, ?, ?, ?)",
+                (input_hash, language, transcript, expires_at)
+            )
+    
+    def get_transcript(self, input_hash: str, language: str, now: float) -> Optional[str]:
+        """Unexpired transcript (JSON) recorded for an input in a language."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transcript FROM transcript_cache "
+                "WHERE input_hash = ? AND language = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (input_hash, language, now)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def delete_expired_transcripts(self, now: float) -> int:
+        """Remove transcripts whose expiry time has passed; returns the number removed."""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM transcript_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            ).rowcount
+    
+    def set_expiry(self, key: str, expires_at: Optional[float]):
+        """Change when an artifact expires."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE artifacts SET expires_at = ? WHERE key = ?", (expires_at, key))
+    
+    def expired(self, now: float) -> List[ArtifactRecord]:
+        """Records whose expiry time has passed."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM artifacts WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (now,)
+            ).fetchall()
+        return [ArtifactRecord(**dict(row)) for row in rows]
+    
+    def oldest(self, created_before: float) -> Iterator[ArtifactRecord]:
+        """Records created before a time, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM artifacts WHERE created_at <= ? ORDER BY created_at",
+                (created_before,)
+            ).fetchall()
+        return (ArtifactRecord(**dict(row)) for row in rows)
+    
+    def total_size(self) -> int:
+        """Sum of the sizes of all records."""
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        return int(row[0])
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class ArtifactStore:
+    """Stores finished outputs, serves them by filename and expires them."""
+    
+    def __init__(
+        self,
+        backend: ArtifactBackend,
+        index: ArtifactIndex,
+        ttl_seconds: Optional[int] = settings.storage.TTL_SECONDS
+    ):
+        self.backend = backend
+        self.index = index
+        self.ttl_seconds = ttl_seconds
+    
+    @staticmethod
+    def new_key() -> str:
+        """Generate a collision-resistant artifact key."""
+        return uuid.uuid4().hex
+    
+    def put(
+        self,
+        source_path: Path,
+        filename: str,
+        key: Optional[str] = None,
+        content_type: str = "video/mp4",
+        ttl_seconds: Optional[int] = None,
+        cache_key: Optional[str] = None
+    ) -> ArtifactRecord:
+        """
+        Move a finished file into the store and index it.
+        
+        Args:
+            source_path: File to store (it is moved, not copied)
+            filename: Public filename used in download URLs
+            key: Storage key; a new UUID key is generated if omitted
+            content_type: MIME type of the artifact
+            ttl_seconds: Lifetime override; defaults to the store TTL
+            cache_key: Reuse this artifact for later encodes with the same key
+                (see ``find_cached``)
+        """
+        source_path = Path(source_path)
+        now = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        record = ArtifactRecord(
+            key=key or self.new_key(),
+            filename=filename,
+            backend=self.backend.name,
+            size=source_path.stat().st_size,
+            sha256=hash_file(source_path),
+            content_type=content_type,
+            created_at=now,
+            expires_at=now + ttl if ttl else None
+        )
+        self.backend.put_file(record.key, source_path)
+        self.index.add(record)
+        if cache_key:
+            self.index.set_cached(cache_key, record.key)
+        return record
+    
+    async def put_async(self, source_path: Path, filename: str, **kwargs) -> ArtifactRecord:
+        """``put`` in a worker thread (hashing and uploads can be slow)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.put(source_path, filename, **kwargs)
+        )
+    
+    def get(self, filename: str) -> Optional[ArtifactRecord]:
+        """Metadata of a stored artifact, if it exists and has not expired."""
+        record = self.index.get_by_filename(filename)
+        if record is None or (record.expires_at and record.expires_at <= time.time()):
+            return None
+        return record
+    
+    async def get_async(self, filename: str) -> Optional[ArtifactRecord]:
+        """``get`` in a worker thread, for request handlers."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get, filename)
+    
+    def find_cached(self, cache_key: str) -> Optional[ArtifactRecord]:
+        """
+        Artifact previously stored under an output cache key, if still available.
+        
+        A hit restarts the artifact's TTL so it is not expired right after
+        being handed out again.
+        """
+        record = self.index.get_cached(cache_key)
+        if record is None or (record.expires_at and record.expires_at <= time.time()):
+            return None
+        if self.ttl_seconds:
+            record.expires_at = time.time() + self.ttl_seconds
+            self.index.set_expiry(record.key, record.expires_at)
+        return record
+    
+    def cache_transcript(self, input_hash: str, language: Optional[str], transcript: Dict):
+        """
+        Keep the transcript of an input for later requests with the same content.
+        
+        ``language`` is the requested language (None: detected), so a request
+        that forces another language is transcribed again. The transcript
+        expires with the store TTL.
+        """
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        self.index.set_transcript(input_hash, language or "", to_json(transcript), expires_at)
+    
+    def find_transcript(self, input_hash: str, language: Optional[str]) -> Optional[Dict]:
+        """Transcript cached for an input's SHA-256 and requested language, if any."""
+        transcript = self.index.get_transcript(input_hash, language or "", time.time())
+        return json.loads(transcript) if transcript is not None else None
+    
+    async def cache_transcript_async(self, input_hash: str, language: Optional[str], transcript: Dict):
+        """``cache_transcript`` in a worker thread."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.cache_transcript, input_hash, language, transcript)
+    
+    async def find_transcript_async(self, input_hash: str, language: Optional[str]) -> Optional[Dict]:
+        """``find_transcript`` in a worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.find_transcript, input_hash, language)
+    
+    def resolve(self, filename: str) -> Optional[Path]:
+        """Local path of a stored artifact, fetching it from the backend if needed."""
+        record = self.get(filename)
+        if record is None:
+            return None
+        return self.backend.local_path(record.key)
+    
+    async def resolve_async(self, filename: str) -> Optional[Path]:
+        """``resolve`` in a worker thread (the S3 backend downloads uncached artifacts)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.resolve, filename)
+    
+    def delete(self, filename: str) -> bool:
+        """Delete an artifact and its index entry."""
+        record = self.index.get_by_filename(filename)
+        if record is None:
+            return False
+        self.backend.delete(record.key)
+        self.index.delete(record.key)
+        return True
+    
+    def expire(self, now: Optional[float] = None) -> int:
+        """Delete every artifact (and cached transcript) whose TTL has elapsed; returns the artifacts removed."""
+        now = now if now is not None else time.time()
+        self.index.delete_expired_transcripts(now)
+        removed = 0
+        for record in self.index.expired(now):
+            try:
+                self.backend.delete(record.key)
+                self.index.delete(record.key)
+                removed += 1
+            except Exception as e:
+                print(f"Warning: Could not expire artifact {record.filename}: {e}")
+        return removed
+    
+    def evict_oldest(self, bytes_to_free: int, min_age_seconds: float = 0) -> int:
+        """
+        Delete the oldest artifacts until ``bytes_to_free`` bytes are released.
+        
+        Artifacts younger than ``min_age_seconds`` are kept. Returns the number
+        of bytes actually freed.
+        """
+        freed = 0
+        cutoff = time.time() - min_age_seconds
+        for record in self.index.oldest(created_before=cutoff):
+            if freed >= bytes_to_free:
+                break
+            try:
+                self.backend.delete(record.key)
+                self.index.delete(record.key)
+                freed += record.size
+            except Exception as e:
+                print(f"Warning: Could not evict artifact {record.filename}: {e}")
+        return freed
+    
+    def total_size(self) -> int:
+        """Total bytes of all indexed artifacts."""
+        return self.index.total_size()
+
+
+def create_artifact_store() -> ArtifactStore:
+    """Build the artifact store configured in settings."""
+    storage = settings.storage
+    if storage.backend == "local":
+        backend = LocalArtifactBackend(storage.ARTIFACT_DIR)
+    elif storage.backend == "sharded":
+        backend = ShardedArtifactBackend(storage.ARTIFACT_DIR, depth=storage.SHARD_DEPTH)
+    elif storage.backend == "s3":
+        if not storage.S3_BUCKET:
+            raise ValueError("S3_BUCKET must be set for ARTIFACT_BACKEND=s3")
+        backend = S3ArtifactBackend(
+            create_s3_client(),
+            bucket=storage.S3_BUCKET,
+            prefix=storage.S3_PREFIX,
+            cache_dir=storage.ARTIFACT_DIR / "s3-cache"
+        )
+    else:
+        raise ValueError(f"Unknown artifact backend: {storage.BACKEND}")
+    return ArtifactStore(backend, ArtifactIndex(storage.INDEX_PATH))
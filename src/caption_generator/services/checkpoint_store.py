@@ -0,0 +1,195 @@
+"""
+On-disk checkpoints that let caption jobs survive a server restart.
+"""
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..models.checkpoint import JobManifest
+from ..core.config import settings
+from ..utils.serialization import to_json
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write a file so that a crash leaves either the old or the new contents"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JobCheckpoint:
+    """
+    The checkpoint directory of one job.
+    
+    Every stage result is written atomically and only then recorded in the
+    manifest, so a stage listed there is always complete on disk. The job
+    directory also holds scratch directories (e.g. smart-render segments)
+    that survive a restart.
+    """
+    
+    def __init__(self, directory: Path, manifest: JobManifest):
+        self.directory = directory
+        self.manifest = manifest
+    
+    @property
+    def job_id(self) -> str:
+        return self.manifest.job_id
+    
+    @property
+    def params(self) -> Dict[str, Any]:
+        return self.manifest.params
+    
+    def path(self, stage: str) -> Optional[Path]:
+        """File holding a finished stage's result, or None"""
+        name = self.manifest.stages.get(stage)
+        if name is None:
+            return None
+        path = self.directory / name
+        return path if path.exists() else None
+    
+    def has(self, stage: str) -> bool:
+        return self.path(stage) is not None
+    
+    def work_dir(self, name: str) -> Path:
+        """Scratch directory of a stage that is kept until the job finishes"""
+        path = self.directory / name
+        path.mkdir(exist_ok=True)
+        return path
+    
+    def save_file(self, stage: str, source: Path) -> Path:
+        """Record a file as a stage result (hard-linked when possible, else copied)"""
+        name = f"{stage}{source.suffix}"
+        path = self.directory / name
+        tmp_path = path.with_name(f".{name}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+        self._record(stage, name)
+        return path
+    
+    def save_json(self, stage: str, data: Any):
+        name = f"{stage}.json"
+        _write_atomic(self.directory / name, to_json(data).encode())
+        self._record(stage, name)
+    
+    def load_json(self, stage: str) -> Optional[Any]:
+        path = self.path(stage)
+        if path is None:
+            return None
+        return json.loads(path.read_text())
+    
+    def save_audio(self, stage: str, audio: np.ndarray):
+        """Store 16 kHz float samples as 16-bit PCM (what they were decoded from, so lossless)"""
+        name = f"{stage}.npy"
+        path = self.directory / name
+        tmp_path = path.with_name(f".{name}.tmp")
+        pcm = np.clip(np.round(audio * 32768.0), -32768, 32767).astype(np.int16)
+        with open(tmp_path, "wb") as f:
+            np.save(f, pcm)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._record(stage, name)
+    
+    def load_audio(self, stage: str) -> Optional[np.ndarray]:
+        path = self.path(stage)
+        if path is None:
+            return None
+        return np.load(path).astype(np.float32) / 32768.0
+    
+    async def save_json_async(self, stage: str, data: Any):
+        await asyncio.get_running_loop().run_in_executor(None, self.save_json, stage, data)
+    
+    async def save_audio_async(self, stage: str, audio: np.ndarray):
+        await asyncio.get_running_loop().run_in_executor(None, self.save_audio, stage, audio)
+    
+    async def load_audio_async(self, stage: str) -> Optional[np.ndarray]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.load_audio, stage)
+    
+    def record_attempt(self):
+        """Count a resume, so a job that keeps crashing the server is eventually dropped"""
+        self.manifest.attempts += 1
+        self._write_manifest()
+    
+    def _record(self, stage: str, name: str):
+        self.manifest.stages[stage] = name
+        self._write_manifest()
+        print(f"💾 Job {self.job_id}: checkpointed {stage}")
+    
+    def _write_manifest(self):
+        self.manifest.updated_at = time.time()
+        _write_atomic(self.directory / MANIFEST_NAME, self.manifest.json().encode())
+
+
+class CheckpointStore:
+    """
+    One directory per unfinished job under ``root``.
+    
+    A job's directory is deleted when the job ends (completed, failed or
+    cancelled); whatever is left at startup belongs to jobs that were
+    interrupted by a crash or restart.
+    """
+    
+    def __init__(self, root: Path):
+        # Created with the first checkpoint
+        self.root = Path(root)
+    
+    def create(self, kind: str, params: Dict[str, Any], job_id: Optional[str] = None) -> JobCheckpoint:
+        """Start checkpointing a new job"""
+        now = time.time()
+        manifest = JobManifest(
+            job_id=job_id or uuid.uuid4().hex,
+            kind=kind,
+            params=params,
+            created_at=now,
+            updated_at=now
+        )
+        directory = self.root / manifest.job_id
+        directory.mkdir(parents=True, exist_ok=True)
+        checkpoint = JobCheckpoint(directory, manifest)
+        checkpoint._write_manifest()
+        return checkpoint
+    
+    def incomplete(self) -> List[JobCheckpoint]:
+        """Checkpoints left behind by jobs that did not finish, oldest first"""
+        checkpoints = []
+        if not self.root.is_dir():
+            return checkpoints
+        for directory in self.root.iterdir():
+            manifest_path = directory / MANIFEST_NAME
+            if not manifest_path.is_file():
+                continue
+            try:
+                manifest = JobManifest.parse_raw(manifest_path.read_text())
+            except Exception as e:
+                print(f"Warning: Discarding unreadable checkpoint {directory.name}: {e}")
+                shutil.rmtree(directory, ignore_errors=True)
+                continue
+            checkpoints.append(JobCheckpoint(directory, manifest))
+        return sorted(checkpoints, key=lambda checkpoint: checkpoint.manifest.created_at)
+    
+    def discard(self, checkpoint: JobCheckpoint):
+        """Delete a job's checkpoints once it no longer needs to resume"""
+        shutil.rmtree(checkpoint.directory, ignore_errors=True)
+
+
+def create_checkpoint_store() -> Optional[CheckpointStore]:
+    """Build the checkpoint store, or None if job checkpoints are disabled."""
+    if not settings.storage.JOB_CHECKPOINTS:
+        return None
+    return CheckpointStore(settings.storage.CHECKPOINT_DIR)
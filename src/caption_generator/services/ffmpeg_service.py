@@ -1,17 +1,23 @@
 """
 FFmpeg service for video processing and subtitle burning.
 """
+import json
 import subprocess
-import asyncio
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from ..core.config import settings
+from ..models.encode import EncodePlan, OutputType, SubtitleOverlay
+from ..models.rendition import RenditionSpec
+from ..utils.subprocess_runner import run_process
 
 
 class FFmpegService:
     def __init__(self):
         self.ffmpeg_path = self._find_ffmpeg()
+        self.ffprobe_path = self._find_ffprobe()
+        self._has_libass: Optional[bool] = None
+        self._pillow_burner = None
     
     def _find_ffmpeg(self) -> str:
         """Find FFmpeg executable path"""
@@ -41,6 +47,145 @@ class FFmpegService:
             
             raise FileNotFoundError("FFmpeg not found. Please install FFmpeg.")
     
+    def _find_ffprobe(self) -> str:
+        """Find FFprobe, preferring the one installed next to FFmpeg"""
+        sibling = Path(self.ffmpeg_path).with_name("ffprobe")
+        return str(sibling) if sibling.exists() else "ffprobe"
+    
+    @property
+    def uses_libass(self) -> bool:
+        """Whether captions are burned with libass, or else with the Pillow fallback (SUBTITLE_RENDERER)"""
+        renderer = settings.ffmpeg.SUBTITLE_RENDERER.strip().lower()
+        if renderer in ("libass", "pillow"):
+            return renderer == "libass"
+        if self._has_libass is None:
+            self._has_libass = self._find_subtitles_filter()
+            if not self._has_libass:
+                print("⚠️  FFmpeg has no subtitles filter (libass), burning captions with Pillow")
+        return self._has_libass
+    
+    def _find_subtitles_filter(self) -> bool:
+        """Whether this FFmpeg build has the libass ``subtitles`` filter"""
+        try:
+            result = subprocess.run(
+                [self.ffmpeg_path, "-hide_banner", "-filters"],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            # Let the burn itself report a broken FFmpeg
+            return True
+        return any(line.split()[1:2] == ["subtitles"] for line in result.stdout.splitlines())
+    
+    @property
+    def pillow_burner(self):
+        """The burner used when libass is not available (created on first use)"""
+        if self._pillow_burner is None:
+            from .pillow_burner import PillowSubtitleBurner
+            self._pillow_burner = PillowSubtitleBurner(self)
+        return self._pillow_burner
+    
+    def plan_encode(
+        self,
+        output_type: OutputType = OutputType.BURN,
+        copy_audio: bool = True,
+        preset: Optional[str] = None,
+        crf: Optional[int] = None
+    ) -> EncodePlan:
+        """
+        Choose the cheapest FFmpeg operation that produces the requested output.
+        
+        Only burned-in subtitles need the video re-encoded; soft subtitles are
+        a remux (video and audio stream-copied) and audio-only outputs drop the
+        video stream. Audio is copied unless MP4 cannot carry its codec.
+        """
+        audio_codec = "copy" if copy_audio else "aac"
+        output_type = OutputType(output_type)
+        if output_type == OutputType.SOFT:
+            plan = EncodePlan(
+                output_type=output_type,
+                video_codec="copy",
+                audio_codec=audio_codec,
+                subtitle_codec="mov_text",
+                profile=f"remux-a:{audio_codec}"
+            )
+        elif output_type == OutputType.AUDIO:
+            plan = EncodePlan(
+                output_type=output_type,
+                audio_codec=audio_codec,
+                subtitle_codec="mov_text",
+                extension=".m4a",
+                content_type="audio/mp4",
+                profile=f"audio-a:{audio_codec}"
+            )
+        else:
+            preset = preset or settings.ffmpeg.PRESET
+            crf = crf if crf is not None else settings.ffmpeg.CRF
+            plan = EncodePlan(
+                output_type=output_type,
+                video_codec="libx264",
+                audio_codec=audio_codec,
+                profile=f"libx264-{preset}-crf{crf}-a:{audio_codec}"
+            )
+        print(f"🧭 Encode plan: {plan.describe()}")
+        return plan
+    
+    async def encode(
+        self,
+        plan: EncodePlan,
+        video_path: Path,
+        srt_path: Path,
+        output_path: Path,
+        font_size: int = 24,
+        font_color: str = "white",
+        position: str = "bottom",
+        fragmented: bool = False
+    ) -> Path:
+        """Produce an output according to a plan from ``plan_encode``"""
+        if plan.output_type == OutputType.BURN:
+            return await self.burn_subtitles(
+                video_path=video_path,
+                srt_path=srt_path,
+                output_path=output_path,
+                font_size=font_size,
+                font_color=font_color,
+                position=position,
+                fragmented=fragmented,
+                copy_audio=plan.audio_codec == "copy"
+            )
+        return await self.mux_subtitles(plan, video_path, srt_path, output_path)
+    
+    async def mux_subtitles(
+        self,
+        plan: EncodePlan,
+        video_path: Path,
+        srt_path: Path,
+        output_path: Path
+    ) -> Path:
+        """Add subtitles as a separate track without re-encoding the video"""
+        cmd = [
+            self.ffmpeg_path,
+            "-i", str(video_path),
+            "-i", str(srt_path),
+            "-map", "0:a:0",
+            "-map", "1:s:0",
+        ]
+        if plan.video_codec:
+            cmd += ["-map", "0:v:0", "-c:v", plan.video_codec]
+        cmd += [
+            "-c:a", plan.audio_codec,
+            "-c:s", plan.subtitle_codec,
+            "-metadata:s:s:0", "handler_name=Captions",
+            "-movflags", "+faststart",
+            "-y",
+            str(output_path)
+        ]
+        await self._run_ffmpeg(cmd)
+        
+        print(f"✅ Successfully created {plan.output_type.value} output: {output_path}")
+        return output_path
+    
     async def burn_subtitles(
         self,
         video_path: Path,
@@ -48,15 +193,259 @@ class FFmpegService:
         output_path: Path,
         font_size: int = 24,
         font_color: str = "white",
-        position: str = "bottom"
+        position: str = "bottom",
+        scale_height: Optional[int] = None,
+        preset: Optional[str] = None,
+        crf: Optional[int] = None,
+        fragmented: bool = False,
+        copy_audio: bool = True,
+        overlay: Optional[SubtitleOverlay] = None
     ) -> Path:
-        """Burn subtitles into video using FFmpeg"""
+        """
+        Burn subtitles into video using FFmpeg.
+        
+        With ``fragmented=True`` the output is written as fragmented MP4
+        (empty moov, one fragment per forced keyframe) so it can be served
+        to clients while the encode is still running. ``copy_audio=False``
+        re-encodes audio to AAC for codecs MP4 cannot carry. With an
+        ``overlay`` (the same captions pre-rendered at the output size) it is
+        composited instead of rendering ``srt_path`` with libass. Without
+        libass the captions are burned by the Pillow fallback.
+        """
+        if overlay is None and not self.uses_libass:
+            return await self.pillow_burner.burn(
+                video_path, srt_path, output_path, font_size, font_color, position,
+                scale_height=scale_height, preset=preset, crf=crf, fragmented=fragmented, copy_audio=copy_audio
+            )
         
         print(f"🎨 Applying subtitle styling:")
         print(f"   Font Size: {font_size}")
         print(f"   Font Color: {font_color}")
         print(f"   Position: {position}")
         
+        if overlay:
+            base = f"scale=-2:{scale_height}" if scale_height else "null"
+            video_args = self.overlay_input(overlay) + [
+                "-filter_complex", f"[0:v]{base}[base];[base][1:v]{self.overlay_filter(overlay)}[v]",
+                "-map", "[v]",
+                "-map", "0:a:0?",
+            ]
+        else:
+            # Scale before burning so libass renders glyphs at the output resolution
+            video_filter = self.subtitle_filter(srt_path, font_size, font_color, position)
+            if scale_height:
+                video_filter = f"scale=-2:{scale_height},{video_filter}"
+            video_args = ["-vf", video_filter]
+        
+        # Build FFmpeg command with corrected subtitle filter
+        cmd = [
+            self.ffmpeg_path,
+            "-i", str(video_path),
+            *video_args,
+            "-c:a", "copy" if copy_audio else "aac",  # Copy audio without re-encoding when possible
+            "-c:v", "libx264",  # Re-encode video with subtitles
+            "-preset", preset or settings.ffmpeg.PRESET,  # Balance between speed and quality
+            "-crf", str(crf if crf is not None else settings.ffmpeg.CRF),
+            "-threads", str(settings.ffmpeg.threads),
+        ]
+        
+        if fragmented:
+            cmd += self.fragment_args()
+        
+        cmd += [
+            "-y",  # Overwrite output file
+            str(output_path)
+        ]
+        
+        await self._run_ffmpeg(cmd)
+        
+        print(f"✅ Successfully created captioned video: {output_path}")
+        return output_path
+    
+    @staticmethod
+    def fragment_args() -> List[str]:
+        """Output options for fragmented MP4 that can be served while it is written"""
+        fragment_seconds = settings.ffmpeg.STREAM_FRAGMENT_SECONDS
+        return [
+            # Keyframe every fragment so each fragment is independently decodable
+            "-force_key_frames", f"expr:gte(t,n_forced*{fragment_seconds})",
+            "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+            "-f", "mp4",
+        ]
+    
+    async def burn_renditions(
+        self,
+        video_path: Path,
+        renditions: List[Tuple[RenditionSpec, Path, Path]],
+        copy_audio: bool = True,
+        overlays: Optional[List[Optional[SubtitleOverlay]]] = None
+    ) -> List[Path]:
+        """
+        Burn several styles or sizes into one input with a single FFmpeg run.
+        
+        ``renditions`` holds ``(spec, subtitle path, output path)`` tuples.
+        The input is decoded once and ``split`` hands each frame to one
+        ``scale``/``subtitles`` chain and encoder per output, instead of
+        decoding (and demuxing) it again for every rendition. ``overlays``
+        optionally gives each rendition a pre-rendered caption track to
+        composite instead of running libass. Without libass, renditions
+        lacking an overlay are burned one at a time by the Pillow fallback.
+        """
+        count = len(renditions)
+        overlays = overlays or [None] * count
+        if not self.uses_libass and not all(overlays):
+            for (spec, subtitle_path, output_path), overlay in zip(renditions, overlays):
+                await self.burn_subtitles(
+                    video_path, subtitle_path, output_path,
+                    font_size=spec.font_size, font_color=spec.font_color, position=spec.position.value,
+                    scale_height=spec.height, copy_audio=copy_audio, overlay=overlay
+                )
+            return [output_path for _, _, output_path in renditions]
+        print(f"🎨 Burning {count} renditions in one pass...")
+        inputs = ["-i", str(video_path)]
+        chains = [f"[0:v]split={count}" + "".join(f"[s{index}]" for index in range(count))] if count > 1 else []
+        for index, ((spec, subtitle_path, _), overlay) in enumerate(zip(renditions, overlays)):
+            source = f"[s{index}]" if count > 1 else "[0:v]"
+            if overlay:
+                inputs += self.overlay_input(overlay)
+                overlay_index = inputs.count("-i") - 1
+                base = f"scale=-2:{spec.height}" if spec.height else "null"
+                chains.append(f"{source}{base}[b{index}]")
+                chains.append(f"[b{index}][{overlay_index}:v]{self.overlay_filter(overlay)}[v{index}]")
+                continue
+            video_filter = self.subtitle_filter(subtitle_path, spec.font_size, spec.font_color, spec.position.value)
+            if spec.height:
+                video_filter = f"scale=-2:{spec.height},{video_filter}"
+            chains.append(f"{source}{video_filter}[v{index}]")
+        
+        cmd = [
+            self.ffmpeg_path,
+            *inputs,
+            "-filter_complex", ";".join(chains),
+        ]
+        # Output options apply to the output file that follows them
+        for index, (_, _, output_path) in enumerate(renditions):
+            cmd += [
+                "-map", f"[v{index}]",
+                "-map", "0:a:0?",
+                "-c:a", "copy" if copy_audio else "aac",
+                "-c:v", "libx264",
+                "-preset", settings.ffmpeg.PRESET,
+                "-crf", str(settings.ffmpeg.CRF),
+                "-threads", str(settings.ffmpeg.threads),
+                "-y",
+                str(output_path)
+            ]
+        
+        await self._run_ffmpeg(cmd)
+        
+        print(f"✅ Successfully created {count} captioned renditions")
+        return [output_path for _, _, output_path in renditions]
+    
+    async def create_preview(
+        self,
+        video_path: Path,
+        srt_path: Path,
+        output_path: Path,
+        font_size: int = 24,
+        font_color: str = "white",
+        position: str = "bottom",
+        prescaled: bool = False,
+        copy_audio: bool = True
+    ) -> Path:
+        """
+        Create a small, fast-to-encode captioned proxy of the video.
+        
+        With ``prescaled=True`` the input is already at preview size (see
+        ``prescale``), so only the subtitles are burned in.
+        """
+        print(f"⚡ Creating {settings.ffmpeg.PREVIEW_HEIGHT}p preview...")
+        return await self.burn_subtitles(
+            video_path=video_path,
+            srt_path=srt_path,
+            output_path=output_path,
+            font_size=font_size,
+            font_color=font_color,
+            position=position,
+            scale_height=None if prescaled else settings.ffmpeg.PREVIEW_HEIGHT,
+            preset=settings.ffmpeg.PREVIEW_PRESET,
+            crf=settings.ffmpeg.PREVIEW_CRF,
+            copy_audio=copy_audio
+        )
+    
+    async def prescale(self, video_path: Path, output_path: Path, copy_audio: bool = True) -> Path:
+        """Downscale a video to preview height (no subtitles) ahead of the preview encode"""
+        print(f"⚡ Pre-scaling input to {settings.ffmpeg.PREVIEW_HEIGHT}p...")
+        cmd = [
+            self.ffmpeg_path,
+            "-i", str(video_path),
+            "-vf", f"scale=-2:{settings.ffmpeg.PREVIEW_HEIGHT}",
+            "-c:a", "copy" if copy_audio else "aac",
+            "-c:v", "libx264",
+            "-preset", settings.ffmpeg.PREVIEW_PRESET,
+            # Intermediate copy: keep quality high, it is re-encoded once more
+            "-crf", "18",
+            "-threads", str(settings.ffmpeg.threads),
+            "-y",
+            str(output_path)
+        ]
+        await self._run_ffmpeg(cmd)
+        return output_path
+    
+    def subtitle_filter(self, srt_path: Path, font_size: int, font_color: str, position: str) -> str:
+        """The libass ``subtitles`` filter that burns an SRT file with the given style"""
+        force_style = self._build_force_style(font_size, font_color, position)
+        print(f"   FFmpeg force_style: {force_style}")
+        return f"subtitles={str(srt_path)}:force_style='{force_style}'"
+    
+    async def render_caption_pairs(
+        self,
+        srt_path: Path,
+        output_pattern: Path,
+        captions: int,
+        width: int,
+        height: int,
+        font_size: int,
+        font_color: str,
+        position: str
+    ) -> Path:
+        """
+        Render one image per second of an SRT file, drawn on black and on white side by side.
+        
+        Used with an SRT holding caption k at second k, so every caption is
+        drawn exactly once. libass leaves the alpha channel alone, so
+        transparency is recovered from the two backgrounds instead.
+        """
+        source = f"s={width}x{height}:r=1:d={captions}"
+        video_filter = self.subtitle_filter(srt_path, font_size, font_color, position)
+        cmd = [
+            self.ffmpeg_path,
+            "-f", "lavfi", "-i", f"color=black:{source},format=rgb24",
+            "-f", "lavfi", "-i", f"color=white:{source},format=rgb24",
+            "-filter_complex", f"[0:v]{video_filter}[b];[1:v]{video_filter}[w];[b][w]hstack",
+            "-start_number", "0",
+            "-y",
+            str(output_pattern)
+        ]
+        await self._run_ffmpeg(cmd)
+        return output_pattern
+    
+    @staticmethod
+    def overlay_input(overlay: SubtitleOverlay) -> List[str]:
+        """Input options that read a pre-rendered caption track (its list sets per-file options, hence unsafe mode)"""
+        return ["-f", "concat", "-safe", "0", "-i", str(overlay.concat_path)]
+    
+    @staticmethod
+    def overlay_filter(overlay: SubtitleOverlay) -> str:
+        """The ``overlay`` filter placing a caption track's band (centered, absorbing rounding of ``scale=-2``)"""
+        return f"overlay=x=(main_w-overlay_w)/2:y={overlay.y}:eof_action=pass"
+    
+    def ass_color(self, color: str) -> str:
+        """A color name or RGB hex as an inline ASS color tag value (``&HBBGGRR&``)"""
+        return f"&H{self._color_to_hex(color)}&"
+    
+    def _build_force_style(self, font_size: int, font_color: str, position: str) -> str:
+        """Build the libass force_style parameter for the subtitles filter"""
         # Correct alignment values for ASS subtitles
         # 1=left, 2=center, 3=right (horizontal)
         # Combined with vertical: 1=bottom, 5=middle, 9=top
@@ -72,7 +461,7 @@ class FFmpegService:
         color_hex = self._color_to_hex(font_color)
         
         # Build the force_style parameter correctly
-        force_style = (
+        return (
             f"FontName=Arial Bold,"
             f"FontSize={font_size},"
             f"PrimaryColour=&H{color_hex},"
@@ -83,41 +472,20 @@ class FFmpegService:
             f"Alignment={alignment},"   # Position alignment
             f"MarginV={margin_v}"       # Vertical margin
         )
-        
-        print(f"   FFmpeg force_style: {force_style}")
-        
-        # Build FFmpeg command with corrected subtitle filter
-        cmd = [
-            self.ffmpeg_path,
-            "-i", str(video_path),
-            "-vf", f"subtitles={str(srt_path)}:force_style='{force_style}'",
-            "-c:a", "copy",  # Copy audio without re-encoding
-            "-c:v", "libx264",  # Re-encode video with subtitles
-            "-preset", "medium",  # Balance between speed and quality
-            "-crf", "23",  # Good quality
-            "-threads", str(settings.ffmpeg.threads),
-            "-y",  # Overwrite output file
-            str(output_path)
-        ]
-        
+    
+    async def _run_ffmpeg(self, cmd: List[str]) -> bytes:
+        """Run an FFmpeg command asynchronously and return its stdout"""
         print(f"   FFmpeg command: {' '.join(cmd)}")
         
-        # Run FFmpeg command asynchronously
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        
-        stdout, stderr = await process.communicate()
+        # Killed (with its process group) if the job is cancelled
+        returncode, stdout, stderr = await run_process(cmd)
         
-        if process.returncode != 0:
+        if returncode != 0:
             error_msg = stderr.decode() if stderr else "Unknown FFmpeg error"
             print(f"❌ FFmpeg stderr: {error_msg}")
             raise RuntimeError(f"FFmpeg failed: {error_msg}")
         
-        print(f"✅ Successfully created captioned video: {output_path}")
-        return output_path
+        return stdout
     
     def _color_to_hex(self, color: str) -> str:
         """Convert color name to BGR hex format for ASS subtitles in FFmpeg"""
@@ -168,7 +536,7 @@ class FFmpegService:
     async def get_video_info(self, video_path: Path) -> dict:
         """Get video information using FFprobe"""
         cmd = [
-            "ffprobe",
+            self.ffprobe_path,
             "-v", "quiet",
             "-print_format", "json",
             "-show_format",
@@ -176,17 +544,54 @@ class FFmpegService:
             str(video_path)
         ]
         
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+        stdout = await self._run_ffprobe(cmd)
+        return json.loads(stdout.decode())
+    
+    async def get_keyframe_times(self, video_path: Path, max_seconds: Optional[float] = 60) -> List[float]:
+        """Timestamps of the keyframes in the first ``max_seconds`` (None = all) of the video"""
+        cmd = [
+            self.ffprobe_path,
+            "-v", "error",
+            "-select_streams", "v:0",
+            "-skip_frame", "nokey",  # Only decode keyframes
+        ]
+        if max_seconds is not None:
+            cmd += ["-read_intervals", f"%+{max_seconds}"]
+        cmd += [
+            "-show_entries", "frame=best_effort_timestamp_time",
+            "-of", "csv=p=0",
+            str(video_path)
+        ]
+        
+        stdout = await self._run_ffprobe(cmd)
+        times = []
+        for line in stdout.decode().splitlines():
+            value = line.strip().rstrip(",")
+            if value and value != "N/A":
+                times.append(float(value))
+        return times
+    
+    async def count_video_frames(self, video_path: Path) -> int:
+        """Number of packets (frames) in the first video stream, read without decoding"""
+        cmd = [
+            self.ffprobe_path,
+            "-v", "error",
+            "-select_streams", "v:0",
+            "-count_packets",
+            "-show_entries", "stream=nb_read_packets",
+            "-of", "csv=p=0",
+            str(video_path)
+        ]
         
-        stdout, stderr = await process.communicate()
+        stdout = await self._run_ffprobe(cmd)
+        return int(stdout.decode().strip().rstrip(","))
+    
+    async def _run_ffprobe(self, cmd: List[str]) -> bytes:
+        """Run an FFprobe command and return its stdout"""
+        returncode, stdout, stderr = await run_process(cmd)
         
-        if process.returncode != 0:
-            error_msg = stderr.decode() if stderr else "Unknown FFprobe error"
+        if returncode != 0:
+            error_msg = stderr.decode().strip() if stderr else "Unknown FFprobe error"
             raise RuntimeError(f"FFprobe failed: {error_msg}")
         
-        import json
-        return json.loads(stdout.decode())
+        return stdout
@@ -0,0 +1,161 @@
+"""
+Periodic janitor that keeps the temp directory within its space budget.
+"""
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from .artifact_store import ArtifactStore
+from ..models.storage import JanitorStats
+from ..core.config import settings
+from ..core.exceptions import StorageCapacityError
+
+
+class TempDirJanitor:
+    """
+    A single background task that reclaims disk space in ``TEMP_DIR``.
+    
+    Each pass expires artifacts whose TTL has elapsed, deletes scratch files
+    (uploads, subtitle files, abandoned encodes) older than
+    ``CLEANUP_DELAY_MINUTES``, and, when scratch plus artifact bytes exceed the
+    high-water mark, evicts the oldest files until usage is back under the
+    low-water mark. Files reported as in use by running jobs are never touched.
+    """
+    
+    def __init__(
+        self,
+        temp_dir: Path,
+        artifact_store: ArtifactStore,
+        is_in_use: Callable[[Path], bool] = lambda path: False,
+        max_age_seconds: float = settings.app.CLEANUP_DELAY_MINUTES * 60,
+        grace_seconds: float = settings.storage.JANITOR_GRACE_SECONDS,
+        high_water_bytes: int = settings.storage.HIGH_WATER_BYTES,
+        low_water_ratio: float = settings.storage.LOW_WATER_RATIO,
+        min_free_disk_bytes: int = settings.storage.MIN_FREE_DISK_BYTES,
+        interval_seconds: float = settings.storage.JANITOR_INTERVAL_SECONDS
+    ):
+        self.temp_dir = Path(temp_dir)
+        self.artifact_store = artifact_store
+        self.is_in_use = is_in_use
+        self.max_age_seconds = max_age_seconds
+        self.grace_seconds = grace_seconds
+        self.high_water_bytes = high_water_bytes
+        self.low_water_bytes = int(high_water_bytes * low_water_ratio)
+        self.min_free_disk_bytes = min_free_disk_bytes
+        self.interval_seconds = interval_seconds
+        self.stats = JanitorStats(
+            high_water_bytes=high_water_bytes,
+            min_free_disk_bytes=min_free_disk_bytes
+        )
+    
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """List top-level scratch files as (mtime, size, path), oldest first"""
+        entries = []
+        try:
+            with os.scandir(self.temp_dir) as it:
+                for entry in it:
+                    # Directories (artifact store, job data) are managed elsewhere
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return []
+        entries.sort()
+        return entries
+    
+    def _remove(self, path: str) -> bool:
+        """Delete a scratch file unless a job is using it"""
+        if self.is_in_use(Path(path)):
+            return False
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"Warning: Janitor could not remove {path}: {e}")
+            return False
+    
+    def free_disk_bytes(self) -> int:
+        """Free bytes on the filesystem holding the temp directory"""
+        return shutil.disk_usage(self.temp_dir).free
+    
+    def run_once(self, now: Optional[float] = None) -> JanitorStats:
+        """Run a single janitor pass and return the updated stats"""
+        started = time.time()
+        now = now if now is not None else started
+        stats = self.stats
+        
+        # 1. Artifacts past their TTL
+        stats.artifacts_expired += self.artifact_store.expire(now)
+        
+        # 2. Scratch files past their max age
+        remaining = []
+        for mtime, size, path in self._scan():
+            if now - mtime > self.max_age_seconds and self._remove(path):
+                stats.files_evicted_by_age += 1
+            else:
+                remaining.append((mtime, size, path))
+        
+        # 3. Size high-water mark: oldest scratch files first, then oldest artifacts
+        scratch_bytes = sum(size for _, size, _ in remaining)
+        artifact_bytes = self.artifact_store.total_size()
+        if scratch_bytes + artifact_bytes > self.high_water_bytes:
+            to_free = scratch_bytes + artifact_bytes - self.low_water_bytes
+            for mtime, size, path in list(remaining):
+                if to_free <= 0:
+                    break
+                if now - mtime > self.grace_seconds and self._remove(path):
+                    stats.files_evicted_by_size += 1
+                    remaining.remove((mtime, size, path))
+                    scratch_bytes -= size
+                    to_free -= size
+            if to_free > 0:
+                freed = self.artifact_store.evict_oldest(to_free, min_age_seconds=self.grace_seconds)
+                stats.artifact_bytes_evicted += freed
+                artifact_bytes -= freed
+        
+        stats.scratch_files = len(remaining)
+        stats.scratch_bytes = scratch_bytes
+        stats.artifact_bytes = artifact_bytes
+        stats.free_disk_bytes = self.free_disk_bytes()
+        stats.accepting_jobs = stats.free_disk_bytes >= self.min_free_disk_bytes
+        stats.runs += 1
+        stats.last_run_at = now
+        stats.last_run_duration = round(time.time() - started, 4)
+        return stats
+    
+    def check_capacity(self):
+        """Raise StorageCapacityError if free disk is below the threshold"""
+        free = self.free_disk_bytes()
+        if free < self.min_free_disk_bytes:
+            self.stats.jobs_refused += 1
+            raise StorageCapacityError(
+                "Not enough free disk space to accept new jobs",
+                details=f"{free} bytes free, {self.min_free_disk_bytes} required"
+            )
+    
+    def _removed_count(self) -> int:
+        stats = self.stats
+        return stats.files_evicted_by_age + stats.files_evicted_by_size + stats.artifacts_expired
+    
+    async def run(self):
+        """Run janitor passes every ``interval_seconds`` until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                before = self._removed_count()
+                await loop.run_in_executor(None, self.run_once)
+                removed = self._removed_count() - before
+                if removed:
+                    print(f"🧹 Janitor removed {removed} file(s)/artifact(s)")
+            except Exception as e:
+                print(f"Warning: Janitor pass failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
@@ -0,0 +1,222 @@
+"""
+In-memory registry of asynchronous caption jobs.
+"""
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from ..models.batch import BatchItem, BatchResponse
+from ..models.job import JobArtifact, JobResponse, JobStatus
+from ..models.pipeline import PipelineReport
+from ..core.config import settings
+from ..utils.caption_timeline import CaptionTimeline
+
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class Job:
+    """Mutable state of a single caption job."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = JobStatus.QUEUED
+        self.message: Optional[str] = "Job queued"
+        self.language: Optional[str] = None
+        self.error: Optional[str] = None
+        self.preview = JobArtifact(kind="preview")
+        self.video = JobArtifact(kind="full")
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.task: Optional[asyncio.Task] = None
+        self.pipeline: Optional[PipelineReport] = None
+        # Estimated seconds from creation to completion, from the input probe
+        self.estimated_total: Optional[float] = None
+        # Captions indexed by time, once the transcript is ready
+        self.timeline: Optional[CaptionTimeline] = None
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job reached a terminal state."""
+        return self.status in TERMINAL_STATUSES
+
+    def elapsed(self) -> float:
+        """Seconds since the job was created."""
+        return round(time.time() - self.created_at, 2)
+
+    def set_status(self, status: JobStatus, message: Optional[str] = None):
+        """Move the job to a new status."""
+        self.status = status
+        if message is not None:
+            self.message = message
+        self.updated_at = time.time()
+
+    def mark_preview_ready(self, url: str):
+        """Record that the low-res preview can be downloaded."""
+        self.preview = JobArtifact(
+            kind="preview", ready=True, url=url, processing_time=self.elapsed()
+        )
+        self.set_status(JobStatus.PREVIEW_READY, "Preview ready, full-quality encode in progress")
+
+    def mark_streaming(self, stream_url: str):
+        """Record that the full-quality video can be streamed while encoding."""
+        self.video = JobArtifact(kind="full", stream_url=stream_url)
+
+    def mark_completed(self, url: str):
+        """Record that the full-quality video can be downloaded."""
+        self.video = JobArtifact(
+            kind="full",
+            ready=True,
+            url=url,
+            stream_url=self.video.stream_url,
+            processing_time=self.elapsed()
+        )
+        self.set_status(JobStatus.COMPLETED, "Video captioned successfully")
+
+    def mark_failed(self, error: str):
+        """Record a job failure; its artifacts are deleted, so their URLs are withdrawn."""
+        self.error = error
+        self._withdraw_artifacts()
+        self.set_status(JobStatus.FAILED, "Job failed")
+
+    def mark_cancelled(self, reason: str = "Job cancelled"):
+        """Record that the job was stopped before it finished; its artifacts are withdrawn."""
+        self._withdraw_artifacts()
+        self.set_status(JobStatus.CANCELLED, reason)
+
+    def _withdraw_artifacts(self):
+        self.preview = JobArtifact(kind="preview")
+        self.video = JobArtifact(kind="full")
+
+    def estimated_time_remaining(self) -> Optional[float]:
+        """Seconds until the job is expected to finish, if an estimate exists."""
+        if self.is_finished or self.estimated_total is None:
+            return None
+        return round(max(0.0, self.estimated_total - self.elapsed()), 1)
+
+    def to_response(self) -> JobResponse:
+        """Build the API representation of this job."""
+        return JobResponse(
+            job_id=self.job_id,
+            status=self.status,
+            message=self.message,
+            language_detected=self.language,
+            preview=self.preview,
+            video=self.video,
+            error=self.error,
+            estimated_time_remaining=self.estimated_time_remaining(),
+            pipeline=self.pipeline
+        )
+
+
+class JobGroup:
+    """A batch of caption items processed together, with per-item state."""
+
+    def __init__(self, group_id: str, sources: List[str]):
+        self.group_id = group_id
+        self.items = [BatchItem(index=i, source=source) for i, source in enumerate(sources)]
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether every item reached a terminal state."""
+        return all(item.status in TERMINAL_STATUSES for item in self.items)
+
+    def set_item_status(self, index: int, status: JobStatus, message: Optional[str] = None):
+        """Move one item to a new status."""
+        item = self.items[index]
+        item.status = status
+        if message is not None:
+            item.message = message
+        self.updated_at = time.time()
+
+    def mark_item_completed(self, index: int, url: str, language: Optional[str]):
+        """Record that an item's captioned video can be downloaded."""
+        item = self.items[index]
+        item.video_url = url
+        item.language_detected = language
+        item.processing_time = round(time.time() - self.created_at, 2)
+        self.set_item_status(index, JobStatus.COMPLETED, "Video captioned successfully")
+
+    def mark_item_failed(self, index: int, error: str):
+        """Record an item failure."""
+        item = self.items[index]
+        item.error = error
+        item.processing_time = round(time.time() - self.created_at, 2)
+        self.set_item_status(index, JobStatus.FAILED, "Item failed")
+
+    def mark_cancelled(self, reason: str = "Batch cancelled"):
+        """Mark every item that had not finished yet as cancelled."""
+        for item in self.items:
+            if item.status not in TERMINAL_STATUSES:
+                item.status = JobStatus.CANCELLED
+                item.message = reason
+        self.updated_at = time.time()
+
+    def to_response(self) -> BatchResponse:
+        """Build the API representation of this group."""
+        completed = sum(1 for item in self.items if item.status == JobStatus.COMPLETED)
+        failed = sum(1 for item in self.items if item.status == JobStatus.FAILED)
+        cancelled = sum(1 for item in self.items if item.status == JobStatus.CANCELLED)
+        if self.is_finished:
+            if cancelled:
+                status = JobStatus.CANCELLED
+            else:
+                status = JobStatus.FAILED if failed == len(self.items) else JobStatus.COMPLETED
+        elif any(item.status != JobStatus.QUEUED for item in self.items):
+            status = JobStatus.PROCESSING
+        else:
+            status = JobStatus.QUEUED
+        return BatchResponse(
+            group_id=self.group_id,
+            status=status,
+            total=len(self.items),
+            completed=completed,
+            failed=failed,
+            items=[item.copy() for item in self.items]
+        )
+
+
+class JobManager:
+    """Keeps track of running and recently finished jobs."""
+
+    def __init__(self, max_jobs: int = settings.app.MAX_TRACKED_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Job] = {}
+        self._groups: Dict[str, JobGroup] = {}
+
+    def create_job(self, job_id: Optional[str] = None) -> Job:
+        """Register a new job with a unique ID (or the given one, for a resumed job)."""
+        self._prune()
+        job = Job(job_id or uuid.uuid4().hex)
+        self._jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Look up a job by ID."""
+        return self._jobs.get(job_id)
+
+    def create_group(self, sources: List[str]) -> JobGroup:
+        """Register a new batch with one item per source."""
+        self._prune(self._groups)
+        group = JobGroup(uuid.uuid4().hex, sources)
+        self._groups[group.group_id] = group
+        return group
+
+    def get_group(self, group_id: str) -> Optional[JobGroup]:
+        """Look up a batch by ID."""
+        return self._groups.get(group_id)
+
+    def _prune(self, registry: Optional[dict] = None):
+        """Forget the oldest finished jobs (or groups) once the registry is full."""
+        registry = self._jobs if registry is None else registry
+        if len(registry) < self.max_jobs:
+            return
+        finished = sorted(
+            ((key, entry) for key, entry in registry.items() if entry.is_finished),
+            key=lambda pair: pair[1].updated_at
+        )
+        for key, _ in finished[:len(registry) - self.max_jobs + 1]:
+            del registry[key]
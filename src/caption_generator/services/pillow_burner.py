@@ -0,0 +1,459 @@
+"""
+Caption burning without libass: captions drawn with Pillow and blended into piped frames with NumPy.
+"""
+import asyncio
+import math
+import os
+import re
+import signal
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .ffmpeg_service import FFmpegService
+from .probe_service import _parse_rotation
+from ..core.config import settings
+from ..models.subtitle import TranscriptSegment
+from ..utils.caption_timeline import CaptionTimeline
+
+# libass lays SRT captions out on a 288-line script scaled to the frame height
+SCRIPT_HEIGHT = 288
+# Rendered captions kept across burns (per text, style and frame size)
+SPRITE_CACHE_SIZE = 256
+# Tried (by file name in the system font directories) when FALLBACK_FONT_PATH is not set
+FONT_CANDIDATES = ("DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf")
+
+# Full-range RGB to limited-range Y'CbCr (rows Y, Cb, Cr), as FFmpeg draws subtitles
+_YUV_MATRICES = {
+    "bt601": np.array([[65.481, 128.553, 24.966], [-37.797, -74.203, 112.0], [112.0, -93.786, -18.214]]) / 255,
+    "bt709": np.array([[46.559, 156.629, 15.812], [-25.664, -86.336, 112.0], [112.0, -101.730, -10.270]]) / 255,
+}
+_YUV_OFFSET = np.array([16.0, 128.0, 128.0])
+
+_SRT_TIMES = re.compile(r"(\d+):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{3})")
+_MARKUP = re.compile(r"</?[a-zA-Z][^>]*>")
+_ASS_OVERRIDE = re.compile(r"\{[^}]*\}")
+
+
+class CaptionSprite(NamedTuple):
+    """
+    A caption ready to blend into YUV 4:2:0 frames of one size.
+    
+    Per plane (Y, U, V): top and left offset, premultiplied color scaled by
+    255 (plus rounding) and ``255 - alpha``, both uint16, so a blend is
+    ``(plane * inverse + color) // 255`` without overflow.
+    """
+    layers: Tuple[Tuple[int, int, np.ndarray, np.ndarray], ...]
+
+
+class PillowSubtitleBurner:
+    """
+    Burns captions for FFmpeg builds without libass (no ``subtitles`` filter).
+    
+    One FFmpeg process decodes the input to raw YUV 4:2:0 frames on a pipe
+    (constant frame rate, so frame k is at k / fps) and another encodes the
+    frames it is sent, muxing the input's audio. In between, each frame is
+    looked up in the caption timeline; frames without a caption are passed
+    through untouched, the others get the caption blended with vectorized
+    NumPy over the few rows it covers. Each caption is drawn by Pillow once
+    per style and frame size (text, black outline and half-transparent
+    shadow, sized like libass draws the same SRT) and kept in an LRU cache.
+    
+    Karaoke ASS files are burned as plain captions (no word highlight).
+    """
+    
+    def __init__(self, ffmpeg_service: FFmpegService, cache_size: int = SPRITE_CACHE_SIZE):
+        self.ffmpeg_service = ffmpeg_service
+        self.cache_size = cache_size
+        self._sprites: "OrderedDict[tuple, Optional[CaptionSprite]]" = OrderedDict()
+        # Frames are pumped in worker threads, and concurrent burns share the cache
+        self._sprites_lock = threading.Lock()
+        self._fonts: Dict[int, ImageFont.FreeTypeFont] = {}
+        self._colors: Dict[Tuple[str, str], np.ndarray] = {}
+        self.rasterized = 0
+    
+    async def burn(
+        self,
+        video_path: Path,
+        srt_path: Path,
+        output_path: Path,
+        font_size: int = 24,
+        font_color: str = "white",
+        position: str = "bottom",
+        scale_height: Optional[int] = None,
+        preset: Optional[str] = None,
+        crf: Optional[int] = None,
+        fragmented: bool = False,
+        copy_audio: bool = True
+    ) -> Path:
+        """Burn an SRT (or ASS) file into a video; same options as ``FFmpegService.burn_subtitles``"""
+        timeline = load_captions(srt_path)
+        info = await self.ffmpeg_service.get_video_info(video_path)
+        stream = next((s for s in info.get("streams", []) if s.get("codec_type") == "video"), None)
+        if stream is None:
+            raise RuntimeError("FFmpeg failed: no video stream to burn captions into")
+        
+        width, height = int(stream["width"]), int(stream["height"])
+        if _parse_rotation(stream) in (90, 270):
+            width, height = height, width
+        if scale_height:
+            # What scale=-2:H picks
+            width, height = int(scale_height * width / (height * 2) + 0.5) * 2, scale_height
+        rate = _frame_rate(stream)
+        matrix = "bt709" if stream.get("color_space") == "bt709" else "bt601"
+        style = (font_size, font_color.strip().lower(), position.lower(), width, height, matrix)
+        print(f"🖌️  Burning {len(timeline)} captions with Pillow at {width}x{height} {float(rate):.3g}fps...")
+        
+        ffmpeg = self.ffmpeg_service.ffmpeg_path
+        decode_cmd = [ffmpeg, "-v", "error", "-nostdin", "-i", str(video_path), "-map", "0:v:0"]
+        if scale_height:
+            decode_cmd += ["-vf", f"scale=-2:{scale_height}"]
+        decode_cmd += ["-fps_mode", "cfr", "-r", str(rate), "-pix_fmt", "yuv420p", "-f", "rawvideo", "pipe:1"]
+        encode_cmd = [
+            ffmpeg, "-v", "error",
+            "-f", "rawvideo", "-pix_fmt", "yuv420p", "-s", f"{width}x{height}", "-framerate", str(rate),
+            "-i", "pipe:0",
+            "-i", str(video_path),
+            "-map", "0:v",
+            "-map", "1:a:0?",
+            "-c:a", "copy" if copy_audio else "aac",
+            "-c:v", "libx264",
+            "-preset", preset or settings.ffmpeg.PRESET,
+            "-crf", str(crf if crf is not None else settings.ffmpeg.CRF),
+            "-threads", str(settings.ffmpeg.threads),
+            "-pix_fmt", "yuv420p",
+        ]
+        if matrix == "bt709":
+            encode_cmd += ["-colorspace", "bt709"]
+        if fragmented:
+            encode_cmd += self.ffmpeg_service.fragment_args()
+        encode_cmd += ["-y", str(output_path)]
+        print(f"   FFmpeg decode: {' '.join(decode_cmd)}")
+        print(f"   FFmpeg encode: {' '.join(encode_cmd)}")
+        
+        posix = hasattr(os, "killpg")
+        loop = asyncio.get_running_loop()
+        with tempfile.TemporaryFile() as decode_log, tempfile.TemporaryFile() as encode_log:
+            # Own process groups, so a cancelled burn can stop both
+            decoder = subprocess.Popen(
+                decode_cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=decode_log,
+                start_new_session=posix
+            )
+            try:
+                encoder = subprocess.Popen(
+                    encode_cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=encode_log,
+                    start_new_session=posix
+                )
+            except BaseException:
+                _stop([decoder], posix)
+                raise
+            try:
+                frames, blended = await loop.run_in_executor(
+                    None, self._pump, decoder, encoder, timeline, style, rate
+                )
+            except BaseException:
+                # Killing the processes ends the pump thread (EOF / broken pipe)
+                await loop.run_in_executor(None, _stop, [decoder, encoder], posix)
+                raise
+            
+            # The encoder's error explains a decoder killed by the broken pipe, so it goes first
+            for process, log in ((encoder, encode_log), (decoder, decode_log)):
+                if process.returncode != 0:
+                    log.seek(0)
+                    error_msg = log.read().decode(errors="replace") or "Unknown FFmpeg error"
+                    print(f"❌ FFmpeg stderr: {error_msg}")
+                    raise RuntimeError(f"FFmpeg failed: {error_msg}")
+        
+        print(f"✅ Successfully created captioned video: {output_path} ({blended} of {frames} frames captioned)")
+        return output_path
+    
+    def _pump(
+        self,
+        decoder: subprocess.Popen,
+        encoder: subprocess.Popen,
+        timeline: CaptionTimeline,
+        style: tuple,
+        rate: Fraction
+    ) -> Tuple[int, int]:
+        """Move frames from decoder to encoder, blending captions in; returns (frames, captioned frames)"""
+        width, height = style[3], style[4]
+        luma, chroma = width * height, ((width + 1) // 2) * ((height + 1) // 2)
+        buffer = bytearray(luma + 2 * chroma)
+        view = memoryview(buffer)
+        planes = (
+            np.frombuffer(buffer, np.uint8, luma).reshape(height, width),
+            np.frombuffer(buffer, np.uint8, chroma, luma).reshape((height + 1) // 2, (width + 1) // 2),
+            np.frombuffer(buffer, np.uint8, chroma, luma + chroma).reshape((height + 1) // 2, (width + 1) // 2),
+        )
+        frames = blended = 0
+        try:
+            while _read_frame(decoder.stdout, view):
+                # Whole milliseconds, truncated, like the subtitles filter asks libass for
+                captions = timeline.at((frames * 1000 // rate) / 1000)
+                for caption in captions:
+                    sprite = self.sprite(caption.text, *style)
+                    if sprite:
+                        _blend(planes, sprite)
+                blended += bool(captions)
+                encoder.stdin.write(view)
+                frames += 1
+        except BrokenPipeError:
+            pass  # The encoder exited early; its stderr says why
+        finally:
+            try:
+                encoder.stdin.close()
+            except BrokenPipeError:
+                pass
+            decoder.stdout.close()
+            encoder.wait()
+            decoder.wait()
+        return frames, blended
+    
+    def sprite(
+        self,
+        text: str,
+        font_size: int,
+        font_color: str,
+        position: str,
+        width: int,
+        height: int,
+        matrix: str = "bt601"
+    ) -> Optional[CaptionSprite]:
+        """A caption drawn for one style and frame size (cached), or None if nothing of it is visible"""
+        key = (text, font_size, font_color, position, width, height, matrix)
+        with self._sprites_lock:
+            if key in self._sprites:
+                self._sprites.move_to_end(key)
+                return self._sprites[key]
+        # Drawn outside the lock so other burns are not held up
+        sprite = self._rasterize(text, font_size, font_color, position, width, height, matrix)
+        with self._sprites_lock:
+            self.rasterized += 1
+            # Another burn may have drawn it meanwhile: keep the cached one
+            sprite = self._sprites.setdefault(key, sprite)
+            self._sprites.move_to_end(key)
+            while len(self._sprites) > self.cache_size:
+                self._sprites.popitem(last=False)
+        return sprite
+    
+    def _rasterize(
+        self,
+        text: str,
+        font_size: int,
+        font_color: str,
+        position: str,
+        width: int,
+        height: int,
+        matrix: str
+    ) -> Optional[CaptionSprite]:
+        scale = height / SCRIPT_HEIGHT
+        font = self._font(max(1, round(font_size * scale)))
+        outline = max(1, round(settings.ffmpeg.OUTLINE_SIZE * scale))
+        shadow = round(settings.ffmpeg.SHADOW_SIZE * scale)
+        margin = round(settings.ffmpeg.MARGIN_V * scale)
+        
+        # Lines are centered one line height (ascent + descent) apart, the block margin pixels
+        # from the edge: the layout libass gives the same SRT
+        lines = text.split("\n")
+        line_height = sum(font.getmetrics())
+        widths = [font.getlength(line) for line in lines]
+        block_top = height - margin - line_height * len(lines) if position == "bottom" else margin
+        
+        # Coverage of the glyphs and of glyphs plus outline, on a canvas in frame coordinates
+        # (left, top) with room for outline and shadow
+        pad = outline + shadow + 1
+        left, top = math.floor((width - max(widths)) / 2) - pad, block_top - pad
+        left, top = left - left % 2, top - top % 2
+        right = math.ceil((width + max(widths)) / 2) + pad
+        bottom = block_top + line_height * len(lines) + pad
+        masks = []
+        for stroke in (0, outline):
+            mask = Image.new("L", (right - left, bottom - top))
+            draw = ImageDraw.Draw(mask)
+            for index, (line, line_width) in enumerate(zip(lines, widths)):
+                draw.text(
+                    ((width - line_width) / 2 - left, block_top + index * line_height - top), line,
+                    font=font, fill=255, stroke_width=stroke, stroke_fill=255, anchor="la"
+                )
+            masks.append(np.asarray(mask, np.float64) / 255)
+        glyphs, outlined = masks
+        shadowed = np.zeros_like(outlined)
+        shadowed[shadow:, shadow:] = outlined[:outlined.shape[0] - shadow, :outlined.shape[1] - shadow] * 0.5
+        
+        # Shadow and outline are black (Y 16, U and V 128), the glyphs on top are the caption color
+        alpha = 1 - (1 - shadowed) * (1 - outlined) * (1 - glyphs)
+        color = self._yuv_color(font_color, matrix)
+        premultiplied = glyphs[..., None] * color + (alpha - glyphs)[..., None] * _YUV_OFFSET
+        
+        # Keep only what is drawn and inside the frame, from even offsets (aligned with 2x2 chroma blocks)
+        rows, columns = np.flatnonzero(alpha.any(axis=1)), np.flatnonzero(alpha.any(axis=0))
+        if rows.size == 0:
+            return None
+        visible_top = max(top + int(rows[0]) - int(rows[0]) % 2, 0)
+        visible_left = max(left + int(columns[0]) - int(columns[0]) % 2, 0)
+        visible_bottom = min(top + int(rows[-1]) + 1, height)
+        visible_right = min(left + int(columns[-1]) + 1, width)
+        if visible_right <= visible_left or visible_bottom <= visible_top:
+            return None
+        crop = (slice(visible_top - top, visible_bottom - top), slice(visible_left - left, visible_right - left))
+        alpha, premultiplied = alpha[crop], premultiplied[crop]
+        
+        layers = [(visible_top, visible_left, *_fixed_point(premultiplied[..., 0], alpha))]
+        # Chroma: average alpha and premultiplied color over 2x2 blocks (zero-padded to even size)
+        pad = ((0, alpha.shape[0] % 2), (0, alpha.shape[1] % 2))
+        rows, columns = (alpha.shape[0] + 1) // 2, (alpha.shape[1] + 1) // 2
+        
+        def halve(plane: np.ndarray) -> np.ndarray:
+            return np.pad(plane, pad).reshape(rows, 2, columns, 2).mean(axis=(1, 3))
+        
+        chroma_alpha = halve(alpha)
+        for channel in (1, 2):
+            color, inverse = _fixed_point(halve(premultiplied[..., channel]), chroma_alpha)
+            layers.append((visible_top // 2, visible_left // 2, color, inverse))
+        return CaptionSprite(layers=tuple(layers))
+    
+    def _yuv_color(self, font_color: str, matrix: str) -> np.ndarray:
+        """Y, U, V values of a caption color"""
+        key = (font_color, matrix)
+        if key not in self._colors:
+            rgb = _color_rgb(self.ffmpeg_service._color_to_hex(font_color))
+            self._colors[key] = _YUV_MATRICES[matrix] @ rgb + _YUV_OFFSET
+        return self._colors[key]
+    
+    def _font(self, size: int) -> ImageFont.FreeTypeFont:
+        """
+        A font whose line height (ascent + descent) is ``size`` pixels.
+        
+        libass sizes fonts by line height, Pillow by em size, so the font is
+        loaded once at ``size`` to measure it and again at the corrected size.
+        """
+        if size not in self._fonts:
+            font = _load_font(size)
+            ascent, descent = font.getmetrics()
+            if ascent + descent > 0 and ascent + descent != size:
+                font = _load_font(max(1, round(size * size / (ascent + descent))))
+            self._fonts[size] = font
+        return self._fonts[size]
+
+
+def _load_font(size: int) -> ImageFont.FreeTypeFont:
+    candidates = [settings.ffmpeg.FALLBACK_FONT_PATH] if settings.ffmpeg.FALLBACK_FONT_PATH else []
+    for candidate in candidates + list(FONT_CANDIDATES):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    # Pillow's bundled scalable font
+    return ImageFont.load_default(size)
+
+
+def _color_rgb(bgr_hex: str) -> np.ndarray:
+    """RGB values of an ASS ``BBGGRR`` color"""
+    return np.array([int(bgr_hex[4:6], 16), int(bgr_hex[2:4], 16), int(bgr_hex[0:2], 16)], np.float64)
+
+
+def _fixed_point(premultiplied: np.ndarray, alpha: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Premultiplied color and ``255 - alpha`` scaled for the integer blend in ``_blend``"""
+    color = (premultiplied * 255).round().astype(np.uint16) + 127
+    inverse = ((1 - alpha) * 255).round().astype(np.uint16)
+    return color, inverse
+
+
+def _blend(planes: Tuple[np.ndarray, ...], sprite: CaptionSprite):
+    """Blend a caption into the Y, U and V planes of a frame, in place"""
+    for plane, (top, left, color, inverse) in zip(planes, sprite.layers):
+        region = plane[top:top + inverse.shape[0], left:left + inverse.shape[1]]
+        region[...] = (region * inverse + color) // 255
+
+
+def _read_frame(stream, view: memoryview) -> bool:
+    """Fill ``view`` with the next frame; False at the end of the stream (a partial frame is dropped)"""
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            return False
+        filled += count
+    return True
+
+
+def _frame_rate(stream: Dict) -> Fraction:
+    """Average frame rate of a video stream (25 fps when FFprobe does not know it)"""
+    for field in ("avg_frame_rate", "r_frame_rate"):
+        try:
+            rate = Fraction(stream.get(field, ""))
+        except (ValueError, ZeroDivisionError):
+            continue
+        if rate > 0:
+            return rate
+    return Fraction(25)
+
+
+def _stop(processes: List[subprocess.Popen], posix: bool):
+    """SIGTERM the processes' groups, SIGKILL whatever is left after the kill timeout, and reap them"""
+    for process in processes:
+        for sig in (signal.SIGTERM, getattr(signal, "SIGKILL", signal.SIGTERM)):
+            if process.poll() is not None:
+                break
+            try:
+                if posix:
+                    os.killpg(process.pid, sig)
+                else:
+                    process.kill()
+            except ProcessLookupError:
+                break
+            try:
+                process.wait(timeout=settings.ffmpeg.KILL_TIMEOUT)
+                print(f"🛑 Stopped cancelled process {process.pid}")
+                break
+            except subprocess.TimeoutExpired:
+                continue
+
+
+def load_captions(path: Path) -> CaptionTimeline:
+    """Captions of an SRT file, or the events of an ASS file as plain text"""
+    content = Path(path).read_text(encoding="utf-8-sig").replace("\r\n", "\n")
+    captions: List[TranscriptSegment] = []
+    
+    def add(start: float, end: float, text: str):
+        text = text.strip()
+        if text and end > start:
+            captions.append(TranscriptSegment(start=start, end=end, text=text))
+    
+    if Path(path).suffix.lower() == ".ass":
+        for line in content.split("\n"):
+            if not line.startswith("Dialogue:"):
+                continue
+            fields = line[len("Dialogue:"):].split(",", 9)
+            if len(fields) == 10:
+                text = _ASS_OVERRIDE.sub("", fields[9]).replace("\\N", "\n").replace("\\n", "\n").replace("\\h", " ")
+                add(_ass_seconds(fields[1]), _ass_seconds(fields[2]), text)
+        return CaptionTimeline(captions)
+    
+    for block in re.split(r"\n\s*\n", content):
+        lines = block.strip().split("\n")
+        # The timing line follows the cue number (which some files omit)
+        for index, line in enumerate(lines[:2]):
+            match = _SRT_TIMES.search(line)
+            if match:
+                h1, m1, s1, ms1, h2, m2, s2, ms2 = (int(value) for value in match.groups())
+                add(
+                    h1 * 3600 + m1 * 60 + s1 + ms1 / 1000,
+                    h2 * 3600 + m2 * 60 + s2 + ms2 / 1000,
+                    _MARKUP.sub("", "\n".join(lines[index + 1:]))
+                )
+                break
+    return CaptionTimeline(captions)
+
+
+def _ass_seconds(value: str) -> float:
+    """Seconds of an ASS time (``H:MM:SS.cc``)"""
+    hours, minutes, seconds = value.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
@@ -0,0 +1,147 @@
+"""
+Asyncio DAG runner for the stages of a caption job.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..models.pipeline import PipelineReport, StageTiming
+
+
+class Stage:
+    """A named step and the stages whose results it needs."""
+    
+    def __init__(self, name: str, func: Callable[..., Awaitable[Any]], depends_on: List[str]):
+        self.name = name
+        self.func = func
+        self.depends_on = depends_on
+        self.timing = StageTiming(name=name, depends_on=depends_on)
+
+
+class Pipeline:
+    """
+    Runs stages as soon as their dependencies have finished.
+    
+    Each stage is an async callable that receives the results of its
+    dependencies as positional arguments, in the order they were listed.
+    Stages without a path between them run concurrently. If a stage fails,
+    the stages still running are cancelled and the first error is raised.
+    Results of the stages that finished stay available in ``results`` (for
+    cleanup), and ``report()`` returns per-stage timings and the critical path.
+    
+    ``before_stage`` is awaited with a stage's name once its dependencies
+    have finished and before it starts: a stage boundary where the job may
+    be paused (e.g. to yield its capacity to more urgent work). Time spent
+    there is not counted in the stage's duration.
+    """
+    
+    def __init__(
+        self,
+        name: str = "pipeline",
+        before_stage: Optional[Callable[[str], Awaitable[None]]] = None
+    ):
+        self.name = name
+        self.before_stage = before_stage
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+    
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], *depends_on: str) -> "Pipeline":
+        """Register a stage; dependencies must already be registered"""
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} already exists")
+        for dependency in depends_on:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dependency!r}")
+        self.stages[name] = Stage(name, func, list(depends_on))
+        return self
+    
+    async def run(self) -> Dict[str, Any]:
+        """Run every stage and return their results by name"""
+        self._started_at = time.monotonic()
+        tasks: Dict[str, asyncio.Task] = {}
+        # Stages are registered after their dependencies, so dict order is a valid topological order
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(
+                self._run_stage(stage, [tasks[dependency] for dependency in stage.depends_on])
+            )
+        
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self._finished_at = time.monotonic()
+        return self.results
+    
+    async def _run_stage(self, stage: Stage, dependencies: List[asyncio.Task]) -> Any:
+        timing = stage.timing
+        try:
+            inputs = [await dependency for dependency in dependencies]
+            if self.before_stage is not None:
+                await self.before_stage(stage.name)
+            timing.status = "running"
+            timing.start = self._elapsed()
+            result = await stage.func(*inputs)
+        except asyncio.CancelledError:
+            timing.status = "cancelled"
+            raise
+        except Exception:
+            # A stage whose dependency failed never started
+            timing.status = "failed" if timing.start is not None else "cancelled"
+            raise
+        finally:
+            if timing.start is not None:
+                timing.end = self._elapsed()
+                timing.duration = round(timing.end - timing.start, 3)
+        timing.status = "completed"
+        self.results[stage.name] = result
+        return result
+    
+    def _elapsed(self) -> float:
+        return round(time.monotonic() - self._started_at, 3)
+    
+    def critical_path(self) -> List[str]:
+        """
+        Stages on the chain that ended last.
+        
+        Starting from the stage that finished last, repeatedly step to the
+        dependency that finished last (the one the stage was waiting for).
+        """
+        finished = [stage for stage in self.stages.values() if stage.timing.end is not None]
+        if not finished:
+            return []
+        stage = max(finished, key=lambda stage: stage.timing.end)
+        path = [stage.name]
+        while stage.depends_on:
+            dependencies = [self.stages[name] for name in stage.depends_on if self.stages[name].timing.end is not None]
+            if not dependencies:
+                break
+            stage = max(dependencies, key=lambda stage: stage.timing.end)
+            path.append(stage.name)
+        return list(reversed(path))
+    
+    def report(self) -> PipelineReport:
+        """Timings of all stages and the critical path"""
+        total = None
+        if self._started_at is not None and self._finished_at is not None:
+            total = round(self._finished_at - self._started_at, 3)
+        return PipelineReport(
+            total_time=total,
+            critical_path=self.critical_path(),
+            stages=[stage.timing.copy() for stage in self.stages.values()]
+        )
+    
+    def log_report(self):
+        """Print the critical path and stage durations"""
+        report = self.report()
+        durations = ", ".join(
+            f"{timing.name}={timing.duration:.2f}s"
+            for timing in report.stages if timing.duration is not None
+        )
+        print(f"⏱️  {self.name}: {report.total_time}s, critical path: {' -> '.join(report.critical_path)}")
+        print(f"   Stages: {durations}")
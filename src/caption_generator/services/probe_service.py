@@ -0,0 +1,202 @@
+"""
+Input probing: fast validation, cached metadata and processing-time estimates.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .ffmpeg_service import FFmpegService
+from ..models.pipeline import PipelineReport
+from ..models.probe import VideoProbe
+from ..core.config import settings
+from ..utils.hashing import hash_file_async
+
+# Audio codecs that can be stream-copied into an MP4 container
+MP4_AUDIO_CODECS = {"aac", "mp3", "ac3", "eac3", "opus", "flac", "alac", "mp2"}
+
+REFERENCE_PIXELS = 1920 * 1080
+# Weight of the newest job when refining the ETA model
+ETA_SMOOTHING = 0.2
+
+
+def _parse_frame_rate(rate: Optional[str]) -> Optional[float]:
+    """Parse an FFprobe rate such as '30000/1001'"""
+    if not rate:
+        return None
+    numerator, _, denominator = rate.partition("/")
+    try:
+        value = float(numerator) / float(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(value, 3) if value > 0 else None
+
+
+def _parse_rotation(stream: Dict) -> int:
+    """Display rotation of a video stream (display matrix side data or legacy ``rotate`` tag)"""
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            try:
+                return int(float(side_data["rotation"])) % 360
+            except (TypeError, ValueError):
+                return 0
+    try:
+        return int(stream.get("tags", {}).get("rotate", 0)) % 360
+    except ValueError:
+        return 0
+
+
+class ProbeService:
+    """
+    Probes inputs right after ingest so broken files are rejected before any
+    model or encoder work, and keeps the results for planning and ETAs.
+    
+    Probes are cached by the SHA-256 of the file, so the same video uploaded
+    again (or fetched again from a URL) is not re-probed. The digest is
+    reused by the pipeline's hash stage, so the file is only read once.
+    """
+    
+    def __init__(
+        self,
+        ffmpeg_service: FFmpegService,
+        cache_size: int = settings.ffmpeg.PROBE_CACHE_SIZE
+    ):
+        self.ffmpeg_service = ffmpeg_service
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, VideoProbe]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.transcribe_speed = settings.ffmpeg.ETA_TRANSCRIBE_SPEED
+        self.encode_speed = settings.ffmpeg.ETA_ENCODE_SPEED_1080P
+    
+    async def probe(self, video_path: Path) -> VideoProbe:
+        """
+        Probe and validate a video.
+        
+        Raises:
+            ValueError: If the file cannot be read, has no audio or video
+                stream, has zero duration or uses an unsupported codec
+        """
+        fingerprint = await hash_file_async(video_path)
+        
+        probe = self._cache_get(fingerprint)
+        if probe is None:
+            probe = await self._run_probe(video_path, fingerprint)
+            self._cache_put(probe)
+        else:
+            print(f"Probe cache hit for {video_path.name}")
+        
+        self.validate(probe)
+        return probe
+    
+    async def _run_probe(self, video_path: Path, fingerprint: str) -> VideoProbe:
+        """Run FFprobe for stream metadata and keyframe spacing concurrently"""
+        info, keyframes = await asyncio.gather(
+            self.ffmpeg_service.get_video_info(video_path),
+            self.ffmpeg_service.get_keyframe_times(video_path, settings.ffmpeg.KEYFRAME_PROBE_SECONDS),
+            return_exceptions=True
+        )
+        if isinstance(info, FileNotFoundError):
+            raise info
+        if isinstance(info, Exception):
+            raise ValueError(f"Could not read video file: {info}")
+        
+        streams = info.get("streams", [])
+        video = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+        audio = next((stream for stream in streams if stream.get("codec_type") == "audio"), None)
+        container = info.get("format", {})
+        
+        try:
+            duration = float(container.get("duration") or (video or {}).get("duration") or 0)
+        except ValueError:
+            duration = 0.0
+        
+        keyframe_interval = None
+        if isinstance(keyframes, list) and len(keyframes) > 1:
+            keyframe_interval = round((keyframes[-1] - keyframes[0]) / (len(keyframes) - 1), 3)
+        
+        return VideoProbe(
+            fingerprint=fingerprint,
+            duration=duration,
+            size=video_path.stat().st_size,
+            format_name=container.get("format_name"),
+            has_video=video is not None,
+            has_audio=audio is not None,
+            video_codec=(video or {}).get("codec_name"),
+            audio_codec=(audio or {}).get("codec_name"),
+            width=(video or {}).get("width"),
+            height=(video or {}).get("height"),
+            rotation=_parse_rotation(video or {}),
+            fps=_parse_frame_rate((video or {}).get("avg_frame_rate")),
+            pix_fmt=(video or {}).get("pix_fmt"),
+            keyframe_interval=keyframe_interval
+        )
+    
+    def validate(self, probe: VideoProbe):
+        """Reject inputs that would only fail later in the pipeline"""
+        if not probe.has_video:
+            raise ValueError("File has no video stream")
+        if not probe.has_audio:
+            raise ValueError("File has no audio stream, nothing to transcribe")
+        if probe.duration <= 0:
+            raise ValueError("Video has zero duration")
+        if not probe.video_codec or probe.video_codec == "none":
+            raise ValueError("Unsupported or unknown video codec")
+        supported = settings.ffmpeg.supported_video_codecs
+        if supported and probe.video_codec not in supported:
+            raise ValueError(
+                f"Unsupported video codec: {probe.video_codec}. Supported: {', '.join(sorted(supported))}"
+            )
+        if not probe.audio_codec or probe.audio_codec == "none":
+            raise ValueError("Unsupported or unknown audio codec")
+    
+    def audio_copyable(self, probe: Optional[VideoProbe]) -> bool:
+        """Whether the input audio can be stream-copied into the MP4 output"""
+        return probe is None or probe.audio_codec in MP4_AUDIO_CODECS
+    
+    def estimate_processing_time(self, probe: VideoProbe) -> float:
+        """Estimated seconds to transcribe and encode a probed video"""
+        return round(probe.duration * (self.transcribe_speed + self.encode_speed * self._pixel_factor(probe)), 1)
+    
+    def estimate_renditions_time(self, probe: VideoProbe, heights: List[Optional[int]]) -> float:
+        """Estimated seconds to transcribe once and encode one output per height (None: input size)"""
+        pixels = 0.0
+        for height in heights:
+            scale = (height / probe.height) ** 2 if height and probe.height else 1.0
+            pixels += self._pixel_factor(probe) * scale
+        return round(probe.duration * (self.transcribe_speed + self.encode_speed * pixels), 1)
+    
+    def record_timings(self, probe: VideoProbe, report: PipelineReport, encode_stage: str):
+        """Refine the ETA model from a finished job's stage timings"""
+        if probe.duration <= 0:
+            return
+        durations: Dict[str, float] = {
+            timing.name: timing.duration for timing in report.stages
+            if timing.status == "completed" and timing.duration is not None
+        }
+        if "transcribe" in durations:
+            observed = durations["transcribe"] / probe.duration
+            self.transcribe_speed += ETA_SMOOTHING * (observed - self.transcribe_speed)
+        if encode_stage in durations:
+            observed = durations[encode_stage] / (probe.duration * self._pixel_factor(probe))
+            self.encode_speed += ETA_SMOOTHING * (observed - self.encode_speed)
+    
+    @staticmethod
+    def _pixel_factor(probe: VideoProbe) -> float:
+        """Frame size relative to 1080p (encode time scales roughly with pixels)"""
+        if not probe.width or not probe.height:
+            return 1.0
+        return max(probe.width * probe.height / REFERENCE_PIXELS, 0.05)
+    
+    def _cache_get(self, fingerprint: str) -> Optional[VideoProbe]:
+        with self._lock:
+            probe = self._cache.get(fingerprint)
+            if probe is not None:
+                self._cache.move_to_end(fingerprint)
+            return probe
+    
+    def _cache_put(self, probe: VideoProbe):
+        with self._lock:
+            self._cache[probe.fingerprint] = probe
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
@@ -0,0 +1,292 @@
+"""
+Smart render: burn captions by re-encoding only the GOPs they appear in.
+"""
+import json
+import os
+import shutil
+import tempfile
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from .ffmpeg_service import FFmpegService
+from .probe_service import _parse_rotation
+from ..models.encode import RenderSegment
+from ..models.probe import VideoProbe
+from ..core.config import settings
+from ..utils.hashing import hash_file
+
+# Pixel formats the re-encoded GOPs are written in; the copied GOPs must match
+SMART_RENDER_PIX_FMTS = {"yuv420p"}
+# Segment split points are placed just before each keyframe so rounding in
+# reported timestamps never pushes a cut to the following keyframe
+SPLIT_EPSILON = 0.001
+# Marks a finished split in a persistent work directory
+SPLIT_DONE = "split.done"
+
+
+def plan_render_segments(
+    keyframes: Sequence[float],
+    duration: float,
+    captions: Sequence[Tuple[float, float]]
+) -> List[RenderSegment]:
+    """
+    Split a video at keyframes into re-encoded and stream-copied spans.
+    
+    Each GOP (keyframe to next keyframe) that overlaps a caption's
+    ``(start, end)`` is re-encoded; consecutive GOPs with the same treatment
+    are merged into one segment.
+    """
+    starts = sorted(k for k in keyframes if 0 <= k < duration)
+    if not starts:
+        return [RenderSegment(start=0.0, end=duration, reencode=bool(captions))]
+    # Frames before the first keyframe cannot be cut from, so they join the first GOP
+    starts[0] = 0.0
+    ends = starts[1:] + [duration]
+    
+    dirty = [False] * len(starts)
+    for caption_start, caption_end in captions:
+        if caption_end <= 0 or caption_start >= duration:
+            continue
+        first = max(0, bisect_right(starts, caption_start) - 1)
+        last = max(0, bisect_right(starts, caption_end) - 1)
+        # A caption ending exactly on a keyframe does not touch the next GOP
+        if last > first and starts[last] >= caption_end:
+            last -= 1
+        for index in range(first, last + 1):
+            dirty[index] = True
+    
+    segments: List[RenderSegment] = []
+    for start, end, reencode in zip(starts, ends, dirty):
+        if segments and segments[-1].reencode == reencode:
+            segments[-1].end = end
+        else:
+            segments.append(RenderSegment(start=start, end=end, reencode=reencode))
+    return segments
+
+
+class SmartRenderer:
+    """
+    Burns subtitles by re-encoding only the captioned GOPs.
+    
+    The video stream is split at keyframes (stream copy) into alternating
+    runs of GOPs with and without captions. Runs with captions are re-encoded
+    with the subtitles burned in, the rest are kept as they are, and the runs
+    are concatenated and muxed with the untouched audio track. The result is
+    checked for the same frame count and duration as the input; ``render``
+    returns None whenever smart rendering does not apply or fails validation,
+    and the caller falls back to a full burn.
+    
+    With a persistent ``work_dir`` (a job checkpoint), the split and every
+    re-encoded segment are kept there as they finish, so a render interrupted
+    by a restart continues with the segments that are still missing.
+    """
+    
+    def __init__(self, ffmpeg_service: FFmpegService):
+        self.ffmpeg_service = ffmpeg_service
+    
+    def supports(self, probe: Optional[VideoProbe]) -> bool:
+        """Whether the copied GOPs can be spliced with libx264 re-encodes (burned by libass)"""
+        return (
+            settings.ffmpeg.SMART_RENDER
+            and self.ffmpeg_service.uses_libass
+            and probe is not None
+            and probe.video_codec == "h264"
+            and probe.pix_fmt in SMART_RENDER_PIX_FMTS
+            # Re-encodes come out autorotated, copied GOPs keep the display matrix
+            and probe.rotation % 360 == 0
+            and probe.duration > 0
+        )
+    
+    async def render(
+        self,
+        video_path: Path,
+        srt_path: Path,
+        captions: Sequence[Tuple[float, float]],
+        output_path: Path,
+        probe: Optional[VideoProbe],
+        font_size: int = 24,
+        font_color: str = "white",
+        position: str = "bottom",
+        copy_audio: bool = True,
+        work_dir: Optional[Path] = None
+    ) -> Optional[Path]:
+        """Smart-render ``output_path``, or return None if a full burn should be used"""
+        if not self.supports(probe):
+            return None
+        
+        keyframes = await self.ffmpeg_service.get_keyframe_times(video_path, max_seconds=None)
+        segments = plan_render_segments(keyframes, probe.duration, captions)
+        reencoded = sum(segment.duration for segment in segments if segment.reencode)
+        coverage = reencoded / probe.duration
+        print(
+            f"✂️  Smart render: {len(segments)} segment(s), "
+            f"{coverage:.0%} of {probe.duration:.1f}s needs re-encoding"
+        )
+        if coverage > settings.ffmpeg.SMART_RENDER_MAX_COVERAGE:
+            print("   Too much of the video is captioned, using a full burn")
+            return None
+        
+        persistent = work_dir is not None
+        if persistent:
+            self._prepare_work_dir(work_dir, segments, srt_path, font_size, font_color, position)
+        else:
+            work_dir = Path(tempfile.mkdtemp(prefix="smart_render_", dir=output_path.parent))
+        try:
+            parts = await self._split(video_path, segments, work_dir)
+            if len(parts) != len(segments):
+                print(f"   Split produced {len(parts)} parts for {len(segments)} segments, using a full burn")
+                return None
+            
+            video_filter = self.ffmpeg_service.subtitle_filter(srt_path, font_size, font_color, position)
+            for index, segment in enumerate(segments):
+                if segment.reencode:
+                    parts[index] = await self._burn_segment(parts[index], segment, video_filter)
+            
+            await self._concat(parts, segments, video_path, output_path, copy_audio, work_dir)
+            if not await self._validate(video_path, output_path, probe):
+                output_path.unlink(missing_ok=True)
+                return None
+        except RuntimeError as e:
+            print(f"   Smart render failed, using a full burn: {e}")
+            output_path.unlink(missing_ok=True)
+            return None
+        finally:
+            if not persistent:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        
+        print(f"✅ Smart-rendered captioned video: {output_path}")
+        return output_path
+    
+    @staticmethod
+    def _prepare_work_dir(
+        work_dir: Path,
+        segments: List[RenderSegment],
+        srt_path: Path,
+        font_size: int,
+        font_color: str,
+        position: str
+    ):
+        """Keep the parts in ``work_dir`` only if they were made for this exact render"""
+        plan = json.dumps({
+            "segments": [[segment.start, segment.end, segment.reencode] for segment in segments],
+            "subtitles": hash_file(srt_path),
+            "style": [font_size, font_color, position],
+            "encoder": [settings.ffmpeg.PRESET, settings.ffmpeg.CRF]
+        })
+        plan_path = work_dir / "plan.json"
+        if plan_path.exists() and plan_path.read_text() == plan:
+            print(f"   Resuming smart render from {work_dir}")
+            return
+        shutil.rmtree(work_dir, ignore_errors=True)
+        work_dir.mkdir(parents=True)
+        plan_path.write_text(plan)
+    
+    async def _split(self, video_path: Path, segments: List[RenderSegment], work_dir: Path) -> List[Path]:
+        """Cut the video stream at the segment boundaries without re-encoding"""
+        if (work_dir / SPLIT_DONE).exists():
+            return sorted(work_dir.glob("part_*.mkv"))
+        cmd = [
+            self.ffmpeg_service.ffmpeg_path,
+            "-i", str(video_path),
+            "-map", "0:v:0",
+            "-c", "copy",
+            # Parameter sets in-band, so parts from different encoders can be spliced
+            "-bsf:v", "h264_mp4toannexb",
+            "-f", "segment",
+            "-segment_format", "matroska",
+            "-reset_timestamps", "1",
+        ]
+        if len(segments) > 1:
+            times = ",".join(f"{segment.start - SPLIT_EPSILON:.3f}" for segment in segments[1:])
+            cmd += ["-segment_times", times]
+        cmd += ["-y", str(work_dir / "part_%05d.mkv")]
+        await self.ffmpeg_service._run_ffmpeg(cmd)
+        (work_dir / SPLIT_DONE).touch()
+        return sorted(work_dir.glob("part_*.mkv"))
+    
+    async def _burn_segment(self, part_path: Path, segment: RenderSegment, video_filter: str) -> Path:
+        """Re-encode one segment with the captions burned in at their original times"""
+        output_path = part_path.with_name(f"burned_{part_path.name}")
+        if output_path.exists():
+            # Finished before an interruption
+            return output_path
+        # Written under another name and renamed, so a segment that exists is complete
+        partial_path = part_path.with_name(f"burning_{part_path.name}")
+        cmd = [
+            self.ffmpeg_service.ffmpeg_path,
+            "-i", str(part_path),
+            # Shift to the segment's position in the source so caption timings line up, then back
+            "-vf", f"setpts=PTS-STARTPTS+{segment.start}/TB,{video_filter},setpts=PTS-STARTPTS",
+            "-c:v", "libx264",
+            "-preset", settings.ffmpeg.PRESET,
+            "-crf", str(settings.ffmpeg.CRF),
+            "-pix_fmt", "yuv420p",
+            "-fps_mode", "passthrough",  # Exactly one output frame per input frame
+            "-threads", str(settings.ffmpeg.threads),
+            "-bsf:v", "h264_mp4toannexb",
+            "-y",
+            str(partial_path)
+        ]
+        await self.ffmpeg_service._run_ffmpeg(cmd)
+        os.replace(partial_path, output_path)
+        return output_path
+    
+    async def _concat(
+        self,
+        parts: List[Path],
+        segments: List[RenderSegment],
+        video_path: Path,
+        output_path: Path,
+        copy_audio: bool,
+        work_dir: Path
+    ):
+        """Join the parts back together and mux them with the original audio"""
+        list_path = work_dir / "parts.txt"
+        # Explicit durations keep every part exactly at its keyframe position
+        list_path.write_text("".join(
+            f"file '{part.name}'\nduration {segment.duration:.6f}\n"
+            for part, segment in zip(parts, segments)
+        ))
+        cmd = [
+            self.ffmpeg_service.ffmpeg_path,
+            "-f", "concat",
+            "-safe", "0",
+            "-i", str(list_path),
+            "-i", str(video_path),
+            "-map", "0:v:0",
+            "-map", "1:a:0?",
+            "-c:v", "copy",
+            "-c:a", "copy" if copy_audio else "aac",
+            "-movflags", "+faststart",
+            "-y",
+            str(output_path)
+        ]
+        await self.ffmpeg_service._run_ffmpeg(cmd)
+    
+    async def _validate(self, video_path: Path, output_path: Path, probe: VideoProbe) -> bool:
+        """Check the output has every input frame, the input's frame size and rotation, and its duration"""
+        input_frames = await self.ffmpeg_service.count_video_frames(video_path)
+        output_frames = await self.ffmpeg_service.count_video_frames(output_path)
+        info = await self.ffmpeg_service.get_video_info(output_path)
+        output_duration = float(info.get("format", {}).get("duration") or 0)
+        video = next((stream for stream in info.get("streams", []) if stream.get("codec_type") == "video"), {})
+        output_frame = (video.get("width"), video.get("height"), _parse_rotation(video))
+        input_frame = (probe.width, probe.height, probe.rotation % 360)
+        frame_time = 1 / probe.fps if probe.fps else 0.05
+        
+        if output_frame != input_frame:
+            print(
+                f"   Smart render frames are {output_frame[0]}x{output_frame[1]} rotated {output_frame[2]}, "
+                f"input {input_frame[0]}x{input_frame[1]} rotated {input_frame[2]}; using a full burn"
+            )
+            return False
+        if output_frames != input_frames:
+            print(f"   Smart render has {output_frames} frames, input has {input_frames}; using a full burn")
+            return False
+        if abs(output_duration - probe.duration) > 2 * frame_time:
+            print(
+                f"   Smart render lasts {output_duration:.3f}s, input {probe.duration:.3f}s; using a full burn"
+            )
+            return False
+        return True
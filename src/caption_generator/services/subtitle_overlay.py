@@ -0,0 +1,268 @@
+"""
+Caption tracks pre-rendered once into transparent images and cached for the ``overlay`` filter.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .ffmpeg_service import FFmpegService
+from ..models.encode import SubtitleOverlay
+from ..models.subtitle import TranscriptSegment
+from ..core.config import settings
+from ..utils.caption_timeline import CaptionTimeline
+from ..utils.hashing import hash_file
+from ..utils.single_flight import SingleFlight
+
+# Bump when the rendering changes, so older cached tracks are not reused
+OVERLAY_FORMAT = "1"
+CONCAT_NAME = "captions.ffconcat"
+META_NAME = "overlay.json"
+
+
+class SubtitleOverlayCache:
+    """
+    Caption tracks rendered once per style and frame size, composited with ``overlay``.
+    
+    Burning with the ``subtitles`` filter runs libass over every frame of
+    every encode. Here one FFmpeg run draws each caption of a timeline
+    exactly once (caption k at second k of a compressed timeline, one frame
+    per caption), on black and on white: libass does not write alpha, so
+    each pixel's coverage is recovered from the two. The images are cropped
+    to the band of rows any caption touches and listed in an ffconcat file
+    with the real caption times, which plays as an image track that only
+    changes at caption boundaries.
+    
+    Tracks live in ``root/<key>``, keyed by subtitle hash, style and frame
+    size; the least recently used beyond ``max_entries`` are deleted, except
+    those an encode is still reading (``release`` when done).
+    """
+    
+    def __init__(self, ffmpeg_service: FFmpegService, root: Path, max_entries: int = 32):
+        self.ffmpeg_service = ffmpeg_service
+        # Created with the first track
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.flights = SingleFlight()
+        self._in_use: Dict[str, int] = {}
+        self.hits = 0
+        self.renders = 0
+    
+    @staticmethod
+    def key(srt_path: Path, font_size: int, font_color: str, position: str, width: int, height: int) -> str:
+        """Cache key of a track: everything that determines its pixels"""
+        parts = [
+            OVERLAY_FORMAT,
+            hash_file(srt_path),
+            f"{font_size}|{font_color.strip().lower()}|{position.lower()}",
+            f"{width}x{height}",
+        ]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    
+    async def acquire(
+        self,
+        srt_path: Path,
+        timeline: CaptionTimeline,
+        font_size: int,
+        font_color: str,
+        position: str,
+        width: int,
+        height: int
+    ) -> SubtitleOverlay:
+        """The cached track for these captions, rendered first if needed; ``release`` it after the encode"""
+        key = self.key(srt_path, font_size, font_color, position, width, height)
+        # In use before waiting, so another render's eviction cannot delete it meanwhile
+        self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            overlay, _ = await self.flights.do(
+                key,
+                lambda: self._load_or_render(key, srt_path, list(timeline), font_size, font_color, position, width, height)
+            )
+        except BaseException:
+            self._release(key)
+            raise
+        return overlay
+    
+    def release(self, overlay: SubtitleOverlay):
+        """An encode finished reading a track; it may be evicted again"""
+        self._release(overlay.key)
+    
+    def _release(self, key: str):
+        count = self._in_use.get(key, 0) - 1
+        if count > 0:
+            self._in_use[key] = count
+        else:
+            self._in_use.pop(key, None)
+    
+    def get(self, key: str) -> Optional[SubtitleOverlay]:
+        """A cached track by key (marked as recently used), or None"""
+        directory = self.root / key
+        try:
+            meta = json.loads((directory / META_NAME).read_text())
+            os.utime(directory)
+        except (FileNotFoundError, ValueError):
+            return None
+        return SubtitleOverlay(key=key, concat_path=directory / CONCAT_NAME, **meta)
+    
+    async def _load_or_render(
+        self,
+        key: str,
+        srt_path: Path,
+        captions: List[TranscriptSegment],
+        font_size: int,
+        font_color: str,
+        position: str,
+        width: int,
+        height: int
+    ) -> SubtitleOverlay:
+        overlay = self.get(key)
+        if overlay:
+            self.hits += 1
+            print(f"♻️  Reusing pre-rendered captions {key[:12]}")
+            return overlay
+        
+        print(f"🖼️  Pre-rendering {len(captions)} captions at {width}x{height}...")
+        work_dir = self.root / f".{key}.{uuid.uuid4().hex}"
+        work_dir.mkdir(parents=True)
+        loop = asyncio.get_running_loop()
+        try:
+            compressed_srt = work_dir / "one_per_second.srt"
+            compressed_srt.write_text(_one_caption_per_second(captions), encoding="utf-8")
+            await self.ffmpeg_service.render_caption_pairs(
+                compressed_srt, work_dir / "pair_%05d.png", len(captions),
+                width, height, font_size, font_color, position
+            )
+            meta = await loop.run_in_executor(None, _build_track, work_dir, captions, width, height)
+            (work_dir / META_NAME).write_text(json.dumps(meta))
+            try:
+                work_dir.rename(self.root / key)
+            except OSError:
+                # Rendered concurrently by another process: keep theirs
+                shutil.rmtree(work_dir, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+        
+        self.renders += 1
+        self._evict(keep=key)
+        return self.get(key)
+    
+    def _evict(self, keep: str):
+        """Delete the least recently used tracks beyond ``max_entries``"""
+        entries = []
+        for directory in self.root.iterdir():
+            if directory.name.startswith(".") or not directory.is_dir():
+                continue
+            try:
+                entries.append((directory.stat().st_mtime, directory))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        excess = len(entries) - self.max_entries
+        for _, directory in entries:
+            if excess <= 0:
+                break
+            if directory.name == keep or directory.name in self._in_use:
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+            excess -= 1
+
+
+def _srt_time(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d},000"
+
+
+def _one_caption_per_second(captions: Sequence[TranscriptSegment]) -> str:
+    """SRT with caption k shown from second k to k + 1 (so a 1 fps render draws each once)"""
+    return "\n".join(
+        f"{index + 1}\n{_srt_time(index)} --> {_srt_time(index + 1)}\n{caption.text}\n"
+        for index, caption in enumerate(captions)
+    )
+
+
+def _unblend(on_black: np.ndarray, on_white: np.ndarray) -> np.ndarray:
+    """RGBA image from the same drawing blended over black and over white"""
+    alpha = 255 - (on_white.astype(np.int16) - on_black).max(axis=-1).clip(0, 255)
+    # Over black the drawing is color * alpha; divide it back out where anything was drawn
+    scale = np.divide(255.0, alpha, out=np.zeros(alpha.shape), where=alpha > 0)[..., None]
+    color = (on_black * scale).round().clip(0, 255)
+    return np.dstack([color, alpha]).astype(np.uint8)
+
+
+def _build_track(work_dir: Path, captions: Sequence[TranscriptSegment], width: int, height: int) -> Dict:
+    """Crop the rendered captions to their common band and write the ffconcat track"""
+    crops: List[Optional[Tuple[int, np.ndarray]]] = []
+    top, bottom = height, 0
+    for index in range(len(captions)):
+        pair_path = work_dir / f"pair_{index:05d}.png"
+        with Image.open(pair_path) as image:
+            pair = np.asarray(image.convert("RGB"))
+        pair_path.unlink()
+        rgba = _unblend(pair[:, :width], pair[:, width:2 * width])
+        rows = np.flatnonzero(rgba[..., 3].any(axis=1))
+        if rows.size == 0:
+            crops.append(None)
+            continue
+        first, last = int(rows[0]), int(rows[-1]) + 1
+        crops.append((first, rgba[first:last]))
+        top, bottom = min(top, first), max(bottom, last)
+    
+    # Even offsets and size keep the band aligned with 4:2:0 chroma
+    if bottom <= top:
+        top, bottom = 0, 2
+    top -= top % 2
+    bottom = min(height, bottom + bottom % 2)
+    blank = np.zeros((bottom - top, width, 4), np.uint8)
+    Image.fromarray(blank, "RGBA").save(work_dir / "blank.png")
+    
+    lines = ["ffconcat version 1.0"]
+    
+    def show(name: str, duration: float):
+        # Millisecond timestamps: at the image demuxer's default 25 fps a caption could start a frame late
+        lines.extend([f"file '{name}'", "option framerate 1000", f"duration {duration:.3f}"])
+    
+    t = 0.0
+    for index, (caption, crop) in enumerate(zip(captions, crops)):
+        end = caption.end
+        if index + 1 < len(captions):
+            end = min(end, captions[index + 1].start)
+        if crop is None or end <= caption.start:
+            continue
+        if caption.start > t:
+            show("blank.png", caption.start - t)
+        band = blank.copy()
+        first, pixels = crop
+        band[first - top:first - top + len(pixels)] = pixels
+        name = f"caption_{index:05d}.png"
+        Image.fromarray(band, "RGBA").save(work_dir / name)
+        show(name, end - max(caption.start, t))
+        t = end
+    # Clear the last caption; the concat demuxer only honors a duration followed by another file
+    show("blank.png", 1.0)
+    lines.append("file 'blank.png'")
+    (work_dir / CONCAT_NAME).write_text("\n".join(lines) + "\n")
+    return {
+        "width": width,
+        "height": height,
+        "y": top,
+        "band_height": bottom - top,
+        "captions": len(captions),
+    }
+
+
+def create_overlay_cache(ffmpeg_service: FFmpegService) -> Optional[SubtitleOverlayCache]:
+    """Build the caption overlay cache, or None if pre-rendered overlays are disabled."""
+    if not settings.storage.SUBTITLE_OVERLAY:
+        return None
+    return SubtitleOverlayCache(
+        ffmpeg_service,
+        settings.storage.OVERLAY_CACHE_DIR,
+        max_entries=settings.storage.OVERLAY_CACHE_ENTRIES
+    )
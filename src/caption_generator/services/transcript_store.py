@@ -0,0 +1,243 @@
+"""
+Full-text search over the transcripts of captioned videos (SQLite FTS5).
+
+Each finished video's transcript is split into short passages of words,
+stored with their start/end times and the start time of every word. An
+external-content FTS5 table indexes the passage text, so a phrase query
+returns the video and the passage, and the word times pin the hit down to
+the first matched word.
+"""
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..models.search import SearchHit
+from ..core.config import settings
+
+# Same word boundaries as FTS5's unicode61 tokenizer (letters and digits)
+_TOKEN = re.compile(r"[^\W_]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL UNIQUE,
+    job_id TEXT,
+    video_url TEXT,
+    language TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY,
+    video INTEGER NOT NULL REFERENCES videos (id),
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    word_times TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_passages_video ON passages (video);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5 (
+    text, content='passages', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS passages_ai AFTER INSERT ON passages BEGIN
+    INSERT INTO passages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS passages_ad AFTER DELETE ON passages BEGIN
+    INSERT INTO passages_fts (passages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def fts5_available() -> bool:
+    """Whether the linked SQLite library was built with FTS5"""
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5 (text)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+class TranscriptStore:
+    """SQLite FTS5 index of transcript passages, searchable by phrase (opened on first use)."""
+    
+    def __init__(self, db_path: Path, chunk_words: int = settings.storage.TRANSCRIPT_CHUNK_WORDS):
+        self.db_path = Path(db_path)
+        self.chunk_words = max(1, chunk_words)
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+    
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Only accessed while holding self._lock
+        if self._connection is None:
+            self._connection = self._open()
+        return self._connection
+    
+    def _open(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+        return conn
+    
+    def add(
+        self,
+        video_id: str,
+        transcript: Dict,
+        video_url: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> int:
+        """
+        Index (or re-index) a video's transcript; returns the number of passages.
+        
+        Args:
+            video_id: Stable identifier of the video (its output filename)
+            transcript: WhisperX result with ``segments`` (and word timings if aligned)
+            video_url: Download URL returned in search hits
+            job_id: Job that produced the video
+        """
+        passages = list(self._passages(transcript.get("segments", [])))
+        with self._lock, self._conn:
+            existing = self._conn.execute("SELECT id FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+            if existing:
+                self._conn.execute("DELETE FROM passages WHERE video = ?", (existing["id"],))
+                self._conn.execute("DELETE FROM videos WHERE id = ?", (existing["id"],))
+            video = self._conn.execute(
+                "INSERT INTO videos (video_id, job_id, video_url, language, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (video_id, job_id, video_url, transcript.get("language"), time.time())
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO passages (video, start_time, end_time, word_times, text) VALUES (?, ?, ?, ?, ?)",
+                ((video, start, end, word_times, text) for start, end, word_times, text in passages)
+            )
+        return len(passages)
+    
+    async def add_async(self, video_id: str, transcript: Dict, **kwargs) -> int:
+        """``add`` in a worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.add(video_id, transcript, **kwargs))
+    
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[SearchHit]:
+        """
+        Passages containing ``query`` as a phrase, best matches (BM25) first.
+        
+        Raises:
+            ValueError: If the query contains no searchable words
+        """
+        words = _tokens(query)
+        if not words:
+            raise ValueError("Search query must contain at least one word")
+        phrase = '"' + " ".join(words) + '"'
+        hits: Dict[Tuple[str, float], SearchHit] = {}
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT videos.video_id, videos.video_url, videos.job_id, videos.language,
+                       passages.start_time, passages.end_time, passages.word_times, passages.text,
+                       snippet(passages_fts, 0, '[', ']', '…', 12) AS snippet
+                FROM passages_fts
+                JOIN passages ON passages.id = passages_fts.rowid
+                JOIN videos ON videos.id = passages.video
+                WHERE passages_fts MATCH ?
+                ORDER BY rank
+                """,
+                (phrase,)
+            )
+            # A match inside the overlap of two passages is reported once, so pages are
+            # cut from the deduplicated hits (rows are read only as far as the page needs)
+            for row in rows:
+                time_ = self._match_time(row, words)
+                hits.setdefault((row["video_id"], time_), SearchHit(
+                    video_id=row["video_id"],
+                    video_url=row["video_url"],
+                    job_id=row["job_id"],
+                    language=row["language"],
+                    time=time_,
+                    start=row["start_time"],
+                    end=row["end_time"],
+                    snippet=row["snippet"]
+                ))
+                if len(hits) >= offset + limit:
+                    break
+        return list(hits.values())[offset:offset + limit]
+    
+    def remove(self, video_id: str) -> bool:
+        """Drop a video from the index."""
+        with self._lock, self._conn:
+            video = self._conn.execute("SELECT id FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+            if video is None:
+                return False
+            self._conn.execute("DELETE FROM passages WHERE video = ?", (video["id"],))
+            self._conn.execute("DELETE FROM videos WHERE id = ?", (video["id"],))
+            return True
+    
+    def video_count(self) -> int:
+        """Number of indexed videos."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+    
+    def _passages(self, segments: List[Dict]) -> Iterator[Tuple[float, float, Optional[str], str]]:
+        """Split segments into overlapping ``(start, end, word_times, text)`` passages of ``chunk_words`` words"""
+        for segment in segments:
+            words = [
+                word for word in segment.get("words") or []
+                if "start" in word and "end" in word and word.get("word", "").strip()
+            ]
+            if not words:
+                text = segment.get("text", "").strip()
+                if text and "start" in segment and "end" in segment:
+                    yield segment["start"], segment["end"], None, text
+                continue
+            # Consecutive passages share a few words, so short phrases across a boundary still match
+            step = max(1, self.chunk_words - self.chunk_words // 4)
+            for index in range(0, max(1, len(words) - self.chunk_words + step), step):
+                chunk = words[index:index + self.chunk_words]
+                # One start time per token, so a token position maps back to a time
+                times = []
+                for word in chunk:
+                    times.extend([f"{word['start']:.2f}"] * len(_tokens(word["word"])))
+                yield (
+                    chunk[0]["start"],
+                    chunk[-1]["end"],
+                    " ".join(times),
+                    " ".join(word["word"].strip() for word in chunk)
+                )
+    
+    @staticmethod
+    def _match_time(row: sqlite3.Row, words: List[str]) -> float:
+        """Start time of the first word of the phrase within a passage"""
+        if not row["word_times"]:
+            return row["start_time"]
+        tokens = _tokens(row["text"])
+        times = row["word_times"].split()
+        for position in range(len(tokens) - len(words) + 1):
+            if tokens[position:position + len(words)] == words and position < len(times):
+                return float(times[position])
+        return row["start_time"]
+
+
+def create_transcript_store() -> Optional[TranscriptStore]:
+    """Build the configured transcript store, or None if search is disabled or unsupported."""
+    if not settings.storage.TRANSCRIPT_SEARCH:
+        return None
+    if not fts5_available():
+        print("Warning: SQLite was built without FTS5, transcript search is disabled")
+        return None
+    return TranscriptStore(settings.storage.TRANSCRIPT_INDEX_PATH)
@@ -0,0 +1,191 @@
+"""
+Dynamic micro-batching of model inputs across concurrent requests.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+from ..models.transcription import SchedulerStats
+
+
+class _Request:
+    """Items submitted by one caller, filled in as batches complete."""
+    
+    def __init__(self, items: List[Any], future: asyncio.Future):
+        self.items = items
+        self.results: List[Any] = [None] * len(items)
+        self.next_item = 0  # first item not yet handed to a batch
+        self.pending = len(items)  # items without a result yet
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Collects items from concurrent callers into shared model batches.
+    
+    Callers ``await submit(key, items)``. Items with the same key (e.g. the
+    language the decoder is prompted with) are grouped; a batch is dispatched
+    as soon as ``max_batch_size`` items are waiting or the oldest waiting item
+    has waited ``max_wait_ms``. ``run_batch(key, items)`` runs in a single
+    worker thread (so the model is never used concurrently) and must return
+    one result per item; results are handed back to each caller in the order
+    it submitted them. A caller with more items than fit in one batch is
+    spread over consecutive batches. If a caller is cancelled, its items
+    that have not reached a batch yet are dropped (a batch already running
+    finishes).
+    """
+    
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, List[Any]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        executor: Optional[Executor] = None
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batch")
+        self._queues: Dict[Hashable, Deque[_Request]] = {}
+        # Created on first submit so they bind to the running event loop
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = SchedulerStats(max_batch_size=self.max_batch_size, max_wait_ms=max_wait_ms)
+    
+    async def submit(self, key: Hashable, items: List[Any]) -> List[Any]:
+        """Queue items for batched processing and wait for their results"""
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+        
+        request = _Request(list(items), loop.create_future())
+        self._queues.setdefault(key, deque()).append(request)
+        self.stats.requests += 1
+        self._wakeup.set()
+        try:
+            return await request.future
+        except asyncio.CancelledError:
+            self._withdraw(key, request)
+            raise
+    
+    def _withdraw(self, key: Hashable, request: _Request):
+        """Drop the items of a cancelled caller that are still queued"""
+        remaining = len(request.items) - request.next_item
+        request.next_item = len(request.items)
+        queue = self._queues.get(key)
+        if queue is not None and request in queue:
+            queue.remove(request)
+            if not queue:
+                del self._queues[key]
+        self.stats.cancelled_items += remaining
+    
+    def _waiting_items(self, key: Hashable) -> int:
+        return sum(len(r.items) - r.next_item for r in self._queues.get(key, ()))
+    
+    def _oldest_key(self) -> Optional[Hashable]:
+        """Key whose head-of-line request has waited longest"""
+        keys = [key for key, queue in self._queues.items() if queue]
+        if not keys:
+            return None
+        return min(keys, key=lambda key: self._queues[key][0].enqueued_at)
+    
+    async def _run(self):
+        """Dispatch batches; if the worker dies, fail every queued request"""
+        try:
+            await self._dispatch_forever()
+        except BaseException as e:
+            error = e if isinstance(e, Exception) else RuntimeError("Transcription scheduler stopped")
+            for queue in self._queues.values():
+                for request in queue:
+                    if not request.future.done():
+                        request.future.set_exception(error)
+            self._queues.clear()
+            raise
+    
+    async def _dispatch_forever(self):
+        """Dispatch batches as they fill up or their wait time runs out"""
+        loop = asyncio.get_running_loop()
+        while True:
+            key = self._oldest_key()
+            if key is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            # Wait for the batch to fill, but never past the oldest item's deadline
+            deadline = self._queues[key][0].enqueued_at + self.max_wait
+            while self._waiting_items(key) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if key not in self._queues:
+                # Every waiting request of this key was cancelled
+                continue
+            
+            batch = self._take_batch(key)
+            items = [request.items[index] for request, index in batch]
+            started = time.monotonic()
+            try:
+                results = await loop.run_in_executor(self._executor, self.run_batch, key, items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"Batch returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                self._fail(batch, e)
+            else:
+                self._deliver(batch, results)
+            self._record(len(items), batch, started)
+    
+    def _take_batch(self, key: Hashable) -> List[tuple]:
+        """Remove up to ``max_batch_size`` items (oldest first) from a key's queue"""
+        queue = self._queues[key]
+        batch = []
+        while queue and len(batch) < self.max_batch_size:
+            request = queue[0]
+            take = min(len(request.items) - request.next_item, self.max_batch_size - len(batch))
+            batch.extend((request, index) for index in range(request.next_item, request.next_item + take))
+            request.next_item += take
+            if request.next_item == len(request.items):
+                queue.popleft()
+        if not queue:
+            del self._queues[key]
+        return batch
+    
+    def _deliver(self, batch: List[tuple], results: List[Any]):
+        for (request, index), result in zip(batch, results):
+            request.results[index] = result
+            request.pending -= 1
+            if request.pending == 0 and not request.future.done():
+                request.future.set_result(request.results)
+    
+    def _fail(self, batch: List[tuple], error: Exception):
+        for request, _ in batch:
+            if not request.future.done():
+                request.future.set_exception(error)
+            # Drop the failed request's remaining items from the queue
+            request.next_item = len(request.items)
+        for key in list(self._queues):
+            queue = self._queues[key]
+            self._queues[key] = deque(r for r in queue if r.next_item < len(r.items))
+            if not self._queues[key]:
+                del self._queues[key]
+    
+    def _record(self, size: int, batch: List[tuple], started: float):
+        stats = self.stats
+        stats.batches += 1
+        stats.items += size
+        stats.average_batch_size = round(stats.items / stats.batches, 2)
+        stats.last_batch_size = size
+        stats.last_batch_duration = round(time.monotonic() - started, 4)
+        oldest_wait = started - min(request.enqueued_at for request, _ in batch)
+        stats.max_queue_wait_ms = round(max(stats.max_queue_wait_ms, oldest_wait * 1000), 2)
@@ -1,18 +1,41 @@
 """
 Video processing service for handling video transcription and captioning.
 """
+import asyncio
+import hashlib
 import time
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 from fastapi import UploadFile
 
 from .whisperx_service import WhisperXService
 from .ffmpeg_service import FFmpegService
+from .job_service import Job, JobGroup, JobManager
+from .admission import AdmissionController, AdmissionTicket
+from .artifact_store import create_artifact_store
+from .checkpoint_store import JobCheckpoint, create_checkpoint_store
+from .janitor import TempDirJanitor
+from .pipeline import Pipeline
+from .probe_service import ProbeService
+from .smart_render import SmartRenderer
+from .subtitle_overlay import create_overlay_cache
+from .transcript_store import create_transcript_store
 from ..utils.file_manager import FileManager
-from ..utils.validation import validate_file_size, validate_video_format
+from ..utils.file_streaming import WriteStatus, tail_file
+from ..utils.hashing import hash_file, hash_file_async
+from ..utils.caption_timeline import CaptionTimeline
+from ..utils.single_flight import SingleFlight
+from ..utils.validation import normalize_url, validate_file_size, validate_video_format
 from ..models.video import VideoResponse
+from ..models.rendition import RenditionResult, RenditionSpec, RenditionsResponse
+from ..models.job import JobStatus
+from ..models.artifact import ArtifactRecord
+from ..models.probe import VideoProbe
+from ..models.encode import EncodePlan, OutputType, SubtitleOverlay
+from ..models.admission import JobCost, JobPriority
 from ..models.subtitle import TranscriptSegment
 from ..core.config import settings
+from ..core.exceptions import RateLimitExceededError, ServerBusyError
 
 
 class VideoProcessingService:
@@ -20,6 +43,27 @@ class VideoProcessingService:
         self.whisperx_service = WhisperXService()
         self.ffmpeg_service = FFmpegService()
         self.file_manager = FileManager()
+        self.job_manager = JobManager()
+        self.artifact_store = create_artifact_store()
+        self.probe_service = ProbeService(self.ffmpeg_service)
+        self.admission = AdmissionController(self.probe_service.estimate_processing_time)
+        self.smart_renderer = SmartRenderer(self.ffmpeg_service)
+        self.overlays = create_overlay_cache(self.ffmpeg_service)
+        self.transcript_store = create_transcript_store()
+        self.checkpoints = create_checkpoint_store()
+        self.janitor = TempDirJanitor(
+            self.file_manager.temp_dir,
+            self.artifact_store,
+            is_in_use=self.file_manager.is_in_use
+        )
+        # Outputs currently being encoded, keyed by filename; set when finished
+        self.active_outputs: Dict[str, WriteStatus] = {}
+        self._encode_slots: Optional[asyncio.Semaphore] = None
+        # Set at shutdown: interrupted jobs keep their checkpoints and resume on the next start
+        self._stopping = False
+        # Identical requests in progress, keyed by input identity and output parameters
+        self.flights = SingleFlight()
+        self._inflight_jobs: Dict[Tuple, Job] = {}
     
     async def process_video(
         self,
@@ -27,61 +71,186 @@ class VideoProcessingService:
         url: Optional[str] = None,
         font_size: int = settings.ffmpeg.default_font_size,
         font_color: str = settings.ffmpeg.default_font_color,
-        position: str = settings.ffmpeg.default_position
+        position: str = settings.ffmpeg.default_position,
+        language: Optional[str] = None,
+        output_type: OutputType = OutputType.BURN,
+        client: str = "anonymous",
+        priority: JobPriority = JobPriority.INTERACTIVE,
+        checkpoint: Optional[JobCheckpoint] = None,
+        highlight_color: Optional[str] = None
     ) -> VideoResponse:
-        """Process video to add captions"""
-        start_time = time.time()
+        """
+        Process video to add captions (``language`` skips language detection).
         
-        # Temporary file paths
-        input_video_path = None
-        srt_path = None
-        output_video_path = None
+        With ``highlight_color`` the captions are karaoke: each word turns that
+        color as it is spoken (see ``_write_subtitle_file``).
         
-        try:
-            # Step 1: Get input video
-            if file:
-                input_video_path = await self._handle_uploaded_file(file)
-            elif url:
-                input_video_path = await self._handle_video_url(url)
-            else:
-                raise ValueError("Either file or URL must be provided")
-            
-            # Step 2: Transcribe video with WhisperX
-            print("Starting transcription...")
-            transcription_result = await self.whisperx_service.transcribe_video(input_video_path)
-            
-            # Step 3: Group words into caption segments
-            print("Grouping words into captions...")
-            captions = self.whisperx_service.group_words_into_captions(
-                transcription_result["segments"]
-            )
-            
-            if not captions:
-                raise ValueError("No speech detected in video")
-            
-            # Step 4: Create SRT file
-            print("Creating SRT file...")
-            srt_content = self.whisperx_service.create_srt_content(captions)
-            srt_path = self.file_manager.get_temp_path(
-                f"subtitles_{self.file_manager.generate_unique_filename('.srt')}"
+        Runs as a stage DAG. The input is probed first (milliseconds) so
+        broken files are rejected before transcription starts, and its
+        estimated cost is charged to ``client`` before any heavy work (see
+        ``AdmissionController``); the request waits while the server is at
+        capacity, and is scheduled by ``priority``. The encode stage runs the cheapest operation for
+        ``output_type`` (see ``FFmpegService.plan_encode``) and reuses a
+        stored output when the same input, subtitles, style and encoder
+        profile were seen before. Transcripts are cached by the input's
+        SHA-256 and the requested language, so a repeated input skips
+        WhisperX and reaches that output cache right away.
+        
+        The input, decoded audio, transcript and smart-render segments are
+        checkpointed as their stages finish. If the server restarts, the job
+        resumes from ``checkpoint`` under the same ``job_id`` (the request was
+        already charged, so it only waits for capacity).
+        
+        Identical requests in progress at the same time (same input, same
+        parameters shaping the output) run once: later ones attach to the
+        first and share its response (``coalesced``) instead of transcribing
+        and encoding again. URL inputs are matched before downloading, by
+        normalized URL and the server's ETag or Last-Modified; other inputs by
+        the SHA-256 of the ingested file.
+        """
+        def run(ingested: Optional[Path] = None) -> Awaitable[VideoResponse]:
+            return self._caption_video(
+                file, url, font_size, font_color, position, language, output_type,
+                client, priority, checkpoint=checkpoint, ingested=ingested,
+                highlight_color=highlight_color
             )
-            
-            with open(srt_path, 'w', encoding='utf-8') as f:
-                f.write(srt_content)
-            
-            # Step 5: Burn subtitles into video
-            print("Burning subtitles into video...")
-            output_filename = f"captioned_{self.file_manager.generate_unique_filename()}"
-            output_video_path = self.file_manager.get_temp_path(output_filename)
-            
-            await self.ffmpeg_service.burn_subtitles(
-                video_path=input_video_path,
-                srt_path=srt_path,
-                output_path=output_video_path,
+        
+        if checkpoint is not None or not settings.app.COALESCE_REQUESTS:
+            return await run()
+        request = (
+            "video", font_size, font_color.strip().lower(), position.lower(), language, output_type.value,
+            highlight_color.strip().lower() if highlight_color else None
+        )
+        
+        if url:
+            validator = await self.file_manager.fetch_url_validator(url)
+            if validator:
+                return await self._coalesce(("url", normalize_url(url), validator) + request, run)
+        
+        input_video_path = await self._ingest_input(file, url)
+        try:
+            input_hash = await hash_file_async(input_video_path)
+        except BaseException:
+            self._discard_input(input_video_path, uploaded=file is not None)
+            raise
+        key = ("content", input_hash) + request
+        if key in self.flights:
+            # An identical request is already running, this copy of the input is not needed
+            self._discard_input(input_video_path, uploaded=file is not None)
+            return await self._coalesce(key, run)
+        return await self._coalesce(key, lambda: run(input_video_path))
+    
+    async def _coalesce(self, key: Tuple, run: Callable[[], Awaitable[VideoResponse]]) -> VideoResponse:
+        """Run a request, or wait for the identical one already in flight and share its response"""
+        start_time = time.time()
+        response, shared = await self.flights.do(key, run)
+        if not shared:
+            return response
+        print(f"🔗 Shared the result of an identical request in flight ({response.video_url})")
+        return response.copy(update={
+            "coalesced": True,
+            "processing_time": round(time.time() - start_time, 2)
+        })
+    
+    async def _caption_video(
+        self,
+        file: Optional[UploadFile],
+        url: Optional[str],
+        font_size: int,
+        font_color: str,
+        position: str,
+        language: Optional[str],
+        output_type: OutputType,
+        client: str,
+        priority: JobPriority,
+        checkpoint: Optional[JobCheckpoint] = None,
+        ingested: Optional[Path] = None,
+        highlight_color: Optional[str] = None
+    ) -> VideoResponse:
+        """The ``process_video`` pipeline (``ingested``: input already saved by the caller)"""
+        start_time = time.time()
+        output_video_path: Optional[Path] = None
+        resumed = checkpoint is not None
+        if not resumed:
+            checkpoint = self._create_checkpoint("video", file, url, dict(
                 font_size=font_size,
                 font_color=font_color,
-                position=position
+                position=position,
+                language=language,
+                output_type=output_type.value,
+                client=client,
+                priority=priority.value,
+                highlight_color=highlight_color
+            ))
+        
+        async def admit(probe: Optional[VideoProbe]) -> AdmissionTicket:
+            cost = self.admission.estimate(probe)
+            if resumed:
+                return await self.admission.acquire(cost, client, self.admission.classify(priority, cost))
+            return await self.admission.admit(client, cost, priority)
+        
+        async def encode(
+            input_video_path: Path,
+            subtitles: Tuple[Path, str, CaptionTimeline],
+            probe: Optional[VideoProbe],
+            input_hash: str
+        ) -> Tuple[str, bool]:
+            nonlocal output_video_path
+            plan = self.ffmpeg_service.plan_encode(
+                output_type, copy_audio=self.probe_service.audio_copyable(probe)
             )
+            cache_key = self._output_cache_key(input_hash, subtitles[0], plan, font_size, font_color, position)
+            cached = self.artifact_store.find_cached(cache_key)
+            if cached:
+                print(f"♻️  Reusing identical output {cached.filename}")
+                return cached.filename, True
+            
+            output_key, output_filename = self._new_output_name("captioned", plan.extension)
+            output_video_path = self._temp_output_path(output_filename)
+            if plan.output_type == OutputType.BURN:
+                await self._burn(
+                    input_video_path, subtitles[0], subtitles[2], output_video_path, probe,
+                    font_size=font_size, font_color=font_color, position=position,
+                    work_dir=checkpoint.work_dir("render") if checkpoint else None
+                )
+            else:
+                await self.ffmpeg_service.encode(
+                    plan,
+                    video_path=input_video_path,
+                    srt_path=subtitles[0],
+                    output_path=output_video_path
+                )
+            await self._store_output(
+                output_video_path, output_filename, output_key,
+                content_type=plan.content_type, cache_key=cache_key
+            )
+            return output_filename, False
+        
+        pipeline = Pipeline("process_video", before_stage=lambda stage: self._checkpoint(pipeline))
+        pipeline.add("ingest", lambda: self._ingest_checkpointed(checkpoint, file, url, ingested))
+        pipeline.add("probe", self._probe_input, "ingest")
+        pipeline.add("admit", admit, "probe")
+        pipeline.add("hash", hash_file_async, "ingest")
+        pipeline.add(
+            "transcribe",
+            lambda path, ticket, input_hash: self._transcribe(path, language, checkpoint, input_hash),
+            "ingest", "admit", "hash"
+        )
+        pipeline.add(
+            "subtitles",
+            lambda transcript: self._write_subtitle_file_async(transcript, font_color, highlight_color),
+            "transcribe"
+        )
+        pipeline.add("encode", encode, "ingest", "subtitles", "probe", "hash")
+        
+        try:
+            await pipeline.run()
+            pipeline.log_report()
+            output_filename, cached = pipeline.results["encode"]
+            if pipeline.results["probe"] and not cached and output_type == OutputType.BURN:
+                self.probe_service.record_timings(pipeline.results["probe"], pipeline.report(), "encode")
+            if not cached:
+                await self._index_transcript(output_filename, pipeline.results["transcribe"])
             
             processing_time = time.time() - start_time
             
@@ -92,26 +261,1165 @@ class VideoProcessingService:
                 video_url=download_url,
                 message="Video captioned successfully",
                 processing_time=round(processing_time, 2),
-                language_detected=transcription_result["language"]
+                language_detected=pipeline.results["subtitles"][1],
+                job_id=checkpoint.job_id if checkpoint else None,
+                output_type=output_type,
+                cached=cached,
+                pipeline=pipeline.report()
             )
-            
-        except Exception as e:
-            # Cleanup on error
-            if input_video_path and file:  # Only cleanup uploaded files
-                self.file_manager.cleanup_file(input_video_path)
-            if srt_path:
-                self.file_manager.cleanup_file(srt_path)
+        
+        except (Exception, asyncio.CancelledError):
+            # Cleanup on error or cancellation (but keep output for download on success)
             if output_video_path:
                 self.file_manager.cleanup_file(output_video_path)
-            raise e
+            raise
         
         finally:
-            # Cleanup input files (but keep output for download)
+            if pipeline.results.get("admit"):
+                pipeline.results["admit"].release()
+            input_video_path = pipeline.results.get("ingest")
             if input_video_path and file:  # Only cleanup uploaded files
                 self.file_manager.cleanup_file(input_video_path)
+            elif input_video_path:
+                # Downloaded inputs are left for the janitor
+                self.file_manager.release(input_video_path)
+            if "subtitles" in pipeline.results:
+                self.file_manager.cleanup_file(pipeline.results["subtitles"][0])
+            self._finish_checkpoint(checkpoint)
+    
+    async def process_renditions(
+        self,
+        file: Optional[UploadFile],
+        url: Optional[str],
+        renditions: List[RenditionSpec],
+        language: Optional[str],
+        client: str,
+        priority: JobPriority = JobPriority.INTERACTIVE
+    ) -> RenditionsResponse:
+        """
+        Caption one input in several styles or sizes.
+        
+        Ingest, probe, admission and transcription run once, and each
+        distinct subtitle file (one SRT, plus a karaoke ASS per color pair)
+        is written once. The renditions not already in the output cache are
+        then encoded together by ``FFmpegService.burn_renditions``, which
+        decodes the input a single time for all of them. Smart render is not
+        used here: it re-encodes segments per output.
+        """
+        start_time = time.time()
+        subtitle_files: Dict[Tuple, Tuple[Path, str, CaptionTimeline]] = {}
+        output_paths: List[Path] = []
+        
+        async def admit(probe: Optional[VideoProbe]) -> AdmissionTicket:
+            cost = self.admission.estimate(probe)
+            if probe is not None:
+                # Audio is transcribed (and charged) once; the encode work grows with the outputs
+                cost = cost.copy(update={"work_seconds": self.probe_service.estimate_renditions_time(
+                    probe, [spec.height for spec in renditions]
+                )})
+            return await self.admission.admit(client, cost, priority)
+        
+        async def subtitles(transcript: Dict) -> Dict[Tuple, Tuple[Path, str, CaptionTimeline]]:
+            for spec in renditions:
+                key = self._subtitle_variant(spec)
+                if key not in subtitle_files:
+                    subtitle_files[key] = await self._write_subtitle_file_async(
+                        transcript, spec.font_color, spec.highlight_color
+                    )
+            return subtitle_files
+        
+        async def encode(
+            input_video_path: Path,
+            subtitle_files: Dict[Tuple, Tuple[Path, str, CaptionTimeline]],
+            probe: Optional[VideoProbe],
+            input_hash: str
+        ) -> List[Tuple[str, bool]]:
+            copy_audio = self.probe_service.audio_copyable(probe)
+            plan = self.ffmpeg_service.plan_encode(OutputType.BURN, copy_audio=copy_audio)
+            results: List[Optional[Tuple[str, bool]]] = [None] * len(renditions)
+            # Renditions to encode, by cache key (a rendition requested twice is encoded once)
+            pending: Dict[str, List[int]] = {}
+            for index, spec in enumerate(renditions):
+                subtitle_path = subtitle_files[self._subtitle_variant(spec)][0]
+                cache_key = self._output_cache_key(
+                    input_hash, subtitle_path, self._rendition_plan(plan, spec),
+                    spec.font_size, spec.font_color, spec.position.value
+                )
+                cached = self.artifact_store.find_cached(cache_key)
+                if cached:
+                    print(f"♻️  Reusing identical output {cached.filename}")
+                    results[index] = (cached.filename, True)
+                else:
+                    pending.setdefault(cache_key, []).append(index)
+            if not pending:
+                return results
+            
+            outputs = []
+            for cache_key, indices in pending.items():
+                output_key, output_filename = self._new_output_name("captioned", plan.extension)
+                output_path = self._temp_output_path(output_filename)
+                output_paths.append(output_path)
+                outputs.append((cache_key, indices, output_key, output_filename, output_path))
+            burns = []
+            overlays: List[Optional[SubtitleOverlay]] = []
+            try:
+                for _, indices, _, _, output_path in outputs:
+                    spec = renditions[indices[0]]
+                    subtitle_path, _, timeline = subtitle_files[self._subtitle_variant(spec)]
+                    burns.append((spec, subtitle_path, output_path))
+                    overlays.append(await self._acquire_overlay(
+                        subtitle_path, timeline, spec.font_size, spec.font_color, spec.position.value,
+                        self._frame_size(probe, spec.height)
+                    ))
+                await self.ffmpeg_service.burn_renditions(
+                    input_video_path, burns, copy_audio=copy_audio, overlays=overlays
+                )
+            finally:
+                for overlay in overlays:
+                    if overlay:
+                        self.overlays.release(overlay)
+            for cache_key, indices, output_key, output_filename, output_path in outputs:
+                await self._store_output(
+                    output_path, output_filename, output_key,
+                    content_type=plan.content_type, cache_key=cache_key
+                )
+                output_paths.remove(output_path)
+                for index in indices:
+                    results[index] = (output_filename, False)
+            return results
+        
+        pipeline = Pipeline("process_renditions", before_stage=lambda stage: self._checkpoint(pipeline))
+        pipeline.add("ingest", lambda: self._ingest_input(file, url))
+        pipeline.add("probe", self._probe_input, "ingest")
+        pipeline.add("admit", admit, "probe")
+        pipeline.add("hash", hash_file_async, "ingest")
+        pipeline.add(
+            "transcribe",
+            lambda path, ticket, input_hash: self._transcribe(path, language, input_hash=input_hash),
+            "ingest", "admit", "hash"
+        )
+        pipeline.add("subtitles", subtitles, "transcribe")
+        pipeline.add("encode", encode, "ingest", "subtitles", "probe", "hash")
+        
+        try:
+            await pipeline.run()
+            pipeline.log_report()
+            results = pipeline.results["encode"]
+            encoded = sorted({filename for filename, cached in results if not cached})
+            for output_filename in encoded:
+                await self._index_transcript(output_filename, pipeline.results["transcribe"])
+            
+            return RenditionsResponse(
+                message=f"{len(renditions)} renditions captioned successfully",
+                processing_time=round(time.time() - start_time, 2),
+                language_detected=pipeline.results["transcribe"]["language"],
+                renditions=[
+                    RenditionResult(video_url=f"/download/{filename}", spec=spec, cached=cached)
+                    for spec, (filename, cached) in zip(renditions, results)
+                ],
+                encoded=len(encoded),
+                pipeline=pipeline.report()
+            )
+        
+        except (Exception, asyncio.CancelledError):
+            for output_path in output_paths:
+                self.file_manager.cleanup_file(output_path)
+            raise
+        
+        finally:
+            if pipeline.results.get("admit"):
+                pipeline.results["admit"].release()
+            input_video_path = pipeline.results.get("ingest")
+            if input_video_path:
+                self._discard_input(input_video_path, uploaded=file is not None)
+            for subtitle_path, _, _ in subtitle_files.values():
+                self.file_manager.cleanup_file(subtitle_path)
+    
+    @staticmethod
+    def _subtitle_variant(spec: RenditionSpec) -> Tuple:
+        """Which subtitle file a rendition burns: one SRT for all plain styles, an ASS per karaoke color pair"""
+        return (spec.font_color, spec.highlight_color) if spec.highlight_color else ()
+    
+    @staticmethod
+    def _rendition_plan(plan: EncodePlan, spec: RenditionSpec) -> EncodePlan:
+        """The burn plan of a rendition; the output height is part of its cache identity"""
+        if not spec.height:
+            return plan
+        return plan.copy(update={"profile": f"{plan.profile}-h{spec.height}"})
+    
+    async def start_progressive_job(
+        self,
+        file: Optional[UploadFile] = None,
+        url: Optional[str] = None,
+        font_size: int = settings.ffmpeg.default_font_size,
+        font_color: str = settings.ffmpeg.default_font_color,
+        position: str = settings.ffmpeg.default_position,
+        stream: bool = False,
+        language: Optional[str] = None,
+        client: str = "anonymous",
+        priority: JobPriority = JobPriority.STANDARD,
+        highlight_color: Optional[str] = None
+    ) -> Job:
+        """
+        Start a two-phase caption job and return immediately.
+        
+        The input is ingested, probed and charged to ``client`` before
+        returning (uploads must be read while the request is open), so
+        over-limit and unusable inputs are rejected synchronously; the job
+        then stays queued until there is capacity for it. A low-res captioned preview is published as soon as
+        the transcript is ready, followed by the full-quality encode. With
+        ``stream=True`` the full encode is written as fragmented MP4 and can be
+        fetched from ``/stream/{filename}`` while it is being produced; it then
+        starts as soon as the subtitles are ready instead of after the preview.
+        
+        Submitting a job identical to one still in progress (matched as in
+        ``process_video``) returns that job instead of starting another.
+        """
+        def start(ingested: Optional[Path] = None) -> Awaitable[Job]:
+            return self._start_progressive_job(
+                file, url, font_size, font_color, position, stream, language,
+                client, priority, ingested=ingested, highlight_color=highlight_color
+            )
+        
+        if not settings.app.COALESCE_REQUESTS:
+            return await start()
+        request = (
+            "job", font_size, font_color.strip().lower(), position.lower(), stream, language,
+            highlight_color.strip().lower() if highlight_color else None
+        )
+        
+        if url:
+            validator = await self.file_manager.fetch_url_validator(url)
+            if validator:
+                return await self._attach_job(("url", normalize_url(url), validator) + request, start)
+        
+        input_video_path = await self._ingest_input(file, url)
+        try:
+            input_hash = await hash_file_async(input_video_path)
+        except BaseException:
+            self._discard_input(input_video_path, uploaded=file is not None)
+            raise
+        key = ("content", input_hash) + request
+        if key in self.flights or key in self._inflight_jobs:
+            self._discard_input(input_video_path, uploaded=file is not None)
+            return await self._attach_job(key, start)
+        return await self._attach_job(key, lambda: start(input_video_path))
+    
+    async def _attach_job(self, key: Tuple, start: Callable[[], Awaitable[Job]]) -> Job:
+        """Return the running job with this key, or start one and remember it until it ends"""
+        job = self._inflight_jobs.get(key)
+        shared = job is not None
+        if job is None:
+            job, shared = await self.flights.do(key, start)
+        if shared:
+            print(f"🔗 Attached to identical job {job.job_id} in progress")
+            return job
+        self._inflight_jobs[key] = job
+        job.task.add_done_callback(lambda task: self._forget_job(key, job))
+        return job
+    
+    def _forget_job(self, key: Tuple, job: Job):
+        if self._inflight_jobs.get(key) is job:
+            del self._inflight_jobs[key]
+    
+    async def _start_progressive_job(
+        self,
+        file: Optional[UploadFile],
+        url: Optional[str],
+        font_size: int,
+        font_color: str,
+        position: str,
+        stream: bool,
+        language: Optional[str],
+        client: str,
+        priority: JobPriority,
+        ingested: Optional[Path] = None,
+        highlight_color: Optional[str] = None
+    ) -> Job:
+        """Ingest, probe and charge a job's input, then start the job (``ingested``: input already saved)"""
+        input_video_path = ingested or await self._ingest_input(file, url)
+        try:
+            # Reject broken and over-limit inputs while the client is still waiting for the response
+            probe = await self._probe_input(input_video_path)
+            cost = self.admission.estimate(probe)
+            priority = self.admission.classify(priority, cost)
+            self.admission.check_capacity()
+            self.admission.charge(client, cost)
+        except Exception:
+            self._discard_input(input_video_path, uploaded=file is not None)
+            raise
+        
+        job = self.job_manager.create_job()
+        if probe:
+            job.estimated_total = self.probe_service.estimate_processing_time(probe)
+        checkpoint = self._create_checkpoint("job", file, url, dict(
+            font_size=font_size,
+            font_color=font_color,
+            position=position,
+            stream=stream,
+            language=language,
+            client=client,
+            priority=priority.value,
+            highlight_color=highlight_color
+        ), job_id=job.job_id)
+        if checkpoint:
+            await self._save_checkpoint_file(checkpoint, "ingest", input_video_path)
+        job.task = asyncio.create_task(self._run_progressive_job(
+            job,
+            input_video_path,
+            probe=probe,
+            cost=cost,
+            client=client,
+            priority=priority,
+            cleanup_input=file is not None,
+            font_size=font_size,
+            font_color=font_color,
+            position=position,
+            stream=stream,
+            language=language,
+            checkpoint=checkpoint,
+            highlight_color=highlight_color
+        ))
+        return job
+    
+    async def _run_progressive_job(
+        self,
+        job: Job,
+        input_video_path: Path,
+        probe: Optional[VideoProbe],
+        cost: JobCost,
+        client: str,
+        priority: JobPriority,
+        cleanup_input: bool,
+        font_size: int,
+        font_color: str,
+        position: str,
+        stream: bool = False,
+        language: Optional[str] = None,
+        checkpoint: Optional[JobCheckpoint] = None,
+        highlight_color: Optional[str] = None
+    ):
+        """
+        Run transcription, preview encode and full encode for a job.
+        
+        Downscaling the input for the preview does not need the transcript,
+        so it runs while transcription is in progress and the preview encode
+        only has to burn subtitles into an already small video. Stages are
+        checkpointed as in ``process_video``.
+        """
+        copy_audio = self.probe_service.audio_copyable(probe)
+        preview_key, preview_filename = self._new_output_name("preview")
+        preview_path = self._temp_output_path(preview_filename)
+        output_key, output_filename = self._new_output_name("captioned")
+        output_video_path = self._temp_output_path(output_filename)
+        
+        async def transcribe(input_hash: str):
+            job.set_status(JobStatus.PROCESSING, "Transcribing audio")
+            return await self._transcribe(input_video_path, language, checkpoint, input_hash)
+        
+        async def subtitles(transcription_result: Dict):
+            subtitle_file = await self._write_subtitle_file_async(transcription_result, font_color, highlight_color)
+            job.language = subtitle_file[1]
+            job.timeline = subtitle_file[2]
+            return subtitle_file
+        
+        async def preview(prescaled_path: Optional[Path], subtitle_file: Tuple[Path, str, CaptionTimeline]):
+            # Phase 1: fast low-res proxy so the client sees something quickly
+            job.set_status(JobStatus.PROCESSING, "Rendering preview")
+            await self.ffmpeg_service.create_preview(
+                video_path=prescaled_path or input_video_path,
+                srt_path=subtitle_file[0],
+                output_path=preview_path,
+                font_size=font_size,
+                font_color=font_color,
+                position=position,
+                prescaled=prescaled_path is not None,
+                copy_audio=copy_audio
+            )
+            await self._store_output(preview_path, preview_filename, preview_key)
+            job.mark_preview_ready(f"/download/{preview_filename}")
+        
+        async def full(subtitle_file: Tuple[Path, str, CaptionTimeline], _preview=None):
+            # Phase 2: full-quality encode
+            print("Burning subtitles into full-quality video...")
+            if stream:
+                self.active_outputs[output_filename] = WriteStatus()
+                job.mark_streaming(f"/stream/{output_filename}")
+            failed = True
+            try:
+                if stream:
+                    # Fragments are served while encoding, so every frame goes through the encoder
+                    await self.ffmpeg_service.burn_subtitles(
+                        video_path=input_video_path,
+                        srt_path=subtitle_file[0],
+                        output_path=output_video_path,
+                        font_size=font_size,
+                        font_color=font_color,
+                        position=position,
+                        fragmented=True,
+                        copy_audio=copy_audio
+                    )
+                else:
+                    await self._burn(
+                        input_video_path, subtitle_file[0], subtitle_file[2], output_video_path, probe,
+                        font_size=font_size, font_color=font_color, position=position,
+                        work_dir=checkpoint.work_dir("render") if checkpoint else None
+                    )
+                await self._store_output(output_video_path, output_filename, output_key)
+                failed = False
+            finally:
+                writing = self.active_outputs.pop(output_filename, None)
+                if writing:
+                    # Readers of /stream see a failure as an aborted response, not a short file
+                    writing.finish(failed)
+        
+        async def admit() -> AdmissionTicket:
+            job.set_status(JobStatus.QUEUED, "Waiting for capacity")
+            try:
+                return await self.admission.acquire(cost, client, priority)
+            except ServerBusyError:
+                self.admission.refund(client, cost)
+                raise
+        
+        pipeline = Pipeline(f"Job {job.job_id}", before_stage=lambda stage: self._checkpoint(pipeline))
+        pipeline.add("admit", admit)
+        pipeline.add("prescale", lambda ticket: self._prescale_for_preview(input_video_path, probe), "admit")
+        pipeline.add("hash", lambda: hash_file_async(input_video_path))
+        pipeline.add("transcribe", lambda ticket, input_hash: transcribe(input_hash), "admit", "hash")
+        pipeline.add("subtitles", subtitles, "transcribe")
+        pipeline.add("preview", preview, "prescale", "subtitles")
+        if stream:
+            # Clients are waiting on /stream, so the full encode starts alongside the preview
+            pipeline.add("full", full, "subtitles")
+        else:
+            # The full encode waits for the preview so the two do not compete for CPU
+            pipeline.add("full", full, "subtitles", "preview")
+        
+        try:
+            await pipeline.run()
+            job.mark_completed(f"/download/{output_filename}")
+            if probe:
+                self.probe_service.record_timings(probe, pipeline.report(), "full")
+            await self._index_transcript(output_filename, pipeline.results["transcribe"], job_id=job.job_id)
+        
+        except Exception as e:
+            print(f"❌ Job {job.job_id} failed: {e}")
+            self.file_manager.cleanup_file(preview_path)
+            self.file_manager.cleanup_file(output_video_path)
+            # The preview may already have been published
+            await self._delete_output(preview_filename)
+            job.mark_failed(str(e))
+        
+        except asyncio.CancelledError:
+            print(f"🛑 Job {job.job_id} cancelled")
+            self.file_manager.cleanup_file(preview_path)
+            self.file_manager.cleanup_file(output_video_path)
+            await self._delete_output(preview_filename)
+            job.mark_cancelled()
+            raise
+        
+        finally:
+            if pipeline.results.get("admit"):
+                pipeline.results["admit"].release()
+            job.pipeline = pipeline.report()
+            pipeline.log_report()
+            if cleanup_input:
+                self.file_manager.cleanup_file(input_video_path)
+            else:
+                self.file_manager.release(input_video_path)
+            if "subtitles" in pipeline.results:
+                self.file_manager.cleanup_file(pipeline.results["subtitles"][0])
+            if pipeline.results.get("prescale"):
+                self.file_manager.cleanup_file(pipeline.results["prescale"])
+            self._finish_checkpoint(checkpoint)
+    
+    def resume_incomplete_jobs(self) -> List[Job]:
+        """
+        Restart the jobs a previous server process left unfinished.
+        
+        Each job resumes from its last checkpointed stage under its original
+        ID, so ``GET /jobs/{job_id}`` reports it (for interrupted
+        ``process_video`` requests too). An upload that was not saved before
+        the restart cannot be recovered, and a job that was resumed
+        ``CHECKPOINT_MAX_RESUMES`` times without finishing is dropped.
+        """
+        if self.checkpoints is None:
+            return []
+        jobs = []
+        for checkpoint in self.checkpoints.incomplete():
+            if not checkpoint.has("ingest") and not checkpoint.params.get("url"):
+                print(f"⚠️  Job {checkpoint.job_id}: upload was interrupted before it was saved, dropping it")
+                self.checkpoints.discard(checkpoint)
+                continue
+            if checkpoint.manifest.attempts >= settings.storage.CHECKPOINT_MAX_RESUMES:
+                print(f"❌ Job {checkpoint.job_id} did not finish after {checkpoint.manifest.attempts} resumes, dropping it")
+                self.checkpoints.discard(checkpoint)
+                continue
+            checkpoint.record_attempt()
+            job = self.job_manager.create_job(checkpoint.job_id)
+            job.set_status(JobStatus.QUEUED, "Resuming after restart")
+            if checkpoint.manifest.kind == "job":
+                job.task = asyncio.create_task(self._resume_progressive_job(job, checkpoint))
+            else:
+                job.task = asyncio.create_task(self._resume_video(job, checkpoint))
+            stages = ", ".join(checkpoint.manifest.stages) or "nothing"
+            print(f"🔁 Resuming job {checkpoint.job_id} (checkpointed: {stages})")
+            jobs.append(job)
+        return jobs
+    
+    async def _resume_video(self, job: Job, checkpoint: JobCheckpoint):
+        """Finish an interrupted ``process_video`` request in the background"""
+        params = checkpoint.params
+        job.set_status(JobStatus.PROCESSING, "Resuming after restart")
+        try:
+            result = await self.process_video(
+                url=params.get("url"),
+                font_size=params["font_size"],
+                font_color=params["font_color"],
+                position=params["position"],
+                language=params.get("language"),
+                output_type=OutputType(params["output_type"]),
+                client=params["client"],
+                priority=JobPriority(params["priority"]),
+                checkpoint=checkpoint,
+                highlight_color=params.get("highlight_color")
+            )
+            job.language = result.language_detected
+            job.pipeline = result.pipeline
+            job.mark_completed(result.video_url)
+        except asyncio.CancelledError:
+            job.mark_cancelled()
+            raise
+        except Exception as e:
+            print(f"❌ Resumed job {job.job_id} failed: {e}")
+            job.mark_failed(str(e))
+    
+    async def _resume_progressive_job(self, job: Job, checkpoint: JobCheckpoint):
+        """Finish an interrupted progressive job, preview included"""
+        params = checkpoint.params
+        try:
+            input_video_path = await self._ingest_checkpointed(checkpoint, None, params.get("url"))
+            probe = await self._probe_input(input_video_path)
+        except Exception as e:
+            print(f"❌ Resumed job {job.job_id} failed: {e}")
+            job.mark_failed(str(e))
+            self._finish_checkpoint(checkpoint)
+            return
+        if probe:
+            job.estimated_total = self.probe_service.estimate_processing_time(probe)
+        await self._run_progressive_job(
+            job,
+            input_video_path,
+            probe=probe,
+            cost=self.admission.estimate(probe),
+            client=params["client"],
+            priority=JobPriority(params["priority"]),
+            cleanup_input=False,
+            font_size=params["font_size"],
+            font_color=params["font_color"],
+            position=params["position"],
+            stream=params.get("stream", False),
+            language=params.get("language"),
+            checkpoint=checkpoint,
+            highlight_color=params.get("highlight_color")
+        )
+    
+    def prepare_shutdown(self):
+        """Keep the checkpoints of jobs interrupted by the shutdown so they resume on the next start"""
+        self._stopping = True
+    
+    async def start_batch(
+        self,
+        files: List[UploadFile],
+        urls: List[str],
+        font_size: int = settings.ffmpeg.default_font_size,
+        font_color: str = settings.ffmpeg.default_font_color,
+        position: str = settings.ffmpeg.default_position,
+        language: Optional[str] = None,
+        client: str = "anonymous",
+        priority: JobPriority = JobPriority.BATCH,
+        highlight_color: Optional[str] = None
+    ) -> JobGroup:
+        """
+        Start captioning many videos as one job group and return immediately.
+        
+        Uploads are saved concurrently before returning (they must be read
+        while the request is open); URLs are downloaded concurrently in the
+        background. Each probed item is charged to ``client``, and items over
+        its budget fail. The admitted clips wait for capacity together, are
+        transcribed together with combined WhisperX batches, and encodes run
+        on a pool sized to the CPU count.
+        """
+        if not files and not urls:
+            raise ValueError("At least one file or URL is required")
+        if len(files) + len(urls) > settings.app.MAX_BATCH_ITEMS:
+            raise ValueError(f"Too many items in batch. Maximum: {settings.app.MAX_BATCH_ITEMS}")
+        
+        self.janitor.check_capacity()
+        self.admission.check_capacity()
+        uploads = await asyncio.gather(
+            *(self._ingest_input(file, None) for file in files),
+            return_exceptions=True
+        )
+        
+        group = self.job_manager.create_group(
+            [file.filename for file in files] + list(urls)
+        )
+        for index, upload in enumerate(uploads):
+            if isinstance(upload, Exception):
+                group.mark_item_failed(index, str(upload))
+        
+        group.task = asyncio.create_task(self._run_batch(
+            group,
+            uploads=list(uploads),
+            urls=list(urls),
+            font_size=font_size,
+            font_color=font_color,
+            position=position,
+            language=language,
+            client=client,
+            priority=priority,
+            highlight_color=highlight_color
+        ))
+        return group
+    
+    async def _run_batch(
+        self,
+        group: JobGroup,
+        uploads: List,
+        urls: List[str],
+        font_size: int,
+        font_color: str,
+        position: str,
+        language: Optional[str] = None,
+        client: str = "anonymous",
+        priority: JobPriority = JobPriority.BATCH,
+        highlight_color: Optional[str] = None
+    ):
+        """Download, transcribe (combined batches) and encode every item of a group"""
+        # index -> (input path, whether it was uploaded and must be deleted)
+        inputs: Dict[int, Tuple[Path, bool]] = {
+            index: (path, True)
+            for index, path in enumerate(uploads)
+            if not isinstance(path, Exception)
+        }
+        ticket: Optional[AdmissionTicket] = None
+        
+        try:
+            offset = len(uploads)
+            for index in range(offset, offset + len(urls)):
+                group.set_item_status(index, JobStatus.PROCESSING, "Downloading")
+            downloads = await asyncio.gather(
+                *(self._ingest_input(None, url) for url in urls),
+                return_exceptions=True
+            )
+            for index, download in enumerate(downloads, start=offset):
+                if isinstance(download, Exception):
+                    group.mark_item_failed(index, str(download))
+                else:
+                    inputs[index] = (download, False)
+            
+            # Reject unusable inputs before they take a slot in the shared transcription pass
+            probed = sorted(inputs)
+            probes = await asyncio.gather(
+                *(self._probe_input(inputs[index][0]) for index in probed),
+                return_exceptions=True
+            )
+            valid: Dict[int, Optional[VideoProbe]] = {}
+            charged: List[JobCost] = []
+            for index, probe in zip(probed, probes):
+                if isinstance(probe, Exception):
+                    group.mark_item_failed(index, str(probe))
+                    continue
+                cost = self.admission.estimate(probe)
+                try:
+                    self.admission.charge(client, cost)
+                except RateLimitExceededError as e:
+                    group.mark_item_failed(index, f"{e.message} (retry in {e.retry_after:.0f}s)")
+                    continue
+                valid[index] = probe
+                charged.append(cost)
+            
+            # The combined pass runs as one job, so it waits for capacity for all clips at once
+            if charged:
+                for index in valid:
+                    group.set_item_status(index, JobStatus.QUEUED, "Waiting for capacity")
+                total = JobCost(
+                    audio_minutes=sum(cost.audio_minutes for cost in charged),
+                    work_seconds=sum(cost.work_seconds for cost in charged)
+                )
+                try:
+                    ticket = await self.admission.acquire(total, client, self.admission.classify(priority, total))
+                except ServerBusyError as e:
+                    self.admission.refund(client, total)
+                    for index in valid:
+                        group.mark_item_failed(index, e.message)
+                    valid = {}
+            
+            # One combined transcription pass over every clip
+            indexes = sorted(valid)
+            for index in indexes:
+                group.set_item_status(index, JobStatus.PROCESSING, "Transcribing audio")
+            print(f"Transcribing {len(indexes)} clip(s) for batch {group.group_id}...")
+            try:
+                transcripts = await self.whisperx_service.transcribe_batch(
+                    [inputs[index][0] for index in indexes],
+                    language=language
+                )
+            except Exception as e:
+                transcripts = [e] * len(indexes)
+            
+            # Stage boundary: the encodes may wait while more urgent jobs use the capacity
+            if ticket:
+                await ticket.checkpoint()
+            encodes = []
+            for index, transcript in zip(indexes, transcripts):
+                if isinstance(transcript, Exception):
+                    group.mark_item_failed(index, str(transcript))
+                    continue
+                encodes.append(self._encode_batch_item(
+                    group, index, inputs[index][0], transcript,
+                    font_size=font_size, font_color=font_color, position=position,
+                    probe=valid[index], highlight_color=highlight_color
+                ))
+            await asyncio.gather(*encodes)
+        
+        except asyncio.CancelledError:
+            print(f"🛑 Batch {group.group_id} cancelled")
+            group.mark_cancelled()
+            raise
+        
+        finally:
+            if ticket:
+                ticket.release()
+            for input_video_path, uploaded in inputs.values():
+                if uploaded:
+                    self.file_manager.cleanup_file(input_video_path)
+                else:
+                    self.file_manager.release(input_video_path)
+            print(f"✅ Batch {group.group_id} finished")
+    
+    async def _encode_batch_item(
+        self,
+        group: JobGroup,
+        index: int,
+        input_video_path: Path,
+        transcript: Dict,
+        font_size: int,
+        font_color: str,
+        position: str,
+        probe: Optional[VideoProbe] = None,
+        highlight_color: Optional[str] = None
+    ):
+        """Write subtitles for one batch item and burn them in once an encode slot is free"""
+        srt_path = None
+        output_video_path = None
+        try:
+            srt_path, language, timeline = await self._write_subtitle_file_async(
+                transcript, font_color, highlight_color
+            )
+            group.set_item_status(index, JobStatus.PROCESSING, "Waiting for an encoder")
+            async with self._get_encode_slots():
+                group.set_item_status(index, JobStatus.PROCESSING, "Burning subtitles")
+                output_key, output_filename = self._new_output_name("captioned")
+                output_video_path = self._temp_output_path(output_filename)
+                await self._burn(
+                    input_video_path, srt_path, timeline, output_video_path, probe,
+                    font_size=font_size, font_color=font_color, position=position
+                )
+            await self._store_output(output_video_path, output_filename, output_key)
+            group.mark_item_completed(index, f"/download/{output_filename}", language)
+            await self._index_transcript(output_filename, transcript, job_id=group.group_id)
+        except Exception as e:
+            print(f"❌ Batch {group.group_id} item {index} failed: {e}")
+            if output_video_path:
+                self.file_manager.cleanup_file(output_video_path)
+            group.mark_item_failed(index, str(e))
+        except asyncio.CancelledError:
+            if output_video_path:
+                self.file_manager.cleanup_file(output_video_path)
+            raise
+        finally:
             if srt_path:
                 self.file_manager.cleanup_file(srt_path)
     
+    def _get_encode_slots(self) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent batch encodes to the CPU budget"""
+        # Created on first use so it binds to the server's event loop
+        if self._encode_slots is None:
+            self._encode_slots = asyncio.Semaphore(settings.ffmpeg.max_concurrent_encodes)
+        return self._encode_slots
+    
+    def get_group(self, group_id: str) -> Optional[JobGroup]:
+        """Look up a batch job group by ID"""
+        return self.job_manager.get_group(group_id)
+    
+    async def stream_output(self, filename: str) -> Optional[AsyncIterator[bytes]]:
+        """
+        Stream an output file, following it while it is still being encoded.
+        
+        Returns None if the output is neither being encoded nor stored.
+        """
+        writing = self.active_outputs.get(filename)
+        if writing is None:
+            # Already finished: stream the stored artifact
+            path = await self.get_download_path(filename)
+            return tail_file(path, is_complete=lambda: True) if path else None
+        return tail_file(
+            self.file_manager.get_temp_path(filename),
+            is_complete=lambda: writing.complete,
+            has_failed=lambda: writing.failed
+        )
+    
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Look up a caption job by ID"""
+        return self.job_manager.get_job(job_id)
+    
+    async def cancel_job(self, job: Job) -> Job:
+        """Stop a running job: its FFmpeg processes are killed and its files deleted"""
+        await self._cancel_task(job.task)
+        if not job.is_finished:
+            # Cancelled before its task started running
+            job.mark_cancelled()
+        return job
+    
+    async def cancel_group(self, group: JobGroup) -> JobGroup:
+        """Stop a running batch; items that already finished keep their outputs"""
+        await self._cancel_task(group.task)
+        if not group.is_finished:
+            group.mark_cancelled()
+        return group
+    
+    async def _cancel_task(self, task: Optional[asyncio.Task]):
+        """Cancel a background task and wait until its cleanup has run"""
+        if task is None or task.done():
+            return
+        task.cancel()
+        # The task's handlers kill its subprocesses and delete its temp files
+        await asyncio.wait({task}, timeout=settings.ffmpeg.KILL_TIMEOUT * 2 + 1)
+    
+    async def _ingest_input(
+        self,
+        file: Optional[UploadFile],
+        url: Optional[str]
+    ) -> Path:
+        """Save the uploaded file or download the URL into the temp directory"""
+        # Refuse new work before writing anything if the disk is nearly full
+        self.janitor.check_capacity()
+        
+        if file:
+            input_video_path = await self._handle_uploaded_file(file)
+        elif url:
+            input_video_path = await self._handle_video_url(url)
+        else:
+            raise ValueError("Either file or URL must be provided")
+        
+        self.file_manager.mark_in_use(input_video_path)
+        return input_video_path
+    
+    async def _ingest_checkpointed(
+        self,
+        checkpoint: Optional[JobCheckpoint],
+        file: Optional[UploadFile],
+        url: Optional[str],
+        ingested: Optional[Path] = None
+    ) -> Path:
+        """Ingest stage: the checkpointed input if there is one, else a fresh upload or download"""
+        saved = checkpoint.path("ingest") if checkpoint else None
+        if saved:
+            return saved
+        input_video_path = ingested or await self._ingest_input(file, url)
+        if checkpoint:
+            await self._save_checkpoint_file(checkpoint, "ingest", input_video_path)
+        return input_video_path
+    
+    async def _transcribe(
+        self,
+        input_video_path: Path,
+        language: Optional[str] = None,
+        checkpoint: Optional[JobCheckpoint] = None,
+        input_hash: Optional[str] = None
+    ) -> Dict:
+        """
+        Transcription stage.
+        
+        With ``input_hash`` (SHA-256 of the input), a transcript cached for
+        the same content and requested language is reused without running
+        WhisperX, and new transcripts are cached. Otherwise resumes from a
+        checkpointed transcript or decoded audio.
+        """
+        if input_hash is None:
+            return await self._transcribe_checkpointed(input_video_path, language, checkpoint)
+        transcript = await self.artifact_store.find_transcript_async(input_hash, language)
+        if transcript is not None:
+            print(f"♻️  Reusing transcript of identical input {input_hash[:12]}")
+            return transcript
+        transcript = await self._transcribe_checkpointed(input_video_path, language, checkpoint)
+        try:
+            await self.artifact_store.cache_transcript_async(input_hash, language, transcript)
+        except Exception as e:
+            print(f"Warning: Could not cache transcript: {e}")
+        return transcript
+    
+    async def _transcribe_checkpointed(
+        self,
+        input_video_path: Path,
+        language: Optional[str] = None,
+        checkpoint: Optional[JobCheckpoint] = None
+    ) -> Dict:
+        """WhisperX transcription, resuming from a checkpointed transcript or decoded audio"""
+        if checkpoint is None:
+            print("Starting transcription...")
+            return await self.whisperx_service.transcribe_video(input_video_path, language=language)
+        
+        transcript = checkpoint.load_json("transcript")
+        if transcript is not None:
+            print(f"♻️  Job {checkpoint.job_id}: reusing checkpointed transcript")
+            return transcript
+        audio = await checkpoint.load_audio_async("audio")
+        if audio is None:
+            audio = await self.whisperx_service.load_audio(input_video_path)
+            await checkpoint.save_audio_async("audio", audio)
+        print("Starting transcription...")
+        transcript = await self.whisperx_service.transcribe_video(input_video_path, language=language, audio=audio)
+        await checkpoint.save_json_async("transcript", transcript)
+        return transcript
+    
+    def _create_checkpoint(
+        self,
+        kind: str,
+        file: Optional[UploadFile],
+        url: Optional[str],
+        params: Dict,
+        job_id: Optional[str] = None
+    ) -> Optional[JobCheckpoint]:
+        """Start checkpointing a job (None if checkpoints are disabled)"""
+        if self.checkpoints is None:
+            return None
+        params = dict(params, url=url, upload=file.filename if file else None)
+        return self.checkpoints.create(kind, params, job_id=job_id)
+    
+    async def _save_checkpoint_file(self, checkpoint: JobCheckpoint, stage: str, path: Path):
+        """Record a file as a stage result (copied in a worker thread if it cannot be hard-linked)"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, checkpoint.save_file, stage, path)
+    
+    def _discard_input(self, input_video_path: Path, uploaded: bool):
+        """Drop an input that will not be processed (downloads are left for the janitor)"""
+        if uploaded:
+            self.file_manager.cleanup_file(input_video_path)
+        else:
+            self.file_manager.release(input_video_path)
+    
+    def _finish_checkpoint(self, checkpoint: Optional[JobCheckpoint]):
+        """Delete the checkpoints of a job that ended, unless it was interrupted by a shutdown"""
+        if checkpoint is not None and not self._stopping:
+            self.checkpoints.discard(checkpoint)
+    
+    async def _burn(
+        self,
+        input_video_path: Path,
+        srt_path: Path,
+        timeline: CaptionTimeline,
+        output_path: Path,
+        probe: Optional[VideoProbe],
+        font_size: int,
+        font_color: str,
+        position: str,
+        work_dir: Optional[Path] = None
+    ) -> Path:
+        """
+        Burn subtitles, re-encoding only the captioned GOPs when the input allows it.
+        
+        ``work_dir`` keeps finished smart-render segments across a restart.
+        """
+        copy_audio = self.probe_service.audio_copyable(probe)
+        rendered = await self.smart_renderer.render(
+            input_video_path,
+            srt_path,
+            timeline.intervals(),
+            output_path,
+            probe,
+            font_size=font_size,
+            font_color=font_color,
+            position=position,
+            copy_audio=copy_audio,
+            work_dir=work_dir
+        )
+        if rendered:
+            return rendered
+        print("Burning subtitles into video...")
+        overlay = await self._acquire_overlay(
+            srt_path, timeline, font_size, font_color, position, self._frame_size(probe)
+        )
+        try:
+            return await self.ffmpeg_service.burn_subtitles(
+                video_path=input_video_path,
+                srt_path=srt_path,
+                output_path=output_path,
+                font_size=font_size,
+                font_color=font_color,
+                position=position,
+                copy_audio=copy_audio,
+                overlay=overlay
+            )
+        finally:
+            if overlay:
+                self.overlays.release(overlay)
+    
+    async def _acquire_overlay(
+        self,
+        srt_path: Path,
+        timeline: CaptionTimeline,
+        font_size: int,
+        font_color: str,
+        position: str,
+        frame_size: Optional[Tuple[int, int]]
+    ) -> Optional[SubtitleOverlay]:
+        """
+        Pre-rendered caption track for a burn, or None to render with libass.
+        
+        None when overlays are disabled, the frame size is unknown, the
+        captions are karaoke (their highlight changes within a caption) or
+        there is no libass to pre-render them with. Release the track when
+        the encode is done.
+        """
+        if self.overlays is None or frame_size is None or srt_path.suffix != ".srt" or not len(timeline):
+            return None
+        if not self.ffmpeg_service.uses_libass:
+            return None
+        try:
+            return await self.overlays.acquire(srt_path, timeline, font_size, font_color, position, *frame_size)
+        except (RuntimeError, OSError, ValueError) as e:
+            print(f"Warning: Could not pre-render captions, burning with libass: {e}")
+            return None
+    
+    @staticmethod
+    def _frame_size(probe: Optional[VideoProbe], height: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """Size of the frames a burn draws on: the decoded (rotated) input, optionally ``scale=-2:height``"""
+        if probe is None or not probe.width or not probe.height:
+            return None
+        width, source_height = probe.width, probe.height
+        if probe.rotation % 180 == 90:
+            width, source_height = source_height, width
+        if not height:
+            return width, source_height
+        # scale=-2 rounds the width to the nearest even number
+        return int(height * width / (source_height * 2) + 0.5) * 2, height
+    
+    async def _checkpoint(self, pipeline: Pipeline):
+        """Stage boundary of an admitted job: yields its capacity to queued higher-priority jobs"""
+        ticket = pipeline.results.get("admit")
+        if ticket:
+            await ticket.checkpoint()
+    
+    async def _index_transcript(self, output_filename: str, transcript: Dict, job_id: Optional[str] = None):
+        """Add a finished video's transcript to the search index (failures only warn)"""
+        if self.transcript_store is None:
+            return
+        try:
+            await self.transcript_store.add_async(
+                output_filename, transcript, video_url=f"/download/{output_filename}", job_id=job_id
+            )
+        except Exception as e:
+            print(f"Warning: Could not index transcript of {output_filename}: {e}")
+    
+    async def _write_subtitle_file_async(
+        self,
+        transcription_result: Dict,
+        font_color: str = settings.ffmpeg.default_font_color,
+        highlight_color: Optional[str] = None
+    ) -> Tuple[Path, str, CaptionTimeline]:
+        """Subtitle stage: ``_write_subtitle_file`` in a worker thread (caption segmentation is CPU-bound)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._write_subtitle_file, transcription_result, font_color, highlight_color
+        )
+    
+    async def _probe_input(self, input_video_path: Path) -> Optional[VideoProbe]:
+        """
+        Probe stage: validated, cached metadata of the input.
+        
+        Raises ValueError for inputs the pipeline cannot process. Returns None
+        (validation skipped) only if FFprobe itself is not installed.
+        """
+        try:
+            return await self.probe_service.probe(input_video_path)
+        except FileNotFoundError as e:
+            print(f"Warning: FFprobe not available, skipping input validation: {e}")
+            return None
+    
+    async def _prescale_for_preview(
+        self,
+        input_video_path: Path,
+        probe: Optional[VideoProbe] = None
+    ) -> Optional[Path]:
+        """Pre-scale stage: downscaled copy of the input for the preview encode"""
+        if probe and probe.height and probe.height <= settings.ffmpeg.PREVIEW_HEIGHT:
+            # Already preview-sized: burn straight from the input
+            return None
+        prescaled_path = self.file_manager.get_temp_path(
+            f"prescaled_{self.file_manager.generate_unique_filename('.mp4')}"
+        )
+        self.file_manager.mark_in_use(prescaled_path)
+        try:
+            return await self.ffmpeg_service.prescale(
+                input_video_path,
+                prescaled_path,
+                copy_audio=self.probe_service.audio_copyable(probe)
+            )
+        except RuntimeError as e:
+            # The preview can still scale while burning, just more slowly
+            print(f"Warning: Pre-scaling for preview failed: {e}")
+            self.file_manager.cleanup_file(prescaled_path)
+            return None
+    
+    def _write_subtitle_file(
+        self,
+        transcription_result: Dict,
+        font_color: str = settings.ffmpeg.default_font_color,
+        highlight_color: Optional[str] = None
+    ) -> Tuple[Path, str, CaptionTimeline]:
+        """
+        Group a transcript into captions and write them to an SRT file.
+        
+        With ``highlight_color`` an ASS file is written instead, one event per
+        caption whose words are timed with ``\\k`` tags: libass highlights
+        them in turn, at the cost of one event per caption rather than one
+        cue per word. Every encode path accepts either file.
+        """
+        # Group words into caption segments
+        print("Grouping words into captions...")
+        captions = self.whisperx_service.group_words_into_captions(
+            transcription_result["segments"]
+        )
+        
+        if not captions:
+            raise ValueError("No speech detected in video")
+        
+        if highlight_color:
+            print("Creating karaoke ASS file...")
+            srt_content = self.whisperx_service.create_karaoke_ass_content(
+                captions,
+                spoken_color=self.ffmpeg_service.ass_color(highlight_color),
+                upcoming_color=self.ffmpeg_service.ass_color(font_color)
+            )
+            extension = ".ass"
+        else:
+            # Create SRT file
+            print("Creating SRT file...")
+            srt_content = self.whisperx_service.create_srt_content(captions)
+            extension = ".srt"
+        srt_path = self.file_manager.get_temp_path(
+            f"subtitles_{self.file_manager.generate_unique_filename(extension)}"
+        )
+        self.file_manager.mark_in_use(srt_path)
+        
+        with open(srt_path, 'w', encoding='utf-8') as f:
+            f.write(srt_content)
+        
+        return srt_path, transcription_result["language"], CaptionTimeline(captions)
+    
     async def _handle_uploaded_file(self, file: UploadFile) -> Path:
         """Handle uploaded video file"""
         # Validate file format
@@ -135,11 +1443,52 @@ class VideoProcessingService:
         """Handle video URL download"""
         return await self.file_manager.download_video_from_url(url)
     
-    def get_download_path(self, filename: str) -> Path:
-        """Get path for download file"""
-        return self.file_manager.get_temp_path(filename)
+    def _new_output_name(self, prefix: str, extension: str = ".mp4") -> Tuple[str, str]:
+        """Allocate an artifact key and the public filename derived from it"""
+        key = self.artifact_store.new_key()
+        return key, f"{prefix}_{key}{extension}"
+    
+    def _temp_output_path(self, filename: str) -> Path:
+        """Temp path for an output being encoded, protected from the janitor"""
+        output_path = self.file_manager.get_temp_path(filename)
+        self.file_manager.mark_in_use(output_path)
+        return output_path
+    
+    async def _store_output(self, output_path: Path, filename: str, key: str, **kwargs):
+        """Move a finished output into the artifact store (``kwargs`` go to ``put``)"""
+        await self.artifact_store.put_async(output_path, filename, key=key, **kwargs)
+        self.file_manager.release(output_path)
+    
+    @staticmethod
+    def _output_cache_key(
+        input_hash: str,
+        srt_path: Path,
+        plan: EncodePlan,
+        font_size: int,
+        font_color: str,
+        position: str
+    ) -> str:
+        """Key identifying an output by everything that determines its bytes"""
+        style = f"{font_size}|{font_color.strip().lower()}|{position.lower()}" if plan.uses_style else ""
+        parts = [input_hash, hash_file(srt_path), style, plan.output_type.value, plan.profile]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    
+    async def get_artifact(self, filename: str) -> Optional[ArtifactRecord]:
+        """Get metadata of a stored output"""
+        return await self.artifact_store.get_async(filename)
+    
+    async def get_download_path(self, filename: str) -> Optional[Path]:
+        """Get local path of a stored output (fetched from the backend if remote), or None if it does not exist"""
+        return await self.artifact_store.resolve_async(filename)
     
     def cleanup_download_file(self, filename: str):
-        """Cleanup downloaded file after serving"""
-        file_path = self.get_download_path(filename)
-        self.file_manager.cleanup_file(file_path)
+        """Delete a stored output"""
+        self.artifact_store.delete(filename)
+    
+    async def _delete_output(self, filename: str):
+        """Delete a stored output, if there is one, in a worker thread (the backend may be remote)"""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.artifact_store.delete, filename)
+        except Exception as e:
+            print(f"Warning: Could not delete output {filename}: {e}")
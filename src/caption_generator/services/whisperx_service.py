@@ -1,38 +1,119 @@
 """
 WhisperX service for speech recognition and transcription.
+
+``whisperx`` and ``torch`` take several seconds to import, so they are only
+imported on first use (model loading or transcription). Importing this module,
+the package or the API app stays cheap.
 """
-import whisperx
-import torch
+import asyncio
+import os
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 
+from .transcription_scheduler import MicroBatcher
+from ..utils.caption_segmenter import CaptionSegmenter, words_from_segments
 from ..models.subtitle import TranscriptSegment
+from ..models.transcription import SchedulerStats
 from ..core.config import settings
 
+# WhisperX resamples all audio to 16kHz
+SAMPLE_RATE = 16000
+# Language detection only looks at the first Whisper window
+DETECTION_SECONDS = 30
+# Same script header FFmpeg gives converted SRT files, so force_style sizes match
+ASS_HEADER = (
+    "[Script Info]\n"
+    "ScriptType: v4.00+\n"
+    "PlayResX: 384\n"
+    "PlayResY: 288\n"
+    "ScaledBorderAndShadow: yes\n"
+    "\n"
+    "[V4+ Styles]\n"
+    "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+    "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
+    "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+    "Style: Default,Arial,16,&Hffffff,&Hffffff,&H0,&H0,0,0,0,0,100,100,0,0,1,1,0,2,10,10,10,0\n"
+    "\n"
+    "[Events]\n"
+    "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+)
+
+
+def _import_whisperx():
+    """Import the WhisperX stack on first use"""
+    import whisperx
+    return whisperx
+
 
 class WhisperXService:
     def __init__(self):
+        # Device detection needs torch, so it is deferred until the model is loaded
+        self.device: Optional[str] = None
+        self.compute_type: Optional[str] = None
+        self.model = None
+        # Alignment models by language code: (model, metadata)
+        self._align_models: Dict[str, Any] = {}
+        self._align_lock = threading.Lock()
+        self.load_error: Optional[str] = None
+        # Created lazily so it binds to the server's event loop, not the import-time one
+        self._load_lock: Optional[asyncio.Lock] = None
+        # The model is not thread-safe; inference runs in worker threads one at a time
+        self._inference_lock = threading.Lock()
+        # Created on first transcription (needs the running event loop)
+        self._scheduler: Optional[MicroBatcher] = None
+        self._micro_batching = True
+    
+    @property
+    def is_model_loaded(self) -> bool:
+        """Whether the transcription model is ready"""
+        return self.model is not None
+    
+    def _resolve_device(self):
+        """Pick the inference device (imports torch)"""
+        if self.device is not None:
+            return
+        
         # Force CPU usage if CUDA_VISIBLE_DEVICES is set to empty
-        import os
         if os.getenv("CUDA_VISIBLE_DEVICES") == "":
             self.device = "cpu"
             print("Forcing CPU usage due to CUDA_VISIBLE_DEVICES environment variable")
         else:
             # Check CUDA availability more safely
             try:
+                import torch
                 self.device = "cuda" if torch.cuda.is_available() else "cpu"
             except Exception as e:
                 print(f"CUDA check failed, falling back to CPU: {e}")
                 self.device = "cpu"
         
         self.compute_type = "float16" if self.device == "cuda" else "int8"
-        self.model = None
-        self.align_model = None
-        self.metadata = None
         print(f"WhisperX will use device: {self.device}")
-        
+    
     async def load_model(self):
         """Load WhisperX model if not already loaded"""
+        if self.model is not None:
+            return
+        
+        # Loading blocks for seconds; keep the event loop (and /health) responsive
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self.model is not None:
+                return
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._load_model_sync)
+                self.load_error = None
+            except Exception as e:
+                self.load_error = str(e)
+                raise
+    
+    def _load_model_sync(self):
+        """Import WhisperX and load the transcription model"""
+        self._resolve_device()
+        whisperx = _import_whisperx()
+        
         if self.model is None:
             print(f"Loading WhisperX model: {settings.whisperx.model}")
             try:
@@ -73,20 +154,173 @@ class WhisperXService:
                         self.device
                     )
     
-    async def transcribe_video(self, video_path: Path) -> Dict[str, Any]:
-        """Transcribe video and return word-level timestamps"""
+    async def transcribe_video(
+        self,
+        video_path: Path,
+        language: Optional[str] = None,
+        audio=None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe video and return word-level timestamps.
+        
+        With ``language`` set, language detection is skipped. Otherwise the
+        language is detected up front from the first 30 seconds only. Either
+        way the alignment model for that language loads in parallel with the
+        transcription instead of after it. ``audio`` (from ``load_audio``)
+        skips decoding the video again.
+        """
         await self.load_model()
+        loop = asyncio.get_running_loop()
         
         # Load audio from video
-        audio = whisperx.load_audio(str(video_path))
+        if audio is None:
+            audio = await self.load_audio(video_path)
+        
+        if language is None:
+            language = await loop.run_in_executor(None, self._detect_language, audio)
+        else:
+            print(f"Using requested language: {language}")
+        
+        preload = None
+        if language is not None:
+            preload = loop.run_in_executor(None, self._get_align_model, language)
+        try:
+            result = await self._transcribe_scheduled(audio, language)
+        finally:
+            align_model = None
+            if preload is not None:
+                # Wait for the preload (or its failure) before continuing
+                align_model, = await asyncio.gather(preload, return_exceptions=True)
+        return await loop.run_in_executor(None, self._align, result, audio, align_model)
+    
+    async def transcribe_batch(
+        self,
+        video_paths: List[Path],
+        language: Optional[str] = None
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Transcribe many videos together.
+        
+        All clips go through the micro-batching scheduler at once, so their
+        speech windows share model batches. Returns one result (or the
+        exception that clip raised) per path, in input order.
+        """
+        return await asyncio.gather(
+            *(self.transcribe_video(video_path, language) for video_path in video_paths),
+            return_exceptions=True
+        )
+    
+    async def load_audio(self, video_path: Path):
+        """Decode a video's audio track to 16kHz mono float samples"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._load_audio, video_path)
+    
+    def _load_audio(self, video_path: Path):
+        """Decode a video's audio track to 16kHz mono (worker thread)"""
+        whisperx = _import_whisperx()
+        return whisperx.load_audio(str(video_path))
+    
+    @property
+    def scheduler_stats(self) -> SchedulerStats:
+        """Micro-batching statistics"""
+        return self._get_scheduler().stats
+    
+    def _detect_language(self, audio) -> Optional[str]:
+        """Detect the spoken language from the first 30 seconds (worker thread)"""
+        try:
+            with self._inference_lock:
+                language = self.model.detect_language(audio[:DETECTION_SECONDS * SAMPLE_RATE])
+        except AttributeError:
+            # Older pipelines only detect inside transcribe()
+            return None
+        print(f"Detected language: {language}")
+        return language
+    
+    def _get_scheduler(self) -> MicroBatcher:
+        """Micro-batcher shared by all in-flight transcriptions"""
+        if self._scheduler is None:
+            self._scheduler = MicroBatcher(
+                self._run_window_batch,
+                max_batch_size=settings.whisperx.MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=settings.whisperx.MICRO_BATCH_MAX_WAIT_MS
+            )
+        return self._scheduler
+    
+    async def _transcribe_scheduled(self, audio, language: Optional[str]) -> Dict[str, Any]:
+        """
+        Transcribe one clip through the micro-batcher.
         
+        The clip is split into the same <=30s speech windows the pipeline
+        would use; the windows are queued with those of other in-flight
+        requests of the same language and decoded in shared batches.
+        """
+        loop = asyncio.get_running_loop()
+        # Windows are batched per language, so an unknown language goes the slow way
+        if self._micro_batching and language is not None:
+            try:
+                windows = await loop.run_in_executor(None, self._prepare_windows, audio)
+                chunks = [
+                    audio[int(window["start"] * SAMPLE_RATE):int(window["end"] * SAMPLE_RATE)]
+                    for window in windows
+                ]
+                texts = await self._get_scheduler().submit(language, chunks)
+                return {
+                    "language": language,
+                    "segments": [
+                        {"text": text, "start": round(window["start"], 3), "end": round(window["end"], 3)}
+                        for window, text in zip(windows, texts)
+                    ]
+                }
+            except (AttributeError, ImportError, TypeError) as e:
+                # Pipeline internals differ between WhisperX versions
+                print(f"Micro-batching unavailable ({e}), transcribing each request on its own")
+                self._micro_batching = False
+        return await loop.run_in_executor(None, self._transcribe_audio_locked, audio, language)
+    
+    def _prepare_windows(self, audio) -> List[Dict[str, float]]:
+        """Speech windows of one clip (worker thread)"""
+        with self._inference_lock:
+            return self._speech_windows(audio)
+    
+    def _run_window_batch(self, language: str, chunks: List[Any]) -> List[str]:
+        """Decode a batch of audio windows of one language in a single pipeline call"""
+        import faster_whisper.tokenizer
+        
+        with self._inference_lock:
+            original_tokenizer = self.model.tokenizer
+            self.model.tokenizer = faster_whisper.tokenizer.Tokenizer(
+                self.model.model.hf_tokenizer,
+                self.model.model.model.is_multilingual,
+                task="transcribe",
+                language=language
+            )
+            try:
+                outputs = self.model(
+                    ({"inputs": chunk} for chunk in chunks),
+                    batch_size=settings.whisperx.BATCH_SIZE
+                )
+                texts = []
+                for output in outputs:
+                    text = output["text"]
+                    texts.append(text[0] if isinstance(text, list) else text)
+            finally:
+                self.model.tokenizer = original_tokenizer
+        return texts
+    
+    def _transcribe_audio_locked(self, audio, language: Optional[str] = None) -> Dict[str, Any]:
+        """Run the model's own transcribe on one clip (worker thread)"""
+        with self._inference_lock:
+            return self._transcribe_audio(audio, language)
+    
+    def _transcribe_audio(self, audio, language: Optional[str] = None) -> Dict[str, Any]:
+        """Run the model on one clip's audio"""
         # Try different transcription approaches based on WhisperX version
         try:
             # Try with new API parameters first
             result = self.model.transcribe(
                 audio, 
-                batch_size=16,
-                language=None
+                batch_size=settings.whisperx.BATCH_SIZE,
+                language=language  # None lets it auto-detect
             )
         except TypeError as e:
             if "missing" in str(e) and "required positional arguments" in str(e):
@@ -94,8 +328,8 @@ class WhisperXService:
                 # Use the newer API with all required parameters
                 result = self.model.transcribe(
                     audio,
-                    batch_size=16,
-                    language=None,
+                    batch_size=settings.whisperx.BATCH_SIZE,
+                    language=language,
                     multilingual=True,
                     max_new_tokens=448,  # Default value
                     clip_timestamps="0,30",  # Default clip range
@@ -104,17 +338,41 @@ class WhisperXService:
                 )
             else:
                 raise e
+        return result
+    
+    def _speech_windows(self, audio) -> List[Dict[str, float]]:
+        """Voice-activity windows (at most 30s each) of one clip, as the pipeline computes them"""
+        import torch
+        from whisperx.vad import merge_chunks
+        
+        vad_segments = self.model.vad_model({
+            "waveform": torch.from_numpy(audio).unsqueeze(0),
+            "sample_rate": SAMPLE_RATE
+        })
+        return merge_chunks(
+            vad_segments,
+            30,
+            onset=self.model._vad_params["vad_onset"],
+            offset=self.model._vad_params["vad_offset"]
+        )
+    
+    def _align(self, result: Dict[str, Any], audio, align_model=None) -> Dict[str, Any]:
+        """
+        Align a transcript to get word-level timestamps.
         
-        # Load alignment model for detected language
+        ``align_model`` is the preloaded ``(model, metadata)`` pair (or the
+        exception its loading raised); it is loaded here if not given.
+        """
+        whisperx = _import_whisperx()
         language = result.get("language", "en")
-        print(f"Detected language: {language}")
         
         # Try to align whisper output for better word-level timestamps
         try:
-            align_model, metadata = whisperx.load_align_model(
-                language_code=language, 
-                device=self.device
-            )
+            if isinstance(align_model, Exception):
+                raise align_model
+            if align_model is None:
+                align_model = self._get_align_model(language)
+            align_model, metadata = align_model
             
             # Align whisper output
             aligned_result = whisperx.align(
@@ -136,83 +394,27 @@ class WhisperXService:
             "word_segments": aligned_result.get("word_segments", [])
         }
     
+    def _get_align_model(self, language: str):
+        """Alignment model for a language, loaded once and reused (thread-safe)"""
+        with self._align_lock:
+            if language not in self._align_models:
+                whisperx = _import_whisperx()
+                print(f"Loading alignment model for language: {language}")
+                self._align_models[language] = whisperx.load_align_model(
+                    language_code=language, 
+                    device=self.device
+                )
+            return self._align_models[language]
+    
     def group_words_into_captions(self, segments: List[Dict]) -> List[TranscriptSegment]:
-        """Group words into readable caption segments of 6-7 words"""
-        captions = []
-        current_words = []
-        current_start = None
-        current_end = None
-        
-        for segment in segments:
-            # Handle segments with word-level timestamps
-            if "words" in segment and segment["words"]:
-                for word in segment["words"]:
-                    if "start" not in word or "end" not in word:
-                        continue
-                        
-                    # Start new caption if this is the first word
-                    if current_start is None:
-                        current_start = word["start"]
-                    
-                    current_words.append(word["word"].strip())
-                    current_end = word["end"]
-                    
-                    # Create caption when we have enough words or reached max duration
-                    should_create_caption = (
-                        len(current_words) >= settings.whisperx.words_per_caption or
-                        (current_end - current_start) >= settings.whisperx.max_caption_duration
-                    )
-                    
-                    if should_create_caption and len(current_words) >= settings.whisperx.min_words_per_caption:
-                        caption_text = " ".join(current_words).strip()
-                        if caption_text:
-                            captions.append(TranscriptSegment(
-                                start=current_start,
-                                end=current_end,
-                                text=caption_text
-                            ))
-                        
-                        # Reset for next caption
-                        current_words = []
-                        current_start = None
-                        current_end = None
-            
-            # Fallback: Handle segments without word-level timestamps
-            elif "text" in segment and "start" in segment and "end" in segment:
-                text = segment["text"].strip()
-                if text:
-                    # Split long segments into smaller captions
-                    words = text.split()
-                    start_time = segment["start"]
-                    end_time = segment["end"]
-                    duration = end_time - start_time
-                    
-                    # Create captions from word chunks
-                    for i in range(0, len(words), settings.whisperx.words_per_caption):
-                        chunk_words = words[i:i + settings.whisperx.words_per_caption]
-                        chunk_text = " ".join(chunk_words)
-                        
-                        # Calculate timing for this chunk
-                        chunk_start = start_time + (i / len(words)) * duration
-                        chunk_end = start_time + ((i + len(chunk_words)) / len(words)) * duration
-                        
-                        captions.append(TranscriptSegment(
-                            start=chunk_start,
-                            end=chunk_end,
-                            text=chunk_text
-                        ))
-        
-        # Add remaining words as final caption (for word-level processing)
-        if current_words and current_start is not None:
-            caption_text = " ".join(current_words).strip()
-            if caption_text:
-                captions.append(TranscriptSegment(
-                    start=current_start,
-                    end=current_end,
-                    text=caption_text
-                ))
-        
-        return captions
+        """
+        Group words into readable captions (see ``CaptionSegmenter``).
+        
+        Captions break preferably at sentence ends, clause marks and pauses,
+        fit ``CAPTION_MAX_LINES`` lines of ``CAPTION_MAX_CHARS_PER_LINE``
+        characters (wrapped with newlines) and stay up long enough to be read.
+        """
+        return CaptionSegmenter().segment(words_from_segments(segments))
     
     def create_srt_content(self, captions: List[TranscriptSegment]) -> str:
         """Convert caption segments to SRT format"""
@@ -228,6 +430,70 @@ class WhisperXService:
         
         return srt_content
     
+    def create_karaoke_ass_content(
+        self,
+        captions: List[TranscriptSegment],
+        spoken_color: str,
+        upcoming_color: str
+    ) -> str:
+        """
+        Convert caption segments to ASS with word-by-word karaoke timing.
+        
+        Each caption stays one event; its words carry ``\\k`` tags (durations
+        in centiseconds), so libass switches each word from ``upcoming_color``
+        to ``spoken_color`` as it is spoken. Colors are ASS ``&HBBGGRR&``
+        values, set inline so they win over the burn's ``force_style``.
+        Captions without word timings are shown plainly.
+        """
+        lines = [ASS_HEADER]
+        for caption in captions:
+            start = round(caption.start * 100)
+            end = max(round(caption.end * 100), start + 1)
+            text = self._karaoke_text(caption, start, end) if caption.words else self._ass_escape(caption.text)
+            lines.append(
+                f"Dialogue: 0,{self._centiseconds_to_ass_time(start)},{self._centiseconds_to_ass_time(end)},"
+                f"Default,,0,0,0,,{{\\1c{spoken_color}\\2c{upcoming_color}}}{text}\n"
+            )
+        return "".join(lines)
+    
+    def _karaoke_text(self, caption: TranscriptSegment, start: int, end: int) -> str:
+        """Words of a caption with ``\\k`` tags; durations are differences of rounded times so they add up"""
+        # Each word is highlighted from its start until the next word starts
+        boundaries = [start]
+        for word in caption.words:
+            boundaries.append(min(max(round(word.start * 100), boundaries[-1]), end))
+        boundaries.append(end)
+        
+        # Words on the first line of a wrapped caption
+        first_line = len(caption.text.split("\n", 1)[0].split())
+        parts = []
+        if boundaries[1] > boundaries[0]:
+            # Silence before the first word
+            parts.append(f"{{\\k{boundaries[1] - boundaries[0]}}}")
+        for index, word in enumerate(caption.words):
+            if index == len(caption.words) - 1:
+                separator = ""
+            elif "\n" in caption.text and index == first_line - 1:
+                separator = "\\N"
+            else:
+                separator = " "
+            duration = boundaries[index + 2] - boundaries[index + 1]
+            parts.append(f"{{\\k{duration}}}{self._ass_escape(word.word)}{separator}")
+        return "".join(parts)
+    
+    @staticmethod
+    def _ass_escape(text: str) -> str:
+        """Keep caption text from being read as ASS override tags (newlines become ``\\N``)"""
+        return text.replace("\\", "/").replace("{", "(").replace("}", ")").replace("\n", "\\N")
+    
+    @staticmethod
+    def _centiseconds_to_ass_time(centiseconds: int) -> str:
+        """Convert centiseconds to ASS time format (H:MM:SS.cc)"""
+        seconds, cs = divmod(centiseconds, 100)
+        minutes, secs = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{secs:02d}.{cs:02d}"
+    
     def _seconds_to_srt_time(self, seconds: float) -> str:
         """Convert seconds to SRT time format (HH:MM:SS,mmm)"""
         hours = int(seconds // 3600)
@@ -0,0 +1,285 @@
+"""
+Caption segmentation: aligned words to readable captions in one linear pass.
+"""
+import math
+from itertools import accumulate
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from ..models.subtitle import TranscriptSegment, WordAlignment
+from ..core.config import settings
+
+SENTENCE_END = (".", "!", "?", "…", "。", "！", "？")
+CLAUSE_END = (",", ";", ":", "—", "–", "，", "、")
+# No caption stays on screen through a pause this long (seconds)
+HARD_BREAK_GAP = 1.5
+# A pause this long makes any break as good as a sentence end
+FULL_PAUSE = 0.6
+
+# Break costs by what ends the caption (scaled down by the pause that follows)
+SENTENCE_BREAK_COST = 0.0
+CLAUSE_BREAK_COST = 0.6
+PHRASE_BREAK_COST = 2.0
+# Caption costs
+LENGTH_WEIGHT = 2.0
+SHORT_CAPTION_COST = 1.0
+# Cost of running through a good break point instead of breaking there
+SPANNED_BREAK_WEIGHT = 1.0
+TWO_LINE_COST = 0.3
+READING_SPEED_WEIGHT = 8.0
+MIN_DURATION_COST = 1.0
+
+
+class TimedWord(NamedTuple):
+    """A word with its timing; ``aligned`` is False for times interpolated from a segment"""
+    text: str
+    start: float
+    end: float
+    aligned: bool = True
+
+
+def words_from_segments(segments: List[Dict]) -> List[TimedWord]:
+    """
+    Flatten transcript segments into one word stream with monotonic times.
+    
+    Words the aligner could not time (numbers, symbols) borrow the end of the
+    previous word instead of being dropped. Segments without word timings
+    are split into words spread evenly over the segment.
+    """
+    words: List[TimedWord] = []
+    last_start = last_end = 0.0
+    
+    def add(text: str, start: float, end: float, aligned: bool):
+        nonlocal last_start, last_end
+        # Clamp so starts and ends never go backwards (the segmenter relies on it)
+        start = max(start, last_start)
+        end = max(end, start, last_end)
+        words.append(TimedWord(text, start, end, aligned))
+        last_start, last_end = start, end
+    
+    for segment in segments:
+        if segment.get("words"):
+            for word in segment["words"]:
+                text = word.get("word", "").strip()
+                if not text:
+                    continue
+                if "start" in word and "end" in word:
+                    add(text, word["start"], word["end"], True)
+                else:
+                    add(text, last_end if words else segment.get("start", 0.0), last_end, True)
+        elif "text" in segment and "start" in segment and "end" in segment:
+            texts = segment["text"].split()
+            duration = segment["end"] - segment["start"]
+            for index, text in enumerate(texts):
+                add(
+                    text,
+                    segment["start"] + duration * index / len(texts),
+                    segment["start"] + duration * (index + 1) / len(texts),
+                    False
+                )
+    return words
+
+
+class CaptionSegmenter:
+    """
+    Splits a word stream into captions at the cheapest break points.
+    
+    Hard limits: a caption fits ``max_lines`` lines of ``max_chars_per_line``
+    characters, lasts at most ``max_duration`` seconds and never spans a
+    pause of ``HARD_BREAK_GAP`` (a single word is always allowed). Within
+    them, every break costs less after sentence punctuation, a clause mark
+    or a pause, and every caption costs more the further its word count is
+    from ``target_words``, when it needs a second line, and when its time on
+    screen (up to the next caption) is below ``min_duration`` or would take
+    reading faster than ``max_cps`` characters per second. Running through a
+    good break point (a sentence end or pause inside the caption) costs too.
+    
+    The cheapest segmentation is a shortest path over break points. A
+    caption spans a bounded number of words ``w``, so this is one forward
+    pass in O(n * w): linear in the transcript length. Captions are then
+    kept on screen long enough to be read (``min_duration`` and
+    ``max_cps``) when the gap before the next one allows, and wrapped into
+    balanced lines.
+    """
+    
+    def __init__(
+        self,
+        target_words: Optional[int] = None,
+        min_words: Optional[int] = None,
+        max_lines: Optional[int] = None,
+        max_chars_per_line: Optional[int] = None,
+        max_duration: Optional[float] = None,
+        min_duration: Optional[float] = None,
+        max_cps: Optional[float] = None
+    ):
+        whisperx = settings.whisperx
+        self.target_words = target_words or whisperx.words_per_caption
+        self.min_words = min_words or whisperx.min_words_per_caption
+        self.max_lines = max_lines or whisperx.CAPTION_MAX_LINES
+        self.max_chars_per_line = max_chars_per_line or whisperx.CAPTION_MAX_CHARS_PER_LINE
+        self.max_duration = max_duration or whisperx.max_caption_duration
+        self.min_duration = min_duration if min_duration is not None else whisperx.MIN_CAPTION_DURATION
+        self.max_cps = max_cps or whisperx.CAPTION_MAX_CPS
+    
+    def segment(self, words: Sequence[TimedWord]) -> List[TranscriptSegment]:
+        """Captions covering every word, in order"""
+        n = len(words)
+        if n == 0:
+            return []
+        # prefix[k]: characters in words[:k], so a caption's width is O(1)
+        prefix = [0, *accumulate(len(word.text) for word in words)]
+        limits = self._caption_limits(words, prefix)
+        # break_costs[j]: cost of a break after words[j - 1]; spanned[k]: how good the
+        # break points after words[0..k - 1] are, so a caption's sum is O(1) too
+        break_costs = [0.0] + [self._break_cost(words, j) for j in range(1, n + 1)]
+        spanned = [0.0, *accumulate(PHRASE_BREAK_COST - break_costs[k] for k in range(1, n))]
+        
+        count_costs = [self._count_cost(count) for count in range(max(limits[i] - i for i in range(n)) + 1)]
+        starts = [word.start for word in words]
+        max_chars, max_cps, min_duration = self.max_chars_per_line, self.max_cps, self.min_duration
+        
+        # best[j]: cheapest segmentation of words[:j]; back[j]: start of its last caption.
+        # This loop runs n * w times, so the caption cost is computed inline.
+        best = [0.0] + [math.inf] * n
+        back = [0] * (n + 1)
+        lo = 0
+        for j in range(1, n + 1):
+            # limits is non-decreasing, so the captions that can end at j start in [lo, j)
+            while limits[lo] < j:
+                lo += 1
+            best_j, back_j = math.inf, j - 1
+            base = break_costs[j] + SPANNED_BREAK_WEIGHT * spanned[j - 1]
+            for i in range(j - 1, lo - 1, -1):
+                cost = best[i] + base - SPANNED_BREAK_WEIGHT * spanned[i] + count_costs[j - i]
+                if cost >= best_j:
+                    # The remaining terms only add to it
+                    continue
+                width = prefix[j] - prefix[i] + (j - i - 1)
+                if width > max_chars:
+                    cost += TWO_LINE_COST
+                if j < n:
+                    # The caption can stay up until the next one starts
+                    available = starts[j] - starts[i] or 0.001
+                    cps = width / available
+                    if cps > max_cps:
+                        cost += READING_SPEED_WEIGHT * ((cps - max_cps) / max_cps) ** 2
+                    if available < min_duration:
+                        cost += MIN_DURATION_COST * (1.0 - available / min_duration)
+                if cost < best_j:
+                    best_j, back_j = cost, i
+            best[j], back[j] = best_j, back_j
+        
+        spans = []
+        j = n
+        while j > 0:
+            spans.append((back[j], j))
+            j = back[j]
+        spans.reverse()
+        return [self._caption(words, prefix, i, j) for i, j in spans]
+    
+    def _caption_limits(self, words: Sequence[TimedWord], prefix: List[int]) -> List[int]:
+        """For each start i, the largest j such that words[i:j] may form one caption"""
+        n = len(words)
+        line_end = self._line_ends(prefix, n)
+        
+        # pause_ends[i]: first word after i that follows a hard pause
+        pause_ends = [n] * n
+        for k in range(n - 1, 0, -1):
+            pause_ends[k - 1] = k if words[k].start - words[k - 1].end >= HARD_BREAK_GAP else pause_ends[k]
+        
+        limits = []
+        duration_end = 0
+        for i in range(n):
+            lines_end = i
+            for _ in range(self.max_lines):
+                lines_end = line_end[lines_end]
+            # Times are monotonic, so this pointer only moves forward
+            duration_end = max(duration_end, i + 1)
+            while duration_end < n and words[duration_end].end - words[i].start <= self.max_duration:
+                duration_end += 1
+            limits.append(max(i + 1, min(lines_end, duration_end, pause_ends[i])))
+        limits.append(n)
+        return limits
+    
+    def _line_ends(self, prefix: List[int], n: int) -> List[int]:
+        """For each start i, the end of the longest line that fits (at least one word)"""
+        line_end = []
+        k = 0
+        for i in range(n):
+            k = max(k, i + 1)
+            while k < n and self._width(prefix, i, k + 1) <= self.max_chars_per_line:
+                k += 1
+            line_end.append(k)
+        line_end.append(n)
+        return line_end
+    
+    @staticmethod
+    def _width(prefix: List[int], i: int, j: int) -> int:
+        """Characters of words[i:j] on one line, spaces included"""
+        return prefix[j] - prefix[i] + (j - i - 1)
+    
+    def _break_cost(self, words: Sequence[TimedWord], j: int) -> float:
+        """Cost of ending a caption after words[j - 1]"""
+        if j == len(words):
+            return 0.0
+        text = words[j - 1].text
+        if text.endswith(SENTENCE_END):
+            cost = SENTENCE_BREAK_COST
+        elif text.endswith(CLAUSE_END):
+            cost = CLAUSE_BREAK_COST
+        else:
+            cost = PHRASE_BREAK_COST
+        gap = words[j].start - words[j - 1].end
+        return cost * max(0.0, 1.0 - gap / FULL_PAUSE)
+    
+    def _count_cost(self, count: int) -> float:
+        """Cost of a caption's word count (distance from the target, too few words)"""
+        cost = LENGTH_WEIGHT * ((count - self.target_words) / self.target_words) ** 2
+        if count < self.min_words:
+            cost += SHORT_CAPTION_COST * (self.min_words - count) / self.min_words
+        return cost
+    
+    def _caption(self, words: Sequence[TimedWord], prefix: List[int], i: int, j: int) -> TranscriptSegment:
+        """words[i:j] as a caption, extended for reading time and wrapped"""
+        start = words[i].start
+        width = self._width(prefix, i, j)
+        end = max(words[j - 1].end, start + self.min_duration, start + width / self.max_cps)
+        if j < len(words) and words[j].start > start:
+            end = min(end, words[j].start)
+        end = max(end, start + 0.001)
+        
+        span = words[i:j]
+        return TranscriptSegment(
+            start=round(start, 3),
+            end=round(end, 3),
+            text="\n".join(" ".join(word.text for word in line) for line in self._wrap(span, prefix, i, j)),
+            words=[
+                WordAlignment(word=word.text, start=word.start, end=word.end)
+                for word in span
+            ] if all(word.aligned for word in span) else None
+        )
+    
+    def _wrap(self, span: Sequence[TimedWord], prefix: List[int], i: int, j: int) -> List[Sequence[TimedWord]]:
+        """Lines of a caption: one if it fits, two balanced ones if they fit, else filled greedily"""
+        limit = self.max_chars_per_line
+        if self._width(prefix, i, j) <= limit:
+            return [span]
+        best_split = None
+        for k in range(i + 1, j):
+            first, second = self._width(prefix, i, k), self._width(prefix, k, j)
+            if first <= limit and second <= limit:
+                # Most even lines; on a tie, the shorter line goes on top
+                key = (abs(first - second), first > second)
+                if best_split is None or key < best_split[0]:
+                    best_split = (key, k)
+        if best_split is not None:
+            k = best_split[1]
+            return [span[:k - i], span[k - i:]]
+        lines = []
+        start = i
+        while start < j:
+            end = start + 1
+            while end < j and self._width(prefix, start, end + 1) <= limit:
+                end += 1
+            lines.append(span[start - i:end - i])
+            start = end
+        return lines
@@ -0,0 +1,179 @@
+"""
+Time-indexed caption storage with window queries, word search and a binary format.
+"""
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from ..models.subtitle import TranscriptSegment
+
+# Magic, format version, caption count
+_HEADER = struct.Struct("<4sHI")
+_MAGIC = b"CTLN"
+_VERSION = 1
+_WORD = re.compile(r"\w+(?:'\w+)*")
+
+
+def _words(text: str) -> List[str]:
+    """Lower-cased words of a caption, without punctuation"""
+    return _WORD.findall(text.lower())
+
+
+class CaptionTimeline:
+    """
+    Captions sorted by start time, indexed for lookup by timestamp and by word.
+    
+    Start and end times are kept in parallel arrays (milliseconds), so
+    ``at(t)`` and ``window(start, end)`` are binary searches. A running
+    maximum of end times bounds how far back a query has to look when
+    captions overlap. ``search`` uses an inverted index from each word to
+    the captions containing it.
+    """
+    
+    def __init__(self, captions: Sequence[TranscriptSegment] = ()):
+        ordered = sorted(captions, key=lambda caption: (caption.start, caption.end))
+        self._starts = array("q", (round(caption.start * 1000) for caption in ordered))
+        self._ends = array("q", (round(caption.end * 1000) for caption in ordered))
+        self._texts = [caption.text for caption in ordered]
+        # Latest end among captions[0..i]: no caption before i can still be on screen after it
+        self._max_ends = array("q", accumulate(self._ends, max))
+        self._index: Dict[str, List[int]] = {}
+        for position, text in enumerate(self._texts):
+            for word in dict.fromkeys(_words(text)):
+                self._index.setdefault(word, []).append(position)
+    
+    def __len__(self) -> int:
+        return len(self._texts)
+    
+    def __iter__(self) -> Iterator[TranscriptSegment]:
+        return (self._caption(position) for position in range(len(self)))
+    
+    @property
+    def duration(self) -> float:
+        """End time of the last caption in seconds"""
+        return self._max_ends[-1] / 1000 if self._texts else 0.0
+    
+    def intervals(self) -> List[Tuple[float, float]]:
+        """``(start, end)`` of every caption in seconds"""
+        return [(start / 1000, end / 1000) for start, end in zip(self._starts, self._ends)]
+    
+    def at(self, seconds: float) -> List[TranscriptSegment]:
+        """Captions on screen at a timestamp (start inclusive, end exclusive)"""
+        t = round(seconds * 1000)
+        return [self._caption(position) for position in self._overlapping(t, t + 1)]
+    
+    def window(self, start: float, end: float) -> List[TranscriptSegment]:
+        """Captions visible at any time in ``[start, end)``"""
+        return [
+            self._caption(position)
+            for position in self._overlapping(round(start * 1000), round(end * 1000))
+        ]
+    
+    def search(self, query: str) -> List[TranscriptSegment]:
+        """Captions containing every word of ``query`` (case and punctuation insensitive)"""
+        words = _words(query)
+        if not words:
+            return []
+        postings = sorted((self._index.get(word, []) for word in dict.fromkeys(words)), key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+        if len(words) > 1:
+            # Consecutive words must appear as a phrase
+            phrase = " ".join(words)
+            matches = {position for position in matches if phrase in " ".join(_words(self._texts[position]))}
+        return [self._caption(position) for position in sorted(matches)]
+    
+    def extract(self, start: float, end: float, rebase: bool = True) -> "CaptionTimeline":
+        """
+        Captions of ``[start, end)`` as a new timeline, clipped to the range.
+        
+        With ``rebase`` times are shifted so the range starts at zero (for
+        cutting a clip out of the video).
+        """
+        start_ms, end_ms = round(start * 1000), round(end * 1000)
+        offset = start_ms if rebase else 0
+        clipped = []
+        for position in self._overlapping(start_ms, end_ms):
+            caption_start = max(self._starts[position], start_ms) - offset
+            caption_end = min(self._ends[position], end_ms) - offset
+            if caption_end > caption_start:
+                clipped.append(TranscriptSegment(
+                    start=caption_start / 1000, end=caption_end / 1000, text=self._texts[position]
+                ))
+        return CaptionTimeline(clipped)
+    
+    def to_bytes(self) -> bytes:
+        """
+        Serialize to a compact binary form.
+        
+        Layout (little-endian): header (magic, version, count), start and end
+        times as int64 milliseconds, text lengths as uint32, then the UTF-8
+        texts back to back.
+        """
+        encoded = [text.encode("utf-8") for text in self._texts]
+        lengths = array("I", (len(text) for text in encoded))
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(encoded))]
+        for values in (self._starts, self._ends, lengths):
+            parts.append(self._little_endian(values).tobytes())
+        parts.extend(encoded)
+        return b"".join(parts)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CaptionTimeline":
+        """Load a timeline written by ``to_bytes``"""
+        try:
+            magic, version, count = _HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError("Truncated caption timeline")
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a caption timeline (or unsupported version)")
+        
+        offset = _HEADER.size
+        columns = []
+        for typecode in ("q", "q", "I"):
+            column = array(typecode)
+            size = column.itemsize * count
+            if len(data) < offset + size:
+                raise ValueError("Truncated caption timeline")
+            column.frombytes(data[offset:offset + size])
+            columns.append(cls._little_endian(column))
+            offset += size
+        starts, ends, lengths = columns
+        
+        captions = []
+        for start, end, length in zip(starts, ends, lengths):
+            text = data[offset:offset + length].decode("utf-8")
+            offset += length
+            captions.append(TranscriptSegment(start=start / 1000, end=end / 1000, text=text))
+        return cls(captions)
+    
+    def _overlapping(self, start_ms: int, end_ms: int) -> List[int]:
+        """Positions of captions with ``start < end_ms`` and ``end > start_ms``, in order"""
+        positions = []
+        position = bisect_left(self._starts, end_ms) - 1
+        while position >= 0 and self._max_ends[position] > start_ms:
+            if self._ends[position] > start_ms:
+                positions.append(position)
+            position -= 1
+        positions.reverse()
+        return positions
+    
+    def _caption(self, position: int) -> TranscriptSegment:
+        return TranscriptSegment(
+            start=self._starts[position] / 1000,
+            end=self._ends[position] / 1000,
+            text=self._texts[position]
+        )
+    
+    @staticmethod
+    def _little_endian(values: array) -> array:
+        """``values`` in little-endian byte order (a copy on big-endian hosts)"""
+        if struct.pack("=H", 1) == struct.pack("<H", 1):
+            return values
+        swapped = array(values.typecode, values)
+        swapped.byteswap()
+        return swapped
@@ -1,12 +1,14 @@
 """
 File management utilities for handling uploads, downloads, and temporary files.
 """
+import asyncio
 import os
+import threading
 import uuid
 import tempfile
 import shutil
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Set
 import aiofiles
 import requests
 
@@ -17,10 +19,12 @@ class FileManager:
     def __init__(self):
         self.temp_dir = Path(settings.temp_dir)
         self.temp_dir.mkdir(exist_ok=True)
-        
+        # Temp files used by running jobs; the janitor never deletes these
+        self._in_use: Set[Path] = set()
+    
     def generate_unique_filename(self, extension: str = ".mp4") -> str:
         """Generate a unique filename with UUID"""
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uuid.uuid4().hex
         return f"video_{unique_id}{extension}"
     
     def get_temp_path(self, filename: str) -> Path:
@@ -38,6 +42,18 @@ class FileManager:
     
     async def download_video_from_url(self, url: str) -> Path:
         """Download video from URL to temporary file"""
+        # Blocking HTTP client: run in a worker thread so downloads can overlap
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        try:
+            return await loop.run_in_executor(None, self._download_video_sync, url, cancelled)
+        except asyncio.CancelledError:
+            # The worker stops at its next chunk and removes the partial file
+            cancelled.set()
+            raise
+    
+    def _download_video_sync(self, url: str, cancelled: Optional[threading.Event] = None) -> Path:
+        """Download video from URL to temporary file (blocking)"""
         response = requests.get(url, stream=True)
         response.raise_for_status()
         
@@ -46,12 +62,42 @@ class FileManager:
         filename = self.generate_unique_filename(extension)
         file_path = self.get_temp_path(filename)
         
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        try:
+            with open(file_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if cancelled is not None and cancelled.is_set():
+                        raise RuntimeError(f"Download of {url} cancelled")
+                    f.write(chunk)
+        except BaseException:
+            response.close()
+            file_path.unlink(missing_ok=True)
+            raise
         
         return file_path
     
+    async def fetch_url_validator(self, url: str) -> Optional[str]:
+        """
+        The server's version tag for a URL's content (ETag, else Last-Modified
+        plus size), from a HEAD request; None if it has neither or cannot be reached.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._fetch_url_validator_sync, url)
+    
+    def _fetch_url_validator_sync(self, url: str) -> Optional[str]:
+        try:
+            response = requests.head(url, allow_redirects=True, timeout=settings.app.URL_HEAD_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Warning: HEAD {url} failed: {e}")
+            return None
+        etag = response.headers.get("etag")
+        if etag:
+            return f"etag:{etag}"
+        last_modified = response.headers.get("last-modified")
+        if last_modified:
+            return f"modified:{last_modified}|{response.headers.get('content-length', '')}"
+        return None
+    
     def _get_extension_from_url_or_headers(self, url: str, headers: dict) -> str:
         """Extract file extension from URL or headers"""
         # Try URL first
@@ -71,8 +117,23 @@ class FileManager:
         # Default to mp4
         return '.mp4'
     
+    def mark_in_use(self, *file_paths: Path):
+        """Protect temporary files from the janitor while a job uses them"""
+        for file_path in file_paths:
+            self._in_use.add(Path(file_path).resolve())
+    
+    def release(self, *file_paths: Path):
+        """Stop protecting temporary files"""
+        for file_path in file_paths:
+            self._in_use.discard(Path(file_path).resolve())
+    
+    def is_in_use(self, file_path: Path) -> bool:
+        """Check whether a running job is using a temporary file"""
+        return Path(file_path).resolve() in self._in_use
+    
     def cleanup_file(self, file_path: Path):
         """Remove temporary file"""
+        self.release(file_path)
         try:
             if file_path.exists():
                 file_path.unlink()
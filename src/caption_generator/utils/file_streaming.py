@@ -0,0 +1,70 @@
+"""
+Helpers for streaming files to clients while they are still being written.
+"""
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+import aiofiles
+
+from ..core.config import settings
+from ..core.exceptions import VideoProcessingError
+
+
+class WriteStatus:
+    """Whether the writer of a streamed file has finished, and whether it succeeded."""
+    
+    def __init__(self):
+        self.complete = False
+        self.failed = False
+    
+    def finish(self, failed: bool = False):
+        """Record that the writer is done with the file."""
+        self.failed = failed
+        self.complete = True
+
+
+async def tail_file(
+    file_path: Path,
+    is_complete: Callable[[], bool],
+    chunk_size: int = settings.ffmpeg.STREAM_CHUNK_SIZE,
+    poll_interval: float = settings.ffmpeg.STREAM_POLL_INTERVAL,
+    has_failed: Callable[[], bool] = lambda: False
+) -> AsyncIterator[bytes]:
+    """
+    Yield the contents of a growing file until its writer has finished.
+    
+    Args:
+        file_path: File being written (e.g. a fragmented MP4 from FFmpeg)
+        is_complete: Returns True once the writer is done with the file
+        chunk_size: Maximum number of bytes per yielded chunk
+        poll_interval: Seconds to wait when no new data is available
+        has_failed: Returns True if the writer stopped before finishing the file
+    
+    Raises:
+        VideoProcessingError: If the writer failed, so a chunked HTTP response
+            is aborted instead of ending as if the file were complete
+    """
+    def check_complete() -> bool:
+        complete = is_complete()
+        if complete and has_failed():
+            raise VideoProcessingError(f"{file_path.name} was not finished, its encode failed")
+        return complete
+    
+    # The writer may not have created the file yet
+    while not file_path.exists():
+        if check_complete():
+            return
+        await asyncio.sleep(poll_interval)
+    
+    async with aiofiles.open(file_path, 'rb') as f:
+        while True:
+            # Check completion before reading so the final drain sees all data
+            complete = check_complete()
+            chunk = await f.read(chunk_size)
+            if chunk:
+                yield chunk
+                continue
+            if complete:
+                return
+            await asyncio.sleep(poll_interval)
@@ -0,0 +1,49 @@
+"""
+Content hashing utilities for files produced and consumed by the pipeline.
+"""
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple
+
+HASH_CHUNK_SIZE = 1024 * 1024
+DIGEST_CACHE_SIZE = 4096
+
+# (path, size, mtime_ns) -> hex digest, so unchanged files are hashed once
+_digest_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_digest_cache_lock = threading.Lock()
+
+
+def hash_file(file_path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Return the SHA-256 hex digest of a file, reading it in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_file_hash(file_path: Path) -> str:
+    """Return the SHA-256 of a file, reusing the digest while size and mtime are unchanged"""
+    stat = file_path.stat()
+    key = (str(file_path.resolve()), stat.st_size, stat.st_mtime_ns)
+    with _digest_cache_lock:
+        digest = _digest_cache.get(key)
+        if digest is not None:
+            _digest_cache.move_to_end(key)
+            return digest
+    
+    digest = hash_file(file_path)
+    with _digest_cache_lock:
+        _digest_cache[key] = digest
+        if len(_digest_cache) > DIGEST_CACHE_SIZE:
+            _digest_cache.popitem(last=False)
+    return digest
+
+
+async def hash_file_async(file_path: Path) -> str:
+    """Hash a file in a worker thread so large files do not block the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, cached_file_hash, file_path)
@@ -0,0 +1,276 @@
+"""
+File responses with HTTP range and conditional request support.
+
+Implements byte-range serving (single and multipart ``206 Partial Content``),
+strong content-hash ETags, ``If-None-Match`` / ``If-Modified-Since`` /
+``If-Range`` handling, and zero-copy transfer through the ASGI
+``http.response.zerocopysend`` extension when the server offers it. Without
+the extension files are streamed in fixed-size chunks, so memory use does not
+depend on the file or range size.
+"""
+import os
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from .hashing import hash_file_async
+
+CHUNK_SIZE = 64 * 1024
+MAX_RANGES = 16
+
+ByteRange = Tuple[int, int]  # Inclusive (start, end)
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when none of the requested ranges overlap the file."""
+    pass
+
+
+def parse_range_header(header: str, file_size: int) -> Optional[List[ByteRange]]:
+    """
+    Parse a ``Range`` header into sorted, merged, inclusive byte ranges.
+    
+    Returns None when the header is malformed or uses an unknown unit, in
+    which case the header must be ignored and the full file served.
+    Raises RangeNotSatisfiable when no range overlaps the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    
+    ranges: List[ByteRange] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start_text, sep, end_text = part.partition("-")
+        if not sep:
+            return None
+        try:
+            if start_text == "":
+                # Suffix range: last N bytes
+                suffix = int(end_text)
+                if suffix <= 0:
+                    continue
+                start, end = max(file_size - suffix, 0), file_size - 1
+            else:
+                start = int(start_text)
+                if end_text:
+                    end = int(end_text)
+                    if end < start:
+                        return None
+                    end = min(end, file_size - 1)
+                else:
+                    end = file_size - 1
+        except ValueError:
+            return None
+        if start < file_size:
+            ranges.append((start, end))
+    
+    if not ranges:
+        raise RangeNotSatisfiable()
+    
+    # Merge overlapping or adjacent ranges so no byte is sent twice
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    
+    # Too many ranges is a common abuse pattern; serve the whole file instead
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+
+def _etag_matches(header: str, etag: str, weak: bool) -> bool:
+    """Check an If-None-Match / If-Range style ETag list against our ETag"""
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    """Check whether the file is unchanged since an HTTP-date"""
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class RangeFileResponse(Response):
+    """Send whole files or byte ranges of a file without buffering them."""
+    
+    def __init__(
+        self,
+        path: Path,
+        ranges: Optional[List[ByteRange]],
+        file_size: int,
+        headers: dict,
+        media_type: str,
+        status_code: int = 200
+    ):
+        self.path = path
+        self.ranges = ranges
+        self.file_size = file_size
+        self.boundary = uuid.uuid4().hex
+        self.part_headers: List[bytes] = []
+        
+        headers = dict(headers)
+        if ranges and len(ranges) > 1:
+            # multipart/byteranges: each part carries its own Content-Range header
+            for start, end in ranges:
+                self.part_headers.append((
+                    f"--{self.boundary}\r\n"
+                    f"Content-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+                ).encode("latin-1"))
+            self.closing = f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+            content_length = (
+                sum(len(h) for h in self.part_headers)
+                + sum(end - start + 1 for start, end in ranges)
+                + 2 * (len(ranges) - 1)  # CRLF between parts
+                + len(self.closing)
+            )
+            media_type = f"multipart/byteranges; boundary={self.boundary}"
+        elif ranges:
+            start, end = ranges[0]
+            headers["content-range"] = f"bytes {start}-{end}/{file_size}"
+            content_length = end - start + 1
+        else:
+            content_length = file_size
+        
+        headers["content-length"] = str(content_length)
+        super().__init__(
+            content=None,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type
+        )
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope.get("method") == "HEAD" or self.file_size == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        spans = self.ranges or [(0, self.file_size - 1)]
+        multipart = len(spans) > 1
+        
+        async with await anyio.open_file(self.path, "rb") as f:
+            for index, (start, end) in enumerate(spans):
+                if multipart:
+                    prefix = self.part_headers[index]
+                    if index > 0:
+                        prefix = b"\r\n" + prefix
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                
+                last = index == len(spans) - 1 and not multipart
+                if zerocopy:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": f.wrapped,
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": not last,
+                    })
+                    continue
+                
+                await f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = await f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": not (last and remaining <= 0),
+                    })
+            
+            if multipart:
+                await send({"type": "http.response.body", "body": self.closing, "more_body": False})
+
+
+async def build_file_response(
+    request: Request,
+    path: Path,
+    filename: str,
+    media_type: str = "video/mp4",
+    etag: Optional[str] = None
+) -> Response:
+    """
+    Serve a file honouring Range, If-Range, If-None-Match and If-Modified-Since.
+    
+    ``etag`` is the content hash of the file if already known; otherwise the
+    file is hashed. Raises FileNotFoundError if the file does not exist.
+    """
+    stat = os.stat(path)
+    file_size = stat.st_size
+    etag = f'"{etag or await hash_file_async(path)}"'
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": formatdate(stat.st_mtime, usegmt=True),
+        "content-disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+    }
+    
+    # Conditional GET: If-None-Match takes precedence over If-Modified-Since
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag, weak=True):
+            return Response(status_code=304, headers=headers)
+    elif if_modified_since and _not_modified_since(if_modified_since, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    
+    ranges = None
+    range_header = request.headers.get("range")
+    if range_header and request.method in ("GET", "HEAD"):
+        # If-Range: only honour the range if the client's copy is still current
+        if_range = request.headers.get("if-range")
+        range_valid = True
+        if if_range:
+            if if_range.startswith('"') or if_range.startswith("W/"):
+                range_valid = _etag_matches(if_range, etag, weak=False)
+            else:
+                # A date validator must match Last-Modified exactly
+                range_valid = if_range.strip() == headers["last-modified"]
+        
+        if range_valid:
+            try:
+                ranges = parse_range_header(range_header, file_size)
+            except RangeNotSatisfiable:
+                headers["content-range"] = f"bytes */{file_size}"
+                return Response(status_code=416, headers=headers)
+    
+    return RangeFileResponse(
+        path=path,
+        ranges=ranges,
+        file_size=file_size,
+        headers=headers,
+        media_type=media_type,
+        status_code=206 if ranges else 200
+    )
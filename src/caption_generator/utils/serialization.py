@@ -0,0 +1,21 @@
+"""
+JSON encoding of WhisperX results, which contain NumPy scalars and arrays.
+"""
+import json
+from typing import Any
+
+import numpy as np
+
+
+def _json_default(value: Any) -> Any:
+    """Encode NumPy scalars and arrays found in WhisperX results"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_json(data: Any) -> str:
+    """Serialize ``data`` to JSON, converting NumPy values to plain numbers and lists"""
+    return json.dumps(data, default=_json_default)
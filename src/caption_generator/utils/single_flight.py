@@ -0,0 +1,62 @@
+"""
+Single-flight coalescing: concurrent identical calls share one execution.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Flight:
+    """One shared execution and the number of callers waiting for it."""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+    
+    A caller whose key is already in flight waits for that call's result (or
+    exception) instead of starting its own. The shared call runs as its own
+    task: a waiter that is cancelled (client gone) just leaves, and the call
+    is only cancelled once every caller attached to it has left. A key is
+    forgotten as soon as its call finishes, so later calls run again (results
+    are not cached here).
+    """
+    
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is True if another caller started the call"""
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._forget(key, flight))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                # This caller was cancelled, not the shared call
+                flight.waiters -= 1
+                if flight.waiters == 0:
+                    flight.task.cancel()
+                    await asyncio.gather(flight.task, return_exceptions=True)
+            raise
+    
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,55 @@
+"""
+Subprocesses that are killed, with their children, when the awaiting task is cancelled.
+"""
+import asyncio
+import os
+import signal
+from typing import List, Tuple
+
+from ..core.config import settings
+
+
+async def run_process(cmd: List[str], kill_timeout: float = settings.ffmpeg.KILL_TIMEOUT) -> Tuple[int, bytes, bytes]:
+    """
+    Run a command and return ``(returncode, stdout, stderr)``.
+    
+    The child gets its own process group. If the calling task is cancelled
+    (job cancelled, client gone), the whole group is sent SIGTERM, then
+    SIGKILL after ``kill_timeout`` seconds, and reaped before the
+    cancellation propagates, so no encoder keeps running for nobody.
+    """
+    posix = hasattr(os, "killpg")
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.DEVNULL,  # Keep FFmpeg from reading the server's stdin
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=posix
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        await _terminate(process, posix, kill_timeout)
+        raise
+    return process.returncode, stdout, stderr
+
+
+async def _terminate(process: asyncio.subprocess.Process, posix: bool, kill_timeout: float):
+    """Stop a child (and its process group) and wait for it to exit"""
+    for sig, wait in ((signal.SIGTERM, kill_timeout), (getattr(signal, "SIGKILL", signal.SIGTERM), None)):
+        if process.returncode is not None:
+            return
+        try:
+            if posix:
+                os.killpg(process.pid, sig)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            return
+        try:
+            # Shielded: a second cancellation must not leave a zombie behind
+            await asyncio.wait_for(asyncio.shield(process.wait()), timeout=wait)
+            print(f"🛑 Stopped cancelled process {process.pid}")
+            return
+        except asyncio.TimeoutError:
+            continue
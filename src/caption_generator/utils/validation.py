@@ -1,7 +1,10 @@
 """
 Validation utilities for file size and format checking.
 """
+import re
 from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 from ..core.config import settings
 
@@ -16,3 +19,32 @@ def validate_video_format(filename: str) -> bool:
     supported_formats = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv'}
     extension = Path(filename).suffix.lower()
     return extension in supported_formats
+
+
+def normalize_language_code(language: Optional[str]) -> Optional[str]:
+    """Normalize an optional language code; raises ValueError if it is malformed"""
+    if language is None or not language.strip():
+        return None
+    language = language.strip().lower()
+    if not re.fullmatch(r"[a-z]{2,3}", language):
+        raise ValueError(f"Invalid language code: {language!r} (expected an ISO 639-1 code such as 'en')")
+    return language
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for recognizing repeated requests.
+    
+    Lower-cases the scheme and host, drops default ports and the fragment,
+    and sorts the query parameters; the path is kept as is (it is case
+    sensitive on most servers).
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    default_port = {"http": 80, "https": 443}.get(scheme)
+    netloc = host if parts.port in (None, default_port) else f"{host}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
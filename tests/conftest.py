@@ -0,0 +1,103 @@
+import asyncio
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.services.artifact_store import ArtifactIndex, ArtifactStore, LocalArtifactBackend
+from src.caption_generator.services.checkpoint_store import CheckpointStore
+from src.caption_generator.services.video_service import VideoProcessingService
+
+TRANSCRIPT = {
+    "language": "en",
+    "segments": [{"start": 0.2, "end": 1.5, "text": "Hello there", "words": []}],
+}
+
+
+class FakeWhisperX:
+    """Stands in for the WhisperX models: decodes silence and returns a fixed transcript, counting its calls"""
+
+    def __init__(self, transcript=TRANSCRIPT, delay: float = 0):
+        self.transcript = transcript
+        self.delay = delay
+        self.decodes = 0
+        self.transcriptions = 0
+        # Transcriptions wait for this event while it is set to one
+        self.block: Optional[asyncio.Event] = None
+
+    async def load_audio(self, path):
+        self.decodes += 1
+        return np.zeros(16000, dtype=np.float32)
+
+    async def transcribe_video(self, path, language=None, audio=None):
+        self.transcriptions += 1
+        await asyncio.sleep(self.delay)
+        if self.block is not None:
+            await self.block.wait()
+        return self.transcript
+
+
+@pytest.fixture
+def make_service(tmp_path):
+    """
+    Factory of services whose inputs, probe, models and encoder are fakes.
+
+    Temp files and artifacts live under ``tmp_path``; checkpoints too when
+    ``checkpoints`` is set, and the search index is off. Every ingest
+    writes the same bytes (``service.ingested`` lists the copies) and
+    every encode writes a fixed output (``service.encoded`` lists their
+    inputs). Services made by one test share ``tmp_path``, so a second
+    one sees what the first stored, as after a restart.
+    """
+    def make(
+        whisperx: Optional[FakeWhisperX] = None,
+        checkpoints: bool = False,
+        validator: Optional[str] = None,
+        block_encode: bool = False
+    ) -> VideoProcessingService:
+        service = VideoProcessingService()
+        service.file_manager.temp_dir = tmp_path
+        service.checkpoints = CheckpointStore(tmp_path / "jobs") if checkpoints else None
+        service.transcript_store = None
+        service.artifact_store = ArtifactStore(
+            LocalArtifactBackend(tmp_path / "artifacts"),
+            ArtifactIndex(tmp_path / "artifacts" / "index.sqlite3"),
+            ttl_seconds=600
+        )
+        service.whisperx = whisperx or FakeWhisperX()
+        service.whisperx_service.load_audio = service.whisperx.load_audio
+        service.whisperx_service.transcribe_video = service.whisperx.transcribe_video
+        service.ingested: List[Path] = []
+        service.encoded: List[Path] = []
+
+        async def ingest(file, url):
+            path = tmp_path / f"input_{len(service.ingested)}.mp4"
+            path.write_bytes(b"video bytes")
+            service.ingested.append(path)
+            return path
+
+        async def probe(path):
+            return None
+
+        async def encode(plan, video_path, srt_path, output_path):
+            service.encoded.append(video_path)
+            if block_encode:
+                await asyncio.Event().wait()
+            output_path.write_bytes(b"captioned")
+            return output_path
+
+        async def fetch_url_validator(url):
+            return validator
+
+        service._ingest_input = ingest
+        service._probe_input = probe
+        service.ffmpeg_service.encode = encode
+        service.file_manager.fetch_url_validator = fetch_url_validator
+        return service
+
+    return make
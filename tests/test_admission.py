@@ -0,0 +1,208 @@
+import asyncio
+import importlib
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.core.exceptions import RateLimitExceededError, ServerBusyError
+from src.caption_generator.models.probe import VideoProbe
+from src.caption_generator.services.admission import AdmissionController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def video(minutes, height=1080):
+    return VideoProbe(
+        fingerprint=f"{minutes}-{height}", duration=minutes * 60, size=1,
+        has_video=True, has_audio=True, width=height * 16 // 9, height=height
+    )
+
+
+def controller(clock=None, **kwargs):
+    options = dict(
+        # One second of work per second of 1080p media, scaled by pixel count
+        estimate_work=lambda probe: probe.duration * (probe.height / 1080) ** 2,
+        minutes_per_hour=600, burst_minutes=180,
+        capacity_seconds=3 * 7200, max_queue=4, queue_timeout=60,
+        enabled=True, clock=clock or FakeClock()
+    )
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def test_cost_follows_duration_and_resolution():
+    admission = controller()
+
+    assert admission.estimate(video(10)).audio_minutes == 10
+    assert admission.estimate(video(10, 2160)).work_seconds == 4 * admission.estimate(video(10)).work_seconds
+    assert admission.estimate(None).work_seconds == 0
+
+
+def test_bucket_throttles_in_audio_minutes_and_refills():
+    clock = FakeClock()
+    admission = controller(clock)
+
+    admission.charge("alice", admission.estimate(video(120)))
+    # 60 minutes left: a second 2-hour video has to wait for 60 more (6 minutes at 600/hour)
+    with pytest.raises(RateLimitExceededError) as error:
+        admission.charge("alice", admission.estimate(video(120)))
+    assert error.value.retry_after == pytest.approx(360)
+    admission.charge("alice", admission.estimate(video(45)))
+    admission.charge("bob", admission.estimate(video(120)))
+
+    clock.now += 400
+    admission.charge("alice", admission.estimate(video(60)))
+    assert admission.stats.rate_limited == 1
+
+
+def test_job_larger_than_the_bucket_runs_when_full_and_leaves_debt():
+    clock = FakeClock()
+    admission = controller(clock)
+
+    admission.charge("alice", admission.estimate(video(300)))
+    with pytest.raises(RateLimitExceededError) as error:
+        admission.charge("alice", admission.estimate(video(1)))
+    # 120 minutes of debt plus one minute, at 10 minutes per minute
+    assert error.value.retry_after == pytest.approx(121 * 6)
+
+
+def test_synthetic_flood_is_throttled_per_client_and_bounded_globally():
+    admission = controller()
+    outcomes = {"admitted": [], "rate_limited": 0, "busy": 0}
+    max_in_flight = 0
+
+    async def submit(client, minutes):
+        nonlocal max_in_flight
+        try:
+            ticket = await admission.admit(client, admission.estimate(video(minutes)))
+        except RateLimitExceededError:
+            outcomes["rate_limited"] += 1
+            return
+        except ServerBusyError:
+            outcomes["busy"] += 1
+            return
+        outcomes["admitted"].append(client)
+        max_in_flight = max(max_in_flight, admission.stats.in_flight_seconds)
+        await asyncio.sleep(0.01)
+        ticket.release()
+
+    async def flood():
+        # Ten greedy clients each post ten 2-hour videos at once, one client posts a short clip
+        requests = [submit(f"greedy-{c}", 120) for c in range(10) for _ in range(10)]
+        requests.append(submit("polite", 3))
+        await asyncio.gather(*requests)
+
+    asyncio.run(flood())
+
+    # Three 2-hour jobs fit at once and four can wait: seven clients get one video through
+    # and the other nine of theirs are throttled by their own bucket
+    assert sorted(outcomes["admitted"]) == [f"greedy-{c}" for c in range(7)]
+    assert outcomes["rate_limited"] == 7 * 9
+    # Later clients find the queue full; each rejection is refunded, so every one of
+    # their requests is turned away at capacity rather than charged
+    assert outcomes["busy"] == 3 * 10 + 1
+    assert max_in_flight <= admission.capacity_seconds
+    assert admission.stats.in_flight_seconds == 0 and admission.stats.queued == 0
+    for client in ("greedy-9", "polite"):
+        admission.charge(client, admission.estimate(video(120)))
+
+
+def test_queued_jobs_start_in_arrival_order_when_capacity_frees():
+    admission = controller(capacity_seconds=7200)
+    started = []
+
+    async def scenario():
+        first = await admission.acquire(admission.estimate(video(120)))
+
+        async def queued(name, minutes):
+            ticket = await admission.acquire(admission.estimate(video(minutes)))
+            started.append(name)
+            return ticket
+
+        waiting = [asyncio.create_task(queued(name, 60)) for name in ("a", "b", "c")]
+        await asyncio.sleep(0)
+        assert admission.stats.queued == 3
+        first.release()
+        tickets = await asyncio.gather(*waiting[:2])
+        # Two 1-hour jobs fill the capacity; the third waits for one of them
+        assert started == ["a", "b"]
+        tickets[0].release()
+        (await waiting[2]).release()
+        tickets[1].release()
+
+    asyncio.run(scenario())
+    assert started == ["a", "b", "c"]
+    assert admission.stats.in_flight_seconds == 0
+
+
+def test_oversized_job_runs_alone_and_waiting_times_out():
+    admission = controller(capacity_seconds=600, queue_timeout=0.05)
+
+    async def scenario():
+        ticket = await admission.acquire(admission.estimate(video(120)))
+        with pytest.raises(ServerBusyError):
+            await admission.acquire(admission.estimate(video(1)))
+        ticket.release()
+        ticket.release()
+        (await admission.acquire(admission.estimate(video(1)))).release()
+
+    asyncio.run(scenario())
+    assert admission.stats.rejected == 1
+    assert admission.stats.running == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    admission = controller(capacity_seconds=600)
+
+    async def scenario():
+        ticket = await admission.acquire(admission.estimate(video(10)))
+        waiter = asyncio.create_task(admission.acquire(admission.estimate(video(10))))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert admission.stats.queued == 0
+        ticket.release()
+
+    asyncio.run(scenario())
+    assert admission.stats.in_flight_seconds == 0
+
+
+def test_api_maps_rejections_and_identifies_clients(monkeypatch):
+    app_module = importlib.import_module("src.caption_generator.api.app")
+    clients = []
+
+    async def rejecting_process_video(**kwargs):
+        clients.append(kwargs["client"])
+        if len(clients) == 1:
+            raise RateLimitExceededError("Rate limit exceeded", retry_after=12.3)
+        raise ServerBusyError("Server is at capacity", retry_after=30)
+
+    monkeypatch.setattr(app_module.video_service, "process_video", rejecting_process_video)
+    client = TestClient(app_module.app)
+
+    response = client.post(
+        "/generate-captioned-video", data={"url": "https://example.com/a.mp4"},
+        headers={"X-API-Key": "secret"}
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "13"
+
+    response = client.post("/generate-captioned-video", data={"url": "https://example.com/a.mp4"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+
+    assert clients[0].startswith("key:") and "secret" not in clients[0]
+    assert clients[1].startswith("ip:")
+    assert client.get("/admission/stats").json()["enabled"] in (True, False)
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.services.artifact_store import (
+    ArtifactIndex,
+    ArtifactStore,
+    LocalArtifactBackend,
+    S3ArtifactBackend,
+    ShardedArtifactBackend,
+)
+from src.caption_generator.services.checkpoint_store import CheckpointStore
+from src.caption_generator.services.transcript_store import TranscriptStore
+
+
+class LocalS3StandIn:
+    """Directory-backed stand-in for a boto3 S3 client"""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, bucket, key):
+        return self.root / bucket / key
+
+    def upload_file(self, filename, bucket, key):
+        path = self._path(bucket, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(filename, path)
+
+    def download_file(self, bucket, key, filename):
+        path = self._path(bucket, key)
+        if not path.exists():
+            raise FileNotFoundError(key)
+        shutil.copyfile(path, filename)
+
+    def delete_object(self, Bucket, Key):
+        self._path(Bucket, Key).unlink(missing_ok=True)
+
+
+def make_backend(kind, tmp_path):
+    if kind == "local":
+        return LocalArtifactBackend(tmp_path / "store")
+    if kind == "sharded":
+        return ShardedArtifactBackend(tmp_path / "store")
+    return S3ArtifactBackend(
+        LocalS3StandIn(tmp_path / "s3"),
+        bucket="captions",
+        prefix="artifacts/",
+        cache_dir=tmp_path / "cache"
+    )
+
+
+def make_output(tmp_path, content=b"captioned video bytes"):
+    path = tmp_path / "output.mp4"
+    path.write_bytes(content)
+    return path
+
+
+@pytest.mark.parametrize("kind", ["local", "sharded", "s3"])
+class TestArtifactStore:
+    def test_put_resolve_delete(self, kind, tmp_path):
+        store = ArtifactStore(make_backend(kind, tmp_path), ArtifactIndex(tmp_path / "index.db"))
+        source = make_output(tmp_path)
+
+        record = store.put(source, "captioned_test.mp4")
+
+        assert not source.exists()  # moved into the store
+        assert len(record.key) == 32  # full UUID, not a truncated prefix
+        assert record.backend == kind
+        assert record.sha256 == hashlib.sha256(b"captioned video bytes").hexdigest()
+        assert store.resolve("captioned_test.mp4").read_bytes() == b"captioned video bytes"
+
+        assert store.delete("captioned_test.mp4")
+        assert store.get("captioned_test.mp4") is None
+        assert store.resolve("captioned_test.mp4") is None
+
+    def test_janitor_expires_artifacts(self, kind, tmp_path):
+        store = ArtifactStore(
+            make_backend(kind, tmp_path),
+            ArtifactIndex(tmp_path / "index.db"),
+            ttl_seconds=60
+        )
+        record = store.put(make_output(tmp_path), "captioned_old.mp4")
+        store.put(make_output(tmp_path), "captioned_forever.mp4", ttl_seconds=0)
+
+        assert store.expire(now=record.created_at + 30) == 0
+        assert store.expire(now=record.created_at + 61) == 1
+        assert store.index.get_by_filename("captioned_old.mp4") is None
+        assert store.resolve("captioned_forever.mp4") is not None
+
+
+def test_index_survives_restart(tmp_path):
+    """Expiry is driven by the persistent index, not by the process that stored it"""
+    backend = LocalArtifactBackend(tmp_path / "store")
+    store = ArtifactStore(backend, ArtifactIndex(tmp_path / "index.db"), ttl_seconds=60)
+    record = store.put(make_output(tmp_path), "captioned_restart.mp4")
+    store.index.close()
+
+    restarted = ArtifactStore(backend, ArtifactIndex(tmp_path / "index.db"), ttl_seconds=60)
+    assert restarted.resolve("captioned_restart.mp4") is not None
+    assert restarted.expire(now=record.expires_at) == 1
+    assert not (tmp_path / "store" / record.key).exists()
+
+
+def test_transcripts_are_cached_by_content_and_language(tmp_path):
+    backend = LocalArtifactBackend(tmp_path / "store")
+    store = ArtifactStore(backend, ArtifactIndex(tmp_path / "index.db"), ttl_seconds=60)
+    segments = [{"start": 0.5, "end": 1.5, "text": "Hello"}]
+
+    # WhisperX results carry NumPy values
+    store.cache_transcript("abc", None, {"language": "en", "segments": [dict(segments[0], start=np.float32(0.5))]})
+
+    assert store.find_transcript("abc", None) == {"language": "en", "segments": segments}
+    # A forced language or other content is transcribed again
+    assert store.find_transcript("abc", "de") is None
+    assert store.find_transcript("abd", None) is None
+    store.expire(now=time.time() + 61)
+    assert store.index.get_transcript("abc", "", now=0) is None
+
+
+def test_sharded_layout(tmp_path):
+    backend = ShardedArtifactBackend(tmp_path / "store", depth=2)
+    store = ArtifactStore(backend, ArtifactIndex(tmp_path / "index.db"))
+    record = store.put(make_output(tmp_path), "captioned_sharded.mp4")
+
+    path = store.resolve("captioned_sharded.mp4")
+    assert path == tmp_path / "store" / record.key[:2] / record.key[2:4] / record.key
+
+    store.delete("captioned_sharded.mp4")
+    assert list((tmp_path / "store").iterdir()) == []
+
+
+def test_s3_fetch_runs_in_a_worker_thread(tmp_path):
+    client = LocalS3StandIn(tmp_path / "s3")
+    downloads = []
+    download_file = client.download_file
+    client.download_file = lambda *args: downloads.append(threading.current_thread()) or download_file(*args)
+    backend = S3ArtifactBackend(client, bucket="captions", prefix="", cache_dir=tmp_path / "cache")
+    store = ArtifactStore(backend, ArtifactIndex(tmp_path / "index.db"))
+    store.put(make_output(tmp_path), "captioned_remote.mp4")
+
+    path = asyncio.run(store.resolve_async("captioned_remote.mp4"))
+
+    assert path.read_bytes() == b"captioned video bytes"
+    assert downloads and downloads[0] is not threading.main_thread()
+    assert asyncio.run(store.resolve_async("captioned_missing.mp4")) is None
+
+
+def test_concurrent_s3_fetches_of_one_key_do_not_share_a_partial_file(tmp_path):
+    client = LocalS3StandIn(tmp_path / "s3")
+    client.upload_file(str(make_output(tmp_path)), "captions", "captioned_remote.mp4")
+    both_writing = threading.Barrier(2, timeout=5)
+
+    def download_file(bucket, key, filename):
+        # Each fetch is halfway through its file when the other one starts
+        body = client._path(bucket, key).read_bytes()
+        with open(filename, "wb") as f:
+            f.write(body[:5])
+            f.flush()
+            both_writing.wait()
+            f.write(body[5:])
+
+    client.download_file = download_file
+    backend = S3ArtifactBackend(client, bucket="captions", prefix="", cache_dir=tmp_path / "cache")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        paths = list(pool.map(backend.local_path, ["captioned_remote.mp4"] * 2))
+
+    assert [path.read_bytes() for path in paths] == [b"captioned video bytes"] * 2
+    assert [path.name for path in (tmp_path / "cache").iterdir()] == ["captioned_remote.mp4"]
+
+
+def test_stores_touch_the_disk_only_when_used(tmp_path):
+    state = tmp_path / "state"
+    store = ArtifactStore(LocalArtifactBackend(state / "artifacts"), ArtifactIndex(state / "index.db"))
+    transcripts = TranscriptStore(state / "search" / "transcripts.db")
+    checkpoints = CheckpointStore(state / "jobs")
+    S3ArtifactBackend(LocalS3StandIn(tmp_path / "s3"), bucket="captions", prefix="", cache_dir=state / "cache")
+
+    assert not state.exists()
+    assert checkpoints.incomplete() == []
+
+    assert store.get("captioned_missing.mp4") is None
+    assert transcripts.video_count() == 0
+    assert (state / "index.db").exists() and (state / "search" / "transcripts.db").exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
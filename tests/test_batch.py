@@ -0,0 +1,88 @@
+import asyncio
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.core.config import settings
+from src.caption_generator.models.job import JobStatus
+from src.caption_generator.services.job_service import JobManager
+from src.caption_generator.services.whisperx_service import SAMPLE_RATE, WhisperXService
+
+
+class FakePipeline:
+    """Stands in for the WhisperX pipeline; records every batched call"""
+
+    def __init__(self, languages):
+        self.languages = languages
+        self.tokenizer = None
+        self.model = types.SimpleNamespace(
+            hf_tokenizer=None,
+            model=types.SimpleNamespace(is_multilingual=True)
+        )
+        self.calls = []
+
+    def detect_language(self, audio):
+        return self.languages[int(audio[0])]
+
+    def __call__(self, inputs, batch_size):
+        chunks = list(inputs)
+        self.calls.append((self.tokenizer.language, len(chunks)))
+        return [{"text": f"clip {int(chunk['inputs'][0])}"} for chunk in chunks]
+
+
+@pytest.fixture
+def fake_tokenizer(monkeypatch):
+    module = types.ModuleType("faster_whisper.tokenizer")
+    module.Tokenizer = lambda hf, multilingual, task, language: types.SimpleNamespace(language=language)
+    package = types.ModuleType("faster_whisper")
+    package.tokenizer = module
+    monkeypatch.setitem(sys.modules, "faster_whisper", package)
+    monkeypatch.setitem(sys.modules, "faster_whisper.tokenizer", module)
+
+
+def test_windows_from_many_clips_share_model_passes(fake_tokenizer, monkeypatch):
+    monkeypatch.setattr(settings.whisperx, "MICRO_BATCH_MAX_WAIT_MS", 50)
+    service = WhisperXService()
+    service.model = FakePipeline(languages={0: "en", 1: "en", 2: "de"})
+    # Each clip's samples carry its index so outputs can be traced back
+    service._load_audio = lambda path: np.full(SAMPLE_RATE * 10, int(path.stem), dtype=np.float32)
+    service._speech_windows = lambda audio: [{"start": 0.0, "end": 4.0}, {"start": 5.0, "end": 9.5}]
+    service._get_align_model = lambda language: None
+    service._align = lambda result, audio, align_model: result
+
+    results = asyncio.run(service.transcribe_batch([Path(f"{i}.mp4") for i in range(3)]))
+
+    # One pipeline call per language, not per clip
+    assert sorted(service.model.calls) == [("de", 2), ("en", 4)]
+    assert service.model.tokenizer is None
+    for index in range(3):
+        assert [s["text"] for s in results[index]["segments"]] == [f"clip {index}"] * 2
+        assert results[index]["segments"][1]["start"] == 5.0
+    assert results[2]["language"] == "de"
+
+
+def test_group_reports_per_item_status():
+    group = JobManager().create_group(["a.mp4", "https://example.com/b.mp4", "c.mp4"])
+    assert group.to_response().status == JobStatus.QUEUED
+
+    group.mark_item_completed(0, "/download/captioned_a.mp4", "en")
+    group.mark_item_failed(1, "404 Not Found")
+    response = group.to_response()
+    assert response.status == JobStatus.PROCESSING
+    assert (response.completed, response.failed, response.total) == (1, 1, 3)
+
+    group.mark_item_completed(2, "/download/captioned_c.mp4", "en")
+    response = group.to_response()
+    assert response.status == JobStatus.COMPLETED
+    assert response.items[1].error == "404 Not Found"
+    assert response.items[2].video_url == "/download/captioned_c.mp4"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
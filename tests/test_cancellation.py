@@ -0,0 +1,203 @@
+import asyncio
+import importlib
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.core.config import settings
+from src.caption_generator.models.job import JobStatus
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+from src.caption_generator.utils import subprocess_runner
+from src.caption_generator.utils.subprocess_runner import run_process
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "killpg"), reason="Process groups need POSIX")
+
+needs_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="FFmpeg/FFprobe not installed"
+)
+
+
+def is_running(pid):
+    """Whether a process exists and is not a zombie waiting to be reaped"""
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+@pytest.fixture
+def spawned(monkeypatch):
+    """PIDs of the processes started through run_process"""
+    pids = []
+    create = asyncio.create_subprocess_exec
+
+    async def recording_create(*args, **kwargs):
+        process = await create(*args, **kwargs)
+        pids.append(process.pid)
+        return process
+
+    monkeypatch.setattr(subprocess_runner.asyncio, "create_subprocess_exec", recording_create)
+    return pids
+
+
+async def cancel_after(coro, delay):
+    task = asyncio.ensure_future(coro)
+    await asyncio.sleep(delay)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+def test_cancelling_kills_the_whole_process_group(tmp_path, spawned):
+    child_pid_file = tmp_path / "child.pid"
+    # The shell forks a grandchild, as FFmpeg filter helpers or wrappers may
+    command = ["sh", "-c", f"sleep 30 & echo $! > {child_pid_file}; wait"]
+
+    async def scenario():
+        await cancel_after(run_process(command, kill_timeout=1), 0.3)
+
+    asyncio.run(scenario())
+    grandchild = int(child_pid_file.read_text())
+    assert not is_running(spawned[0])
+    assert not is_running(grandchild)
+
+
+def test_process_ignoring_sigterm_is_killed(spawned):
+    command = ["sh", "-c", "trap '' TERM; sleep 30 & wait; sleep 30"]
+
+    async def scenario():
+        started = asyncio.get_running_loop().time()
+        await cancel_after(run_process(command, kill_timeout=0.2), 0.3)
+        return asyncio.get_running_loop().time() - started
+
+    assert asyncio.run(scenario()) < 5
+    assert not is_running(spawned[0])
+
+
+def test_finished_process_returns_its_output():
+    returncode, stdout, _ = asyncio.run(run_process(["sh", "-c", "echo hello; exit 3"]))
+    assert returncode == 3
+    assert stdout == b"hello\n"
+
+
+@needs_ffmpeg
+def test_cancelled_encode_stops_ffmpeg_and_leaves_no_process(tmp_path, spawned):
+    output = tmp_path / "endless.mp4"
+    command = [
+        "ffmpeg", "-y", "-re", "-f", "lavfi", "-i", "testsrc=size=320x240:rate=25",
+        "-c:v", "libx264", "-preset", "ultrafast", str(output)
+    ]
+
+    async def scenario():
+        await cancel_after(FFmpegService()._run_ffmpeg(command), 1.0)
+
+    asyncio.run(scenario())
+    assert spawned and not is_running(spawned[0])
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after):
+        self.polls = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self):
+        self.polls += 1
+        return self.polls >= self.disconnect_after
+
+
+def test_disconnected_client_cancels_its_work(monkeypatch):
+    app_module = importlib.import_module("src.caption_generator.api.app")
+    monkeypatch.setattr(settings.app, "DISCONNECT_POLL_INTERVAL", 0.01)
+    events = []
+
+    async def work():
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            events.append("cleaned up")
+            raise
+
+    async def scenario():
+        with pytest.raises(HTTPException) as error:
+            await app_module.run_until_disconnected(FakeRequest(disconnect_after=3), work())
+        return error.value.status_code
+
+    assert asyncio.run(scenario()) == 499
+    assert events == ["cleaned up"]
+
+
+def test_connected_client_gets_the_result(monkeypatch):
+    app_module = importlib.import_module("src.caption_generator.api.app")
+    monkeypatch.setattr(settings.app, "DISCONNECT_POLL_INTERVAL", 0.01)
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    request = FakeRequest(disconnect_after=1000)
+    assert asyncio.run(app_module.run_until_disconnected(request, work())) == "done"
+    assert request.polls >= 1
+
+
+def test_cancel_job_stops_its_task_and_marks_it_cancelled():
+    app_module = importlib.import_module("src.caption_generator.api.app")
+    service = app_module.video_service
+
+    async def scenario():
+        job = service.job_manager.create_job()
+
+        async def run():
+            job.set_status(JobStatus.PROCESSING, "Burning subtitles")
+            try:
+                await run_process(["sleep", "30"])
+            except asyncio.CancelledError:
+                job.mark_cancelled()
+                raise
+
+        job.task = asyncio.create_task(run())
+        await asyncio.sleep(0.2)
+        await service.cancel_job(job)
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.task.cancelled()
+    assert job.status == JobStatus.CANCELLED
+    assert job.is_finished
+
+
+def test_delete_endpoint_rejects_unknown_and_finished_jobs():
+    app_module = importlib.import_module("src.caption_generator.api.app")
+    client = TestClient(app_module.app)
+    assert client.delete("/jobs/missing").status_code == 404
+    assert client.delete("/batch/missing").status_code == 404
+
+    job = app_module.video_service.job_manager.create_job()
+    # Never started: cancelling it only records the new state
+    response = client.delete(f"/jobs/{job.job_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert client.delete(f"/jobs/{job.job_id}").status_code == 409
+
+    group = app_module.video_service.job_manager.create_group(["a.mp4", "b.mp4"])
+    group.mark_item_failed(0, "bad input")
+    response = client.delete(f"/batch/{group.group_id}")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "cancelled"
+    assert [item["status"] for item in body["items"]] == ["failed", "cancelled"]
@@ -0,0 +1,116 @@
+from pathlib import Path
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.utils.caption_segmenter import CaptionSegmenter, TimedWord, words_from_segments
+
+
+def speech(text, start=0.0, word_seconds=0.3, gap=0.05, pauses=None):
+    """Evenly timed words; ``pauses`` maps a word index to the silence before it"""
+    words = []
+    t = start
+    for index, word in enumerate(text.split()):
+        t += (pauses or {}).get(index, 0.0)
+        words.append(TimedWord(word, round(t, 3), round(t + word_seconds, 3)))
+        t += word_seconds + gap
+    return words
+
+
+def texts(captions):
+    return [caption.text for caption in captions]
+
+
+def test_breaks_at_sentence_ends_and_pauses_rather_than_word_counts():
+    segmenter = CaptionSegmenter(target_words=7, min_words=5)
+    words = speech(
+        "I went home. Then we talked about the weather for a while and then she left",
+        pauses={3: 0.5, 9: 0.7}
+    )
+
+    captions = segmenter.segment(words)
+
+    assert texts(captions) == ["I went home.", "Then we talked about the weather", "for a while and then she left"]
+
+
+def test_captions_stay_up_long_enough_to_read_without_overlapping():
+    segmenter = CaptionSegmenter(min_duration=1.0, max_cps=15, max_lines=1, max_chars_per_line=40)
+    words = speech("Wait for me.", word_seconds=0.2)
+    words += speech("Extraordinarily complicated sentence.", start=0.9, word_seconds=0.2)
+    words += speech("Later.", start=10.0, word_seconds=0.2)
+
+    first, second, last = segmenter.segment(words)
+
+    # Extended into the pause, but only up to the next caption
+    assert (first.start, first.end) == (0.0, 0.9)
+    # 37 characters at 15 cps need 2.47s on screen, more than the speech itself takes
+    assert second.end == round(0.9 + 37 / 15, 3)
+    assert (last.start, last.end) == (10.0, 11.0)
+
+
+def test_long_captions_wrap_into_two_balanced_lines():
+    segmenter = CaptionSegmenter(target_words=13, max_chars_per_line=40, max_duration=10, max_cps=30)
+    words = speech("these thirteen words are spoken quickly enough to fit in a single caption", word_seconds=0.2)
+
+    [caption] = segmenter.segment(words)
+
+    first, second = caption.text.split("\n")
+    assert len(first) <= 40 and len(second) <= 40
+    assert abs(len(first) - len(second)) <= 6
+    assert len(caption.words) == 13
+
+
+def test_hard_limits_split_captions():
+    segmenter = CaptionSegmenter(target_words=20, max_lines=1, max_chars_per_line=20, max_duration=2.0)
+
+    captions = segmenter.segment(speech("one two three four five six seven eight nine ten"))
+
+    assert all(len(caption.text) <= 20 and "\n" not in caption.text for caption in captions)
+    assert all(caption.words[-1].end - caption.start <= 2.0 for caption in captions)
+    assert " ".join(texts(captions)) == "one two three four five six seven eight nine ten"
+
+    # A long silence always ends a caption
+    paused = segmenter.segment(speech("yes no", pauses={1: 1.6}))
+    assert texts(paused) == ["yes", "no"]
+
+
+def test_a_word_too_long_for_a_line_gets_a_line_of_its_own():
+    segmenter = CaptionSegmenter(max_chars_per_line=10)
+
+    captions = segmenter.segment(speech("a supercalifragilistic word"))
+
+    lines = [line for caption in captions for line in caption.text.split("\n")]
+    assert lines == ["a", "supercalifragilistic", "word"]
+
+
+def test_word_stream_keeps_untimed_words_and_interpolates_plain_segments():
+    segments = [
+        {"start": 0.0, "end": 1.0, "text": "It costs 20 euros", "words": [
+            {"word": "It", "start": 0.0, "end": 0.2},
+            {"word": "costs", "start": 0.3, "end": 0.5},
+            {"word": "20"},
+            {"word": "euros", "start": 0.7, "end": 1.0},
+        ]},
+        {"start": 3.0, "end": 4.0, "text": "no word timings"},
+    ]
+
+    words = words_from_segments(segments)
+
+    assert [word.text for word in words] == ["It", "costs", "20", "euros", "no", "word", "timings"]
+    assert (words[2].start, words[2].end) == (0.5, 0.5)
+    assert words[5].start == 3.0 + 1 / 3 and not words[5].aligned
+
+    captions = CaptionSegmenter().segment(words)
+    assert texts(captions) == ["It costs 20 euros", "no word timings"]
+    assert len(captions[0].words) == 4 and captions[1].words is None
+
+
+def test_out_of_order_timings_are_clamped():
+    words = words_from_segments([{"words": [
+        {"word": "a", "start": 1.0, "end": 1.4},
+        {"word": "b", "start": 0.9, "end": 1.2},
+    ]}])
+
+    assert [(word.start, word.end) for word in words] == [(1.0, 1.4), (1.0, 1.4)]
+    assert CaptionSegmenter().segment([]) == []
@@ -0,0 +1,115 @@
+import importlib
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.models.subtitle import TranscriptSegment
+from src.caption_generator.utils.caption_timeline import CaptionTimeline
+
+
+def caption(start, end, text):
+    return TranscriptSegment(start=start, end=end, text=text)
+
+
+@pytest.fixture
+def timeline():
+    return CaptionTimeline([
+        caption(4.0, 6.0, "Welcome back to the show."),
+        caption(0.5, 3.0, "Hello, everyone!"),
+        caption(6.5, 9.0, "Today we talk about the show's history"),
+        # Overlaps the previous caption (e.g. a second speaker)
+        caption(7.0, 12.0, "Great to be back"),
+    ])
+
+
+def texts(captions):
+    return [c.text for c in captions]
+
+
+def test_captions_are_ordered_by_start(timeline):
+    assert [c.start for c in timeline] == [0.5, 4.0, 6.5, 7.0]
+    assert timeline.duration == 12.0
+
+
+def test_at_returns_captions_on_screen(timeline):
+    assert texts(timeline.at(1.0)) == ["Hello, everyone!"]
+    assert timeline.at(3.5) == []
+    assert texts(timeline.at(8.0)) == ["Today we talk about the show's history", "Great to be back"]
+    # End is exclusive, start inclusive
+    assert texts(timeline.at(6.0)) == []
+    assert texts(timeline.at(4.0)) == ["Welcome back to the show."]
+
+
+def test_window_includes_partially_visible_captions(timeline):
+    assert texts(timeline.window(2.5, 4.5)) == ["Hello, everyone!", "Welcome back to the show."]
+    assert texts(timeline.window(10.0, 20.0)) == ["Great to be back"]
+    assert timeline.window(20.0, 30.0) == []
+
+
+def test_search_matches_words_and_phrases(timeline):
+    assert texts(timeline.search("BACK")) == ["Welcome back to the show.", "Great to be back"]
+    assert texts(timeline.search("hello everyone")) == ["Hello, everyone!"]
+    assert texts(timeline.search("show's")) == ["Today we talk about the show's history"]
+    # Both words occur, but not as a phrase
+    assert timeline.search("back welcome") == []
+    assert timeline.search("?!") == []
+
+
+def test_extract_clips_and_rebases(timeline):
+    clip = timeline.extract(5.0, 8.0)
+
+    assert [(c.start, c.end, c.text) for c in clip] == [
+        (0.0, 1.0, "Welcome back to the show."),
+        (1.5, 3.0, "Today we talk about the show's history"),
+        (2.0, 3.0, "Great to be back"),
+    ]
+
+
+def test_binary_round_trip(timeline):
+    data = timeline.to_bytes()
+    restored = CaptionTimeline.from_bytes(data)
+
+    assert list(restored) == list(timeline)
+    assert texts(restored.search("history")) == ["Today we talk about the show's history"]
+    with pytest.raises(ValueError):
+        CaptionTimeline.from_bytes(data[:20])
+    with pytest.raises(ValueError):
+        CaptionTimeline.from_bytes(b"not a timeline")
+
+
+def test_lookups_stay_fast_on_long_timelines():
+    long = CaptionTimeline([caption(i * 2.0, i * 2.0 + 1.5, f"line {i}") for i in range(100_000)])
+
+    start = time.perf_counter()
+    for i in range(1000):
+        assert len(long.at(i * 150.0 + 0.5)) == 1
+    assert time.perf_counter() - start < 0.5
+    assert len(long.window(1000.0, 1010.0)) == 5
+
+
+def test_job_captions_endpoint(timeline):
+    app_module = importlib.import_module("src.caption_generator.api.app")
+    client = TestClient(app_module.app)
+    job = app_module.video_service.job_manager.create_job()
+
+    assert client.get(f"/jobs/{job.job_id}/captions").status_code == 409
+
+    job.timeline = timeline
+    response = client.get(f"/jobs/{job.job_id}/captions", params={"start": 5, "end": 7})
+    assert response.status_code == 200
+    assert response.json()["total"] == 4
+    assert texts(TranscriptSegment(**c) for c in response.json()["captions"]) == [
+        "Welcome back to the show.", "Today we talk about the show's history"
+    ]
+
+    response = client.get(f"/jobs/{job.job_id}/captions", params={"q": "back", "end": 6.5})
+    assert [c["text"] for c in response.json()["captions"]] == ["Welcome back to the show."]
+
+    binary = client.get(f"/jobs/{job.job_id}/captions", params={"format": "binary"})
+    assert list(CaptionTimeline.from_bytes(binary.content)) == list(timeline)
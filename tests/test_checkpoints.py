@@ -0,0 +1,148 @@
+import asyncio
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.core.config import settings
+from src.caption_generator.models.encode import OutputType
+from src.caption_generator.models.job import JobStatus
+from src.caption_generator.services.checkpoint_store import CheckpointStore
+
+
+def test_stage_results_round_trip(tmp_path):
+    store = CheckpointStore(tmp_path / "jobs")
+    checkpoint = store.create("video", {"font_size": 30, "url": "https://example.com/a.mp4"})
+    source = tmp_path / "input.mp4"
+    source.write_bytes(b"video bytes")
+
+    saved = checkpoint.save_file("ingest", source)
+    # Samples decoded from 16-bit PCM, as WhisperX produces them
+    audio = (np.arange(-32768, 32768, 7, dtype=np.int16) / 32768.0).astype(np.float32)
+    checkpoint.save_audio("audio", audio)
+    checkpoint.save_json("transcript", {"language": "en", "score": np.float32(0.5), "ids": np.arange(3)})
+
+    [reloaded] = store.incomplete()
+    assert reloaded.job_id == checkpoint.job_id
+    assert reloaded.params["font_size"] == 30
+    assert list(reloaded.manifest.stages) == ["ingest", "audio", "transcript"]
+    assert reloaded.path("ingest") == saved and saved.read_bytes() == b"video bytes"
+    assert np.array_equal(reloaded.load_audio("audio"), audio)
+    assert reloaded.load_json("transcript") == {"language": "en", "score": 0.5, "ids": [0, 1, 2]}
+    assert reloaded.load_json("subtitles") is None
+
+    store.discard(reloaded)
+    assert store.incomplete() == []
+
+
+def test_unreadable_manifest_is_discarded(tmp_path):
+    store = CheckpointStore(tmp_path / "jobs")
+    broken = tmp_path / "jobs" / "broken"
+    broken.mkdir(parents=True)
+    (broken / "manifest.json").write_text("{not json")
+
+    assert store.incomplete() == []
+    assert not broken.exists()
+
+
+async def interrupt(service, coro, when):
+    """Run a request until ``when()`` holds, then stop it the way a shutdown does"""
+    task = asyncio.ensure_future(coro)
+    while not when():
+        await asyncio.sleep(0.01)
+    service.prepare_shutdown()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def test_restart_during_encode_resumes_without_transcribing_again(make_service):
+    first = make_service(checkpoints=True, block_encode=True)
+
+    async def crash():
+        await interrupt(
+            first,
+            first.process_video(url="https://example.com/a.mp4", output_type=OutputType.SOFT),
+            when=lambda: first.encoded
+        )
+
+    asyncio.run(crash())
+    [checkpoint] = first.checkpoints.incomplete()
+    assert set(checkpoint.manifest.stages) == {"ingest", "audio", "transcript"}
+    saved_input = checkpoint.path("ingest")
+
+    whisperx = first.whisperx
+    second = make_service(whisperx=whisperx, checkpoints=True)
+
+    async def restart():
+        [job] = second.resume_incomplete_jobs()
+        await job.task
+        return job
+
+    job = asyncio.run(restart())
+    assert job.job_id == checkpoint.job_id
+    assert job.status == JobStatus.COMPLETED
+    assert job.language == "en"
+    assert second.artifact_store.resolve(job.video.url.rsplit("/", 1)[1]).read_bytes() == b"captioned"
+    # Only the encode ran again, from the checkpointed input
+    assert (whisperx.decodes, whisperx.transcriptions, len(second.ingested)) == (1, 1, 0)
+    assert second.encoded == [saved_input]
+    # A finished job leaves no checkpoint behind
+    assert second.checkpoints.incomplete() == []
+
+
+def test_restart_during_transcription_reuses_the_decoded_audio(make_service):
+    first = make_service(checkpoints=True)
+    whisperx = first.whisperx
+    whisperx.block = asyncio.Event()
+
+    async def crash():
+        await interrupt(
+            first,
+            first.process_video(url="https://example.com/a.mp4", output_type=OutputType.SOFT),
+            when=lambda: whisperx.transcriptions
+        )
+
+    asyncio.run(crash())
+    whisperx.block = None
+    second = make_service(whisperx=whisperx, checkpoints=True)
+
+    async def restart():
+        [job] = second.resume_incomplete_jobs()
+        await job.task
+        return job
+
+    assert asyncio.run(restart()).status == JobStatus.COMPLETED
+    assert (whisperx.decodes, whisperx.transcriptions) == (1, 2)
+
+
+def test_cancelled_job_does_not_resume(make_service):
+    service = make_service(checkpoints=True)
+    whisperx = service.whisperx
+    whisperx.block = asyncio.Event()
+
+    async def cancel():
+        task = asyncio.ensure_future(service.process_video(url="https://example.com/a.mp4"))
+        while not whisperx.transcriptions:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(cancel())
+    assert service.checkpoints.incomplete() == []
+
+
+def test_unrecoverable_checkpoints_are_dropped(make_service, monkeypatch):
+    monkeypatch.setattr(settings.storage, "CHECKPOINT_MAX_RESUMES", 2)
+    service = make_service(checkpoints=True)
+    # An upload interrupted before it was saved
+    service.checkpoints.create("video", {"url": None, "upload": "clip.mp4"})
+    # A job that crashed the server on every resume
+    crashing = service.checkpoints.create("video", {"url": "https://example.com/a.mp4"})
+    crashing.record_attempt()
+    crashing.record_attempt()
+
+    assert service.resume_incomplete_jobs() == []
+    assert service.checkpoints.incomplete() == []
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.models.encode import OutputType
+from src.caption_generator.services.artifact_store import ArtifactIndex, ArtifactStore, LocalArtifactBackend
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+
+needs_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="FFmpeg/FFprobe not installed"
+)
+
+
+def make_clip(path: Path) -> Path:
+    subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=size=320x240:rate=25:duration=2",
+        "-f", "lavfi", "-i", "sine=frequency=440:duration=2",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", str(path)
+    ], check=True)
+    return path
+
+
+def stream_types(path: Path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_streams", str(path)],
+        capture_output=True, check=True
+    )
+    return sorted(stream["codec_type"] for stream in json.loads(result.stdout)["streams"])
+
+
+def make_store(tmp_path: Path) -> ArtifactStore:
+    return ArtifactStore(
+        LocalArtifactBackend(tmp_path / "artifacts"),
+        ArtifactIndex(tmp_path / "artifacts" / "index.sqlite3"),
+        ttl_seconds=600
+    )
+
+
+def test_only_burned_outputs_re_encode_video():
+    service = FFmpegService()
+
+    burn = service.plan_encode(OutputType.BURN)
+    soft = service.plan_encode(OutputType.SOFT)
+    audio = service.plan_encode(OutputType.AUDIO, copy_audio=False)
+
+    assert burn.video_codec == "libx264" and burn.subtitle_codec is None
+    assert (soft.video_codec, soft.audio_codec, soft.subtitle_codec) == ("copy", "copy", "mov_text")
+    assert audio.video_codec is None and audio.audio_codec == "aac"
+    assert (audio.extension, audio.content_type) == (".m4a", "audio/mp4")
+    assert burn.uses_style and not soft.uses_style
+
+
+def test_output_cache_survives_until_artifact_is_deleted(tmp_path):
+    store = make_store(tmp_path)
+    source = tmp_path / "out.mp4"
+    source.write_bytes(b"captioned")
+
+    record = store.put(source, "captioned_x.mp4", cache_key="abc")
+
+    assert store.find_cached("abc").filename == "captioned_x.mp4"
+    assert store.find_cached("other") is None
+    store.delete(record.filename)
+    assert store.find_cached("abc") is None
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("output_type, expected", [
+    (OutputType.SOFT, ["audio", "subtitle", "video"]),
+    (OutputType.AUDIO, ["audio", "subtitle"]),
+])
+def test_mux_outputs_carry_a_subtitle_track(tmp_path, output_type, expected):
+    service = FFmpegService()
+    clip = make_clip(tmp_path / "clip.mp4")
+    srt = tmp_path / "captions.srt"
+    srt.write_text("1\n00:00:00,200 --> 00:00:01,500\nHello there\n")
+    plan = service.plan_encode(output_type)
+
+    output = asyncio.run(service.encode(plan, clip, srt, tmp_path / f"out{plan.extension}"))
+
+    assert stream_types(output) == expected
+
+
+@needs_ffmpeg
+def test_identical_request_reuses_stored_output(make_service, tmp_path):
+    service = make_service()
+    clip = make_clip(tmp_path / "clip.mp4")
+    encodes = []
+    uploads = []
+
+    async def ingest(file, url):
+        # Each request uploads its own copy of the same video
+        copy = tmp_path / f"upload_{len(uploads)}.mp4"
+        shutil.copyfile(clip, copy)
+        uploads.append(copy)
+        return copy
+
+    real_encode = FFmpegService().encode
+
+    async def counting_encode(plan, **kwargs):
+        encodes.append(plan.output_type)
+        return await real_encode(plan, **kwargs)
+
+    service._ingest_input = ingest
+    service.ffmpeg_service.encode = counting_encode
+
+    async def run():
+        first = await service.process_video(url="x", output_type=OutputType.SOFT)
+        second = await service.process_video(url="x", output_type=OutputType.SOFT)
+        restyled = await service.process_video(url="x", output_type=OutputType.SOFT, font_size=40)
+        return first, second, restyled
+
+    first, second, restyled = asyncio.run(run())
+
+    assert not first.cached
+    assert second.cached and second.video_url == first.video_url
+    # Style does not change a soft-subtitle output
+    assert restyled.cached
+    assert encodes == [OutputType.SOFT]
+    # The repeats reuse the cached transcript, so WhisperX ran once
+    assert service.whisperx.transcriptions == 1
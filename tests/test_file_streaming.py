@@ -0,0 +1,74 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.core.exceptions import VideoProcessingError
+from src.caption_generator.utils.file_streaming import WriteStatus, tail_file
+
+
+async def write_slowly(path: Path, status: WriteStatus, parts, fail: bool = False):
+    """Append ``parts`` to a file one at a time, then finish it"""
+    await asyncio.sleep(0.05)
+    for part in parts:
+        with open(path, "ab") as f:
+            f.write(part)
+        await asyncio.sleep(0.05)
+    status.finish(failed=fail)
+
+
+async def read_all(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+def tail(path: Path, status: WriteStatus):
+    return tail_file(
+        path,
+        is_complete=lambda: status.complete,
+        chunk_size=4,
+        poll_interval=0.01,
+        has_failed=lambda: status.failed
+    )
+
+
+def test_tail_follows_the_file_until_the_writer_finishes(tmp_path):
+    path = tmp_path / "growing.mp4"
+    status = WriteStatus()
+
+    async def scenario():
+        writer = asyncio.ensure_future(write_slowly(path, status, [b"first ", b"second ", b"third"]))
+        body = await read_all(tail(path, status))
+        await writer
+        return body
+
+    assert asyncio.run(scenario()) == b"first second third"
+
+
+def test_tail_raises_when_the_writer_fails(tmp_path):
+    path = tmp_path / "growing.mp4"
+    status = WriteStatus()
+    received = []
+
+    async def scenario():
+        writer = asyncio.ensure_future(write_slowly(path, status, [b"first ", b"second "], fail=True))
+        try:
+            async for chunk in tail(path, status):
+                received.append(chunk)
+        finally:
+            await writer
+
+    with pytest.raises(VideoProcessingError):
+        asyncio.run(scenario())
+    assert b"".join(received) == b"first second "
+
+
+def test_tail_raises_when_the_writer_fails_before_creating_the_file(tmp_path):
+    status = WriteStatus()
+    status.finish(failed=True)
+
+    with pytest.raises(VideoProcessingError):
+        asyncio.run(read_all(tail(tmp_path / "never_written.mp4", status)))
@@ -0,0 +1,117 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.core.exceptions import StorageCapacityError
+from src.caption_generator.services.artifact_store import (
+    ArtifactIndex,
+    ArtifactStore,
+    LocalArtifactBackend,
+)
+from src.caption_generator.services.janitor import TempDirJanitor
+
+NOW = time.time()
+
+
+def make_file(directory: Path, name: str, size: int, age_seconds: float) -> Path:
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    os.utime(path, (NOW - age_seconds, NOW - age_seconds))
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(
+        LocalArtifactBackend(tmp_path / "artifacts"),
+        ArtifactIndex(tmp_path / "artifacts" / "index.db"),
+        ttl_seconds=None
+    )
+
+
+def make_janitor(tmp_path, store, **kwargs):
+    options = dict(
+        max_age_seconds=1800,
+        grace_seconds=60,
+        high_water_bytes=10_000,
+        low_water_ratio=0.5,
+        min_free_disk_bytes=0
+    )
+    options.update(kwargs)
+    return TempDirJanitor(tmp_path, store, **options)
+
+
+class TestTempDirJanitor:
+    def test_evicts_files_older_than_max_age(self, tmp_path, store):
+        old = make_file(tmp_path, "video_old.mp4", 100, age_seconds=3600)
+        fresh = make_file(tmp_path, "video_fresh.mp4", 100, age_seconds=10)
+
+        stats = make_janitor(tmp_path, store).run_once(now=NOW)
+
+        assert not old.exists()
+        assert fresh.exists()
+        assert stats.files_evicted_by_age == 1
+        assert stats.scratch_files == 1
+        assert (tmp_path / "artifacts").is_dir()  # directories are left alone
+
+    def test_never_removes_files_in_use(self, tmp_path, store):
+        busy = make_file(tmp_path, "video_busy.mp4", 100, age_seconds=7200)
+
+        janitor = make_janitor(tmp_path, store, is_in_use=lambda path: path == busy)
+        janitor.run_once(now=NOW)
+
+        assert busy.exists()
+
+    def test_high_water_evicts_oldest_first(self, tmp_path, store):
+        oldest = make_file(tmp_path, "a.mp4", 4000, age_seconds=900)
+        middle = make_file(tmp_path, "b.mp4", 4000, age_seconds=600)
+        newest = make_file(tmp_path, "c.mp4", 4000, age_seconds=300)
+        in_grace = make_file(tmp_path, "d.mp4", 4000, age_seconds=5)
+
+        # 16000 bytes > 10000 high water; evict down to 5000 (low water)
+        stats = make_janitor(tmp_path, store).run_once(now=NOW)
+
+        assert not oldest.exists() and not middle.exists() and not newest.exists()
+        assert in_grace.exists()
+        assert stats.files_evicted_by_size == 3
+        assert stats.scratch_bytes == 4000
+
+    def test_high_water_evicts_artifacts_after_scratch(self, tmp_path, store):
+        source = make_file(tmp_path, "out.mp4", 12_000, age_seconds=0)
+        record = store.put(source, "captioned_big.mp4")
+        store.index.add(record.copy(update={"created_at": NOW - 3600}))
+
+        stats = make_janitor(tmp_path, store).run_once(now=NOW)
+
+        assert store.get("captioned_big.mp4") is None
+        assert stats.artifact_bytes_evicted == 12_000
+        assert stats.artifact_bytes == 0
+
+    def test_expires_artifacts_by_ttl(self, tmp_path, store):
+        source = make_file(tmp_path, "out.mp4", 10, age_seconds=0)
+        store.put(source, "captioned_ttl.mp4", ttl_seconds=60)
+
+        stats = make_janitor(tmp_path, store).run_once(now=NOW + 120)
+
+        assert stats.artifacts_expired == 1
+        assert store.index.get_by_filename("captioned_ttl.mp4") is None
+
+    def test_refuses_jobs_when_disk_is_low(self, tmp_path, store):
+        janitor = make_janitor(tmp_path, store, min_free_disk_bytes=2 ** 62)
+
+        with pytest.raises(StorageCapacityError):
+            janitor.check_capacity()
+
+        stats = janitor.run_once(now=NOW)
+        assert stats.accepting_jobs is False
+        assert stats.jobs_refused == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
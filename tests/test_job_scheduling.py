@@ -0,0 +1,182 @@
+import asyncio
+from pathlib import Path
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.models.admission import JobCost, JobPriority
+from src.caption_generator.services.admission import AdmissionController
+
+INTERACTIVE, STANDARD, BATCH = JobPriority.INTERACTIVE, JobPriority.STANDARD, JobPriority.BATCH
+
+
+class TickingClock:
+    """Advances one second per reading, so arrival order is unambiguous"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+
+def cost(minutes):
+    return JobCost(audio_minutes=minutes, work_seconds=minutes * 60)
+
+
+def scheduler(**kwargs):
+    options = dict(
+        estimate_work=lambda probe: 0.0,
+        capacity_seconds=3600, max_queue=100, queue_timeout=60,
+        aging_seconds=0, tenant_weights={}, preemption=True, enabled=True,
+        clock=TickingClock()
+    )
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+async def start_order(admission, jobs):
+    """Fill the capacity, queue ``jobs`` ((name, client, minutes, priority)), then run them one by one"""
+    blocker = await admission.acquire(cost(60), "blocker", INTERACTIVE)
+    started = []
+
+    async def job(name, client, minutes, priority):
+        ticket = await admission.acquire(cost(minutes), client, priority)
+        started.append(name)
+        # Finish before the next job can start, so the order is the scheduling order
+        await asyncio.sleep(0)
+        ticket.release()
+
+    tasks = []
+    for spec in jobs:
+        tasks.append(asyncio.create_task(job(*spec)))
+        await asyncio.sleep(0)
+    blocker.release()
+    await asyncio.gather(*tasks)
+    return started
+
+
+def test_higher_classes_start_first():
+    admission = scheduler()
+    jobs = [("archive", "a", 30, BATCH), ("upload", "b", 30, STANDARD), ("clip", "c", 30, INTERACTIVE)]
+
+    assert asyncio.run(start_order(admission, jobs)) == ["clip", "upload", "archive"]
+    assert admission.stats.classes[BATCH].started == 1
+
+
+def test_shortest_job_of_a_client_goes_first():
+    admission = scheduler()
+    jobs = [("30min", "a", 30, STANDARD), ("5min", "a", 5, STANDARD), ("15min", "a", 15, STANDARD)]
+
+    assert asyncio.run(start_order(admission, jobs)) == ["5min", "15min", "30min"]
+
+
+def test_clients_share_a_class_fairly_by_weight():
+    jobs = [(f"a{i}", "a", 10, BATCH) for i in range(4)] + [(f"b{i}", "b", 10, BATCH) for i in range(2)]
+
+    # A flood from one client does not delay another client's jobs behind all of it
+    assert asyncio.run(start_order(scheduler(), jobs)) == ["a0", "b0", "a1", "b1", "a2", "a3"]
+    # With twice the weight, b's jobs advance its virtual time half as much: two of its
+    # jobs start for each of a's
+    weighted = scheduler(tenant_weights={"b": 2.0})
+    jobs = [(f"a{i}", "a", 10, BATCH) for i in range(3)] + [(f"b{i}", "b", 10, BATCH) for i in range(4)]
+    assert asyncio.run(start_order(weighted, jobs)) == ["b0", "a0", "b1", "b2", "a1", "b3", "a2"]
+
+
+def test_waiting_jobs_age_into_higher_classes():
+    admission = scheduler(aging_seconds=2)
+    # The batch job has waited two clock ticks by the time the standard job queues
+    jobs = [("archive", "a", 30, BATCH), ("upload", "b", 30, STANDARD)]
+
+    assert asyncio.run(start_order(admission, jobs)) == ["archive", "upload"]
+
+
+def test_long_interactive_requests_run_as_standard():
+    admission = scheduler(interactive_max_minutes=10)
+
+    assert admission.classify(INTERACTIVE, cost(5)) == INTERACTIVE
+    assert admission.classify(INTERACTIVE, cost(45)) == STANDARD
+    assert admission.classify(BATCH, cost(1)) == BATCH
+
+
+def test_lower_class_job_yields_at_a_checkpoint():
+    admission = scheduler()
+    events = []
+
+    async def scenario():
+        archive = await admission.acquire(cost(50), "a", BATCH)
+        # Nothing urgent is waiting: the checkpoint returns at once
+        await archive.checkpoint()
+
+        async def clip():
+            ticket = await admission.acquire(cost(20), "b", INTERACTIVE)
+            events.append("clip started")
+            await asyncio.sleep(0.01)
+            events.append("clip finished")
+            ticket.release()
+
+        clip_task = asyncio.create_task(clip())
+        await asyncio.sleep(0)
+        assert admission.stats.classes[INTERACTIVE].queued == 1
+
+        await archive.checkpoint()
+        events.append("archive resumed")
+        await clip_task
+        archive.release()
+
+    asyncio.run(scenario())
+
+    assert events == ["clip started", "clip finished", "archive resumed"]
+    assert admission.stats.classes[BATCH].preempted == 1
+    assert admission.stats.running == 0 and admission.stats.in_flight_seconds == 0
+
+
+def test_same_or_lower_class_does_not_preempt():
+    admission = scheduler()
+
+    async def scenario():
+        upload = await admission.acquire(cost(50), "a", STANDARD)
+        waiting = asyncio.create_task(admission.acquire(cost(20), "b", BATCH))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(upload.checkpoint(), timeout=0.1)
+        upload.release()
+        (await waiting).release()
+
+    asyncio.run(scenario())
+    assert admission.stats.classes[STANDARD].preempted == 0
+
+
+def test_release_while_yielded_leaves_the_queue():
+    admission = scheduler()
+
+    async def scenario():
+        archive = await admission.acquire(cost(50), "a", BATCH)
+        clip = asyncio.create_task(admission.acquire(cost(20), "b", INTERACTIVE))
+        await asyncio.sleep(0)
+        paused = asyncio.create_task(archive.checkpoint())
+        clip_ticket = await clip
+        await asyncio.sleep(0)
+        # The batch job is cancelled while paused (e.g. its pipeline failed)
+        paused.cancel()
+        archive.release()
+        clip_ticket.release()
+
+    asyncio.run(scenario())
+    assert admission.stats.queued == 0 and admission.stats.running == 0
+
+
+def test_wait_metrics_are_broken_out_by_class():
+    admission = scheduler()
+    jobs = [("archive", "a", 30, BATCH), ("clip", "b", 30, INTERACTIVE)]
+
+    asyncio.run(start_order(admission, jobs))
+    classes = admission.stats.classes
+
+    assert classes[INTERACTIVE].started == 2  # including the job that filled the capacity
+    assert classes[BATCH].started == 1
+    # The batch job queued first and started last
+    assert classes[BATCH].max_wait > classes[INTERACTIVE].max_wait > 0
+    assert classes[BATCH].p95_wait == classes[BATCH].max_wait
+    assert classes[STANDARD].started == 0
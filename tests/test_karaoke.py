@@ -0,0 +1,123 @@
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+from src.caption_generator.services.video_service import VideoProcessingService
+from src.caption_generator.services.whisperx_service import WhisperXService
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg not installed")
+
+YELLOW = "&H00FFFF&"
+WHITE = "&HFFFFFF&"
+
+
+def timed_words(*words):
+    """Segment with ``(word, start, end)`` timings"""
+    return {
+        "start": words[0][1],
+        "end": words[-1][2],
+        "text": " ".join(word for word, _, _ in words),
+        "words": [{"word": word, "start": start, "end": end} for word, start, end in words],
+    }
+
+
+def dialogue_lines(content):
+    return [line for line in content.splitlines() if line.startswith("Dialogue:")]
+
+
+def k_durations(line):
+    return [int(value) for value in re.findall(r"\\k(\d+)", line)]
+
+
+def test_captions_keep_their_word_timings():
+    service = WhisperXService()
+    segments = [timed_words(("Hello", 0.0, 0.4), ("there", 0.5, 0.9)), {"start": 3.0, "end": 4.0, "text": "no words"}]
+
+    captions = service.group_words_into_captions(segments)
+
+    assert [word.word for word in captions[0].words] == ["Hello", "there"]
+    assert captions[0].words[1].start == 0.5
+    # Times interpolated from a segment are not word timings
+    assert captions[1].text == "no words" and captions[1].words is None
+
+
+def test_one_karaoke_event_per_caption_with_word_durations():
+    service = WhisperXService()
+    segments = [timed_words(
+        ("One", 1.00, 1.30), ("two", 1.45, 1.70), ("three", 2.00, 2.40),
+        ("four.", 2.50, 2.80), ("Five", 3.60, 3.80), ("six", 3.90, 4.20),
+        ("seven", 4.30, 4.50), ("eight", 4.60, 4.633)
+    )]
+    captions = service.group_words_into_captions(segments)
+
+    content = service.create_karaoke_ass_content(captions, YELLOW, WHITE)
+
+    lines = dialogue_lines(content)
+    assert len(lines) == len(captions) == 2
+    assert lines[0].startswith("Dialogue: 0,0:00:01.00,0:00:02.80,Default,")
+    assert "{\\1c&H00FFFF&\\2c&HFFFFFF&}{\\k45}One {\\k55}two " in lines[0]
+    # A word is highlighted until the next one starts, and the tags fill the whole event
+    for line, caption in zip(lines, captions):
+        assert len(k_durations(line)) == len(caption.words)
+        assert sum(k_durations(line)) == round(caption.end * 100) - round(caption.start * 100)
+
+
+def test_karaoke_text_cannot_inject_override_tags():
+    service = WhisperXService()
+    captions = service.group_words_into_captions([timed_words(("{\\b1}bold", 0.0, 0.5), ("x", 0.6, 0.8))])
+
+    [line] = dialogue_lines(service.create_karaoke_ass_content(captions, YELLOW, WHITE))
+
+    assert "(/b1)bold" in line and "{\\b1}" not in line
+
+
+def test_highlight_color_switches_the_subtitle_file_to_ass(tmp_path):
+    service = VideoProcessingService()
+    service.file_manager.temp_dir = tmp_path
+    transcript = {"language": "en", "segments": [timed_words(("Hello", 0.2, 0.6), ("there", 0.7, 1.5))]}
+
+    srt_path, _, _ = service._write_subtitle_file(transcript)
+    ass_path, language, timeline = service._write_subtitle_file(transcript, "white", highlight_color="yellow")
+
+    assert srt_path.suffix == ".srt" and ass_path.suffix == ".ass"
+    assert language == "en" and len(timeline) == 1
+    assert "{\\1c&H00FFFF&\\2c&HFFFFFF&}{\\k50}Hello {\\k80}there" in ass_path.read_text()
+
+
+def yellow_pixels(frame):
+    return int(np.count_nonzero((frame[..., 0] > 180) & (frame[..., 1] > 180) & (frame[..., 2] < 90)))
+
+
+@needs_ffmpeg
+def test_libass_highlights_words_as_they_are_spoken(tmp_path):
+    whisperx = WhisperXService()
+    ffmpeg = FFmpegService()
+    captions = whisperx.group_words_into_captions([timed_words(("HELLO", 0.0, 0.9), ("WORLD", 1.0, 1.9))])
+    ass_path = tmp_path / "karaoke.ass"
+    ass_path.write_text(whisperx.create_karaoke_ass_content(
+        captions, ffmpeg.ass_color("yellow"), ffmpeg.ass_color("white")
+    ))
+    width, height = 320, 240
+
+    result = subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"color=black:s={width}x{height}:r=10:d=2",
+            "-vf", ffmpeg.subtitle_filter(ass_path, 24, "white", "bottom"),
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-"
+        ],
+        capture_output=True,
+        check=True
+    )
+    frames = np.frombuffer(result.stdout, np.uint8).reshape(-1, height, width, 3)
+
+    first_word, both_words = yellow_pixels(frames[5]), yellow_pixels(frames[15])
+    assert 0 < first_word < both_words
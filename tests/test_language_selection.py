@@ -0,0 +1,96 @@
+import asyncio
+import sys
+import time
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.services.whisperx_service import SAMPLE_RATE, WhisperXService
+from src.caption_generator.utils.validation import normalize_language_code
+
+STEP_SECONDS = 0.3
+
+
+class SlowPipeline:
+    """Fake pipeline whose batches take a while; records detection calls"""
+
+    def __init__(self):
+        self.tokenizer = None
+        self.model = types.SimpleNamespace(
+            hf_tokenizer=None,
+            model=types.SimpleNamespace(is_multilingual=True)
+        )
+        self.detected_lengths = []
+
+    def detect_language(self, audio):
+        self.detected_lengths.append(len(audio))
+        return "fr"
+
+    def __call__(self, inputs, batch_size):
+        chunks = list(inputs)
+        time.sleep(STEP_SECONDS)
+        return [{"text": self.tokenizer.language} for _ in chunks]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    module = types.ModuleType("faster_whisper.tokenizer")
+    module.Tokenizer = lambda hf, multilingual, task, language: types.SimpleNamespace(language=language)
+    package = types.ModuleType("faster_whisper")
+    package.tokenizer = module
+    monkeypatch.setitem(sys.modules, "faster_whisper", package)
+    monkeypatch.setitem(sys.modules, "faster_whisper.tokenizer", module)
+
+    service = WhisperXService()
+    service.model = SlowPipeline()
+    service._load_audio = lambda path: np.zeros(SAMPLE_RATE * 90, dtype=np.float32)
+    service._speech_windows = lambda audio: [{"start": 0.0, "end": 30.0}, {"start": 30.0, "end": 60.0}]
+    service.align_loads = []
+
+    def load_align_model(language):
+        service.align_loads.append((language, time.monotonic()))
+        time.sleep(STEP_SECONDS)
+        return ("align-model", language)
+
+    service._get_align_model = load_align_model
+    service._align = lambda result, audio, align_model: dict(result, align_model=align_model)
+    return service
+
+
+def test_forced_language_skips_detection(service):
+    result = asyncio.run(service.transcribe_video(Path("clip.mp4"), language="de"))
+
+    assert service.model.detected_lengths == []
+    assert result["language"] == "de"
+    assert [segment["text"] for segment in result["segments"]] == ["de", "de"]
+    assert result["align_model"] == ("align-model", "de")
+
+
+def test_alignment_model_loads_while_transcribing(service):
+    start = time.monotonic()
+    result = asyncio.run(service.transcribe_video(Path("clip.mp4")))
+    elapsed = time.monotonic() - start
+
+    # Detection only looks at the first 30 seconds of the 90 second clip
+    assert service.model.detected_lengths == [30 * SAMPLE_RATE]
+    assert service.align_loads[0][0] == "fr"
+    assert result["align_model"] == ("align-model", "fr")
+    # Transcription and alignment-model loading overlap instead of adding up
+    assert elapsed < 2 * STEP_SECONDS * 0.9
+
+
+def test_normalize_language_code():
+    assert normalize_language_code(None) is None
+    assert normalize_language_code("  ") is None
+    assert normalize_language_code(" EN ") == "en"
+    with pytest.raises(ValueError):
+        normalize_language_code("english")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
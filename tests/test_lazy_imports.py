@@ -0,0 +1,33 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+
+
+def imported_modules(statement: str):
+    """Run an import in a fresh interpreter and return the loaded module names"""
+    result = subprocess.run(
+        [sys.executable, "-c", f"{statement}\nimport sys\nprint('\\n'.join(sys.modules))"],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize("statement", [
+    "import src.caption_generator.api.app",
+    "from src.caption_generator.services import VideoProcessingService, WhisperXService",
+])
+def test_startup_does_not_import_ml_stack(statement):
+    modules = imported_modules(statement)
+    assert "torch" not in modules
+    assert "whisperx" not in modules
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
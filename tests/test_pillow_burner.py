@@ -0,0 +1,145 @@
+import asyncio
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.core.config import settings
+from src.caption_generator.models.probe import VideoProbe
+from src.caption_generator.models.subtitle import TranscriptSegment
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+from src.caption_generator.services.pillow_burner import PillowSubtitleBurner, _blend, load_captions
+from src.caption_generator.services.smart_render import SmartRenderer
+from src.caption_generator.services.whisperx_service import WhisperXService
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg not installed")
+
+CAPTIONS = [
+    TranscriptSegment(start=0.5, end=1.5, text="Hello there"),
+    TranscriptSegment(start=2.0, end=3.2, text="Second caption\nline two"),
+]
+
+
+def test_captions_are_read_from_srt_and_karaoke_ass(tmp_path):
+    srt_path = tmp_path / "captions.srt"
+    srt_path.write_text(
+        "1\r\n00:00:00,500 --> 00:00:01,500\r\n<i>Hello</i> there\r\n\r\n"
+        "00:00:02,000 --> 00:00:03,200\r\nSecond caption\r\nline two\r\n"
+    )
+    ass_path = tmp_path / "captions.ass"
+    ass_path.write_text(WhisperXService().create_karaoke_ass_content(CAPTIONS, "&H00FFFF&", "&HFFFFFF&"))
+
+    for path in (srt_path, ass_path):
+        assert [(c.start, c.end, c.text) for c in load_captions(path)] == [
+            (0.5, 1.5, "Hello there"), (2.0, 3.2, "Second caption\nline two")
+        ]
+
+
+def test_captions_are_drawn_once_and_blended_only_where_they_are():
+    burner = PillowSubtitleBurner(FFmpegService())
+    sprite = burner.sprite("Hello there", 24, "yellow", "bottom", 320, 240)
+    again = burner.sprite("Hello there", 24, "yellow", "bottom", 320, 240)
+    too_wide = burner.sprite("W" * 80, 24, "yellow", "top", 320, 240)
+
+    assert again is sprite and burner.rasterized == 2
+    (top, left, _, inverse), (chroma_top, chroma_left, _, chroma_inverse) = sprite.layers[:2]
+    assert top % 2 == left % 2 == 0 and (chroma_top, chroma_left) == (top // 2, left // 2)
+    assert top > 160 and top + inverse.shape[0] <= 240
+    assert chroma_inverse.shape == ((inverse.shape[0] + 1) // 2, (inverse.shape[1] + 1) // 2)
+    # Clipped to the frame instead of failing
+    assert too_wide.layers[0][1] == 0 and too_wide.layers[0][3].shape[1] == 320
+
+    planes = tuple(
+        np.full(shape, value, np.uint8) for shape, value in (((240, 320), 126), ((120, 160), 128), ((120, 160), 128))
+    )
+    _blend(planes, sprite)
+    luma = planes[0]
+    changed = np.argwhere(luma != 126)
+    assert changed[:, 0].min() >= top and changed[:, 0].max() < top + inverse.shape[0]
+    # Opaque glyph pixels take the caption color (yellow: Y 210), the outline is black (Y 16)
+    assert luma.max() == 210 and luma.min() == 16
+
+
+def test_sprite_cache_is_shared_safely_by_concurrent_burns():
+    burner = PillowSubtitleBurner(FFmpegService(), cache_size=4)
+    texts = [f"Caption {index}" for index in range(12)]
+
+    def burn(offset):
+        for index in range(300):
+            text = texts[(offset + index) % len(texts)]
+            assert burner.sprite(text, 24, "white", "bottom", 160, 120) is not None
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(burn, range(8)))
+
+    assert len(burner._sprites) == 4
+
+
+def make_input(path: Path):
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc2=s=320x240:r=10:d=4",
+         "-f", "lavfi", "-i", "sine=d=4", "-c:v", "libx264", "-crf", "0", "-c:a", "aac", "-shortest",
+         str(path)],
+        check=True
+    )
+
+
+def decode(path):
+    raw = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", str(path), "-f", "rawvideo", "-pix_fmt", "yuv420p", "-"],
+        capture_output=True, check=True
+    ).stdout
+    return np.frombuffer(raw, np.uint8).reshape(-1, 320 * 240 * 3 // 2).astype(int)
+
+
+@needs_ffmpeg
+def test_pillow_burn_captions_the_same_frames_as_libass(tmp_path, monkeypatch):
+    ffmpeg = FFmpegService()
+    video_path, srt_path = tmp_path / "input.mp4", tmp_path / "captions.srt"
+    make_input(video_path)
+    srt_path.write_text(WhisperXService().create_srt_content(CAPTIONS))
+    style = dict(font_size=24, font_color="yellow", position="bottom", preset="ultrafast", crf=0)
+
+    async def scenario():
+        monkeypatch.setattr(settings.ffmpeg, "SUBTITLE_RENDERER", "libass")
+        await ffmpeg.burn_subtitles(video_path, srt_path, tmp_path / "libass.mp4", **style)
+        monkeypatch.setattr(settings.ffmpeg, "SUBTITLE_RENDERER", "pillow")
+        await ffmpeg.burn_subtitles(video_path, srt_path, tmp_path / "pillow.mp4", **style)
+
+    asyncio.run(scenario())
+
+    source, libass, pillow = (decode(tmp_path / name) for name in ("input.mp4", "libass.mp4", "pillow.mp4"))
+    assert len(source) == len(libass) == len(pillow) == 40
+    captioned = [index for index in range(40) if np.abs(pillow[index] - source[index]).max()]
+    assert captioned == [index for index in range(40) if np.abs(libass[index] - source[index]).max()]
+    assert captioned == list(range(5, 15)) + list(range(20, 32))
+    # Audio is muxed from the input
+    streams = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "stream=codec_type", "-of", "csv=p=0",
+         str(tmp_path / "pillow.mp4")],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    assert streams == ["video", "audio"]
+
+
+@needs_ffmpeg
+def test_renderer_setting_picks_libass_or_pillow(monkeypatch):
+    ffmpeg = FFmpegService()
+    probe = VideoProbe(
+        fingerprint="x", duration=10, size=1, has_video=True, has_audio=True,
+        video_codec="h264", pix_fmt="yuv420p", width=320, height=240
+    )
+
+    monkeypatch.setattr(settings.ffmpeg, "SUBTITLE_RENDERER", "auto")
+    assert ffmpeg.uses_libass == ffmpeg._find_subtitles_filter()
+    assert SmartRenderer(ffmpeg).supports(probe) == ffmpeg.uses_libass
+    monkeypatch.setattr(settings.ffmpeg, "SUBTITLE_RENDERER", "pillow")
+    # Smart render splices libass re-encodes, so it is off without libass
+    assert not ffmpeg.uses_libass and not SmartRenderer(ffmpeg).supports(probe)
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.services.pipeline import Pipeline
+
+
+def sleeper(seconds, result=None):
+    async def stage(*inputs):
+        await asyncio.sleep(seconds)
+        return result if result is not None else inputs
+    return stage
+
+
+def test_independent_stages_run_concurrently():
+    pipeline = Pipeline()
+    pipeline.add("ingest", sleeper(0.01, "video.mp4"))
+    pipeline.add("probe", sleeper(0.2, "info"), "ingest")
+    pipeline.add("transcribe", sleeper(0.2, "transcript"), "ingest")
+    pipeline.add("burn", sleeper(0.01), "ingest", "transcribe", "probe")
+
+    start = time.monotonic()
+    results = asyncio.run(pipeline.run())
+    elapsed = time.monotonic() - start
+
+    assert results["burn"] == ("video.mp4", "transcript", "info")
+    assert elapsed < 0.35  # probe and transcribe overlapped
+
+
+def test_critical_path_follows_the_slowest_chain():
+    pipeline = Pipeline()
+    pipeline.add("ingest", sleeper(0.01, "video.mp4"))
+    pipeline.add("probe", sleeper(0.02, "info"), "ingest")
+    pipeline.add("transcribe", sleeper(0.15, "transcript"), "ingest")
+    pipeline.add("subtitles", sleeper(0.01, "srt"), "transcribe")
+    pipeline.add("burn", sleeper(0.05), "ingest", "subtitles", "probe")
+
+    asyncio.run(pipeline.run())
+    report = pipeline.report()
+
+    assert report.critical_path == ["ingest", "transcribe", "subtitles", "burn"]
+    timings = {timing.name: timing for timing in report.stages}
+    assert timings["burn"].start >= timings["subtitles"].end
+    assert timings["probe"].end < timings["transcribe"].end
+    assert all(timing.status == "completed" for timing in report.stages)
+
+
+def test_failure_cancels_running_stages():
+    async def broken(_):
+        await asyncio.sleep(0.01)
+        raise ValueError("No audio stream")
+
+    pipeline = Pipeline()
+    pipeline.add("ingest", sleeper(0, "video.mp4"))
+    pipeline.add("probe", broken, "ingest")
+    pipeline.add("transcribe", sleeper(5, "transcript"), "ingest")
+    pipeline.add("burn", sleeper(0), "transcribe", "probe")
+
+    start = time.monotonic()
+    with pytest.raises(ValueError, match="No audio stream"):
+        asyncio.run(pipeline.run())
+    assert time.monotonic() - start < 1
+
+    statuses = {timing.name: timing.status for timing in pipeline.report().stages}
+    assert statuses == {
+        "ingest": "completed",
+        "probe": "failed",
+        "transcribe": "cancelled",
+        "burn": "cancelled",
+    }
+    assert pipeline.results == {"ingest": "video.mp4"}
+
+
+def test_before_stage_pauses_at_stage_boundaries():
+    seen = []
+
+    async def boundary(name):
+        seen.append(name)
+        if name == "burn":
+            # e.g. waiting to get capacity back from more urgent work
+            await asyncio.sleep(0.2)
+
+    pipeline = Pipeline(before_stage=boundary)
+    pipeline.add("ingest", sleeper(0, "video.mp4"))
+    pipeline.add("transcribe", sleeper(0.01, "transcript"), "ingest")
+    pipeline.add("burn", sleeper(0.01), "transcribe")
+
+    start = time.monotonic()
+    asyncio.run(pipeline.run())
+
+    assert seen == ["ingest", "transcribe", "burn"]
+    # Stage times are rounded to milliseconds
+    assert time.monotonic() - start >= 0.19
+    timings = {timing.name: timing for timing in pipeline.report().stages}
+    assert timings["burn"].duration < 0.1
+    assert timings["burn"].start - timings["transcribe"].end >= 0.19
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        Pipeline().add("burn", sleeper(0), "transcribe")
+
+
+def test_subtitle_stage_runs_in_a_worker_thread(make_service):
+    service = make_service()
+    threads = []
+    group = service.whisperx_service.group_words_into_captions
+
+    def recording_group(segments):
+        threads.append(threading.current_thread())
+        return group(segments)
+
+    service.whisperx_service.group_words_into_captions = recording_group
+    transcript = {"language": "en", "segments": [{"start": 0.2, "end": 1.5, "text": "Hello there", "words": []}]}
+
+    srt_path, language, timeline = asyncio.run(service._write_subtitle_file_async(transcript))
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert srt_path.exists() and language == "en" and len(timeline) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
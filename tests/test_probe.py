@@ -0,0 +1,129 @@
+import asyncio
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+from src.caption_generator.services.probe_service import ProbeService
+from src.caption_generator.models.pipeline import PipelineReport, StageTiming
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="FFmpeg/FFprobe not installed"
+)
+
+
+def make_clip(path: Path, audio: bool = True, audio_codec: str = "aac"):
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=size=320x240:rate=25:duration=3",
+    ]
+    if audio:
+        command += ["-f", "lavfi", "-i", "sine=frequency=440:duration=3", "-c:a", audio_codec]
+    else:
+        command += ["-an"]
+    command += ["-c:v", "libx264", "-g", "25", "-pix_fmt", "yuv420p", "-shortest", str(path)]
+    subprocess.run(command, check=True)
+    return path
+
+
+class CountingFFmpegService(FFmpegService):
+    def __init__(self):
+        super().__init__()
+        self.info_calls = 0
+
+    async def get_video_info(self, video_path):
+        self.info_calls += 1
+        return await super().get_video_info(video_path)
+
+
+@pytest.fixture
+def service():
+    return ProbeService(CountingFFmpegService())
+
+
+def test_probe_reads_metadata_and_keyframe_spacing(tmp_path, service):
+    clip = make_clip(tmp_path / "clip.mp4")
+
+    probe = asyncio.run(service.probe(clip))
+
+    assert probe.has_video and probe.has_audio
+    assert probe.video_codec == "h264"
+    assert probe.audio_codec == "aac"
+    assert (probe.width, probe.height) == (320, 240)
+    assert probe.fps == 25
+    assert probe.keyframe_interval == pytest.approx(1.0, abs=0.05)
+    assert probe.duration == pytest.approx(3.0, abs=0.2)
+    assert service.audio_copyable(probe)
+
+
+def test_probe_is_cached_by_content(tmp_path, service):
+    clip = make_clip(tmp_path / "clip.mp4")
+    copy = tmp_path / "same-video-other-name.mp4"
+    shutil.copyfile(clip, copy)
+
+    first = asyncio.run(service.probe(clip))
+    second = asyncio.run(service.probe(copy))
+
+    assert first == second
+    assert service.ffmpeg_service.info_calls == 1
+
+
+def test_probe_cache_tells_apart_files_differing_between_samples(tmp_path, service):
+    clip = make_clip(tmp_path / "clip.mp4")
+    padded = clip.read_bytes() + bytes(4 * 1024 * 1024)
+    changed = bytearray(padded)
+    # Same size, start, middle and end: only a full hash sees the difference
+    changed[len(changed) // 4] = 1
+    first, second = tmp_path / "first.mp4", tmp_path / "second.mp4"
+    first.write_bytes(padded)
+    second.write_bytes(bytes(changed))
+
+    probes = [asyncio.run(service.probe(path)) for path in (first, second)]
+
+    assert probes[0].fingerprint != probes[1].fingerprint
+    assert service.ffmpeg_service.info_calls == 2
+
+
+def test_rejects_video_without_audio(tmp_path, service):
+    clip = make_clip(tmp_path / "silent.mp4", audio=False)
+
+    with pytest.raises(ValueError, match="no audio"):
+        asyncio.run(service.probe(clip))
+
+
+@pytest.mark.parametrize("content", [b"", b"definitely not a video" * 100])
+def test_rejects_unreadable_files(tmp_path, service, content):
+    broken = tmp_path / "broken.mp4"
+    broken.write_bytes(content)
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.probe(broken))
+
+
+def test_audio_that_mp4_cannot_carry_is_transcoded(tmp_path, service):
+    clip = make_clip(tmp_path / "clip.mkv", audio_codec="pcm_s16le")
+
+    probe = asyncio.run(service.probe(clip))
+
+    assert probe.audio_codec == "pcm_s16le"
+    assert not service.audio_copyable(probe)
+
+
+def test_eta_learns_from_finished_jobs(tmp_path, service):
+    probe = asyncio.run(service.probe(make_clip(tmp_path / "clip.mp4")))
+    before = service.estimate_processing_time(probe)
+
+    report = PipelineReport(stages=[
+        StageTiming(name="transcribe", duration=probe.duration * 2, status="completed"),
+        StageTiming(name="burn", duration=probe.duration * 2, status="completed"),
+    ])
+    service.record_timings(probe, report, "burn")
+
+    assert service.estimate_processing_time(probe) > before
@@ -0,0 +1,173 @@
+import asyncio
+import importlib
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi import HTTPException
+
+from src.caption_generator.core.exceptions import VideoProcessingError
+from src.caption_generator.models.job import JobStatus
+
+
+@pytest.fixture
+def service(make_service):
+    """
+    A service with fake preview and full encodes. The preview waits for
+    ``preview_done`` (set by default); the full encode writes its first
+    fragment, then waits for ``full_done`` and fails with ``full_error``
+    if that is set.
+    """
+    service = make_service()
+    service.preview_done = asyncio.Event()
+    service.preview_done.set()
+    service.full_done = asyncio.Event()
+    service.full_error = None
+
+    async def prescale(input_video_path, probe=None):
+        return None
+
+    async def create_preview(video_path, srt_path, output_path, **kwargs):
+        await service.preview_done.wait()
+        output_path.write_bytes(b"preview")
+        return output_path
+
+    async def encode_full(output_path):
+        output_path.write_bytes(b"fragment 1;")
+        await service.full_done.wait()
+        if service.full_error:
+            raise RuntimeError(service.full_error)
+        with open(output_path, "ab") as f:
+            f.write(b"fragment 2")
+        return output_path
+
+    async def burn(input_video_path, srt_path, timeline, output_path, probe, **kwargs):
+        return await encode_full(output_path)
+
+    async def burn_subtitles(video_path, srt_path, output_path, fragmented=False, **kwargs):
+        assert fragmented
+        return await encode_full(output_path)
+
+    service._prescale_for_preview = prescale
+    service.ffmpeg_service.create_preview = create_preview
+    service._burn = burn
+    service.ffmpeg_service.burn_subtitles = burn_subtitles
+    return service
+
+
+@pytest.fixture
+def app_module(service, monkeypatch):
+    module = importlib.import_module("src.caption_generator.api.app")
+    monkeypatch.setattr(module, "video_service", service)
+    return module
+
+
+def filename(url):
+    return url.rsplit("/", 1)[1]
+
+
+async def read_stream(app_module, url) -> bytes:
+    response = await app_module.stream_video(filename(url))
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def test_job_reports_the_preview_before_the_full_video(service, app_module):
+    async def scenario():
+        job = await service.start_progressive_job(url="https://example.com/a.mp4")
+        while job.status != JobStatus.PREVIEW_READY:
+            await asyncio.sleep(0.01)
+        early = await app_module.get_caption_job(job.job_id)
+        service.full_done.set()
+        await job.task
+        return early, await app_module.get_caption_job(job.job_id)
+
+    early, final = asyncio.run(scenario())
+
+    assert early.preview.ready and early.preview.url.startswith("/download/preview_")
+    assert not early.video.ready and early.video.url is None
+    assert final.status == JobStatus.COMPLETED and final.language_detected == "en"
+    assert final.preview.url == early.preview.url
+    assert final.video.ready and final.video.url.startswith("/download/captioned_")
+    assert final.preview.processing_time <= final.video.processing_time
+    assert service.artifact_store.resolve(filename(final.preview.url)).read_bytes() == b"preview"
+    assert service.artifact_store.resolve(filename(final.video.url)).read_bytes() == b"fragment 1;fragment 2"
+
+
+def test_failed_job_deletes_both_artifacts(service, app_module, tmp_path):
+    service.full_error = "Encoder crashed"
+
+    async def scenario():
+        job = await service.start_progressive_job(url="https://example.com/a.mp4")
+        while job.status != JobStatus.PREVIEW_READY:
+            await asyncio.sleep(0.01)
+        preview_url = job.preview.url
+        service.full_done.set()
+        await job.task
+        return preview_url, await app_module.get_caption_job(job.job_id)
+
+    preview_url, response = asyncio.run(scenario())
+
+    assert response.status == JobStatus.FAILED and response.error == "Encoder crashed"
+    assert response.preview.url is None and response.video.url is None
+    assert service.artifact_store.get(filename(preview_url)) is None
+    assert not list(tmp_path.glob("preview_*")) and not list(tmp_path.glob("captioned_*"))
+
+
+def test_streamed_encode_starts_before_the_preview_and_is_served_while_it_runs(service, app_module):
+    service.preview_done.clear()
+
+    async def scenario():
+        job = await service.start_progressive_job(url="https://example.com/a.mp4", stream=True)
+        while not job.video.stream_url:
+            await asyncio.sleep(0.01)
+        assert not job.preview.ready
+        body = asyncio.ensure_future(read_stream(app_module, job.video.stream_url))
+        await asyncio.sleep(0.2)
+        assert not body.done()
+        service.full_done.set()
+        service.preview_done.set()
+        await job.task
+        # Once stored, the same URL serves the finished file
+        return job, await body, await read_stream(app_module, job.video.stream_url)
+
+    job, streamed, stored = asyncio.run(scenario())
+
+    assert job.status == JobStatus.COMPLETED and job.preview.ready
+    assert streamed == stored == b"fragment 1;fragment 2"
+    assert filename(job.video.url) == filename(job.video.stream_url)
+
+
+def test_stream_of_a_failed_encode_is_aborted(service, app_module):
+    service.full_error = "Encoder crashed"
+
+    async def scenario():
+        job = await service.start_progressive_job(url="https://example.com/a.mp4", stream=True)
+        while not job.video.stream_url:
+            await asyncio.sleep(0.01)
+        stream_url = job.video.stream_url
+        body = asyncio.ensure_future(read_stream(app_module, stream_url))
+        await asyncio.sleep(0.1)
+        service.full_done.set()
+        await job.task
+        with pytest.raises(VideoProcessingError):
+            await body
+        with pytest.raises(HTTPException) as missing:
+            await app_module.stream_video(filename(stream_url))
+        return job, missing.value
+
+    job, missing = asyncio.run(scenario())
+
+    assert job.status == JobStatus.FAILED
+    assert missing.status_code == 404
+
+
+def test_unknown_job_is_not_found(app_module):
+    response = TestClient(app_module.app).get("/jobs/missing")
+
+    assert response.status_code == 404
+    assert response.json()["error"] == "Job not found"
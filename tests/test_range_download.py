@@ -0,0 +1,153 @@
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.utils.range_response import (
+    build_file_response,
+    parse_range_header,
+    RangeNotSatisfiable,
+)
+
+FILE_SIZE = 32 * 1024 * 1024
+
+
+@pytest.fixture(scope="module")
+def video_file(tmp_path_factory):
+    """A large file with position-dependent content"""
+    path = tmp_path_factory.mktemp("range") / "video.mp4"
+    block = bytes(range(256)) * 4096  # 1 MiB
+    with open(path, "wb") as f:
+        for _ in range(FILE_SIZE // len(block)):
+            f.write(block)
+    return path
+
+
+@pytest.fixture(scope="module")
+def client(video_file):
+    """Minimal app serving the test file the same way /download does"""
+    app = FastAPI()
+
+    @app.get("/download/{filename}")
+    async def download(filename: str, request: Request):
+        return await build_file_response(request, video_file, filename=filename)
+
+    return TestClient(app)
+
+
+def expected_bytes(start, end):
+    return bytes((i % 256) for i in range(start, end + 1))
+
+
+class TestParseRangeHeader:
+    def test_single_and_suffix_ranges(self):
+        assert parse_range_header("bytes=0-99", 1000) == [(0, 99)]
+        assert parse_range_header("bytes=900-", 1000) == [(900, 999)]
+        assert parse_range_header("bytes=-100", 1000) == [(900, 999)]
+        assert parse_range_header("bytes=990-5000", 1000) == [(990, 999)]
+
+    def test_overlapping_ranges_are_merged(self):
+        assert parse_range_header("bytes=50-99,0-60,200-299", 1000) == [(0, 99), (200, 299)]
+
+    def test_invalid_headers_are_ignored(self):
+        assert parse_range_header("items=0-1", 1000) is None
+        assert parse_range_header("bytes=abc", 1000) is None
+        assert parse_range_header("bytes=10-5", 1000) is None
+
+    def test_unsatisfiable_range(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range_header("bytes=2000-3000", 1000)
+
+
+class TestRangeDownload:
+    def test_full_download_has_validators(self, client):
+        response = client.get("/download/video.mp4")
+        assert response.status_code == 200
+        assert int(response.headers["content-length"]) == len(response.content) == FILE_SIZE
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["etag"].startswith('"')
+        assert "last-modified" in response.headers
+
+    def test_single_range(self, client):
+        response = client.get("/download/video.mp4", headers={"Range": "bytes=1000-1999"})
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes 1000-1999/{FILE_SIZE}"
+        assert response.content == expected_bytes(1000, 1999)
+
+    def test_multipart_ranges(self, client):
+        response = client.get("/download/video.mp4", headers={"Range": "bytes=0-9,100-109"})
+        assert response.status_code == 206
+        content_type = response.headers["content-type"]
+        assert content_type.startswith("multipart/byteranges; boundary=")
+        boundary = content_type.split("boundary=")[1]
+        assert int(response.headers["content-length"]) == len(response.content)
+        assert response.content.count(f"--{boundary}".encode()) == 3
+        assert f"Content-Range: bytes 100-109/{FILE_SIZE}".encode() in response.content
+        assert expected_bytes(100, 109) in response.content
+
+    def test_unsatisfiable_range(self, client):
+        response = client.get("/download/video.mp4", headers={"Range": f"bytes={FILE_SIZE}-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{FILE_SIZE}"
+
+    def test_if_none_match(self, client):
+        etag = client.get("/download/video.mp4", headers={"Range": "bytes=0-0"}).headers["etag"]
+        response = client.get("/download/video.mp4", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_if_range(self, client):
+        etag = client.get("/download/video.mp4", headers={"Range": "bytes=0-0"}).headers["etag"]
+        response = client.get(
+            "/download/video.mp4",
+            headers={"Range": "bytes=0-9", "If-Range": etag}
+        )
+        assert response.status_code == 206
+
+        # Stale validator: the range is ignored and the full file is sent
+        response = client.get(
+            "/download/video.mp4",
+            headers={"Range": "bytes=0-9", "If-Range": '"stale"'}
+        )
+        assert response.status_code == 200
+        assert int(response.headers["content-length"]) == FILE_SIZE
+
+    def test_concurrent_range_reads_do_not_buffer_file(self, client):
+        """Serving many ranges concurrently uses memory independent of file size"""
+        span = 256 * 1024
+        offsets = [i * (FILE_SIZE // 32) for i in range(32)]
+        # Warm the ETag cache so hashing is not part of the measurement
+        client.get("/download/video.mp4", headers={"Range": "bytes=0-0"})
+
+        def fetch(offset):
+            response = client.get(
+                "/download/video.mp4",
+                headers={"Range": f"bytes={offset}-{offset + span - 1}"}
+            )
+            assert response.status_code == 206
+            assert response.content[:256] == expected_bytes(offset, offset + 255)
+            return len(response.content)
+
+        tracemalloc.start()
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                sizes = list(pool.map(fetch, offsets))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert sizes == [span] * len(offsets)
+        # Client-side buffers for 8 in-flight responses plus server chunks;
+        # far below the size of the file itself
+        assert peak < FILE_SIZE // 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
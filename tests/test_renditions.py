@@ -0,0 +1,131 @@
+import asyncio
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.models.rendition import RenditionSpec
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg not installed")
+
+TRANSCRIPT = {
+    "language": "en",
+    "segments": [{"start": 0.0, "end": 1.8, "text": "HELLO WORLD", "words": [
+        {"word": "HELLO", "start": 0.0, "end": 0.8},
+        {"word": "WORLD", "start": 0.9, "end": 1.8},
+    ]}],
+}
+
+
+def test_rendition_specs_are_validated():
+    spec = RenditionSpec(font_color=" Yellow ", highlight_color="", height=480)
+
+    assert spec.font_color == "yellow" and spec.highlight_color is None
+    with pytest.raises(ValueError):
+        RenditionSpec(height=481)
+    with pytest.raises(ValueError):
+        RenditionSpec(font_size=100)
+
+
+@pytest.fixture
+def service(make_service):
+    """A service with a fake input and model that records its FFmpeg runs"""
+    service = make_service()
+    service.whisperx.transcript = TRANSCRIPT
+    service.runs = []
+
+    async def burn_renditions(video_path, renditions, copy_audio=True, overlays=None):
+        service.runs.append([(spec, subtitle_path.suffix) for spec, subtitle_path, _ in renditions])
+        for _, subtitle_path, output_path in renditions:
+            assert subtitle_path.exists()
+            output_path.write_bytes(b"captioned")
+        return [output_path for _, _, output_path in renditions]
+
+    service.ffmpeg_service.burn_renditions = burn_renditions
+    return service
+
+
+def test_missing_renditions_are_encoded_together_and_cached(service, tmp_path):
+    specs = [
+        RenditionSpec(),
+        RenditionSpec(height=360, font_size=18, position="top"),
+        RenditionSpec(),
+        RenditionSpec(highlight_color="yellow"),
+    ]
+
+    response = asyncio.run(service.process_renditions(None, "x", specs, None, "client"))
+
+    # One FFmpeg run; the repeated rendition is encoded once, karaoke burns an ASS file
+    [run] = service.runs
+    assert [suffix for _, suffix in run] == [".srt", ".srt", ".ass"]
+    assert response.encoded == 3 and response.language_detected == "en"
+    urls = [rendition.video_url for rendition in response.renditions]
+    assert urls[0] == urls[2] and len(set(urls)) == 3
+    # Subtitle files are temporary
+    assert not list(tmp_path.glob("subtitles_*"))
+
+    again = asyncio.run(service.process_renditions(None, "x", specs[:2] + [RenditionSpec(height=240)], None, "client"))
+
+    assert [rendition.cached for rendition in again.renditions] == [True, True, False]
+    assert [rendition.video_url for rendition in again.renditions[:2]] == urls[:2]
+    assert len(service.runs) == 2 and [spec.height for spec, _ in service.runs[1]] == [240]
+
+
+def yellow_pixels(frame):
+    return int(np.count_nonzero((frame[..., 0] > 180) & (frame[..., 1] > 180) & (frame[..., 2] < 90)))
+
+
+def probe_stream(path, stream):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", stream, "-show_entries", "stream=codec_type,width,height",
+         "-of", "json", str(path)],
+        capture_output=True, check=True
+    )
+    return json.loads(result.stdout)["streams"]
+
+
+@needs_ffmpeg
+def test_one_ffmpeg_run_writes_every_rendition(tmp_path):
+    ffmpeg = FFmpegService()
+    video_path = tmp_path / "input.mp4"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "color=black:s=640x480:r=10:d=2",
+         "-f", "lavfi", "-i", "sine=d=2", "-c:v", "libx264", "-c:a", "aac", "-shortest", str(video_path)],
+        check=True
+    )
+    srt_path = tmp_path / "captions.srt"
+    srt_path.write_text("1\n00:00:00,000 --> 00:00:02,000\nHELLO WORLD\n")
+    renditions = [
+        (RenditionSpec(font_color="yellow"), srt_path, tmp_path / "full.mp4"),
+        (RenditionSpec(font_color="white", height=240), srt_path, tmp_path / "small.mp4"),
+    ]
+
+    outputs = asyncio.run(ffmpeg.burn_renditions(video_path, renditions))
+
+    assert outputs == [tmp_path / "full.mp4", tmp_path / "small.mp4"]
+    assert probe_stream(outputs[0], "v")[0]["height"] == 480
+    assert probe_stream(outputs[1], "v")[0]["height"] == 240
+    assert all(probe_stream(output, "a") for output in outputs)
+
+    frames = {}
+    for output in outputs:
+        height = probe_stream(output, "v")[0]["height"]
+        width = probe_stream(output, "v")[0]["width"]
+        raw = subprocess.run(
+            ["ffmpeg", "-v", "error", "-ss", "1", "-i", str(output), "-frames:v", "1",
+             "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+            capture_output=True, check=True
+        ).stdout
+        frames[output.name] = np.frombuffer(raw, np.uint8).reshape(height, width, 3)
+    # Each output carries its own style
+    assert yellow_pixels(frames["full.mp4"]) > 100
+    assert yellow_pixels(frames["small.mp4"]) == 0
+    assert frames["small.mp4"].max() > 200
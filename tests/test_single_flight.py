@@ -0,0 +1,169 @@
+import asyncio
+from pathlib import Path
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.models.encode import OutputType
+from src.caption_generator.utils.single_flight import SingleFlight
+from src.caption_generator.utils.validation import normalize_url
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(3)))
+        # Finished calls are forgotten: the next one runs again
+        again = await flights.do("key", work)
+        return results, again
+
+    results, again = asyncio.run(scenario())
+    assert results == [("result", False), ("result", True), ("result", True)]
+    assert again == ("result", False)
+    assert len(calls) == 2
+    assert (flights.leaders, flights.followers) == (2, 2)
+
+
+def test_errors_are_shared_and_keys_stay_separate():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("broken input")
+
+    async def succeed():
+        return "other"
+
+    async def scenario():
+        return await asyncio.gather(
+            flights.do("a", fail), flights.do("a", fail), flights.do("b", succeed),
+            return_exceptions=True
+        )
+
+    first, second, other = asyncio.run(scenario())
+    assert isinstance(first, ValueError) and second is first
+    assert other == ("other", False)
+
+
+def test_shared_call_is_cancelled_only_when_every_caller_left():
+    flights = SingleFlight()
+    events = []
+
+    async def work():
+        try:
+            await asyncio.sleep(0.2)
+            return "done"
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("key", work))
+        second = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        # The other caller still gets the result
+        assert await second == ("done", True)
+
+        third = asyncio.ensure_future(flights.do("key", work))
+        fourth = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        third.cancel()
+        fourth.cancel()
+        await asyncio.gather(third, fourth, return_exceptions=True)
+        return "key" in flights
+
+    assert asyncio.run(scenario()) is False
+    assert events == ["cancelled"]
+
+
+def test_urls_are_normalized():
+    assert normalize_url("HTTPS://Example.COM:443/Videos/a.mp4?b=2&a=1#t=10") == \
+        "https://example.com/Videos/a.mp4?a=1&b=2"
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+    assert normalize_url("http://example.com/a.mp4?x=1") != normalize_url("http://example.com/a.mp4?x=2")
+
+
+def test_identical_uploads_in_flight_are_processed_once(make_service):
+    service = make_service()
+    service.whisperx.delay = 0.1
+
+    async def scenario():
+        return await asyncio.gather(
+            service.process_video(url="x", output_type=OutputType.SOFT),
+            service.process_video(url="x", output_type=OutputType.SOFT),
+            service.process_video(url="x", output_type=OutputType.AUDIO),
+        )
+
+    first, second, audio_only = asyncio.run(scenario())
+    assert not first.coalesced and second.coalesced
+    assert second.video_url == first.video_url
+    assert not audio_only.coalesced and audio_only.video_url != first.video_url
+    # Every request brings its own copy, but the shared one is transcribed and encoded once
+    assert (len(service.ingested), service.whisperx.transcriptions, len(service.encoded)) == (3, 2, 2)
+
+
+def test_retry_after_the_first_request_finished_reuses_its_transcript(make_service):
+    service = make_service()
+
+    async def scenario():
+        first = await service.process_video(url="x", output_type=OutputType.SOFT)
+        retry = await service.process_video(url="x", output_type=OutputType.SOFT)
+        audio_only = await service.process_video(url="x", output_type=OutputType.AUDIO)
+        return first, retry, audio_only
+
+    first, retry, audio_only = asyncio.run(scenario())
+    # Nothing was in flight to attach to, so the caches serve the repeats
+    assert not retry.coalesced and retry.cached and retry.video_url == first.video_url
+    assert not audio_only.cached
+    assert (len(service.ingested), service.whisperx.transcriptions, len(service.encoded)) == (3, 1, 2)
+
+
+def test_url_with_etag_is_coalesced_before_downloading(make_service):
+    service = make_service(validator='etag:"abc"')
+    service.whisperx.delay = 0.1
+
+    async def scenario():
+        return await asyncio.gather(
+            service.process_video(url="https://Example.com/a.mp4", output_type=OutputType.SOFT),
+            service.process_video(url="https://example.com/a.mp4#t=3", output_type=OutputType.SOFT),
+        )
+
+    first, second = asyncio.run(scenario())
+    assert second.coalesced and second.video_url == first.video_url
+    assert (len(service.ingested), service.whisperx.transcriptions, len(service.encoded)) == (1, 1, 1)
+
+
+def test_identical_job_submission_attaches_to_the_running_job(make_service):
+    service = make_service()
+    started = []
+
+    async def run_job(job, input_video_path, **kwargs):
+        started.append(input_video_path)
+        await asyncio.sleep(0.1)
+
+    service._run_progressive_job = run_job
+
+    async def scenario():
+        first, second = await asyncio.gather(
+            service.start_progressive_job(url="x"),
+            service.start_progressive_job(url="x"),
+        )
+        third = await service.start_progressive_job(url="x")
+        await first.task
+        restyled = await service.start_progressive_job(url="x", font_size=40)
+        # Once the job ended, the same request starts a new one
+        fourth = await service.start_progressive_job(url="x")
+        return first, second, third, restyled, fourth
+
+    first, second, third, restyled, fourth = asyncio.run(scenario())
+    assert first is second is third
+    assert restyled is not first and fourth is not first
+    assert len(started) == 3
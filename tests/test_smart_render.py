@@ -0,0 +1,207 @@
+import asyncio
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+from src.caption_generator.services.probe_service import ProbeService
+from src.caption_generator.services.smart_render import SmartRenderer, plan_render_segments
+
+needs_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="FFmpeg/FFprobe not installed"
+)
+
+WIDTH, HEIGHT = 320, 240
+
+
+def spans(segments):
+    return [(s.start, s.end, s.reencode) for s in segments]
+
+
+def test_only_gops_overlapping_captions_are_reencoded():
+    keyframes = [0.0, 2.0, 4.0, 6.0, 8.0, 10.0]
+
+    segments = plan_render_segments(keyframes, 12.0, [(4.5, 5.0), (5.5, 6.5), (10.2, 11.0)])
+
+    assert spans(segments) == [
+        (0.0, 4.0, False),
+        (4.0, 8.0, True),
+        (8.0, 10.0, False),
+        (10.0, 12.0, True),
+    ]
+
+
+def test_caption_ending_on_a_keyframe_stays_in_its_gop():
+    segments = plan_render_segments([0.0, 2.0, 4.0], 6.0, [(2.5, 4.0)])
+
+    assert spans(segments) == [(0.0, 2.0, False), (2.0, 4.0, True), (4.0, 6.0, False)]
+
+
+def test_leading_frames_join_the_first_gop():
+    segments = plan_render_segments([0.04, 3.0], 6.0, [])
+
+    assert spans(segments) == [(0.0, 6.0, False)]
+
+
+def make_clip(path: Path, audio: bool = True) -> Path:
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=size={WIDTH}x{HEIGHT}:rate=25:duration=12",
+    ]
+    if audio:
+        cmd += ["-f", "lavfi", "-i", "sine=frequency=440:duration=12", "-c:a", "aac", "-shortest"]
+    subprocess.run(cmd + ["-c:v", "libx264", "-g", "50", "-pix_fmt", "yuv420p", str(path)], check=True)
+    return path
+
+
+def rotate_clip(clip: Path, path: Path) -> Path:
+    """The same streams with a 90 degree display matrix, as phones record portrait video"""
+    subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error", "-display_rotation", "90", "-i", str(clip), "-c", "copy", str(path)
+    ], check=True)
+    return path
+
+
+def frame_at(path: Path, seconds: float) -> np.ndarray:
+    result = subprocess.run([
+        "ffmpeg", "-v", "error", "-ss", str(seconds), "-i", str(path),
+        "-frames:v", "1", "-f", "rawvideo", "-pix_fmt", "gray", "-"
+    ], capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.uint8).astype(int)
+
+
+@needs_ffmpeg
+def test_smart_render_burns_captions_and_keeps_other_frames(tmp_path):
+    ffmpeg = FFmpegService()
+    clip = make_clip(tmp_path / "clip.mp4")
+    srt = tmp_path / "captions.srt"
+    srt.write_text("1\n00:00:04,500 --> 00:00:05,500\nHello there\n")
+    output = tmp_path / "out.mp4"
+
+    async def render():
+        probe = await ProbeService(ffmpeg).probe(clip)
+        result = await SmartRenderer(ffmpeg).render(clip, srt, [(4.5, 5.5)], output, probe)
+        frames = await ffmpeg.count_video_frames(output)
+        return probe, result, frames
+
+    probe, result, frames = asyncio.run(render())
+
+    assert result == output
+    assert frames == 12 * 25
+    assert probe.keyframe_interval == pytest.approx(2.0, abs=0.05)
+    # Caption visible inside the re-encoded GOP, untouched frames copied bit-exactly
+    assert np.abs(frame_at(output, 5.0) - frame_at(clip, 5.0)).mean() > 0.5
+    assert np.array_equal(frame_at(output, 9.0), frame_at(clip, 9.0))
+
+
+@needs_ffmpeg
+def test_mostly_captioned_video_falls_back_to_full_burn(tmp_path):
+    ffmpeg = FFmpegService()
+    clip = make_clip(tmp_path / "clip.mp4")
+    srt = tmp_path / "captions.srt"
+    srt.write_text("1\n00:00:00,000 --> 00:00:11,000\nTalking all the time\n")
+
+    async def render():
+        probe = await ProbeService(ffmpeg).probe(clip)
+        return await SmartRenderer(ffmpeg).render(clip, srt, [(0.0, 11.0)], tmp_path / "out.mp4", probe)
+
+    assert asyncio.run(render()) is None
+
+
+@needs_ffmpeg
+def test_interrupted_render_resumes_from_finished_segments(tmp_path):
+    ffmpeg = FFmpegService()
+    clip = make_clip(tmp_path / "clip.mp4")
+    srt = tmp_path / "captions.srt"
+    srt.write_text(
+        "1\n00:00:01,000 --> 00:00:01,500\nFirst\n\n"
+        "2\n00:00:08,500 --> 00:00:09,000\nSecond\n"
+    )
+    captions = [(1.0, 1.5), (8.5, 9.0)]
+    work_dir = tmp_path / "checkpoint" / "render"
+    work_dir.mkdir(parents=True)
+    commands = []
+    run_ffmpeg = ffmpeg._run_ffmpeg
+
+    async def recording_run(cmd):
+        kind = "split" if "segment" in cmd else "burn" if "libx264" in cmd else "other"
+        commands.append(kind)
+        if kind == "burn" and commands.count("burn") == 2 and interrupt:
+            # The server goes down while the second segment is being encoded
+            raise asyncio.CancelledError()
+        return await run_ffmpeg(cmd)
+
+    ffmpeg._run_ffmpeg = recording_run
+
+    async def render():
+        probe = await ProbeService(ffmpeg).probe(clip)
+        return await SmartRenderer(ffmpeg).render(
+            clip, srt, captions, tmp_path / "out.mp4", probe, work_dir=work_dir
+        )
+
+    interrupt = True
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(render())
+    assert len(list(work_dir.glob("burned_part_*.mkv"))) == 1
+
+    interrupt = False
+    commands.clear()
+    assert asyncio.run(render()) == tmp_path / "out.mp4"
+    # No second split, and only the unfinished segment is encoded again
+    assert commands.count("split") == 0
+    assert commands.count("burn") == 1
+
+
+@needs_ffmpeg
+def test_rotated_video_is_not_smart_rendered(tmp_path):
+    ffmpeg = FFmpegService()
+    clip = rotate_clip(make_clip(tmp_path / "clip.mp4"), tmp_path / "rotated.mp4")
+    srt = tmp_path / "captions.srt"
+    srt.write_text("1\n00:00:04,500 --> 00:00:05,500\nHello there\n")
+
+    async def render():
+        probe = await ProbeService(ffmpeg).probe(clip)
+        return probe, await SmartRenderer(ffmpeg).render(clip, srt, [(4.5, 5.5)], tmp_path / "out.mp4", probe)
+
+    probe, result = asyncio.run(render())
+
+    assert probe.rotation == 90
+    assert result is None
+
+
+@needs_ffmpeg
+def test_video_without_audio_is_smart_rendered(tmp_path):
+    ffmpeg = FFmpegService()
+    clip = make_clip(tmp_path / "clip.mp4", audio=False)
+    srt = tmp_path / "captions.srt"
+    srt.write_text("1\n00:00:04,500 --> 00:00:05,500\nHello there\n")
+    output = tmp_path / "out.mp4"
+
+    async def render():
+        # Not validated: transcription rejects silent inputs, the renderer must not
+        probe = await ProbeService(ffmpeg)._run_probe(clip, "silent")
+        return await SmartRenderer(ffmpeg).render(clip, srt, [(4.5, 5.5)], output, probe)
+
+    assert asyncio.run(render()) == output
+
+
+@needs_ffmpeg
+def test_output_with_another_frame_size_fails_validation(tmp_path):
+    ffmpeg = FFmpegService()
+    clip = make_clip(tmp_path / "clip.mp4")
+
+    async def validate():
+        probe = await ProbeService(ffmpeg).probe(clip)
+        renderer = SmartRenderer(ffmpeg)
+        portrait = probe.copy(update={"width": HEIGHT, "height": WIDTH})
+        return await renderer._validate(clip, clip, probe), await renderer._validate(clip, clip, portrait)
+
+    assert asyncio.run(validate()) == (True, False)
@@ -0,0 +1,181 @@
+import asyncio
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.models.probe import VideoProbe
+from src.caption_generator.models.subtitle import TranscriptSegment
+from src.caption_generator.services.ffmpeg_service import FFmpegService
+from src.caption_generator.services.probe_service import _parse_rotation
+from src.caption_generator.services import subtitle_overlay
+from src.caption_generator.services.subtitle_overlay import SubtitleOverlayCache, _unblend
+from src.caption_generator.services.video_service import VideoProcessingService
+from src.caption_generator.services.whisperx_service import WhisperXService
+from src.caption_generator.utils.caption_timeline import CaptionTimeline
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg not installed")
+
+CAPTIONS = [
+    TranscriptSegment(start=0.5, end=1.5, text="Hello there"),
+    TranscriptSegment(start=2.0, end=3.2, text="Second caption\nline two"),
+]
+
+
+def test_alpha_is_recovered_from_black_and_white_renders():
+    color = np.array([[[255, 255, 0], [10, 20, 30], [0, 0, 0]]], dtype=float)
+    alpha = np.array([[255, 128, 0]], dtype=float)[..., None]
+    on_black = (color * alpha / 255).round().astype(np.uint8)
+    on_white = (color * alpha / 255 + 255 * (1 - alpha / 255)).round().astype(np.uint8)
+
+    rgba = _unblend(on_black, on_white)
+
+    assert rgba[..., 3].tolist() == [[255, 128, 0]]
+    assert np.abs(rgba[0, :2, :3].astype(int) - color[0, :2]).max() <= 2
+
+
+def test_frame_size_follows_rotation_and_scaling():
+    probe = VideoProbe(
+        fingerprint="x", duration=1, size=1, has_video=True, has_audio=True, width=1920, height=1080
+    )
+
+    assert VideoProcessingService._frame_size(probe) == (1920, 1080)
+    assert VideoProcessingService._frame_size(probe, 480) == (854, 480)
+    assert VideoProcessingService._frame_size(probe.copy(update={"rotation": 90}), 640) == (360, 640)
+    assert VideoProcessingService._frame_size(None) is None
+    assert _parse_rotation({"side_data_list": [{"rotation": -90}]}) == 270
+    assert _parse_rotation({"tags": {"rotate": "180"}}) == 180 and _parse_rotation({}) == 0
+
+
+def write_srt(path):
+    path.write_text(WhisperXService().create_srt_content(CAPTIONS))
+    return path
+
+
+def decode(path, width, height):
+    raw = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", str(path), "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+        capture_output=True, check=True
+    ).stdout
+    return np.frombuffer(raw, np.uint8).reshape(-1, height, width, 3).astype(int)
+
+
+@needs_ffmpeg
+def test_overlay_burn_matches_libass_and_is_rendered_once(tmp_path):
+    ffmpeg = FFmpegService()
+    cache = SubtitleOverlayCache(ffmpeg, tmp_path / "overlays")
+    srt_path = write_srt(tmp_path / "captions.srt")
+    video_path = tmp_path / "input.mp4"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc2=s=320x240:r=10:d=4",
+         "-f", "lavfi", "-i", "sine=d=4", "-c:v", "libx264", "-crf", "0", "-c:a", "aac", "-shortest",
+         str(video_path)],
+        check=True
+    )
+    style = dict(font_size=24, font_color="yellow", position="bottom")
+
+    async def scenario():
+        overlay = await cache.acquire(srt_path, CaptionTimeline(CAPTIONS), width=320, height=240, **style)
+        again = await cache.acquire(srt_path, CaptionTimeline(CAPTIONS), width=320, height=240, **style)
+        for output, track in (("libass.mp4", None), ("overlay.mp4", overlay)):
+            await ffmpeg.burn_subtitles(
+                video_path, srt_path, tmp_path / output, preset="ultrafast", crf=0, overlay=track, **style
+            )
+        return overlay, again
+
+    overlay, again = asyncio.run(scenario())
+
+    assert again == overlay and (cache.renders, cache.hits) == (1, 1)
+    # Only the rows captions touch are stored, at the bottom of the frame
+    assert overlay.band_height < 80 and overlay.y + overlay.band_height <= 240 and overlay.y > 120
+
+    libass, composited = decode(tmp_path / "libass.mp4", 320, 240), decode(tmp_path / "overlay.mp4", 320, 240)
+    assert len(libass) == len(composited) == 40
+    difference = np.abs(libass - composited).reshape(40, -1)
+    captioned = [index for index in range(40) if np.abs(libass[index] - decode(video_path, 320, 240)[index]).max()]
+    # Captions appear and disappear on the same frames (5-14 and 20-31), with the same pixels
+    # up to chroma rounding at glyph edges
+    assert captioned == list(range(5, 15)) + list(range(20, 32))
+    assert all(difference[index].max() == 0 for index in range(40) if index not in captioned)
+    assert difference.mean() < 0.1
+
+
+@needs_ffmpeg
+def test_least_recently_used_tracks_are_evicted_unless_in_use(tmp_path):
+    cache = SubtitleOverlayCache(FFmpegService(), tmp_path / "overlays", max_entries=1)
+    srt_path = write_srt(tmp_path / "captions.srt")
+    timeline = CaptionTimeline(CAPTIONS)
+
+    async def scenario():
+        first = await cache.acquire(srt_path, timeline, 24, "white", "top", 160, 120)
+        second = await cache.acquire(srt_path, timeline, 24, "white", "bottom", 160, 120)
+        # In use: kept over the limit
+        kept = first.concat_path.exists()
+        cache.release(first)
+        cache.release(second)
+        third = await cache.acquire(srt_path, timeline, 24, "red", "top", 160, 120)
+        return first, second, third, kept
+
+    first, second, third, kept = asyncio.run(scenario())
+
+    assert kept
+    assert third.concat_path.exists()
+    assert not first.concat_path.exists() and not second.concat_path.exists()
+    assert not [path for path in (tmp_path / "overlays").iterdir() if path.name.startswith(".")]
+
+
+class GatedRenderer:
+    """Stands in for FFmpeg's caption render: waits for ``gate``, then fails if ``error`` is set"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.error = None
+
+    async def render_caption_pairs(self, srt_path, output_pattern, captions, *args):
+        await self.gate.wait()
+        if self.error:
+            raise RuntimeError(self.error)
+
+
+def fake_track(work_dir, captions, width, height):
+    (work_dir / "captions.ffconcat").write_text("ffconcat version 1.0\n")
+    return dict(width=width, height=height, y=0, band_height=height, captions=len(captions))
+
+
+def test_tracks_being_acquired_are_not_evicted_by_concurrent_renders(tmp_path, monkeypatch):
+    monkeypatch.setattr(subtitle_overlay, "_build_track", fake_track)
+    renderer = GatedRenderer()
+    cache = SubtitleOverlayCache(renderer, tmp_path / "overlays", max_entries=1)
+    srt_path = write_srt(tmp_path / "captions.srt")
+    timeline = CaptionTimeline(CAPTIONS)
+
+    async def scenario():
+        acquiring = [
+            asyncio.ensure_future(cache.acquire(srt_path, timeline, 24, "white", position, 160, 120))
+            for position in ("top", "bottom")
+        ]
+        await asyncio.sleep(0.01)
+        # Marked in use while still rendering
+        waiting = dict(cache._in_use)
+        renderer.gate.set()
+        tracks = await asyncio.gather(*acquiring)
+        # Both kept over the limit until released
+        kept = [track.concat_path.exists() for track in tracks]
+        for track in tracks:
+            cache.release(track)
+        renderer.error = "Render failed"
+        with pytest.raises(RuntimeError):
+            await cache.acquire(srt_path, timeline, 24, "red", "top", 160, 120)
+        return waiting, kept
+
+    waiting, kept = asyncio.run(scenario())
+
+    assert sorted(waiting.values()) == [1, 1]
+    assert kept == [True, True]
+    assert cache._in_use == {}
@@ -0,0 +1,105 @@
+import importlib
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.services.transcript_store import TranscriptStore, fts5_available
+
+pytestmark = pytest.mark.skipif(not fts5_available(), reason="SQLite built without FTS5")
+
+
+def aligned(text, start, step=0.5):
+    words = [
+        {"word": word, "start": start + i * step, "end": start + i * step + 0.4}
+        for i, word in enumerate(text.split())
+    ]
+    return {"start": start, "end": words[-1]["end"], "text": text, "words": words}
+
+
+TALK = {
+    "language": "en",
+    "segments": [
+        aligned("Welcome back to the show, everyone.", 1.0),
+        aligned("Today we look at the history of machine learning.", 10.0),
+    ],
+}
+INTERVIEW = {
+    "language": "en",
+    "segments": [
+        # No word timings: indexed at segment level
+        {"start": 3.0, "end": 8.0, "text": "Machine learning changed everything for us"},
+    ],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TranscriptStore(tmp_path / "transcripts.sqlite3", chunk_words=8)
+    store.add("talk.mp4", TALK, video_url="/download/talk.mp4", job_id="job-1")
+    store.add("interview.mp4", INTERVIEW, video_url="/download/interview.mp4")
+    yield store
+    store.close()
+
+
+def test_phrase_hits_carry_video_and_word_time(store):
+    hits = {hit.video_id: hit for hit in store.search("Machine Learning")}
+
+    assert set(hits) == {"talk.mp4", "interview.mp4"}
+    # "machine" is the 8th word of the second segment, "learning" the 9th (across the chunk boundary)
+    assert hits["talk.mp4"].time == pytest.approx(13.5)
+    assert hits["talk.mp4"].job_id == "job-1"
+    assert "[machine learning]" in hits["talk.mp4"].snippet.lower()
+    assert hits["interview.mp4"].time == 3.0
+
+
+def test_words_must_appear_as_a_phrase(store):
+    assert [hit.video_id for hit in store.search("show everyone")] == ["talk.mp4"]
+    assert store.search("learning machine") == []
+    with pytest.raises(ValueError):
+        store.search("?!")
+
+
+def test_pages_do_not_repeat_or_skip_hits_in_passage_overlaps(store):
+    # "red fox" every 6 words: each occurrence is in the overlap of two 8-word passages
+    words = [f"word{i}" for i in range(30)]
+    for position in (6, 12, 18, 24):
+        words[position:position + 2] = ["red", "fox"]
+    store.add("foxes.mp4", {"language": "en", "segments": [aligned(" ".join(words), 0.0)]})
+
+    everything = store.search("red fox", limit=100)
+    pages = [store.search("red fox", limit=2, offset=offset) for offset in (0, 2, 4)]
+
+    assert sorted(hit.time for hit in everything) == [3.0, 6.0, 9.0, 12.0]
+    assert [len(page) for page in pages] == [2, 2, 0]
+    assert [hit.time for page in pages for hit in page] == [hit.time for hit in everything]
+
+
+def test_reindexing_replaces_and_remove_drops(store):
+    store.add("talk.mp4", {"language": "en", "segments": [aligned("Completely new words", 0.0)]})
+
+    assert [hit.video_id for hit in store.search("machine learning")] == ["interview.mp4"]
+    assert store.search("new words")[0].video_id == "talk.mp4"
+    assert store.video_count() == 2
+
+    assert store.remove("interview.mp4")
+    assert store.search("machine learning") == []
+    assert store.video_count() == 1
+
+
+def test_search_endpoint(store):
+    app_module = importlib.import_module("src.caption_generator.api.app")
+    app_module.video_service.transcript_store = store
+    client = TestClient(app_module.app)
+
+    response = client.get("/search", params={"q": "history of machine"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["indexed_videos"] == 2
+    assert [hit["video_url"] for hit in body["hits"]] == ["/download/talk.mp4"]
+
+    assert client.get("/search", params={"q": "..."}).status_code == 400
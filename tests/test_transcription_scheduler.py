@@ -0,0 +1,154 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import our modules
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.caption_generator.services.transcription_scheduler import MicroBatcher
+
+
+class RecordingModel:
+    """Fake batched model: upper-cases items and records each batch"""
+
+    def __init__(self, delay=0.0, fail_on=None):
+        self.batches = []
+        self.delay = delay
+        self.fail_on = fail_on
+
+    def __call__(self, key, items):
+        self.batches.append((key, list(items)))
+        if self.fail_on in items:
+            raise RuntimeError("model exploded")
+        time.sleep(self.delay)
+        return [f"{key}:{item.upper()}" for item in items]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_requests_share_one_batch():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit("en", ["a", "b"]),
+            batcher.submit("en", ["c"]),
+            batcher.submit("en", ["d", "e", "f"]),
+        )
+
+    results = run(main())
+
+    assert results == [["en:A", "en:B"], ["en:C"], ["en:D", "en:E", "en:F"]]
+    assert model.batches == [("en", ["a", "b", "c", "d", "e", "f"])]
+    assert batcher.stats.batches == 1
+    assert batcher.stats.average_batch_size == 6
+
+
+def test_full_batch_is_dispatched_without_waiting():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=2, max_wait_ms=10_000)
+
+    async def main():
+        return await asyncio.wait_for(batcher.submit("en", ["a", "b"]), timeout=2)
+
+    assert run(main()) == ["en:A", "en:B"]
+
+
+def test_large_request_is_split_and_reassembled_in_order():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=3, max_wait_ms=1)
+    items = [chr(ord("a") + i) for i in range(7)]
+
+    result = run(batcher.submit("en", items))
+
+    assert result == [f"en:{item.upper()}" for item in items]
+    assert [len(batch) for _, batch in model.batches] == [3, 3, 1]
+
+
+def test_keys_are_batched_separately():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=20)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit("en", ["a"]),
+            batcher.submit("de", ["b"]),
+            batcher.submit("en", ["c"]),
+        )
+
+    assert run(main()) == [["en:A"], ["de:B"], ["en:C"]]
+    assert sorted(model.batches) == [("de", ["b"]), ("en", ["a", "c"])]
+
+
+def test_max_wait_bounds_latency():
+    batcher = MicroBatcher(RecordingModel(), max_batch_size=64, max_wait_ms=20)
+
+    async def main():
+        start = time.monotonic()
+        await batcher.submit("en", ["a"])
+        return time.monotonic() - start
+
+    assert run(main()) < 0.5
+
+
+def test_batch_failure_reaches_every_caller_in_it():
+    batcher = MicroBatcher(RecordingModel(fail_on="boom"), max_batch_size=8, max_wait_ms=20)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit("en", ["boom"]),
+            batcher.submit("en", ["fine"]),
+            return_exceptions=True
+        )
+
+    results = run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    # The scheduler keeps working after a failed batch
+    async def again():
+        return await batcher.submit("en", ["ok"])
+
+    assert run(again()) == ["en:OK"]
+
+
+def test_cancelled_request_stops_at_the_next_batch():
+    model = RecordingModel(delay=0.05)
+    batcher = MicroBatcher(model, max_batch_size=2, max_wait_ms=0)
+
+    async def main():
+        long_clip = asyncio.create_task(batcher.submit("en", ["a", "b", "c", "d", "e", "f"]))
+        await asyncio.sleep(0.02)  # first batch is running
+        long_clip.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await long_clip
+        # Other requests still go through
+        return await batcher.submit("en", ["x"])
+
+    assert run(main()) == ["en:X"]
+    assert model.batches == [("en", ["a", "b"]), ("en", ["x"])]
+    assert batcher.stats.cancelled_items == 4
+
+
+def test_cancelling_every_waiting_request_keeps_the_scheduler_running():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        waiting = asyncio.create_task(batcher.submit("en", ["a"]))
+        await asyncio.sleep(0.01)  # the scheduler is waiting for the batch to fill
+        waiting.cancel()
+        await asyncio.sleep(0.06)
+        return await batcher.submit("en", ["b"])
+
+    assert run(main()) == ["en:B"]
+    assert model.batches == [("en", ["b"])]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])